@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+"""
+Offline Benchmark Suite
+=======================
+
+Headless benchmark of the face security hot paths. No webcam, desktop
+session or registered owner is needed - frames come from test_frame.jpg,
+recorded clips and the synthetic frame source, owner galleries are
+generated.
+
+Benchmarks:
+1. MediaPipeFaceSecuritySystem.detect_faces
+2. MediaPipeFaceSecuritySystem.extract_face_features
+3. MediaPipeFaceSecuritySystem.compare_faces (per pair) and match_faces (batched,
+   raw vectors and pose_pca descriptors)
+4. FaceSecuritySystem.detect_faces
+5. create_blurred_background of both backends
+6. Blur engine tiers vs the former PIL blur pipeline (lock-path cost per
+   resolution, no backend needed), and one vs three monitors blurred
+   serially and on the engine's thread pool
+7. face_recognition detection + encoding in 1..N inference worker processes
+   (throughput scaling across cores)
+
+Backends whose dependencies are missing on this machine are reported as
+skipped. Results (latency percentiles and throughput per benchmark, input,
+resolution and face count) are written as JSON so commits can be compared.
+
+Usage:
+    python benchmark.py
+    python benchmark.py --resolutions 640x480,1280x720 --faces 0,1,3 --iterations 50
+    python benchmark.py --video clip.mp4 --output benchmark_results.json
+    python benchmark.py --benchmarks workers --workers 1,2,4,8
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import cv2
+import numpy as np
+from PIL import Image, ImageFilter
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from frame_sources import SyntheticSource, VideoFileSource
+from perf_stats import StageTimer
+from blur_engine import BLUR_TIERS, BlurEngine
+from screen_capture import FakeScreenCapture
+
+DEFAULT_RESOLUTIONS = '640x480,1280x720,1920x1080'
+DEFAULT_FACES = '0,1,2,4'
+TEST_FRAME = 'test_frame.jpg'
+
+
+def parse_resolutions(text):
+    """'640x480,1280x720' -> [(640, 480), (1280, 720)]"""
+    resolutions = []
+    for item in text.split(','):
+        width, height = item.lower().strip().split('x')
+        resolutions.append((int(width), int(height)))
+    return resolutions
+
+
+def load_backend(name):
+    """Instantiate a backend, returns (system, None) or (None, reason it is unavailable)"""
+    try:
+        if name == 'mediapipe':
+            from mediapipe_face_security import MediaPipeFaceSecuritySystem
+            return MediaPipeFaceSecuritySystem(), None
+        from face_security_system import FaceSecuritySystem
+        return FaceSecuritySystem(), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+def load_frame_sets(resolutions, face_counts, video_paths, frames_per_input):
+    """Benchmark inputs as dicts with input name, resolution, face count and frames"""
+    test_frame = cv2.imread(TEST_FRAME)
+    frame_sets = []
+
+    for width, height in resolutions:
+        resolution = f"{width}x{height}"
+
+        if test_frame is not None:
+            frame = cv2.resize(test_frame, (width, height), interpolation=cv2.INTER_AREA)
+            frame_sets.append({'input': 'test_frame', 'resolution': resolution, 'faces': None, 'frames': [frame]})
+
+        for face_count in face_counts:
+            source = SyntheticSource(width, height, pacing='fast', face_count=face_count,
+                                     face_image=test_frame, max_frames=frames_per_input)
+            source.open()
+            frames = []
+            while True:
+                ret, frame = source.read()
+                if not ret:
+                    break
+                frames.append(frame)
+            source.release()
+            frame_sets.append({'input': 'synthetic', 'resolution': resolution, 'faces': face_count, 'frames': frames})
+
+        for path in video_paths:
+            source = VideoFileSource(path, pacing='fast', loop=False)
+            if not source.open():
+                continue
+            frames = []
+            while len(frames) < frames_per_input:
+                ret, frame = source.read()
+                if not ret:
+                    break
+                frames.append(cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA))
+            source.release()
+            if frames:
+                frame_sets.append({'input': f"video:{os.path.basename(path)}", 'resolution': resolution,
+                                   'faces': None, 'frames': frames})
+
+    return frame_sets
+
+
+def time_call(func, inputs, iterations, warmup):
+    """Call func over the inputs (cycled) and return latency percentiles and throughput"""
+    for i in range(warmup):
+        func(inputs[i % len(inputs)])
+
+    timer = StageTimer(enabled=True, window=iterations)
+    started = time.perf_counter()
+    for i in range(iterations):
+        with timer.stage('call'):
+            func(inputs[i % len(inputs)])
+    elapsed = time.perf_counter() - started
+
+    latency = timer.summary()['call']
+    return {
+        'iterations': iterations,
+        'latency_ms': {key[:-3]: round(value, 4) for key, value in latency.items() if key.endswith('_ms')},
+        'throughput_fps': round(iterations / elapsed, 3) if elapsed > 0 else 0.0,
+    }
+
+
+def owner_landmark_gallery(rng, size):
+    """Landmark-like owner feature vectors (478 points x 3 coordinates)"""
+    base = rng.uniform(0.2, 0.8, 1434)
+    return [np.clip(base + rng.normal(0, 0.01, base.shape), 0, 1) for _ in range(size)]
+
+
+def owner_encoding_gallery(rng, size):
+    """face_recognition-like 128-d owner encodings"""
+    base = rng.normal(0, 0.1, 128)
+    return [base + rng.normal(0, 0.01, 128) for _ in range(size)]
+
+
+class BenchmarkRunner:
+    def __init__(self, iterations=30, warmup=3, gallery_size=20, seed=0):
+        self.iterations = iterations
+        self.warmup = warmup
+        self.gallery_size = gallery_size
+        self.rng = np.random.default_rng(seed)
+        self.results = []
+        self.skipped = []
+
+    def run(self, name, func, inputs, input_name, resolution=None, faces=None):
+        """Time one benchmark case and record the result"""
+        label = f"{name} [{input_name} {resolution or ''} faces={faces}]"
+        try:
+            result = time_call(func, inputs, self.iterations, self.warmup)
+        except Exception as e:
+            self.skipped.append({'name': name, 'input': input_name, 'reason': f"{type(e).__name__}: {e}"})
+            print(f"❌ {label}: {e}")
+            return None
+
+        result.update({'name': name, 'input': input_name, 'resolution': resolution, 'faces': faces})
+        self.results.append(result)
+        latency = result['latency_ms']
+        print(f"✅ {label}: p50 {latency['p50']:.2f} ms | p95 {latency['p95']:.2f} ms | "
+              f"{result['throughput_fps']:.1f} calls/s")
+        return result
+
+    def skip(self, name, reason):
+        self.skipped.append({'name': name, 'reason': reason})
+        print(f"⏭️  {name} skipped: {reason}")
+
+    def run_mediapipe(self, frame_sets):
+        system, reason = load_backend('mediapipe')
+        names = ('mediapipe.detect_faces', 'mediapipe.extract_face_features', 'mediapipe.compare_faces',
+                 'mediapipe.match_faces', 'mediapipe.match_faces_pose_pca')
+        if system is None:
+            for name in names:
+                self.skip(name, reason)
+            return None
+
+        system.owner_face_features = owner_landmark_gallery(self.rng, self.gallery_size)
+        system.update_owner_matcher()
+
+        for frame_set in frame_sets:
+            case = (frame_set['input'], frame_set['resolution'], frame_set['faces'])
+            self.run('mediapipe.detect_faces', system.detect_faces, frame_set['frames'], *case)
+            self.run('mediapipe.extract_face_features', system.extract_face_features, frame_set['frames'], *case)
+
+        # Matching is independent of the frame - one face against the whole owner gallery
+        faces = owner_landmark_gallery(self.rng, 8)
+        owner = system.owner_face_features
+        self.run('mediapipe.compare_faces',
+                 lambda face: [system.compare_faces(face, sample) for sample in owner],
+                 faces, 'landmarks', faces=1)
+        self.run('mediapipe.match_faces', lambda face: system.match_faces([face]), faces, 'landmarks', faces=1)
+
+        # Same faces through the compact pose-normalized descriptor (descriptor + template matching)
+        system.fit_descriptor(owner)
+        system.update_owner_matcher()
+        self.run('mediapipe.match_faces_pose_pca', lambda face: system.match_faces([face]), faces, 'landmarks', faces=1)
+        system.descriptor = None
+        system.update_owner_matcher()
+        return system
+
+    def run_face_recognition(self, frame_sets):
+        system, reason = load_backend('face_recognition')
+        if system is None:
+            self.skip('face_recognition.detect_faces', reason)
+            return None
+
+        system.owner_face_encodings = owner_encoding_gallery(self.rng, self.gallery_size)
+        system.update_owner_matcher()
+
+        for frame_set in frame_sets:
+            case = (frame_set['input'], frame_set['resolution'], frame_set['faces'])
+            self.run('face_recognition.detect_faces', system.detect_faces, frame_set['frames'], *case)
+        return system
+
+    def run_worker_pool(self, frame_sets, worker_counts):
+        """Detection + encoding throughput of the shared-memory inference pool per worker count"""
+        from inference_pool import InferencePool
+        try:
+            import face_recognition  # noqa: F401
+        except Exception as e:
+            self.skip('face_recognition.worker_pool', f"{type(e).__name__}: {e}")
+            return
+
+        for workers in worker_counts:
+            pool = InferencePool(workers=workers).start()
+            try:
+                for frame_set in frame_sets:
+                    frames = frame_set['frames']
+                    for future in [pool.submit(frames[i % len(frames)]) for i in range(self.warmup + workers)]:
+                        future.result()
+
+                    started = time.perf_counter()
+                    futures = [pool.submit(frames[i % len(frames)]) for i in range(self.iterations)]
+                    for future in futures:
+                        future.result()
+                    elapsed = time.perf_counter() - started
+                    worker_ms = np.array([future.worker_time for future in futures]) * 1000
+
+                    p50, p95, p99 = np.percentile(worker_ms, (50, 95, 99))
+                    result = {'name': 'face_recognition.worker_pool', 'input': frame_set['input'],
+                              'resolution': frame_set['resolution'], 'faces': frame_set['faces'], 'workers': workers,
+                              'iterations': self.iterations,
+                              'latency_ms': {'mean': round(float(worker_ms.mean()), 4), 'p50': round(float(p50), 4),
+                                             'p95': round(float(p95), 4), 'p99': round(float(p99), 4),
+                                             'max': round(float(worker_ms.max()), 4)},
+                              'throughput_fps': round(self.iterations / elapsed, 3) if elapsed > 0 else 0.0}
+                    self.results.append(result)
+                    print(f"✅ face_recognition.worker_pool [{frame_set['input']} {frame_set['resolution']} "
+                          f"faces={frame_set['faces']} workers={workers}]: {result['throughput_fps']:.1f} frames/s")
+            finally:
+                pool.close()
+
+    def run_blur(self, systems, resolutions):
+        test_frame = cv2.imread(TEST_FRAME)
+        for backend, system in systems.items():
+            name = f"{backend}.create_blurred_background"
+            if system is None:
+                self.skip(name, 'backend unavailable')
+                continue
+            for width, height in resolutions:
+                screen = cv2.resize(test_frame, (width, height), interpolation=cv2.INTER_LINEAR)
+                screen_image = Image.fromarray(cv2.cvtColor(screen, cv2.COLOR_BGR2RGB))
+                self.run(name, system.create_blurred_background, [screen_image], 'screen', f"{width}x{height}")
+
+        # Lock-path blur cost per resolution: former PIL pipeline vs the engine tiers
+        for width, height in resolutions:
+            screen = cv2.cvtColor(cv2.resize(test_frame, (width, height), interpolation=cv2.INTER_LINEAR),
+                                  cv2.COLOR_BGR2RGB)
+            screen_image = Image.fromarray(screen)
+            self.run('blur.pil_reference', pil_reference_blur, [screen_image], 'screen', f"{width}x{height}")
+            for quality in BLUR_TIERS:
+                self.run(f"blur.engine_{quality}", BlurEngine(quality).blur, [screen], 'screen', f"{width}x{height}")
+
+        # Multi-monitor lock path: one desktop grab, every monitor blurred (serially vs on the pool)
+        engine = BlurEngine('balanced')
+        for width, height in resolutions:
+            screen = cv2.cvtColor(cv2.resize(test_frame, (width, height), interpolation=cv2.INTER_LINEAR),
+                                  cv2.COLOR_BGR2RGB)
+            single = FakeScreenCapture(screen)
+            triple = FakeScreenCapture(np.hstack([screen] * 3), monitors=[(i * width, 0, width, height) for i in range(3)])
+            self.run('blur.monitors_1', lambda capture: blur_monitors(capture, engine), [single], 'screen', f"{width}x{height}")
+            self.run('blur.monitors_3_serial', lambda capture: blur_monitors(capture, engine, parallel=False),
+                     [triple], 'screen', f"3x{width}x{height}")
+            self.run('blur.monitors_3_parallel', lambda capture: blur_monitors(capture, engine),
+                     [triple], 'screen', f"3x{width}x{height}")
+        engine.close()
+
+
+def blur_monitors(capture, engine, parallel=True):
+    """Grab all monitors of a capture and blur each to its own size, as the lock path does"""
+    blur = lambda view: engine.blur(view, conversion=cv2.COLOR_BGRA2RGB)
+    with capture.lock:
+        views = [view for _, view in capture.grab_monitors()]
+        return engine.map(blur, views) if parallel else [blur(view) for view in views]
+
+
+def pil_reference_blur(screen_image, blur_intensity=15, quality_reduction=4, overlay_darkness=100):
+    """The former create_blurred_background pipeline, kept as the blur engine baseline"""
+    small_size = (screen_image.width // quality_reduction, screen_image.height // quality_reduction)
+    blurred = screen_image.resize(small_size, Image.Resampling.LANCZOS)
+    blurred = blurred.filter(ImageFilter.GaussianBlur(radius=blur_intensity))
+    blurred = blurred.filter(ImageFilter.GaussianBlur(radius=blur_intensity // 2))
+    blurred = blurred.resize(screen_image.size, Image.Resampling.LANCZOS).convert('RGBA')
+    overlay = Image.new('RGBA', blurred.size, (0, 0, 0, overlay_darkness))
+    return Image.alpha_composite(blurred, overlay).convert('RGB')
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run_benchmarks(resolutions, face_counts, video_paths=(), iterations=30, warmup=3,
+                   frames_per_input=10, gallery_size=20, benchmarks=('mediapipe', 'face_recognition', 'blur'),
+                   worker_counts=(1, 2, 4)):
+    """Run the selected benchmark groups and return the JSON-ready report"""
+    runner = BenchmarkRunner(iterations, warmup, gallery_size)
+    frame_sets = load_frame_sets(resolutions, face_counts, video_paths, frames_per_input)
+
+    systems = {}
+    if 'mediapipe' in benchmarks:
+        print("\n🧪 MEDIAPIPE BACKEND")
+        print("=" * 50)
+        systems['mediapipe'] = runner.run_mediapipe(frame_sets)
+    if 'face_recognition' in benchmarks:
+        print("\n🧪 FACE_RECOGNITION BACKEND")
+        print("=" * 50)
+        systems['face_recognition'] = runner.run_face_recognition(frame_sets)
+    if 'blur' in benchmarks:
+        print("\n🧪 BLUR GENERATION")
+        print("=" * 50)
+        for backend in ('mediapipe', 'face_recognition'):
+            if backend not in systems:
+                systems[backend] = load_backend(backend)[0]
+        runner.run_blur(systems, resolutions)
+    if 'workers' in benchmarks:
+        print("\n🧪 INFERENCE WORKER POOL")
+        print("=" * 50)
+        runner.run_worker_pool(frame_sets, worker_counts)
+
+    return {
+        'meta': {
+            'timestamp': time.time(),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'opencv': cv2.__version__,
+            'iterations': iterations,
+            'warmup': warmup,
+            'gallery_size': gallery_size,
+        },
+        'results': runner.results,
+        'skipped': runner.skipped,
+    }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Headless benchmark of the face security hot paths")
+    parser.add_argument('--resolutions', default=DEFAULT_RESOLUTIONS, help="Comma separated WIDTHxHEIGHT list")
+    parser.add_argument('--faces', default=DEFAULT_FACES, help="Comma separated synthetic face counts")
+    parser.add_argument('--video', action='append', default=[], help="Recorded clip to include (repeatable)")
+    parser.add_argument('--iterations', type=int, default=30, help="Timed calls per benchmark case")
+    parser.add_argument('--warmup', type=int, default=3, help="Untimed calls before timing")
+    parser.add_argument('--frames', type=int, default=10, help="Frames per synthetic / video input")
+    parser.add_argument('--gallery-size', type=int, default=20, help="Owner samples in the generated gallery")
+    parser.add_argument('--benchmarks', default='mediapipe,face_recognition,blur',
+                        help="Comma separated groups: mediapipe, face_recognition, blur, workers")
+    parser.add_argument('--workers', default='1,2,4', help="Comma separated inference worker counts (workers group)")
+    parser.add_argument('--output', default='benchmark_results.json', help="JSON results file")
+    return parser
+
+
+def main(argv=None):
+    """Main benchmark function"""
+    args = build_parser().parse_args(argv)
+
+    print("⏱️  Face Security System - Offline Benchmark")
+    print("=" * 50)
+
+    report = run_benchmarks(parse_resolutions(args.resolutions),
+                            [int(count) for count in args.faces.split(',') if count.strip()],
+                            args.video, args.iterations, args.warmup, args.frames, args.gallery_size,
+                            [name.strip() for name in args.benchmarks.split(',')],
+                            [int(count) for count in args.workers.split(',') if count.strip()])
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+    print("\n" + "=" * 50)
+    print(f"Benchmark Results: {len(report['results'])} cases timed, {len(report['skipped'])} skipped")
+    print(f"Results written to {args.output}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Screen blur engine for Face Security System
+Blurs a captured screen as a NumPy array on the lock path:
+
+    area downscale -> blur at low resolution -> darken -> linear upscale
+
+Darkening is a single multiply on the small image instead of compositing
+a full-screen RGBA overlay. Because the upscale is linear, darkening
+before or after it gives the same picture.
+
+Quality tiers pick the working resolution and the blur kernel:
+    fast     - at most 480 px wide, three box passes (Gaussian approximation)
+    balanced - at most 960 px wide, separable Gaussian
+    quality  - BLUR_QUALITY_REDUCTION only, separable Gaussian (closest to
+               the former PIL LANCZOS + double GaussianBlur result)
+
+The blur strength is defined at full resolution, so every tier produces
+the same amount of blur and only the fidelity differs. A strong blur
+removes all detail finer than its sigma anyway, so fast and balanced
+also shrink the working image until the blur is only a few pixels wide
+there.
+
+Several monitors can be blurred side by side on a small thread pool
+(map()). OpenCV releases the GIL inside resize and blur, so the gain
+depends on the free cores: with one worker the monitors are blurred one
+after another (three 1080p screens took ~47 ms against ~11 ms for one on
+a single core), with a core per monitor they overlap.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+from PIL import Image
+
+# max_width: working image width limit, working_sigma: blur sigma (px) the working image is shrunk to
+BLUR_TIERS = {
+    'fast': {'max_width': 480, 'working_sigma': 2.0, 'kernel': 'box'},
+    'balanced': {'max_width': 960, 'working_sigma': 4.0, 'kernel': 'gaussian'},
+    'quality': {'max_width': None, 'working_sigma': None, 'kernel': 'gaussian'},
+}
+
+
+def box_size_for_sigma(sigma, passes=3):
+    """Odd box width whose repeated application approximates a Gaussian of this sigma"""
+    width = int(np.sqrt(12.0 * sigma * sigma / passes + 1.0))
+    return max(1, width if width % 2 else width + 1)
+
+
+class BlurEngine:
+    def __init__(self, quality='balanced', blur_intensity=15, quality_reduction=4, overlay_darkness=100,
+                 workers=0):
+        if quality not in BLUR_TIERS:
+            raise ValueError(f"Unknown blur quality '{quality}', expected one of {', '.join(BLUR_TIERS)}")
+        self.quality = quality
+        self.blur_intensity = blur_intensity        # Gaussian radius on the quality-reduced screen, as before
+        self.quality_reduction = max(1, quality_reduction)
+        self.overlay_darkness = overlay_darkness    # 0-255, alpha of the former black overlay
+        self.workers = workers                      # Thread pool size for map(), 0 = one per CPU (max 8)
+        self.pool = None
+        self.pool_lock = threading.Lock()
+
+        # Statistics
+        self.last_ms = 0.0
+        self.runs = 0
+
+    def working_size(self, width, height):
+        """Size of the low-resolution image the blur runs on"""
+        tier = BLUR_TIERS[self.quality]
+        scale = 1.0 / self.quality_reduction
+        if tier['max_width'] is not None:
+            scale = min(scale, tier['max_width'] / width)
+        sigma = self.full_resolution_sigma()
+        if tier['working_sigma'] is not None and sigma > 0:
+            scale = min(scale, tier['working_sigma'] / sigma)
+        return max(1, int(round(width * scale))), max(1, int(round(height * scale)))
+
+    def full_resolution_sigma(self):
+        """Blur strength in screen pixels (both former Gaussian passes combined)"""
+        radius = float(self.blur_intensity)
+        return np.hypot(radius, radius // 2) * self.quality_reduction
+
+    def blur_small(self, screen, conversion=None):
+        """Blurred and darkened screen at the working resolution, before the upscale
+
+        conversion: optional cv2.COLOR_* code applied after the downscale, where it is cheap
+        (e.g. cv2.COLOR_BGRA2RGB for a screen capture buffer)
+        """
+        screen = np.asarray(screen)
+        height, width = screen.shape[:2]
+
+        small_size = self.working_size(width, height)
+        small = cv2.resize(screen, small_size, interpolation=cv2.INTER_AREA)
+        if conversion is not None:
+            small = cv2.cvtColor(small, conversion)
+
+        sigma = self.full_resolution_sigma() * small_size[0] / width
+        if sigma > 0.3:
+            if BLUR_TIERS[self.quality]['kernel'] == 'box':
+                size = box_size_for_sigma(sigma)
+                for _ in range(3):
+                    small = cv2.blur(small, (size, size), borderType=cv2.BORDER_REFLECT)
+            else:
+                small = cv2.GaussianBlur(small, (0, 0), sigma, borderType=cv2.BORDER_REFLECT)
+
+        if self.overlay_darkness > 0:
+            # Same result as compositing black with this alpha, as one multiply
+            small = cv2.convertScaleAbs(small, alpha=1.0 - self.overlay_darkness / 255.0)
+        return small
+
+    def upscale(self, small, output_size):
+        """Linear upscale of a blur_small result to (width, height)"""
+        return cv2.resize(small, output_size, interpolation=cv2.INTER_LINEAR)
+
+    def blur(self, screen, output_size=None, conversion=None):
+        """Blurred and darkened copy of a screen array (H, W, 3) uint8, any channel order
+
+        output_size: (width, height) of the result, defaults to the input size
+        conversion: optional cv2.COLOR_* code, see blur_small
+        """
+        started = time.perf_counter()
+        screen = np.asarray(screen)
+        height, width = screen.shape[:2]
+        blurred = self.upscale(self.blur_small(screen, conversion), output_size or (width, height))
+
+        self.last_ms = (time.perf_counter() - started) * 1000
+        self.runs += 1
+        return blurred
+
+    def blur_image(self, screen_image):
+        """PIL in, PIL out - for callers that display through ImageTk"""
+        if screen_image.mode != 'RGB':
+            screen_image = screen_image.convert('RGB')
+        return Image.fromarray(self.blur(np.asarray(screen_image)))
+
+    def worker_count(self):
+        """Pool size: BLUR_WORKERS, or one per CPU core (at most 8) for 0"""
+        return self.workers or min(8, os.cpu_count() or 1)
+
+    def map(self, function, items):
+        """[function(item) for item in items], run on the worker pool when there is more than one
+
+        With a single worker a pool only adds hand-off overhead, so the items run in the caller.
+        """
+        items = list(items)
+        if len(items) < 2 or self.worker_count() < 2:
+            return [function(item) for item in items]
+        with self.pool_lock:
+            if self.pool is None:
+                self.pool = ThreadPoolExecutor(max_workers=self.worker_count(), thread_name_prefix="blur")
+        return list(self.pool.map(function, items))
+
+    def close(self):
+        """Shut the worker pool down (it is recreated on the next map)"""
+        with self.pool_lock:
+            if self.pool is not None:
+                self.pool.shutdown(wait=False)
+                self.pool = None
+
+    def get_stats(self):
+        return {'quality': self.quality, 'runs': self.runs, 'last_ms': self.last_ms}
@@ -0,0 +1,125 @@
+"""
+Threaded camera grabber for Face Security System
+Continuously drains the capture device on a background thread so the
+monitoring loop always works on the freshest frame instead of whatever
+has been sitting in the driver buffer
+
+With buffer_size 1 every read returns the newest frame. A larger buffer
+keeps up to that many unread frames and hands them out oldest first,
+which smooths over short analysis stalls at the cost of frame age.
+Frames pushed out of a full buffer are counted as dropped.
+"""
+
+import threading
+import time
+from collections import deque
+
+
+class LatestFrameGrabber:
+    def __init__(self, capture, buffer_size=1):
+        self.capture = capture
+        self.buffer = deque(maxlen=max(1, buffer_size))  # Unread frames, oldest first
+        self.condition = threading.Condition()
+        self.capture_thread = None
+        self.running = False
+        self.failed = False
+
+        # Statistics
+        self.frames_captured = 0
+        self.frames_consumed = 0
+        self.frames_dropped = 0
+        self.last_sequence = 0
+        self.last_frame_timestamp = None
+        self.last_frame_age = 0.0
+
+    def start(self):
+        """Start the capture thread"""
+        if self.running:
+            return self
+        self.running = True
+        self.capture_thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self.capture_thread.start()
+        return self
+
+    def _capture_loop(self):
+        """Read frames as fast as the device delivers them"""
+        while self.running:
+            ret, frame = self.capture.read()
+            timestamp = time.time()
+
+            with self.condition:
+                if not ret:
+                    self.failed = True
+                    self.condition.notify_all()
+                    break
+
+                self.frames_captured += 1
+                self.buffer.append((self.frames_captured, timestamp, frame))
+                self.condition.notify_all()
+
+    def read_latest(self, timeout=2.0):
+        """Wait for the oldest unread frame - the newest one with buffer_size 1
+
+        Returns (frame, timestamp), or (None, None) if the device stopped
+        delivering frames
+        """
+        deadline = time.time() + timeout
+        with self.condition:
+            while not self.buffer:
+                remaining = deadline - time.time()
+                if self.failed or not self.running or remaining <= 0:
+                    return None, None
+                self.condition.wait(remaining)
+
+            sequence, timestamp, frame = self.buffer.popleft()
+            # Every frame pushed out of the buffer unread was never analysed
+            self.frames_dropped += sequence - self.last_sequence - 1
+            self.last_sequence = sequence
+
+        self.frames_consumed += 1
+        self.last_frame_timestamp = timestamp
+        self.last_frame_age = time.time() - timestamp
+        return frame, timestamp
+
+    def read(self):
+        """cv2.VideoCapture compatible read, see read_latest"""
+        frame, _ = self.read_latest()
+        return frame is not None, frame
+
+    def frame_age(self, now=None):
+        """Seconds since the last returned frame was captured"""
+        if self.last_frame_timestamp is None:
+            return 0.0
+        return (now if now is not None else time.time()) - self.last_frame_timestamp
+
+    def get_stats(self):
+        """Capture statistics for display and logging"""
+        return {
+            'frames_captured': self.frames_captured,
+            'frames_consumed': self.frames_consumed,
+            'frames_dropped': self.frames_dropped,
+            'drop_ratio': self.frames_dropped / self.frames_captured if self.frames_captured else 0.0,
+            'last_frame_age_ms': self.last_frame_age * 1000,
+        }
+
+    def isOpened(self):
+        return self.capture.isOpened() and not self.failed
+
+    def set(self, prop_id, value):
+        return self.capture.set(prop_id, value)
+
+    def get(self, prop_id):
+        return self.capture.get(prop_id)
+
+    def stop(self):
+        """Stop the capture thread"""
+        self.running = False
+        with self.condition:
+            self.condition.notify_all()
+        if self.capture_thread and self.capture_thread.is_alive():
+            self.capture_thread.join(timeout=2.0)
+
+    def release(self):
+        """Stop capturing and release the underlying device"""
+        self.stop()
+        self.capture.release()
@@ -26,7 +26,13 @@ class Config:
             'CAMERA_INDEX': '0',
             'CAMERA_WIDTH': '640',
             'CAMERA_HEIGHT': '480',
-            'CAMERA_FPS': '30'
+            'CAMERA_FPS': '30',
+            'THREADED_CAPTURE': 'True',
+            'CAPTURE_BUFFER_SIZE': '1',
+            'SOURCE_TYPE': 'camera',
+            'SOURCE_PATH': '',
+            'SOURCE_PACING': 'realtime',
+            'SOURCE_LOOP': 'True'
         }
         
         self.config['Display'] = {
@@ -48,14 +54,95 @@ class Config:
         
         self.config['Performance'] = {
             'PROCESSING_DELAY': '0.1',
-            'DETECTION_INTERVAL': '1.0'
+            'DETECTION_INTERVAL': '1.0',
+            'ADAPTIVE_DETECTION': 'True',
+            'STABLE_PERIOD': '3.0',
+            'FACE_COUNT_PROBE': 'True',
+            'ENABLE_STAGE_TIMING': 'False',
+            'SHOW_STAGE_TIMING': 'True',
+            'STAGE_TIMING_WINDOW': '300',
+            'STAGE_TIMING_FILE': 'stage_timings.json',
+            'PIPELINE_MODE': 'serial',
+            'PIPELINE_QUEUE_SIZE': '2',
+            'INFERENCE_WORKERS': '0'
         }
         
         self.config['Blur_Effect'] = {
             'ENABLE_SCREEN_BLUR': 'True',
             'BLUR_INTENSITY': '15',
             'BLUR_QUALITY_REDUCTION': '4',
-            'BLUR_OVERLAY_DARKNESS': '100'
+            'BLUR_OVERLAY_DARKNESS': '100',
+            'BLUR_QUALITY': 'balanced',
+            'BLUR_WORKERS': '0'
+        }
+        
+        self.config['Motion_Gate'] = {
+            'ENABLE_MOTION_GATE': 'True',
+            'MOTION_THRESHOLD': '25',
+            'MOTION_MIN_AREA': '0.01',
+            'MOTION_REGION': '0.0, 0.0, 1.0, 1.0',
+            'MOTION_MAX_REUSE': '5.0'
+        }
+        
+        self.config['Tracking'] = {
+            'ENABLE_TRACKING': 'True',
+            'TRACK_IOU_THRESHOLD': '0.3',
+            'TRACK_MAX_MISSED': '5',
+            'REVERIFY_INTERVAL': '2.0'
+        }
+        
+        self.config['Descriptor'] = {
+            'DESCRIPTOR_MODE': 'raw',
+            'DESCRIPTOR_COMPONENTS': '32',
+            'DESCRIPTOR_SCALE': '0.08'
+        }
+        
+        self.config['Template_Index'] = {
+            'ENABLE_POSE_INDEX': 'True',
+            'POSE_BIN_SIZE': '15.0',
+            'POSE_NEIGHBOUR_BINS': '1',
+            'POSE_INDEX_MIN_TEMPLATES': '20'
+        }
+        
+        self.config['Authorized_Users'] = {
+            'ENABLE_AUTHORIZED_USERS': 'True',
+            'GALLERY_BRUTE_FORCE_LIMIT': '4096',
+            'GALLERY_CLUSTERS': '0',
+            'GALLERY_PROBES': '4'
+        }
+        
+        self.config['Template_Consolidation'] = {
+            'ENABLE_CONSOLIDATION': 'True',
+            'MAX_TEMPLATES_PER_IDENTITY': '50',
+            'IDENTITY_TEMPLATE_CAPS': ''
+        }
+        
+        self.config['Template_Adaptation'] = {
+            'ENABLE_ADAPTATION': 'False',
+            'ADAPTATION_CAPACITY': '20',
+            'ADAPTATION_MIN_MARGIN': '0.1',
+            'ADAPTATION_MIN_STREAK': '5',
+            'ADAPTATION_MIN_INTERVAL': '60.0'
+        }
+        
+        self.config['Screen_Capture'] = {
+            'SCREEN_CAPTURE_BACKEND': 'auto'
+        }
+        
+        self.config['Snapshot_Cache'] = {
+            'ENABLE_SNAPSHOT_CACHE': 'False',
+            'SNAPSHOT_REFRESH_INTERVAL': '3.0',
+            'SNAPSHOT_MAX_AGE': '10.0',
+            'SNAPSHOT_MAX_WIDTH': '960',
+            'SNAPSHOT_MEMORY_LIMIT_MB': '16'
+        }
+        
+        self.config['Detector_Escalation'] = {
+            'ENABLE_CNN_FALLBACK': 'True',
+            'CNN_MIN_INTERVAL': '10.0',
+            'CNN_SCALE': '0.5',
+            'CNN_REQUIRE_MOTION': 'True',
+            'CNN_MAX_DUTY_CYCLE': '0.1'
         }
         
         # Load from file if it exists
@@ -148,6 +235,30 @@ class Config:
     def camera_fps(self):
         return self.get_int('Camera', 'CAMERA_FPS')
     
+    @property
+    def threaded_capture(self):
+        return self.get_bool('Camera', 'THREADED_CAPTURE')
+    
+    @property
+    def capture_buffer_size(self):
+        return self.get_int('Camera', 'CAPTURE_BUFFER_SIZE')
+    
+    @property
+    def source_type(self):
+        return self.get_string('Camera', 'SOURCE_TYPE') or 'camera'
+    
+    @property
+    def source_path(self):
+        return self.get_string('Camera', 'SOURCE_PATH')
+    
+    @property
+    def source_pacing(self):
+        return self.get_string('Camera', 'SOURCE_PACING') or 'realtime'
+    
+    @property
+    def source_loop(self):
+        return self.get_bool('Camera', 'SOURCE_LOOP')
+    
     @property
     def show_monitor_window(self):
         return self.get_bool('Display', 'SHOW_MONITOR_WINDOW')
@@ -191,6 +302,46 @@ class Config:
     def detection_interval(self):
         return self.get_float('Performance', 'DETECTION_INTERVAL')
     
+    @property
+    def adaptive_detection(self):
+        return self.get_bool('Performance', 'ADAPTIVE_DETECTION')
+    
+    @property
+    def stable_period(self):
+        return self.get_float('Performance', 'STABLE_PERIOD')
+    
+    @property
+    def face_count_probe(self):
+        return self.get_bool('Performance', 'FACE_COUNT_PROBE')
+    
+    @property
+    def enable_stage_timing(self):
+        return self.get_bool('Performance', 'ENABLE_STAGE_TIMING')
+    
+    @property
+    def show_stage_timing(self):
+        return self.get_bool('Performance', 'SHOW_STAGE_TIMING')
+    
+    @property
+    def stage_timing_window(self):
+        return self.get_int('Performance', 'STAGE_TIMING_WINDOW')
+    
+    @property
+    def stage_timing_file(self):
+        return self.get_string('Performance', 'STAGE_TIMING_FILE')
+    
+    @property
+    def pipeline_mode(self):
+        return self.get_string('Performance', 'PIPELINE_MODE').lower()
+    
+    @property
+    def pipeline_queue_size(self):
+        return max(1, self.get_int('Performance', 'PIPELINE_QUEUE_SIZE'))
+    
+    @property
+    def inference_workers(self):
+        return max(0, self.get_int('Performance', 'INFERENCE_WORKERS'))
+    
     # Blur effect properties
     @property
     def enable_screen_blur(self):
@@ -207,6 +358,205 @@ class Config:
     @property
     def blur_overlay_darkness(self):
         return self.get_int('Blur_Effect', 'BLUR_OVERLAY_DARKNESS')
+    
+    @property
+    def blur_quality(self):
+        """'fast', 'balanced' or 'quality' blur engine tier"""
+        quality = self.get_string('Blur_Effect', 'BLUR_QUALITY').lower()
+        return quality if quality in ('fast', 'balanced', 'quality') else 'balanced'
+
+    @property
+    def blur_workers(self):
+        """Blur thread pool size, 0 picks one per CPU core"""
+        return max(0, self.get_int('Blur_Effect', 'BLUR_WORKERS'))
+
+    # Motion gate properties
+    @property
+    def enable_motion_gate(self):
+        return self.get_bool('Motion_Gate', 'ENABLE_MOTION_GATE')
+    
+    @property
+    def motion_threshold(self):
+        return self.get_int('Motion_Gate', 'MOTION_THRESHOLD')
+    
+    @property
+    def motion_min_area(self):
+        return self.get_float('Motion_Gate', 'MOTION_MIN_AREA')
+    
+    @property
+    def motion_region(self):
+        """Watched region as (x, y, width, height) fractions of the frame"""
+        try:
+            region = tuple(float(v) for v in self.get_string('Motion_Gate', 'MOTION_REGION').split(','))
+            if len(region) == 4:
+                return region
+        except ValueError:
+            pass
+        return (0.0, 0.0, 1.0, 1.0)
+    
+    @property
+    def motion_max_reuse(self):
+        return self.get_float('Motion_Gate', 'MOTION_MAX_REUSE')
+
+    # Face tracking properties
+    @property
+    def enable_tracking(self):
+        return self.get_bool('Tracking', 'ENABLE_TRACKING')
+    
+    @property
+    def track_iou_threshold(self):
+        return self.get_float('Tracking', 'TRACK_IOU_THRESHOLD')
+    
+    @property
+    def track_max_missed(self):
+        return self.get_int('Tracking', 'TRACK_MAX_MISSED')
+    
+    @property
+    def reverify_interval(self):
+        return self.get_float('Tracking', 'REVERIFY_INTERVAL')
+
+    # Landmark descriptor properties
+    @property
+    def descriptor_mode(self):
+        """'raw' landmark vectors or compact 'pose_pca' descriptors"""
+        mode = self.get_string('Descriptor', 'DESCRIPTOR_MODE').lower()
+        return mode if mode in ('raw', 'pose_pca') else 'raw'
+    
+    @property
+    def descriptor_components(self):
+        return self.get_int('Descriptor', 'DESCRIPTOR_COMPONENTS')
+    
+    @property
+    def descriptor_scale(self):
+        return self.get_float('Descriptor', 'DESCRIPTOR_SCALE')
+
+    # Template index properties
+    @property
+    def enable_pose_index(self):
+        return self.get_bool('Template_Index', 'ENABLE_POSE_INDEX')
+    
+    @property
+    def pose_bin_size(self):
+        return self.get_float('Template_Index', 'POSE_BIN_SIZE')
+    
+    @property
+    def pose_neighbour_bins(self):
+        return self.get_int('Template_Index', 'POSE_NEIGHBOUR_BINS')
+    
+    @property
+    def pose_index_min_templates(self):
+        return self.get_int('Template_Index', 'POSE_INDEX_MIN_TEMPLATES')
+
+    # Authorized user gallery properties
+    @property
+    def enable_authorized_users(self):
+        return self.get_bool('Authorized_Users', 'ENABLE_AUTHORIZED_USERS')
+    
+    @property
+    def gallery_brute_force_limit(self):
+        return self.get_int('Authorized_Users', 'GALLERY_BRUTE_FORCE_LIMIT')
+    
+    @property
+    def gallery_clusters(self):
+        """IVF cluster count, None for about sqrt(templates)"""
+        return self.get_int('Authorized_Users', 'GALLERY_CLUSTERS') or None
+    
+    @property
+    def gallery_probes(self):
+        return max(1, self.get_int('Authorized_Users', 'GALLERY_PROBES'))
+
+    # Template consolidation properties
+    @property
+    def enable_consolidation(self):
+        return self.get_bool('Template_Consolidation', 'ENABLE_CONSOLIDATION')
+    
+    @property
+    def max_templates_per_identity(self):
+        return self.get_int('Template_Consolidation', 'MAX_TEMPLATES_PER_IDENTITY')
+    
+    @property
+    def identity_template_caps(self):
+        """Per-identity caps as {name: cap} from 'name: cap, name: cap'"""
+        caps = {}
+        for entry in self.get_string('Template_Consolidation', 'IDENTITY_TEMPLATE_CAPS').split(','):
+            name, _, cap = entry.rpartition(':')
+            try:
+                if name.strip():
+                    caps[name.strip()] = int(cap)
+            except ValueError:
+                pass
+        return caps
+
+    # Template adaptation properties
+    @property
+    def enable_adaptation(self):
+        return self.get_bool('Template_Adaptation', 'ENABLE_ADAPTATION')
+    
+    @property
+    def adaptation_capacity(self):
+        return self.get_int('Template_Adaptation', 'ADAPTATION_CAPACITY')
+    
+    @property
+    def adaptation_min_margin(self):
+        return self.get_float('Template_Adaptation', 'ADAPTATION_MIN_MARGIN')
+    
+    @property
+    def adaptation_min_streak(self):
+        return self.get_int('Template_Adaptation', 'ADAPTATION_MIN_STREAK')
+    
+    @property
+    def adaptation_min_interval(self):
+        return self.get_float('Template_Adaptation', 'ADAPTATION_MIN_INTERVAL')
+
+    # Screen capture properties
+    @property
+    def screen_capture_backend(self):
+        """'auto', 'win32', 'x11' or 'fake' screen capture backend"""
+        backend = self.get_string('Screen_Capture', 'SCREEN_CAPTURE_BACKEND').lower()
+        return backend if backend in ('auto', 'win32', 'x11', 'fake') else 'auto'
+
+    # Snapshot cache properties
+    @property
+    def enable_snapshot_cache(self):
+        return self.get_bool('Snapshot_Cache', 'ENABLE_SNAPSHOT_CACHE')
+    
+    @property
+    def snapshot_refresh_interval(self):
+        return max(0.5, self.get_float('Snapshot_Cache', 'SNAPSHOT_REFRESH_INTERVAL'))
+    
+    @property
+    def snapshot_max_age(self):
+        return self.get_float('Snapshot_Cache', 'SNAPSHOT_MAX_AGE')
+    
+    @property
+    def snapshot_max_width(self):
+        return max(64, self.get_int('Snapshot_Cache', 'SNAPSHOT_MAX_WIDTH'))
+    
+    @property
+    def snapshot_memory_limit(self):
+        """Snapshot cache memory limit in bytes"""
+        return max(1, self.get_int('Snapshot_Cache', 'SNAPSHOT_MEMORY_LIMIT_MB')) * 1024 * 1024
+
+    # Detector escalation properties
+    @property
+    def enable_cnn_fallback(self):
+        return self.get_bool('Detector_Escalation', 'ENABLE_CNN_FALLBACK')
+    
+    @property
+    def cnn_min_interval(self):
+        return self.get_float('Detector_Escalation', 'CNN_MIN_INTERVAL')
+    
+    @property
+    def cnn_scale(self):
+        return self.get_float('Detector_Escalation', 'CNN_SCALE')
+    
+    @property
+    def cnn_require_motion(self):
+        return self.get_bool('Detector_Escalation', 'CNN_REQUIRE_MOTION')
+    
+    @property
+    def cnn_max_duty_cycle(self):
+        return self.get_float('Detector_Escalation', 'CNN_MAX_DUTY_CYCLE')
 
 # Global config instance
 config = Config()
@@ -0,0 +1,106 @@
+"""
+Adaptive detection scheduler for Face Security System
+Runs full recognition only every DETECTION_INTERVAL seconds while the
+owner is stably alone, and escalates to every-frame analysis as soon as
+the face count changes or the owner match confidence drops
+
+Modes:
+    alert  - analyse every frame
+    stable - analyse every detection_interval seconds, reuse the last
+             analysis in between (a cheap face-count probe still runs)
+"""
+
+import time
+
+
+class AdaptiveDetectionScheduler:
+    def __init__(self, detection_interval=1.0, stable_period=3.0, confidence_margin=0.05, enabled=True):
+        self.detection_interval = detection_interval
+        self.stable_period = stable_period
+        self.confidence_margin = confidence_margin
+        self.enabled = enabled and detection_interval > 0
+
+        self.mode = 'alert'
+        self.stable_since = None
+        self.last_analysis_time = None
+        self.reference_face_count = None
+        self.reference_score = None
+
+        # Statistics
+        self.frames_seen = 0
+        self.frames_analysed = 0
+        self.escalations = 0
+        self.last_escalation_reason = None
+
+    @property
+    def wants_probe(self):
+        """True when a cheap face-count probe should run on this frame
+
+        Only in stable mode - in alert mode every frame is analysed anyway
+        """
+        return self.enabled and self.mode == 'stable'
+
+    def escalate(self, reason):
+        """Switch to every-frame analysis"""
+        if self.mode == 'stable':
+            self.escalations += 1
+            print(f"🔎 Detection escalated: {reason}")
+        self.mode = 'alert'
+        self.stable_since = None
+        self.last_escalation_reason = reason
+
+    def should_analyze(self, now=None, face_count=None):
+        """Decide whether this frame needs full recognition"""
+        now = now if now is not None else time.time()
+        self.frames_seen += 1
+
+        if not self.enabled or self.mode == 'alert' or self.last_analysis_time is None:
+            return True
+
+        if face_count is not None and self.reference_face_count is not None and face_count != self.reference_face_count:
+            self.escalate(f"face count changed {self.reference_face_count} -> {face_count}")
+            return True
+
+        return now - self.last_analysis_time >= self.detection_interval
+
+    def record_skipped(self):
+        """Count a frame that reused the last analysis before reaching should_analyze (static scene)"""
+        self.frames_seen += 1
+
+    def record(self, analysis, now=None, face_count=None):
+        """Update the schedule from a fresh FrameAnalysis"""
+        now = now if now is not None else time.time()
+        self.frames_analysed += 1
+        self.last_analysis_time = now
+        self.reference_face_count = face_count if face_count is not None else analysis.total_faces
+
+        if not analysis.owner_alone or analysis.low_confidence:
+            self.reference_score = None
+            self.escalate("owner not alone")
+            return
+
+        score = max(analysis.scores) if analysis.scores else 0
+        if self.reference_score is not None and score < self.reference_score - self.confidence_margin:
+            self.reference_score = None
+            self.escalate(f"owner confidence dropped to {score:.2f}")
+            return
+
+        # Track the typical owner score while stable
+        self.reference_score = score if self.reference_score is None else 0.9 * self.reference_score + 0.1 * score
+
+        if self.mode == 'alert':
+            if self.stable_since is None:
+                self.stable_since = now
+            elif now - self.stable_since >= self.stable_period:
+                # Owner has been alone long enough - back off to the configured interval
+                self.mode = 'stable'
+
+    def get_stats(self):
+        """Scheduler statistics for display and logging"""
+        return {
+            'mode': self.mode,
+            'frames_seen': self.frames_seen,
+            'frames_analysed': self.frames_analysed,
+            'skip_ratio': 1 - self.frames_analysed / self.frames_seen if self.frames_seen else 0.0,
+            'escalations': self.escalations,
+        }
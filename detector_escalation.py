@@ -0,0 +1,67 @@
+"""
+Detector escalation policy for Face Security System
+Decides when an empty HOG result may be retried with the much slower CNN
+face detector. Escalation is rate limited, budgeted against the measured
+CNN cost, runs on a downscaled frame and (optionally) only when the motion
+gate saw the scene change, so an empty desk no longer costs a CNN pass on
+every frame.
+
+Tiers:
+    hog - fast detector, runs on every analysed frame
+    cnn - slow fallback, runs only when the policy allows it
+"""
+
+import time
+
+
+class DetectorEscalationPolicy:
+    def __init__(self, enabled=True, min_interval=10.0, scale=0.5, require_motion=True, max_duty_cycle=0.1):
+        self.enabled = enabled
+        self.min_interval = min_interval        # Seconds between two CNN passes at least
+        self.scale = scale                      # CNN runs on the frame downscaled by this factor
+        self.require_motion = require_motion    # Only escalate when the scene changed
+        self.max_duty_cycle = max_duty_cycle    # Share of wall time the CNN may consume
+
+        self.next_allowed = 0.0
+
+        # Statistics
+        self.tier_runs = {'hog': 0, 'cnn': 0}
+        self.cnn_denied = 0
+        self.cnn_hits = 0
+        self.cnn_time = 0.0
+
+    def record_hog(self):
+        """Count a pass of the fast tier"""
+        self.tier_runs['hog'] += 1
+
+    def allow_cnn(self, now=None, motion_seen=True):
+        """True if an empty HOG result may be retried with the CNN detector"""
+        now = now if now is not None else time.time()
+
+        if not self.enabled or (self.require_motion and not motion_seen) or now < self.next_allowed:
+            self.cnn_denied += 1
+            return False
+        return True
+
+    def record_cnn(self, started, finished, faces_found):
+        """Account a CNN pass and schedule the next allowed escalation"""
+        cost = finished - started
+        self.tier_runs['cnn'] += 1
+        self.cnn_time += cost
+        if faces_found:
+            self.cnn_hits += 1
+
+        # Back off further when a single pass is expensive, so the CNN stays within its duty cycle
+        backoff = cost / self.max_duty_cycle if self.max_duty_cycle > 0 else 0.0
+        self.next_allowed = finished + max(self.min_interval, backoff)
+
+    def get_stats(self):
+        """Per-tier counters for display and logging"""
+        cnn_runs = self.tier_runs['cnn']
+        return {
+            'hog_runs': self.tier_runs['hog'],
+            'cnn_runs': cnn_runs,
+            'cnn_denied': self.cnn_denied,
+            'cnn_hits': self.cnn_hits,
+            'cnn_avg_ms': self.cnn_time / cnn_runs * 1000 if cnn_runs else 0.0,
+        }
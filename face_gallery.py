@@ -0,0 +1,455 @@
+"""
+Multi-identity face gallery for Face Security System
+Stores the templates of any number of authorized identities, each with
+its own policy, and answers "best identity and score for each face".
+
+Small galleries are searched with a vectorized brute force. Larger ones
+switch to a clustered inverted-file (IVF) index: templates are grouped
+around k-means centroids and a face is only compared with the templates
+of its n_probe nearest clusters, so lookup cost grows sub-linearly with
+the gallery size.
+
+Metrics:
+    cosine    - rows are L2-normalised, score is the cosine similarity (higher is better)
+    euclidean - score is the Euclidean distance (lower is better)
+"""
+
+import time
+
+import numpy as np
+
+DEFAULT_POLICY = {
+    'enabled': True,        # Disabled identities are kept but never matched
+    'allow_unlock': True,   # False: recognised (and logged by name) but still counts as unauthorized
+    'threshold': None,      # Per-identity acceptance threshold, None for the backend default
+}
+
+
+class Identity:
+    def __init__(self, name, policy=None):
+        self.name = name
+        self.policy = dict(DEFAULT_POLICY, **(policy or {}))
+
+    @property
+    def enabled(self):
+        return bool(self.policy['enabled'])
+
+    @property
+    def allow_unlock(self):
+        return bool(self.policy['allow_unlock'])
+
+    @property
+    def threshold(self):
+        return self.policy['threshold']
+
+    def __repr__(self):
+        return f"Identity({self.name!r}, {self.policy})"
+
+
+def prepare_vectors(vectors, metric):
+    """Contiguous float32 rows, L2-normalised for the cosine metric"""
+    matrix = np.asarray(vectors, dtype=np.float32).reshape(len(vectors), -1)
+    if metric == 'cosine':
+        matrix = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    return np.ascontiguousarray(matrix)
+
+
+def score_matrix(queries, matrix, sq_norms, metric):
+    """(queries, rows) cosine similarities or Euclidean distances"""
+    products = queries @ matrix.T
+    if metric == 'cosine':
+        return products
+    query_norms = np.einsum('ij,ij->i', queries, queries)
+    return np.sqrt(np.maximum(query_norms[:, None] + sq_norms[None, :] - 2.0 * products, 0.0))
+
+
+def template_spread(vectors):
+    """Standard deviation of each raw (un-normalised) template - the quality term of the landmark rule"""
+    return np.asarray(vectors, dtype=np.float32).reshape(len(vectors), -1).std(axis=1)
+
+
+def best_columns(scores, metric):
+    return scores.argmax(axis=1) if metric == 'cosine' else scores.argmin(axis=1)
+
+
+class BruteForceIndex:
+    name = 'brute_force'
+
+    def __init__(self, metric='cosine'):
+        self.metric = metric
+        self.comparisons = 0
+
+    def build(self, matrix, ids):
+        self.matrix = matrix
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.sq_norms = np.einsum('ij,ij->i', matrix, matrix)
+        return self
+
+    def add(self, vectors, ids):
+        return self.build(np.concatenate([self.matrix, vectors]), np.concatenate([self.ids, ids]))
+
+    def search(self, queries):
+        """Best template id and score per query"""
+        if len(self.matrix) == 0:
+            return np.full(len(queries), -1, np.int64), np.full(len(queries), np.nan, np.float32)
+        scores = score_matrix(queries, self.matrix, self.sq_norms, self.metric)
+        best = best_columns(scores, self.metric)
+        self.comparisons += scores.size
+        return self.ids[best], scores[np.arange(len(queries)), best]
+
+
+class IVFIndex:
+    name = 'ivf'
+
+    def __init__(self, metric='cosine', n_clusters=None, n_probe=4, iterations=8, seed=0):
+        self.metric = metric
+        self.n_clusters = n_clusters    # None: about sqrt(templates)
+        self.n_probe = n_probe
+        self.iterations = iterations
+        self.seed = seed
+        self.centroids = None
+        self.lists = []                 # Per-cluster (members, dims) template blocks
+        self.list_ids = []              # Per-cluster template ids
+        self.comparisons = 0
+
+    def _centroid_scores(self, vectors):
+        centroid_norms = np.einsum('ij,ij->i', self.centroids, self.centroids)
+        return score_matrix(vectors, self.centroids, centroid_norms, self.metric)
+
+    def _assign(self, vectors):
+        return best_columns(self._centroid_scores(vectors), self.metric)
+
+    def _seed(self, sample, clusters, rng):
+        """k-means++ seeding - spreads the initial centroids over the gallery"""
+        chosen = [rng.integers(len(sample))]
+        sample_norms = np.einsum('ij,ij->i', sample, sample)
+        nearest = np.full(len(sample), np.inf)
+        for _ in range(1, clusters):
+            latest = sample[chosen[-1]:chosen[-1] + 1]
+            distance = score_matrix(latest, sample, sample_norms, 'euclidean')[0] ** 2
+            nearest = np.minimum(nearest, distance)
+            total = nearest.sum()
+            chosen.append(rng.choice(len(sample), p=nearest / total) if total > 0 else rng.integers(len(sample)))
+        return sample[chosen].copy()
+
+    def train(self, matrix):
+        """Lloyd k-means on a subsample (spherical k-means for the cosine metric)"""
+        rng = np.random.default_rng(self.seed)
+        clusters = self.n_clusters or max(1, int(np.sqrt(len(matrix))))
+        clusters = min(clusters, len(matrix))
+        sample = matrix[rng.choice(len(matrix), min(len(matrix), clusters * 40), replace=False)]
+
+        self.centroids = self._seed(sample, clusters, rng)
+        for _ in range(self.iterations):
+            assignment = self._assign(sample)
+            counts = np.bincount(assignment, minlength=clusters)
+            sums = np.zeros_like(self.centroids)
+            np.add.at(sums, assignment, sample)
+            empty = counts == 0
+            self.centroids = np.where(empty[:, None], sample[rng.choice(len(sample), clusters)],
+                                      sums / np.maximum(counts, 1)[:, None]).astype(np.float32)
+            if self.metric == 'cosine':
+                self.centroids = prepare_vectors(self.centroids, 'cosine')
+        return self.centroids
+
+    def split_large_clusters(self, matrix, max_ratio=2.0):
+        """Bisect clusters holding more than max_ratio times the average share
+
+        Well separated identities tend to leave a few "hub" centroids between
+        them that collect far more than their share of the templates - every
+        face routed to a hub would pay for a near-exhaustive scan.
+        """
+        rng = np.random.default_rng(self.seed)
+        assignment = self._assign(matrix)
+        limit = max(int(max_ratio * len(matrix) / len(self.centroids)), 2)
+        centroids = list(self.centroids)
+        members = {cluster: np.flatnonzero(assignment == cluster) for cluster in range(len(centroids))}
+        oversized = [cluster for cluster, rows in members.items() if len(rows) > limit]
+
+        while oversized:
+            cluster = oversized.pop()
+            rows = members[cluster]
+            halves = IVFIndex(self.metric, 2, iterations=self.iterations, seed=int(rng.integers(1 << 31)))
+            halves.train(matrix[rows])
+            side = halves._assign(matrix[rows])
+            if side.min() == side.max():
+                continue    # Identical templates cannot be split
+            centroids[cluster] = halves.centroids[0]
+            centroids.append(halves.centroids[1])
+            members[cluster], members[len(centroids) - 1] = rows[side == 0], rows[side == 1]
+            oversized += [c for c in (cluster, len(centroids) - 1) if len(members[c]) > limit]
+
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+        return self.centroids
+
+    def build(self, matrix, ids, centroids=None):
+        if centroids is not None:
+            self.centroids = np.asarray(centroids, dtype=np.float32)
+        elif len(matrix):
+            self.train(matrix)
+            self.split_large_clusters(matrix)
+        else:
+            self.centroids = np.zeros((0, matrix.shape[1]), np.float32)
+
+        self.lists = [matrix[:0]] * len(self.centroids)
+        self.list_ids = [np.zeros(0, np.int64)] * len(self.centroids)
+        return self.add(matrix, ids)
+
+    def add(self, vectors, ids):
+        """File new templates under their nearest centroid - only the touched blocks are rebuilt"""
+        if len(vectors) == 0:
+            return self
+        ids = np.asarray(ids, dtype=np.int64)
+        assignment = self._assign(vectors)
+        for cluster in np.unique(assignment):
+            members = assignment == cluster
+            self.lists[cluster] = np.concatenate([self.lists[cluster], vectors[members]])
+            self.list_ids[cluster] = np.concatenate([self.list_ids[cluster], ids[members]])
+        return self
+
+    def search(self, queries):
+        """Best template id and score per query among the n_probe nearest clusters"""
+        template_ids = np.full(len(queries), -1, np.int64)
+        best_scores = np.full(len(queries), np.nan, np.float32)
+        if self.centroids is None or len(self.centroids) == 0:
+            return template_ids, best_scores
+
+        centroid_scores = self._centroid_scores(queries)
+        probe = min(self.n_probe, len(self.centroids))
+        order = np.argsort(-centroid_scores if self.metric == 'cosine' else centroid_scores, axis=1)[:, :probe]
+        self.comparisons += centroid_scores.size
+
+        for i, clusters in enumerate(order):
+            blocks = [self.lists[cluster] for cluster in clusters if len(self.lists[cluster])]
+            if not blocks:
+                continue
+            candidates = np.concatenate(blocks) if len(blocks) > 1 else blocks[0]
+            candidate_ids = np.concatenate([self.list_ids[cluster] for cluster in clusters])
+            scores = score_matrix(queries[i:i + 1], candidates,
+                                  np.einsum('ij,ij->i', candidates, candidates), self.metric)[0]
+            best = scores.argmax() if self.metric == 'cosine' else scores.argmin()
+            template_ids[i] = candidate_ids[best]
+            best_scores[i] = scores[best]
+            self.comparisons += len(candidates)
+        return template_ids, best_scores
+
+
+class GalleryMatch:
+    """Best identity per face, identity index -1 when the gallery is empty"""
+
+    def __init__(self, identity_index, template_index, score, gallery):
+        self.identity_index = identity_index
+        self.template_index = template_index    # Index within the identity's templates
+        self.score = score
+        self.gallery = gallery
+
+    def template_std(self, face):
+        """Raw standard deviation of the best template of a face, None if unknown"""
+        index = self.identity_index[face]
+        spread = self.gallery.template_std[index] if index >= 0 else None
+        return float(spread[self.template_index[face]]) if spread is not None else None
+
+    def __len__(self):
+        return len(self.identity_index)
+
+    def identity(self, face):
+        index = self.identity_index[face]
+        return self.gallery.identities[index] if index >= 0 else None
+
+
+def authorize_with_gallery(result, gallery, faces, accept):
+    """Look up the faces the owner matcher rejected in the authorized-user gallery
+
+    accept(identity, score, face, template_std) -> (accepted, confidence)
+    applies the backend's threshold to the best gallery score; template_std
+    is the raw std of the best template, None if unknown. Accepted faces
+    get the identity name in result.identities and count as authorized when
+    the identity's policy allows unlocking. Updates and returns result.
+    """
+    pending = np.flatnonzero(~np.asarray(result.is_owner, dtype=bool))
+    if gallery is None or len(gallery) == 0 or len(pending) == 0:
+        return result
+
+    match = gallery.search(np.asarray(faces, dtype=np.float32)[pending])
+    for row, face in enumerate(pending):
+        identity = match.identity(row)
+        if identity is None:
+            continue
+        accepted, confidence = accept(identity, float(match.score[row]), faces[face], match.template_std(row))
+        if accepted:
+            result.identities[face] = identity.name
+            result.is_owner[face] = identity.allow_unlock
+            result.confidence[face] = confidence
+    return result
+
+
+class FaceGallery:
+    def __init__(self, metric='cosine', brute_force_limit=4096, n_clusters=None, n_probe=4):
+        self.metric = metric
+        self.brute_force_limit = brute_force_limit
+        self.n_clusters = n_clusters
+        self.n_probe = n_probe
+
+        self.identities = []
+        self.templates = []     # Per-identity prepared (templates, dims) float32 matrices
+        self.template_std = []  # Per-identity raw std of each template (None where unknown), see template_spread
+        self.index = None
+        self.indexed_identity = np.zeros(0, np.int64)   # Global template id -> identity index
+        self.indexed_offset = np.zeros(0, np.int64)     # Global template id -> row within identity
+        self.trained_size = 0
+        self.last_build_ms = 0.0
+
+    def __len__(self):
+        return sum(len(templates) for templates in self.templates)
+
+    def names(self):
+        return [identity.name for identity in self.identities]
+
+    def identity(self, name):
+        for identity in self.identities:
+            if identity.name == name:
+                return identity
+        return None
+
+    def _position(self, name):
+        names = self.names()
+        return names.index(name) if name in names else None
+
+    def add_identity(self, name, templates, policy=None):
+        """Add (or replace) an identity with its raw templates"""
+        if self._position(name) is not None:
+            self.remove_identity(name, rebuild=False)
+            self.identities.append(Identity(name, policy))
+            self.templates.append(prepare_vectors(templates, self.metric))
+            self.template_std.append(template_spread(templates))
+            self.rebuild()
+            return self.identities[-1]
+
+        identity = Identity(name, policy)
+        self.identities.append(identity)
+        self.templates.append(prepare_vectors(templates, self.metric))
+        self.template_std.append(template_spread(templates))
+
+        size = len(self)
+        if (self.index is None or not identity.enabled or
+                (self.index.name == 'brute_force' and size > self.brute_force_limit) or
+                (self.index.name == 'ivf' and size > 2 * self.trained_size)):
+            self.rebuild()
+        else:
+            # Incremental insert into the existing index
+            position = len(self.identities) - 1
+            first_id = len(self.indexed_identity)
+            count = len(self.templates[position])
+            self.index.add(self.templates[position], np.arange(first_id, first_id + count))
+            self.indexed_identity = np.concatenate([self.indexed_identity, np.full(count, position, np.int64)])
+            self.indexed_offset = np.concatenate([self.indexed_offset, np.arange(count, dtype=np.int64)])
+        return identity
+
+    def remove_identity(self, name, rebuild=True):
+        position = self._position(name)
+        if position is None:
+            return False
+        del self.identities[position]
+        del self.templates[position]
+        del self.template_std[position]
+        if rebuild:
+            self.rebuild()
+        return True
+
+    def replace_templates(self, updates, template_std=None):
+        """Swap the templates of several identities ({name: templates}), re-indexing once
+
+        Templates read back from the gallery are already normalised for the
+        cosine metric, so their raw std is passed as {name: std} - or left
+        unknown. Euclidean templates are raw and measured here.
+        """
+        template_std = template_std or {}
+        for name, templates in updates.items():
+            position = self._position(name)
+            self.templates[position] = prepare_vectors(templates, self.metric)
+            if name in template_std:
+                self.template_std[position] = np.asarray(template_std[name], dtype=np.float32)
+            else:
+                self.template_std[position] = template_spread(templates) if self.metric != 'cosine' else None
+        self.rebuild()
+
+    def set_policy(self, name, **policy):
+        """Update an identity's policy, re-indexing when it is enabled or disabled"""
+        identity = self.identity(name)
+        was_enabled = identity.enabled
+        identity.policy.update(policy)
+        if identity.enabled != was_enabled:
+            self.rebuild()
+        return identity
+
+    def rebuild(self, centroids=None):
+        """Re-index the templates of all enabled identities"""
+        started = time.perf_counter()
+        blocks, identity_ids, offsets = [], [], []
+        for position, (identity, templates) in enumerate(zip(self.identities, self.templates)):
+            if identity.enabled and len(templates):
+                blocks.append(templates)
+                identity_ids.append(np.full(len(templates), position, np.int64))
+                offsets.append(np.arange(len(templates), dtype=np.int64))
+
+        dims = self.templates[0].shape[1] if self.templates else 0
+        matrix = np.concatenate(blocks) if blocks else np.zeros((0, dims), np.float32)
+        self.indexed_identity = np.concatenate(identity_ids) if identity_ids else np.zeros(0, np.int64)
+        self.indexed_offset = np.concatenate(offsets) if offsets else np.zeros(0, np.int64)
+
+        if len(matrix) > self.brute_force_limit:
+            self.index = IVFIndex(self.metric, self.n_clusters, self.n_probe).build(
+                matrix, np.arange(len(matrix)), centroids)
+        else:
+            self.index = BruteForceIndex(self.metric).build(matrix, np.arange(len(matrix)))
+        self.trained_size = len(matrix)
+        self.last_build_ms = (time.perf_counter() - started) * 1000
+        return self.index
+
+    def search(self, faces):
+        """Best identity, template and score for each face"""
+        if self.index is None:
+            self.rebuild()
+        queries = prepare_vectors(faces, self.metric) if len(faces) else np.zeros((0, 1), np.float32)
+        if len(queries) == 0:
+            empty = np.zeros(0, np.int64)
+            return GalleryMatch(empty, empty, np.zeros(0, np.float32), self)
+
+        template_ids, scores = self.index.search(queries)
+        found = template_ids >= 0
+        identity_index = np.where(found, self.indexed_identity[np.maximum(template_ids, 0)], -1)
+        template_index = np.where(found, self.indexed_offset[np.maximum(template_ids, 0)], -1)
+        return GalleryMatch(identity_index, template_index, scores, self)
+
+    def to_dict(self):
+        """Gallery state for the encrypted config (the IVF centroids are kept so loading skips training)"""
+        return {
+            'metric': self.metric,
+            'identities': [{'name': identity.name, 'policy': dict(identity.policy), 'templates': templates,
+                            'template_std': spread}
+                           for identity, templates, spread in zip(self.identities, self.templates, self.template_std)],
+            'centroids': self.index.centroids if isinstance(self.index, IVFIndex) else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data, **settings):
+        gallery = cls(data['metric'], **settings)
+        for entry in data['identities']:
+            gallery.identities.append(Identity(entry['name'], entry['policy']))
+            gallery.templates.append(prepare_vectors(entry['templates'], gallery.metric))
+            spread = entry.get('template_std')  # Not stored by older profiles
+            if spread is None and gallery.metric != 'cosine':
+                spread = template_spread(entry['templates'])
+            gallery.template_std.append(np.asarray(spread, dtype=np.float32) if spread is not None else None)
+        gallery.rebuild(data.get('centroids'))
+        return gallery
+
+    def get_stats(self):
+        """Gallery statistics for logging"""
+        return {
+            'identities': len(self.identities),
+            'templates': len(self),
+            'index': self.index.name if self.index is not None else None,
+            'comparisons': self.index.comparisons if self.index is not None else 0,
+            'last_build_ms': self.last_build_ms,
+        }
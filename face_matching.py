@@ -0,0 +1,237 @@
+"""
+Vectorized owner gallery matching for Face Security System
+Owner samples are prepared once into contiguous float32 matrices and all
+faces of a frame are scored against all samples in a single batched NumPy
+operation instead of nested per-pair Python loops
+"""
+
+import numpy as np
+
+
+class MatchResult:
+    """Scores of every face in a frame against every gallery sample"""
+
+    def __init__(self, scores, matches, is_owner, confidence, best_index, best_score, matched_tolerance=None,
+                 identities=None):
+        self.scores = scores            # (faces, samples) similarity / distance matrix
+        self.matches = matches          # (faces, samples) per-sample match decisions
+        self.is_owner = is_owner        # (faces,) owner decision per face
+        self.confidence = confidence    # (faces,) confidence reported for the decision
+        self.best_index = best_index    # (faces,) index of the best sample per face
+        self.best_score = best_score    # (faces,) score of the best sample per face
+        self.matched_tolerance = matched_tolerance  # (faces,) tolerance that accepted the face (distance matchers)
+        self.identities = identities if identities is not None else [None] * len(is_owner)  # Gallery user per face
+
+    def __len__(self):
+        return len(self.is_owner)
+
+    @classmethod
+    def no_match(cls, faces, samples):
+        """Result for an empty frame or an empty gallery"""
+        return cls(np.zeros((faces, samples), np.float32), np.zeros((faces, samples), bool),
+                   np.zeros(faces, bool), np.zeros(faces, np.float32),
+                   np.zeros(faces, np.int64), np.zeros(faces, np.float32))
+
+
+class LandmarkMatcher:
+    """Batched matcher for MediaPipe face mesh feature vectors
+
+    Reproduces MediaPipeFaceSecuritySystem.compare_faces for every
+    (face, sample) pair at once. With unit vectors a and b:
+        combined = 0.5 * cos + 0.3 / (1 + |a - b|) + 0.2 * dot
+                 = 0.7 * cos + 0.3 / (1 + sqrt(2 - 2 * cos))
+    and a pair matches when combined exceeds
+        threshold * (0.8 + 0.2 * min(std(face), std(sample), 1))
+    The confidence of an owner face is the cosine similarity of the first
+    matching sample, as in the original per-sample loop.
+    """
+
+    def __init__(self, owner_features, similarity_threshold=0.8):
+        self.similarity_threshold = similarity_threshold
+        self.set_samples(owner_features)
+
+    def set_samples(self, owner_features):
+        """Normalise the owner samples once into a contiguous float32 matrix"""
+        if len(owner_features) == 0:
+            self.matrix = np.zeros((0, 0), np.float32)
+            self.sample_std = np.zeros(0, np.float32)
+            return
+
+        raw = np.asarray(owner_features, dtype=np.float32).reshape(len(owner_features), -1)
+        norms = np.linalg.norm(raw, axis=1, keepdims=True)
+        self.matrix = np.ascontiguousarray(raw / np.maximum(norms, 1e-12))
+        self.sample_std = raw.std(axis=1)
+
+    def set_sample(self, index, sample):
+        """Replace one sample (append when index == len(self)), normalising only that row"""
+        raw = np.asarray(sample, dtype=np.float32).reshape(1, -1)
+        if len(self.matrix) == 0:
+            return self.set_samples(raw)
+        row = raw / max(float(np.linalg.norm(raw)), 1e-12)
+        if index == len(self.matrix):
+            self.matrix = np.concatenate([self.matrix, row])
+            self.sample_std = np.concatenate([self.sample_std, raw.std(axis=1)])
+        else:
+            self.matrix[index] = row[0]
+            self.sample_std[index] = raw.std()
+
+    def __len__(self):
+        return len(self.matrix)
+
+    def match(self, faces, sample_indices=None):
+        """Score all faces (list of vectors or (faces, dims) array) against all samples
+
+        sample_indices restricts scoring to a subset of the gallery, result
+        columns then follow sample_indices
+        """
+        matrix, sample_std = self.matrix, self.sample_std
+        if sample_indices is not None:
+            matrix, sample_std = matrix[sample_indices], sample_std[sample_indices]
+
+        if len(faces) == 0 or len(matrix) == 0:
+            return MatchResult.no_match(len(faces), len(matrix))
+
+        raw = np.asarray(faces, dtype=np.float32).reshape(len(faces), -1)
+        norms = np.linalg.norm(raw, axis=1, keepdims=True)
+        normalized = raw / np.maximum(norms, 1e-12)
+
+        cosine = normalized @ matrix.T
+        euclidean = np.sqrt(np.maximum(2.0 - 2.0 * cosine, 0.0))
+        combined = 0.7 * cosine + 0.3 / (1.0 + euclidean)
+
+        quality = np.minimum(np.minimum(raw.std(axis=1)[:, None], sample_std[None, :]), 1.0)
+        thresholds = self.similarity_threshold * (0.8 + 0.2 * quality)
+        matches = combined > thresholds
+
+        is_owner = matches.any(axis=1)
+        rows = np.arange(len(raw))
+        first_match = matches.argmax(axis=1)
+        confidence = np.where(is_owner, cosine[rows, first_match], 0.0).astype(np.float32)
+
+        best_index = combined.argmax(axis=1)
+        return MatchResult(combined, matches, is_owner, confidence, best_index, combined[rows, best_index])
+
+
+class EncodingMatcher:
+    """Batched matcher for face_recognition 128-d encodings
+
+    Computes the full (faces, samples) Euclidean distance matrix in one
+    operation against a preloaded gallery and evaluates the tolerance
+    ladder on it. Reproduces FaceSecuritySystem's per-face loop: a face is
+    the owner when, for the first tolerance in the ladder that any sample
+    is within, the best distance is strictly below that tolerance. The
+    confidence is 1 - best distance.
+    """
+
+    def __init__(self, owner_encodings, tolerances=(0.5, 0.6, 0.8)):
+        self.tolerances = np.asarray(tolerances, dtype=np.float64)
+        self.set_samples(owner_encodings)
+
+    def set_samples(self, owner_encodings):
+        """Stack the owner encodings into a contiguous gallery with precomputed squared norms"""
+        if len(owner_encodings) == 0:
+            self.gallery = np.zeros((0, 128), np.float64)
+        else:
+            self.gallery = np.ascontiguousarray(np.asarray(owner_encodings, dtype=np.float64).reshape(len(owner_encodings), -1))
+        self.gallery_sq_norms = np.einsum('ij,ij->i', self.gallery, self.gallery)
+
+    def set_sample(self, index, encoding):
+        """Replace one encoding (append when index == len(self)) and its squared norm"""
+        row = np.asarray(encoding, dtype=np.float64).reshape(1, -1)
+        if index == len(self.gallery):
+            self.gallery = np.concatenate([self.gallery, row])
+            self.gallery_sq_norms = np.append(self.gallery_sq_norms, row @ row[0])
+        else:
+            self.gallery[index] = row[0]
+            self.gallery_sq_norms[index] = row[0] @ row[0]
+
+    def __len__(self):
+        return len(self.gallery)
+
+    def distances(self, encodings):
+        """(faces, samples) Euclidean distance matrix"""
+        faces = np.asarray(encodings, dtype=np.float64).reshape(len(encodings), -1)
+        face_sq_norms = np.einsum('ij,ij->i', faces, faces)
+        squared = face_sq_norms[:, None] + self.gallery_sq_norms[None, :] - 2.0 * (faces @ self.gallery.T)
+        return np.sqrt(np.maximum(squared, 0.0))
+
+    def match(self, encodings):
+        """Score all face encodings against the gallery and apply the tolerance ladder"""
+        if len(encodings) == 0 or len(self.gallery) == 0:
+            result = MatchResult.no_match(len(encodings), len(self.gallery))
+            result.best_score = np.full(len(encodings), np.inf)
+            result.matched_tolerance = np.full(len(encodings), np.nan)
+            return result
+
+        distances = self.distances(encodings)
+        rows = np.arange(len(distances))
+        best_index = distances.argmin(axis=1)
+        best_distance = distances[rows, best_index]
+
+        # Tolerance ladder on the whole matrix: (faces, tolerances)
+        accepted = best_distance[:, None] < self.tolerances[None, :]
+        is_owner = accepted.any(axis=1)
+        matched_tolerance = np.where(is_owner, self.tolerances[accepted.argmax(axis=1)], np.nan)
+
+        # Per-sample matches at the tolerance that accepted the face
+        matches = distances <= np.where(is_owner, matched_tolerance, -1.0)[:, None]
+        confidence = np.where(is_owner, 1.0 - best_distance, 0.0)
+
+        return MatchResult(distances, matches, is_owner, confidence, best_index, best_distance, matched_tolerance)
+
+
+class DescriptorMatcher:
+    """Batched matcher for compact pose-normalized landmark descriptors
+
+    Descriptor distances approximate the RMS landmark displacement in units
+    of face size. They are mapped to a similarity
+        similarity = 1 / (1 + distance / scale)
+    and a face is the owner when its best similarity exceeds the threshold.
+    The confidence is the best similarity.
+    """
+
+    def __init__(self, templates, similarity_threshold=0.8, scale=0.08):
+        self.similarity_threshold = similarity_threshold
+        self.scale = scale
+        self.set_samples(templates)
+
+    def set_samples(self, templates):
+        """Stack the templates into a contiguous float32 gallery with precomputed squared norms"""
+        self.matrix = np.ascontiguousarray(np.asarray(templates, dtype=np.float32).reshape(len(templates), -1))
+        self.sq_norms = np.einsum('ij,ij->i', self.matrix, self.matrix)
+
+    def set_sample(self, index, template):
+        """Replace one template (append when index == len(self)) and its squared norm"""
+        row = np.asarray(template, dtype=np.float32).reshape(1, -1)
+        if len(self.matrix) == 0:
+            return self.set_samples(row)
+        if index == len(self.matrix):
+            self.matrix = np.concatenate([self.matrix, row])
+            self.sq_norms = np.append(self.sq_norms, row @ row[0])
+        else:
+            self.matrix[index] = row[0]
+            self.sq_norms[index] = row[0] @ row[0]
+
+    def __len__(self):
+        return len(self.matrix)
+
+    def match(self, descriptors, sample_indices=None):
+        """Score all face descriptors against all templates (or the templates in sample_indices)"""
+        matrix, sq_norms = self.matrix, self.sq_norms
+        if sample_indices is not None:
+            matrix, sq_norms = matrix[sample_indices], sq_norms[sample_indices]
+
+        if len(descriptors) == 0 or len(matrix) == 0:
+            return MatchResult.no_match(len(descriptors), len(matrix))
+
+        faces = np.asarray(descriptors, dtype=np.float32).reshape(len(descriptors), -1)
+        squared = np.einsum('ij,ij->i', faces, faces)[:, None] + sq_norms[None, :] - 2.0 * (faces @ matrix.T)
+        similarity = 1.0 / (1.0 + np.sqrt(np.maximum(squared, 0.0)) / self.scale)
+        matches = similarity > self.similarity_threshold
+
+        rows = np.arange(len(faces))
+        best_index = similarity.argmax(axis=1)
+        best_score = similarity[rows, best_index]
+        is_owner = matches.any(axis=1)
+        confidence = np.where(is_owner, best_score, 0.0).astype(np.float32)
+        return MatchResult(similarity, matches, is_owner, confidence, best_index, best_score)
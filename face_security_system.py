@@ -8,15 +8,26 @@ import threading
 from datetime import datetime
 import tkinter as tk
 from tkinter import messagebox, simpledialog
-from PIL import Image, ImageTk, ImageFilter
 import hashlib
 from cryptography.fernet import Fernet
-import win32gui
-import win32con
-import win32api
-import win32ui
-from ctypes import windll
 import keyboard
+from camera_grabber import LatestFrameGrabber
+from frame_analysis import FrameAnalysis
+from detection_scheduler import AdaptiveDetectionScheduler
+from motion_gate import MotionGate
+from face_tracker import FaceTracker
+from frame_sources import CameraSource, frame_source_from_config
+from face_matching import EncodingMatcher
+from face_gallery import FaceGallery, authorize_with_gallery
+from template_consolidation import consolidate_templates, format_report
+from template_adaptation import TemplateReservoir, AsyncProfileWriter
+from detector_escalation import DetectorEscalationPolicy
+from perf_stats import StageTimer
+from blur_engine import BlurEngine
+from lock_screen import LockScreen
+from lock_overlay import render_panel, text_width, wrap_line
+from pipeline import MonitorPipeline
+from inference_pool import InferencePool, InferenceFuture, detection_scale_for, preprocess_for_detection
 
 # Try to import configuration
 try:
@@ -27,9 +38,11 @@ except ImportError:
     print("Warning: config_loader not available, using default settings")
 
 class FaceSecuritySystem:
-    def __init__(self):
+    def __init__(self, frame_source=None, screen_capture=None):
         self.owner_face_encodings = []
+        self.owner_matcher = None  # Preloaded owner encoding gallery, built from owner_face_encodings
         self.owner_name = "Owner"
+        self.gallery = None  # Authorized users besides the owner, loaded from the encrypted config
         
         # Load configuration
         if CONFIG_AVAILABLE:
@@ -38,18 +51,61 @@ class FaceSecuritySystem:
             self.grace_period = config.grace_period
             self.face_detection_interval = config.detection_interval
             self.registration_samples = config.registration_samples
+            tracker_settings = (config.track_iou_threshold, config.track_max_missed, config.reverify_interval)
+            enable_tracking = config.enable_tracking
+            self.detector_escalation = DetectorEscalationPolicy(config.enable_cnn_fallback, config.cnn_min_interval,
+                                                                config.cnn_scale, config.cnn_require_motion,
+                                                                config.cnn_max_duty_cycle)
+            self.perf = StageTimer(config.enable_stage_timing, config.stage_timing_window)
+            self.enable_authorized_users = config.enable_authorized_users
+            self.gallery_settings = {'brute_force_limit': config.gallery_brute_force_limit,
+                                     'n_clusters': config.gallery_clusters, 'n_probe': config.gallery_probes}
+            self.consolidation_settings = (config.enable_consolidation, config.max_templates_per_identity,
+                                           config.identity_template_caps)
+            self.adaptation = (TemplateReservoir(config.adaptation_capacity, config.adaptation_min_margin,
+                                                 config.adaptation_min_streak, config.adaptation_min_interval,
+                                                 space='encoding')
+                               if config.enable_adaptation else None)
         else:
             self.config_file = "face_security_config.pkl"
             self.key_file = "security.key"
             self.grace_period = 3
             self.face_detection_interval = 1.0
             self.registration_samples = 5
+            tracker_settings = (0.3, 5, 2.0)
+            enable_tracking = True
+            self.detector_escalation = DetectorEscalationPolicy()
+            self.perf = StageTimer()
+            self.enable_authorized_users = True
+            self.gallery_settings = {}
+            self.consolidation_settings = (True, 50, {})
+            self.adaptation = None
+        
+        self.profile_writer = None  # Background writer for adapted templates, created on first use
+        self.config_lock = threading.RLock()
             
+        # Detect-then-track: identities are carried with face tracks between recognitions
+        self.face_tracker = FaceTracker(*tracker_settings) if enable_tracking else None
+        self.motion_gate = None  # Created by monitor_faces, consulted before CNN escalation
+        self.face_count_probe = True
+        self.pipeline = None  # MonitorPipeline while monitoring in threaded mode
+        self.inference_pool = None  # Detection/encoding worker processes of the threaded pipeline
+        
+        # Fallback system keeps its own blur strength, only the engine tier is configurable
+        self.blur_engine = BlurEngine(config.blur_quality if CONFIG_AVAILABLE else 'balanced',
+                                      blur_intensity=15, quality_reduction=4, overlay_darkness=100,
+                                      workers=config.blur_workers if CONFIG_AVAILABLE else 0)
+        
         self.is_monitoring = False
         self.screen_blurred = False
         self.camera = None
-        self.blur_window = None
-        self.blur_thread = None
+        self.frame_source = frame_source  # Optional injected FrameSource (video, images, synthetic)
+        # Screen capture, blurred snapshots and the per-monitor lock overlays (see lock_screen.py)
+        self.lock_screen = LockScreen(self.blur_engine,
+                                      lambda monitor: self.render_lock_panel(monitor.width, monitor.height,
+                                                                             *self.lock_overlay_text(), monitor.scale),
+                                      rely=0.4, screen_capture=screen_capture,
+                                      capture_backend=config.screen_capture_backend if CONFIG_AVAILABLE else 'auto')
         self.last_face_time = time.time()
         self.owner_detected = True
         self.setup_encryption()
@@ -69,6 +125,19 @@ class FaceSecuritySystem:
         """Hash password for secure storage"""
         return hashlib.sha256(password.encode()).hexdigest()
     
+    def open_frame_source(self, width, height, fps):
+        """Open the injected frame source, or the one selected in config.ini"""
+        if self.frame_source is not None:
+            source = self.frame_source
+        elif CONFIG_AVAILABLE:
+            source = frame_source_from_config(width, height, fps)
+        else:
+            source = CameraSource(0, width, height, fps)
+        
+        if not source.open():
+            return None
+        return source
+    
     def register_owner(self):
         """Register the owner's face with password protection"""
         print("=== Owner Registration ===")
@@ -89,13 +158,44 @@ class FaceSecuritySystem:
         
         root.destroy()
         
+        face_encodings = self.capture_face_samples()
+        if face_encodings is None:
+            return False
+        
+        if len(face_encodings) >= self.registration_samples:  # Use config value
+            if self.consolidation_settings[0]:
+                face_encodings = list(self.consolidate_identity(self.owner_name, face_encodings).templates)
+            
+            # Save the configuration
+            config = {
+                'face_encodings': face_encodings,
+                'owner_name': self.owner_name,
+                'password_hash': self.hash_password(password),
+                'registration_date': datetime.now().isoformat()
+            }
+            if self.gallery is not None:
+                config['authorized_users'] = self.gallery.to_dict()  # Keep the authorized users
+            
+            # Encrypt and save atomically, after any queued adapted-template write for the old profile
+            if self.profile_writer is not None:
+                self.profile_writer.flush()
+            self._write_config(config)
+            
+            print(f"Owner registration successful! Collected {len(face_encodings)} face samples.")
+            return True
+        else:
+            print(f"Registration failed - need at least {self.registration_samples} face samples, got {len(face_encodings)}")
+            return False
+    
+    def capture_face_samples(self, title='Owner Registration', label="Owner Face"):
+        """Capture face encodings from the camera (SPACE per sample), returns None when cancelled"""
         print("Position yourself in front of the camera...")
         print("Press SPACE to capture your face, ESC to cancel")
         
-        cap = cv2.VideoCapture(0)
-        if not cap.isOpened():
+        cap = self.open_frame_source(640, 480, 30)
+        if cap is None:
             print("Error: Could not open camera")
-            return False
+            return None
         
         face_encodings = []
         
@@ -116,7 +216,7 @@ class FaceSecuritySystem:
             # Draw rectangles around faces
             for (top, right, bottom, left) in face_locations:
                 cv2.rectangle(frame, (left, top), (right, bottom), (0, 255, 0), 2)
-                cv2.putText(frame, "Owner Face", (left, top-10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+                cv2.putText(frame, label, (left, top-10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
             
             cv2.putText(frame, "Press SPACE to capture, ESC to cancel", (10, 30), 
                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
@@ -125,7 +225,7 @@ class FaceSecuritySystem:
             cv2.putText(frame, f"Samples needed: {len(face_encodings)}/{self.registration_samples}", (10, 90), 
                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
             
-            cv2.imshow('Owner Registration', frame)
+            cv2.imshow(title, frame)
             
             key = cv2.waitKey(1) & 0xFF
             if key == ord(' '):  # Space to capture
@@ -140,30 +240,12 @@ class FaceSecuritySystem:
             elif key == 27:  # ESC to cancel
                 cap.release()
                 cv2.destroyAllWindows()
-                return False
+                return None
         
         cap.release()
         cv2.destroyAllWindows()
         
-        if len(face_encodings) >= self.registration_samples:  # Use config value
-            # Save the configuration
-            config = {
-                'face_encodings': face_encodings,
-                'owner_name': self.owner_name,
-                'password_hash': self.hash_password(password),
-                'registration_date': datetime.now().isoformat()
-            }
-            
-            # Encrypt and save
-            encrypted_data = self.cipher.encrypt(pickle.dumps(config))
-            with open(self.config_file, 'wb') as f:
-                f.write(encrypted_data)
-            
-            print(f"Owner registration successful! Collected {len(face_encodings)} face samples.")
-            return True
-        else:
-            print(f"Registration failed - need at least {self.registration_samples} face samples, got {len(face_encodings)}")
-            return False
+        return face_encodings
     
     def load_owner_data(self):
         """Load owner's face data"""
@@ -179,11 +261,124 @@ class FaceSecuritySystem:
             
             self.owner_face_encodings = config['face_encodings']
             self.owner_name = config['owner_name']
+            self.gallery = None
+            if self.enable_authorized_users and config.get('authorized_users'):
+                self.gallery = FaceGallery.from_dict(config['authorized_users'], **self.gallery_settings)
+            if self.adaptation is not None:
+                self.adaptation.load(config.get('adapted_templates'))
+            self.update_owner_matcher()
             return True
         except Exception as e:
             print(f"Error loading configuration: {e}")
             return False
     
+    def _read_config(self):
+        with self.config_lock:
+            with open(self.config_file, 'rb') as f:
+                return pickle.loads(self.cipher.decrypt(f.read()))
+    
+    def _write_config(self, config):
+        """Encrypt and replace the profile atomically (it may be written from the profile writer thread)"""
+        with self.config_lock:
+            temp_file = self.config_file + '.tmp'
+            with open(temp_file, 'wb') as f:
+                f.write(self.cipher.encrypt(pickle.dumps(config)))
+            os.replace(temp_file, self.config_file)
+    
+    def add_authorized_user(self, name, encodings, policy=None):
+        """Store an additional authorized identity with its encodings and policy in the encrypted config"""
+        config = self._read_config()
+        gallery = self.gallery or FaceGallery('euclidean', **self.gallery_settings)
+        if self.consolidation_settings[0]:
+            encodings = self.consolidate_identity(name, encodings).templates
+        gallery.add_identity(name, encodings, policy)
+        config['authorized_users'] = gallery.to_dict()
+        self._write_config(config)
+        self.gallery = gallery
+        return gallery.identity(name)
+    
+    def template_cap(self, name):
+        """Maximum templates kept for an identity"""
+        _, max_templates, caps = self.consolidation_settings
+        return caps.get(name, max_templates)
+    
+    def consolidate_identity(self, name, encodings):
+        """k-medoids + centroid consolidation of one identity's encodings, logs the score change"""
+        result = consolidate_templates(encodings, self.template_cap(name), 'euclidean')
+        if result.changed:
+            print(f"🧩 Consolidated {format_report(name, result.report)}")
+        return result
+    
+    def consolidate_all_templates(self):
+        """Consolidate the owner and every authorized user on demand and save the result"""
+        if not self.load_owner_data():
+            print("No owner registered")
+            return False
+        
+        config = self._read_config()
+        owner = self.consolidate_identity(self.owner_name, self.owner_face_encodings)
+        reports = {self.owner_name: owner.report}
+        if owner.changed:
+            self.owner_face_encodings = list(owner.templates)
+            config['face_encodings'] = self.owner_face_encodings
+            self.update_owner_matcher()
+        
+        if self.gallery is not None:
+            updates = {}
+            for name, templates in zip(self.gallery.names(), self.gallery.templates):
+                result = self.consolidate_identity(name, templates)
+                reports[name] = result.report
+                if result.changed:
+                    updates[name] = result.templates
+            if updates:
+                self.gallery.replace_templates(updates)
+                config['authorized_users'] = self.gallery.to_dict()
+        
+        self._write_config(config)
+        for name, report in reports.items():
+            print(f"   {format_report(name, report)}")
+        return reports
+    
+    def remove_authorized_user(self, name):
+        """Delete an authorized identity, returns False if it does not exist"""
+        if self.gallery is None or not self.gallery.remove_identity(name):
+            return False
+        config = self._read_config()
+        config['authorized_users'] = self.gallery.to_dict()
+        self._write_config(config)
+        return True
+    
+    def register_authorized_user(self):
+        """Register an additional authorized user, confirmed with the owner password"""
+        print("=== Authorized User Registration ===")
+        if not self.load_owner_data():
+            print("Register the owner first")
+            return False
+        
+        root = tk.Tk()
+        root.withdraw()
+        password = simpledialog.askstring("Authorized User", "Owner password:", show='*')
+        if not password or not self.verify_password(password):
+            messagebox.showerror("Error", "Invalid password!")
+            root.destroy()
+            return False
+        name = simpledialog.askstring("Authorized User", "Name of the user:")
+        allow_unlock = messagebox.askyesno("Authorized User", "May this user unlock the screen?")
+        root.destroy()
+        if not name or name == self.owner_name:
+            print("A unique user name is required")
+            return False
+        
+        face_encodings = self.capture_face_samples('Authorized User Registration', name)
+        if face_encodings is None or len(face_encodings) < self.registration_samples:
+            print("Registration failed - insufficient face samples")
+            return False
+        
+        self.add_authorized_user(name, face_encodings, {'allow_unlock': allow_unlock})
+        print(f"Authorized user '{name}' registered with {len(face_encodings)} face samples "
+              f"({self.gallery.get_stats()['identities']} authorized users)")
+        return True
+    
     def verify_password(self, password):
         """Verify password against stored hash"""
         if not os.path.exists(self.config_file):
@@ -201,96 +396,292 @@ class FaceSecuritySystem:
             print(f"Error verifying password: {e}")
             return False
     
-    def detect_faces(self, frame):
-        """Enhanced face detection with preprocessing and better accuracy"""
-        try:
-            # Preprocess frame for better detection
-            # 1. Resize for faster processing while maintaining quality
-            original_frame = frame.copy()
-            height, width = frame.shape[:2]
-            
-            # Use higher resolution if available for better accuracy
-            if CONFIG_AVAILABLE:
-                detection_scale = 1.0 if min(width, height) >= 720 else 1.5
-            else:
-                detection_scale = 1.0
-            
-            if detection_scale != 1.0:
-                new_width = int(width * detection_scale)
-                new_height = int(height * detection_scale)
-                frame = cv2.resize(frame, (new_width, new_height), interpolation=cv2.INTER_CUBIC)
-            
-            # 2. Enhance image quality
-            # Apply histogram equalization for better lighting
-            yuv = cv2.cvtColor(frame, cv2.COLOR_BGR2YUV)
-            yuv[:,:,0] = cv2.equalizeHist(yuv[:,:,0])
-            frame = cv2.cvtColor(yuv, cv2.COLOR_YUV2BGR)
-            
-            # 3. Apply slight Gaussian blur to reduce noise
-            frame = cv2.GaussianBlur(frame, (3, 3), 0.5)
-            
-            # Convert to RGB for face_recognition
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            
+    def preprocess_frame(self, frame):
+        """Upscale, equalize and denoise a frame for detection, returns (rgb_frame, detection_scale)"""
+        # Use higher resolution if available for better accuracy (shared with the inference workers)
+        detection_scale = detection_scale_for(frame.shape, upscale_small=CONFIG_AVAILABLE)
+        return preprocess_for_detection(frame, detection_scale), detection_scale
+    
+    def detect_face_locations(self, frame):
+        """Preprocess a frame and find face locations (top, right, bottom, left) in original frame coordinates"""
+        with self.perf.stage('preprocess'):
+            rgb_frame, detection_scale = self.preprocess_frame(frame)
+        
+        with self.perf.stage('detection'):
             # Use better face detection model
             face_locations = face_recognition.face_locations(rgb_frame, model='hog')  # More accurate than default
+            self.detector_escalation.record_hog()
             
             if not face_locations:
-                # Try with CNN model if HOG fails (slower but more accurate)
-                try:
-                    face_locations = face_recognition.face_locations(rgb_frame, model='cnn')
-                except:
-                    pass  # Fall back to no faces detected
-            
-            # Scale back face locations if we resized
-            if detection_scale != 1.0:
-                face_locations = [(int(top/detection_scale), int(right/detection_scale), 
-                                 int(bottom/detection_scale), int(left/detection_scale)) 
-                                for (top, right, bottom, left) in face_locations]
-            
-            # Extract face encodings with enhanced tolerance
-            face_encodings = face_recognition.face_encodings(cv2.cvtColor(original_frame, cv2.COLOR_BGR2RGB), 
-                                                           face_locations, num_jitters=2)  # More jitters for accuracy
-            
-            owner_detected = False
-            unauthorized_face_detected = False
-            total_faces = len(face_locations)
-            recognized_faces = 0
-            
-            # Enhanced face comparison with multiple tolerance levels
-            similarity_threshold = config.similarity_threshold if CONFIG_AVAILABLE else 0.8
-            
-            for i, face_encoding in enumerate(face_encodings):
-                is_owner = False
-                
-                # Try multiple tolerance levels for better accuracy
-                for tolerance in [0.5, 0.6, similarity_threshold]:
-                    matches = face_recognition.compare_faces(self.owner_face_encodings, face_encoding, tolerance=tolerance)
-                    
-                    if True in matches:
-                        # Calculate confidence using face distance
-                        face_distances = face_recognition.face_distance(self.owner_face_encodings, face_encoding)
-                        best_match_distance = min(face_distances)
-                        
-                        # Additional confidence check
-                        if best_match_distance < tolerance:
-                            owner_detected = True
-                            recognized_faces += 1
-                            is_owner = True
-                            break
-                
-                if not is_owner:
-                    unauthorized_face_detected = True
-            
-            face_detected = total_faces > 0
-            
-            return owner_detected, face_detected, unauthorized_face_detected, total_faces
+                # Try with CNN model if HOG fails (slower but more accurate) - budgeted and rate limited
+                face_locations = self._escalate_to_cnn(rgb_frame, detection_scale)
+        
+        # Scale back face locations if we resized
+        if detection_scale != 1.0:
+            face_locations = [(int(top/detection_scale), int(right/detection_scale), 
+                             int(bottom/detection_scale), int(left/detection_scale)) 
+                            for (top, right, bottom, left) in face_locations]
+        
+        return face_locations
+    
+    def _escalate_to_cnn(self, rgb_frame, detection_scale):
+        """CNN retry on a downscaled copy of the preprocessed frame, when the escalation policy allows it"""
+        now = time.time()
+        motion_seen = self.motion_gate.last_changed if self.motion_gate is not None else True
+        if not self.detector_escalation.allow_cnn(now, motion_seen):
+            return []
+        
+        # CNN input size relative to the original frame, independent of the detection upscale
+        cnn_scale = self.detector_escalation.scale / detection_scale
+        small_rgb = cv2.resize(rgb_frame, (0, 0), fx=cnn_scale, fy=cnn_scale, interpolation=cv2.INTER_AREA)
+        try:
+            face_locations = face_recognition.face_locations(small_rgb, model='cnn')
+        except Exception:
+            face_locations = []  # Fall back to no faces detected
+        self.detector_escalation.record_cnn(now, time.time(), len(face_locations))
+        
+        # Back to preprocessed frame coordinates
+        return [(int(top / cnn_scale), int(right / cnn_scale), int(bottom / cnn_scale), int(left / cnn_scale))
+                for (top, right, bottom, left) in face_locations]
+    
+    def encode_faces(self, frame, face_locations):
+        """Face encodings for the given locations in the original frame"""
+        # Extract face encodings with enhanced tolerance
+        with self.perf.stage('extraction'):
+            return face_recognition.face_encodings(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB), 
+                                                   face_locations, num_jitters=2)  # More jitters for accuracy
+    
+    def update_owner_matcher(self):
+        """Stack the owner encodings once into a gallery for batched distance matching"""
+        similarity_threshold = config.similarity_threshold if CONFIG_AVAILABLE else 0.8
+        
+        samples = list(self.owner_face_encodings)
+        if self.adaptation is not None:
+            samples += self.adaptation.templates  # Adapted templates follow the enrolled ones
+        
+        # Enhanced face comparison with multiple tolerance levels
+        self.owner_matcher = EncodingMatcher(samples, [0.5, 0.6, similarity_threshold])
+        return self.owner_matcher
+    
+    def adapt_owner_template(self, track, now):
+        """Fold a sustained, high-margin owner track into the adapted templates, returns the slot or None"""
+        if (self.adaptation is None or not track.is_owner or track.identity is not None
+                or not self.adaptation.eligible(track.owner_streak, now)):
+            return None
+        
+        enrolled = len(self.owner_face_encodings)
+        distances = self.owner_matcher.distances([track.landmarks])[0]
+        anchored = enrolled > 0 and distances[:enrolled].min() < self.owner_matcher.tolerances.max()
+        margin = float(self.owner_matcher.tolerances.min() - distances.min())
+        slot = self.adaptation.offer(track.landmarks, margin, now, anchored)
+        if slot is not None:
+            # One row update instead of rebuilding the gallery
+            self.owner_matcher.set_sample(enrolled + slot, track.landmarks)
+            self.save_adapted_templates()
+        return slot
+    
+    def save_adapted_templates(self):
+        """Queue the adapted templates for an asynchronous write to the encrypted profile"""
+        if self.profile_writer is None:
+            self.profile_writer = AsyncProfileWriter(self._write_adapted_templates)
+        self.profile_writer.submit(self.adaptation.to_dict())
+    
+    def _write_adapted_templates(self, snapshot):
+        with self.config_lock:
+            config = self._read_config()
+            config['adapted_templates'] = snapshot
+            self._write_config(config)
+    
+    def match_encodings(self, face_encodings):
+        """Score all encodings of a frame against all owner samples with one distance matrix"""
+        if self.owner_matcher is None:
+            self.update_owner_matcher()
+        with self.perf.stage('matching'):
+            result = self.owner_matcher.match(face_encodings)
+            return authorize_with_gallery(result, self.gallery, face_encodings, self._accept_gallery_face)
+    
+    def _accept_gallery_face(self, identity, distance, face_encoding, template_std=None):
+        """Gallery decision with the owner's loosest tolerance unless the identity sets its own (no quality term)"""
+        tolerance = identity.threshold if identity.threshold is not None else float(self.owner_matcher.tolerances.max())
+        return distance < tolerance, 1.0 - distance
+    
+    def match_encoding(self, face_encoding):
+        """Match an encoding against the owner samples, returns (is_owner, confidence score)"""
+        result = self.match_encodings([face_encoding])
+        return bool(result.is_owner[0]), float(result.confidence[0])
+    
+    def analyze_frame(self, frame):
+        """Enhanced face detection with preprocessing and better accuracy, returns a FrameAnalysis"""
+        try:
+            face_locations = self.detect_face_locations(frame)
+            return self.recognize_locations(frame, face_locations)
             
         except Exception as e:
             print(f"Error in enhanced face detection: {e}")
             # Fallback to basic detection
             return self._basic_face_detection(frame)
     
+    def recognize_locations(self, frame, face_locations, face_encodings=None):
+        """Encode (unless encoded by a worker) and match already detected faces, returns a FrameAnalysis"""
+        if face_encodings is None:
+            face_encodings = self.encode_faces(frame, face_locations)
+        
+        result = self.match_encodings(face_encodings)
+        
+        analysis = FrameAnalysis(frame.shape)
+        for i, (face_location, face_encoding) in enumerate(zip(face_locations, face_encodings)):
+            analysis.add_face(self.location_to_box(face_location), face_encoding, float(result.confidence[i]),
+                              bool(result.is_owner[i]), distance=float(result.best_score[i]),
+                              identity=result.identities[i])
+        
+        return analysis
+    
+    def analyze_frame_tracked(self, frame, now=None):
+        """Detect-then-track analysis - encodings and matching only run for new or re-verified tracks"""
+        now = now if now is not None else time.time()
+        try:
+            face_locations = self.detect_face_locations(frame)
+            return self.recognize_tracked(frame, face_locations, now)
+            
+        except Exception as e:
+            print(f"Error in tracked face detection: {e}")
+            return self._basic_face_detection(frame)
+    
+    def recognize_tracked(self, frame, face_locations, now, face_encodings=None):
+        """Update the face tracks with detected faces and recognise only new or re-verified tracks"""
+        tracks = self.face_tracker.update([self.location_to_box(location) for location in face_locations], now)
+        pending = self.face_tracker.pending(tracks, now)
+        
+        if pending:
+            # Encode only the faces whose identity is unknown or due for re-verification
+            pending_faces = [tracks.index(track) for track in pending]
+            if face_encodings is not None:
+                pending_encodings = [face_encodings[i] for i in pending_faces]
+            else:
+                pending_encodings = self.encode_faces(frame, [face_locations[i] for i in pending_faces])
+            result = self.match_encodings(pending_encodings)
+            for i, (track, face_encoding) in enumerate(zip(pending, pending_encodings)):
+                self.face_tracker.recognize(track, bool(result.is_owner[i]), float(result.confidence[i]), face_encoding,
+                                            now, distance=float(result.best_score[i]), identity=result.identities[i])
+                self.adapt_owner_template(track, now)
+        
+        # Tracks that could not be recognised yet count as unauthorized (fail-safe)
+        analysis = FrameAnalysis(frame.shape, now)
+        for track in tracks:
+            analysis.add_face(track.box, track.landmarks, track.score, bool(track.is_owner), track.track_id,
+                              track.distance, track.identity)
+        return analysis
+    
+    def run_analysis(self, frame, now=None):
+        """Analyse a frame, through the face tracker when tracking is enabled"""
+        if self.face_tracker is not None:
+            return self.analyze_frame_tracked(frame, now)
+        return self.analyze_frame(frame)
+    
+    def detect_stage(self, frame, now=None):
+        """Detection half of run_analysis (threaded pipeline), returns face locations or None on error
+        
+        With inference workers the frame is only handed to the pool and an
+        InferenceFuture is returned - detection and encoding run in a worker.
+        If no worker slot frees up in time or the workers are gone, the error
+        is handed on so the recognition stage fails safe.
+        """
+        try:
+            if self.inference_pool is not None:
+                try:
+                    future = self.inference_pool.submit(frame, self.inference_pool.result_timeout())
+                except RuntimeError as e:
+                    return e  # Workers exited or the pool was closed
+                return future if future is not None else TimeoutError("No inference worker slot became free in time")
+            return self.detect_face_locations(frame)
+        except Exception as e:
+            print(f"Error in face detection stage: {e}")
+            return None
+    
+    def recognize_stage(self, frame, face_locations, now=None):
+        """Recognition half of run_analysis (threaded pipeline), returns a FrameAnalysis"""
+        if isinstance(face_locations, Exception):
+            print(f"⚠️  {face_locations} - treating the frame as unauthorized")
+            return FrameAnalysis.failsafe(frame.shape, str(face_locations))
+        if face_locations is None:
+            return self._basic_face_detection(frame)
+        now = now if now is not None else time.time()
+        try:
+            face_encodings = None
+            if isinstance(face_locations, InferenceFuture):
+                face_locations, face_encodings = self.collect_worker_result(frame, face_locations)
+            if self.face_tracker is not None:
+                return self.recognize_tracked(frame, face_locations, now, face_encodings)
+            return self.recognize_locations(frame, face_locations, face_encodings)
+        except TimeoutError as e:
+            # A stalled worker must not hold up the lock decision - assume unauthorized
+            print(f"⚠️  {e} - treating the frame as unauthorized")
+            return FrameAnalysis.failsafe(frame.shape, str(e))
+        except Exception as e:
+            if self.inference_pool is not None and not self.inference_pool.alive:
+                print(f"⚠️  Inference workers stopped ({e}) - treating the frame as unauthorized")
+                return FrameAnalysis.failsafe(frame.shape, str(e))
+            print(f"Error in face recognition stage: {e}")
+            return self._basic_face_detection(frame)
+    
+    def collect_worker_result(self, frame, future):
+        """Face locations and encodings from an inference worker, returns (locations, encodings or None)
+        
+        An empty HOG result still gets the budgeted CNN retry, in this process.
+        Raises TimeoutError when the workers are slower than their recent
+        average allows (see InferencePool.result_timeout)
+        """
+        result = self.inference_pool.wait(future)
+        self.detector_escalation.record_hog()
+        if len(result['locations']):
+            return [tuple(int(value) for value in location) for location in result['locations']], list(result['encodings'])
+        
+        with self.perf.stage('preprocess'):
+            rgb_frame, detection_scale = self.preprocess_frame(frame)
+        with self.perf.stage('detection'):
+            face_locations = self._escalate_to_cnn(rgb_frame, detection_scale)
+        return [(int(top / detection_scale), int(right / detection_scale),
+                 int(bottom / detection_scale), int(left / detection_scale))
+                for (top, right, bottom, left) in face_locations], None
+    
+    def gate_frame(self, frame, current_time, analysed_before=True):
+        """Whether a frame needs a fresh analysis, returns (analyse, face count probe result)
+        
+        A static scene (motion gate) or a stably alone owner (detection
+        scheduler) reuses the last analysis instead
+        """
+        with self.perf.stage('motion'):
+            scene_changed = self.motion_gate.has_changed(frame, current_time)
+        if analysed_before and not scene_changed:
+            self.detection_scheduler.record_skipped()  # Still a frame the scheduler's skip ratio covers
+            return False, None
+        
+        face_count = None
+        if self.face_count_probe and self.detection_scheduler.wants_probe:
+            with self.perf.stage('probe'):
+                face_count = self.count_faces(frame)
+        analyse = self.detection_scheduler.should_analyze(current_time, face_count)
+        return analyse or not analysed_before, face_count
+    
+    def detect_faces(self, frame):
+        """Enhanced face detection with preprocessing and better accuracy"""
+        return self.analyze_frame(frame).as_detection_result()
+    
+    def location_to_box(self, face_location):
+        """Convert a face_recognition (top, right, bottom, left) location to (x, y, width, height)"""
+        top, right, bottom, left = face_location
+        return left, top, right - left, bottom - top
+    
+    def count_faces(self, frame, scale=0.25):
+        """Cheap face-count probe on a downscaled frame (HOG only, no encodings)"""
+        try:
+            small_frame = cv2.resize(frame, (0, 0), fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            rgb_small = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
+            return len(face_recognition.face_locations(rgb_small, model='hog'))
+        except Exception as e:
+            print(f"Error in face count probe: {e}")
+            return None
+    
     def _basic_face_detection(self, frame):
         """Fallback basic face detection method"""
         try:
@@ -298,147 +689,28 @@ class FaceSecuritySystem:
             face_locations = face_recognition.face_locations(rgb_frame)
             face_encodings = face_recognition.face_encodings(rgb_frame, face_locations)
             
-            owner_detected = False
-            unauthorized_face_detected = False
-            total_faces = len(face_locations)
+            analysis = FrameAnalysis(frame.shape)
             
-            for face_encoding in face_encodings:
+            for face_location, face_encoding in zip(face_locations, face_encodings):
                 matches = face_recognition.compare_faces(self.owner_face_encodings, face_encoding, tolerance=0.6)
-                
-                if True in matches:
-                    owner_detected = True
-                else:
-                    unauthorized_face_detected = True
+                analysis.add_face(self.location_to_box(face_location), face_encoding, 0, True in matches)
             
-            face_detected = total_faces > 0
-            return owner_detected, face_detected, unauthorized_face_detected, total_faces
+            return analysis
             
         except Exception as e:
             print(f"Error in basic face detection: {e}")
-            return False, False, False, 0
-    
-    def get_screen_size(self):
-        """Get screen dimensions"""
-        user32 = windll.user32
-        return user32.GetSystemMetrics(0), user32.GetSystemMetrics(1)
+            return FrameAnalysis(frame.shape)
     
     def capture_screen(self):
         """Capture the current screen content"""
-        try:
-            # Get screen dimensions
-            screen_width, screen_height = self.get_screen_size()
-            
-            # Create device context
-            hwindc = win32gui.GetWindowDC(0)
-            srcdc = win32ui.CreateDCFromHandle(hwindc)
-            memdc = srcdc.CreateCompatibleDC()
-            
-            # Create bitmap
-            bmp = win32ui.CreateBitmap()
-            bmp.CreateCompatibleBitmap(srcdc, screen_width, screen_height)
-            memdc.SelectObject(bmp)
-            
-            # Copy screen to bitmap
-            memdc.BitBlt((0, 0), (screen_width, screen_height), srcdc, (0, 0), win32con.SRCCOPY)
-            
-            # Convert to PIL Image
-            bmpinfo = bmp.GetInfo()
-            bmpstr = bmp.GetBitmapBits(True)
-            
-            # Create PIL image from bitmap data
-            img = Image.frombuffer(
-                'RGB',
-                (bmpinfo['bmWidth'], bmpinfo['bmHeight']),
-                bmpstr, 'raw', 'BGRX', 0, 1)
-            
-            # Clean up
-            srcdc.DeleteDC()
-            memdc.DeleteDC()
-            win32gui.ReleaseDC(0, hwindc)
-            win32gui.DeleteObject(bmp.GetHandle())
-            
-            return img
-            
-        except Exception as e:
-            print(f"Error capturing screen: {e}")
-            return None
+        return self.lock_screen.capture_screen()
     
-    def create_blurred_background(self):
-        """Create a blurred version of the current screen"""
-        try:
-            # Note: face_security_system.py doesn't have CONFIG_AVAILABLE, so use defaults
-            # or implement a simple config check
-            
-            # Capture current screen
-            screen_image = self.capture_screen()
-            if screen_image is None:
-                return None
-            
-            # Use default values since this is the fallback system
-            blur_intensity = 15
-            quality_reduction = 4
-            overlay_darkness = 100
-            
-            # Apply blur effect
-            # Reduce size for performance, then upscale
-            small_size = (screen_image.width // quality_reduction, screen_image.height // quality_reduction)
-            screen_image_small = screen_image.resize(small_size, Image.Resampling.LANCZOS)
-            
-            # Apply multiple blur passes for stronger effect
-            blurred = screen_image_small.filter(ImageFilter.GaussianBlur(radius=blur_intensity))
-            blurred = blurred.filter(ImageFilter.GaussianBlur(radius=blur_intensity//2))
-            
-            # Scale back to full size
-            blurred_full = blurred.resize(screen_image.size, Image.Resampling.LANCZOS)
-            
-            # Add darkening overlay for better text readability
-            overlay = Image.new('RGBA', blurred_full.size, (0, 0, 0, overlay_darkness))  # Semi-transparent black
-            blurred_full = blurred_full.convert('RGBA')
-            blurred_full = Image.alpha_composite(blurred_full, overlay)
-            
-            return blurred_full.convert('RGB')
-            
-        except Exception as e:
-            print(f"Error creating blurred background: {e}")
-            return None
+    def create_blurred_background(self, screen_image=None):
+        """Create a blurred version of the current screen (or of a given PIL screen image)"""
+        return self.lock_screen.create_blurred_background(screen_image)
 
-    def create_blur_overlay(self):
-        """Create a modern blurred overlay window with text"""
-        if self.blur_window:
-            return
-        
-        screen_width, screen_height = self.get_screen_size()
-        
-        # Create fullscreen window
-        self.blur_window = tk.Toplevel()
-        self.blur_window.title("Screen Security")
-        self.blur_window.attributes('-fullscreen', True)
-        self.blur_window.attributes('-topmost', True)
-        self.blur_window.attributes('-toolwindow', True)
-        self.blur_window.configure(bg='#000000')
-        
-        try:
-            # Create blurred background
-            print("Capturing and blurring screen...")
-            blurred_bg = self.create_blurred_background()
-            
-            if blurred_bg:
-                # Convert PIL image to PhotoImage for tkinter
-                photo = ImageTk.PhotoImage(blurred_bg)
-                
-                # Create background label with blurred image
-                bg_label = tk.Label(self.blur_window, image=photo, bd=0, highlightthickness=0)
-                bg_label.image = photo  # Keep a reference
-                bg_label.place(x=0, y=0, relwidth=1, relheight=1)
-            else:
-                # Fallback to gradient background if screen capture fails
-                self.blur_window.configure(bg='#1a1a1a')
-                
-        except Exception as e:
-            print(f"Error setting blurred background: {e}")
-            # Fallback to dark background
-            self.blur_window.configure(bg='#1a1a1a')
-        
+    def lock_overlay_text(self):
+        """Warning text and unlock hotkey shown on the lock overlay"""
         # Try to load config for warning text and hotkey
         try:
             from config_loader import config
@@ -461,91 +733,41 @@ Press Ctrl+Alt+O to enter unlock password
 
 ⚠️ All access attempts are being logged ⚠️"""
             hotkey = 'ctrl+alt+o'
+        return warning_text, hotkey
+    
+    def render_lock_panel(self, screen_width, screen_height, warning_text, hotkey, scale=1.0):
+        """Pre-render the glass card with the security alert and warning text, scaled for the monitor's DPI"""
+        wraplength = min(screen_width-300*scale, 700*scale)
+        main_lines = [wrapped for line in warning_text.split('\n')[2:]  # Skip header lines shown above
+                      for wrapped in wrap_line(line, 14*scale, 'normal', wraplength)]
+        entries = [("🔒 SECURITY ALERT", 24, 'bold', '#ff4757', 0),            # Bright red for attention
+                   ("UNAUTHORIZED ACCESS DETECTED", 16, 'normal', '#ffa502', 15)]  # Orange for warning
+        entries += [(line, 14, 'normal', '#ffffff', 20 if i == 0 else 0) for i, line in enumerate(main_lines)]
+        entries += [(f"Press {hotkey.upper()} to unlock", 16, 'bold', '#2ed573', 30),  # Green for action
+                    ("⚠️ This session is being monitored and logged ⚠️", 12, 'italic', '#747d8c', 15)]
         
-        # Create modern glass overlay with enhanced design
-        text_frame = tk.Frame(self.blur_window)
-        text_frame.configure(bg='#000000', relief='flat', bd=0, highlightthickness=0)
-        text_frame.place(relx=0.5, rely=0.4, anchor='center')
-        
-        # Enhanced glassmorphism container with multiple layers
-        glass_container = tk.Frame(text_frame)
-        glass_container.configure(bg='#1a1a1a', relief='flat', bd=0, 
-                                 highlightthickness=2, highlightcolor='#3a3a3a')
-        glass_container.pack(padx=40, pady=30)
-        
-        # Add subtle glow effect layers
-        for i, (color, width, offset) in enumerate([
-            ('#ffffff', 1, 6),   # Bright inner glow
-            ('#cccccc', 1, 8),   # Medium glow  
-            ('#999999', 1, 10),  # Outer glow
-        ]):
-            glow_frame = tk.Frame(self.blur_window, bg=color, highlightthickness=0)
-            glow_frame.place(relx=0.5, rely=0.4, anchor='center',
-                           width=glass_container.winfo_reqwidth() + width * 20 + offset,
-                           height=glass_container.winfo_reqheight() + width * 15 + offset)
-            glow_frame.lower()
-        
-        # Main content with improved typography
-        content_frame = tk.Frame(glass_container, bg='#1a1a1a', bd=0)
-        content_frame.pack(padx=30, pady=25)
-        
-        # Header with icon
-        header_frame = tk.Frame(content_frame, bg='#1a1a1a')
-        header_frame.pack(fill='x', pady=(0, 15))
-        
-        header_label = tk.Label(header_frame,
-                               text="🔒 SECURITY ALERT",
-                               font=('Segoe UI', 24, 'bold'),
-                               fg='#ff4757',  # Bright red for attention
-                               bg='#1a1a1a',
-                               justify='center')
-        header_label.pack()
-        
-        # Subtitle
-        subtitle_label = tk.Label(content_frame,
-                                 text="UNAUTHORIZED ACCESS DETECTED",
-                                 font=('Segoe UI', 16, 'normal'),
-                                 fg='#ffa502',  # Orange for warning
-                                 bg='#1a1a1a',
-                                 justify='center')
-        subtitle_label.pack(pady=(0, 20))
-        
-        # Main message with better formatting
-        lines = warning_text.split('\n')[2:]  # Skip header lines we already displayed
-        main_text = '\n'.join(lines)
-        
-        text_label = tk.Label(content_frame,
-                             text=main_text,
-                             font=('Segoe UI', 14, 'normal'),
-                             fg='#ffffff',
-                             bg='#1a1a1a',
-                             justify='center',
-                             wraplength=min(screen_width-300, 700))
-        text_label.pack(pady=(0, 20))
-        
-        # Action button style
-        action_frame = tk.Frame(content_frame, bg='#1a1a1a')
-        action_frame.pack(fill='x', pady=(10, 0))
-        
-        action_label = tk.Label(action_frame,
-                               text=f"Press {hotkey.upper()} to unlock",
-                               font=('Segoe UI', 16, 'bold'),
-                               fg='#2ed573',  # Green for action
-                               bg='#1a1a1a',
-                               justify='center')
-        action_label.pack()
-        
-        # Monitoring notice
-        notice_label = tk.Label(content_frame,
-                               text="⚠️ This session is being monitored and logged ⚠️",
-                               font=('Segoe UI', 12, 'italic'),
-                               fg='#747d8c',  # Gray for notice
-                               bg='#1a1a1a',
-                               justify='center')
-        notice_label.pack(pady=(15, 0))
-        
-        # Bind unlock hotkey
-        keyboard.add_hotkey(hotkey, self.request_unlock)
+        # Stack the lines like the packed labels they replace
+        items, y = [], round(45*scale)
+        for text, size, style, color, gap in entries:
+            line_height = round(size*scale * 96 / 72 * 1.4)
+            y += round(gap*scale) + line_height // 2
+            items.append((text, y, size*scale, style, color))
+            y += line_height - line_height // 2
+        width = int(max(text_width(text, size, style) for text, _, size, style, _ in items) + 140*scale)
+        
+        # Glow layers around the dark glass container
+        borders = [('#999999', 1, 0), ('#cccccc', 1, 2), ('#ffffff', 1, 4), ('#3a3a3a', 2, 8)]
+        return render_panel((width, y + round(45*scale)), items, background='#1a1a1a',
+                            borders=[(color, max(1, round(w*scale)), round(inset*scale)) for color, w, inset in borders])
+
+    def prepare_lock_overlay(self):
+        """Build the lock overlays once and keep them withdrawn, so a lock only has to show them"""
+        return self.lock_screen.prepare()
+    
+    def create_blur_overlay(self):
+        """Cover every monitor with its lock overlay over a blurred copy of it"""
+        with self.perf.stage('lock'):  # Timed apart from the 'decision' stage it runs in
+            self.lock_screen.cover()
     
     def request_unlock(self):
         """Request password to unlock screen"""
@@ -567,34 +789,179 @@ Press Ctrl+Alt+O to enter unlock password
     
     def remove_blur_overlay(self):
         """Remove the blur overlay"""
-        if self.blur_window:
-            self.blur_window.destroy()
-            self.blur_window = None
+        self.lock_screen.uncover()  # Overlays stay built for the next lock
         self.screen_blurred = False
     
+    def apply_security_decision(self, analysis, current_time):
+        """Lock or unlock the screen for an analysed frame"""
+        # Fresh lock backgrounds blurred since the last frame are shown here, on the thread that owns the overlays
+        self.lock_screen.apply_pending_backgrounds()
+        
+        owner_detected, face_detected, unauthorized_face_detected, total_faces = analysis.as_detection_result()
+        
+        # Enhanced security logic
+        if unauthorized_face_detected:
+            # Lock screen if ANY unauthorized face is detected, even with owner present
+            if not self.screen_blurred:
+                if owner_detected:
+                    print(f"SECURITY ALERT: Owner present but {total_faces - 1} unauthorized face(s) detected - locking screen")
+                else:
+                    print(f"Unknown person(s) detected ({total_faces} faces) - locking screen")
+                if isinstance(self.camera, LatestFrameGrabber):
+                    print(f"   Decision made on a frame captured {self.camera.frame_age() * 1000:.0f} ms ago")
+                distances = [f"{distance:.3f}" for distance in analysis.distances if distance is not None]
+                if distances:
+                    print(f"   Best owner distance per face: {', '.join(distances)}")
+                self.create_blur_overlay()
+                self.screen_blurred = True
+        elif owner_detected and not unauthorized_face_detected and total_faces == 1:
+            # Only unlock if ONLY the owner is present (no other faces)
+            self.last_face_time = current_time
+            self.owner_detected = True
+            if self.screen_blurred:
+                self.remove_blur_overlay()
+                print("Owner detected alone - screen unlocked")
+        elif owner_detected and total_faces > 1:
+            # Owner is present but with other faces - keep locked
+            if not self.screen_blurred:
+                print(f"Owner present with {total_faces - 1} other person(s) - maintaining lock")
+                self.create_blur_overlay()
+                self.screen_blurred = True
+        elif not face_detected:
+            # No face detected - update timer but don't unlock yet
+            self.last_face_time = current_time
+        elif face_detected and not owner_detected:
+            # Only unauthorized faces detected
+            if not self.screen_blurred and (current_time - self.last_face_time > self.grace_period):
+                print(f"Only unauthorized person(s) detected ({total_faces} faces) - locking screen")
+                self.create_blur_overlay()
+                self.screen_blurred = True
+    
+    def render_monitor_frame(self, frame, analysis, current_fps):
+        """Draw the status overlay and show the monitoring window"""
+        # Enhanced monitoring display with better configuration support
+        if not (CONFIG_AVAILABLE and config.show_monitor_window):
+            return
+        owner_detected, face_detected, unauthorized_face_detected, total_faces = analysis.as_detection_result()
+        
+        # Enhanced status display with modern styling
+        status_bg_height = 140
+        overlay = frame.copy()
+        cv2.rectangle(overlay, (0, 0), (frame.shape[1], status_bg_height), (0, 0, 0), -1)
+        cv2.addWeighted(overlay, 0.7, frame, 0.3, 0, frame)
+        
+        if unauthorized_face_detected:
+            status_text = f"🚨 SECURITY ALERT: {total_faces} faces detected"
+            status_color = (0, 0, 255)  # Red
+            if owner_detected:
+                detail_text = f"Owner + {total_faces - 1} unauthorized person(s)"
+            else:
+                detail_text = f"{total_faces} unauthorized person(s)"
+        elif owner_detected and total_faces == 1:
+            status_text = "✅ SECURE: Owner authenticated"
+            status_color = (0, 255, 0)  # Green
+            detail_text = "Screen unlocked - single authorized user"
+        elif total_faces > 1:
+            status_text = "🔒 PRIVACY MODE: Multiple people"
+            status_color = (0, 255, 255)  # Yellow
+            detail_text = f"{total_faces} people detected - screen locked for privacy"
+        elif total_faces == 0:
+            status_text = "👀 MONITORING: No faces detected"
+            status_color = (255, 255, 0)  # Cyan
+            detail_text = "Scanning for faces..."
+        else:
+            status_text = "🔍 MONITORING: Analyzing..."
+            status_color = (255, 255, 255)  # White
+            detail_text = "Processing face data..."
+        
+        # Main status
+        cv2.putText(frame, status_text, (15, 35), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.8, status_color, 2)
+        
+        # Detail text
+        cv2.putText(frame, detail_text, (15, 65), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+        
+        # Stats line 1
+        stats_text1 = f"Faces: {total_faces} | Screen: {'🔒 LOCKED' if self.screen_blurred else '🔓 UNLOCKED'}"
+        cv2.putText(frame, stats_text1, (15, 95), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
+        
+        # Stats line 2
+        stats_text2 = f"FPS: {current_fps:.1f} | Resolution: {frame.shape[1]}x{frame.shape[0]} | Enhanced Mode"
+        if isinstance(self.camera, LatestFrameGrabber):
+            capture_stats = self.camera.get_stats()
+            stats_text2 += f" | Frame age: {self.camera.frame_age() * 1000:.0f} ms | Dropped: {capture_stats['frames_dropped']}"
+        scheduler_stats = self.detection_scheduler.get_stats()
+        stats_text2 += f" | Detection: {scheduler_stats['mode']} ({scheduler_stats['frames_analysed']}/{scheduler_stats['frames_seen']})"
+        stats_text2 += f" | Motion skip: {self.motion_gate.get_stats()['skip_ratio'] * 100:.0f}%"
+        stats_text2 += f" | CNN: {self.detector_escalation.get_stats()['cnn_runs']}"
+        if self.inference_pool is not None:
+            stats_text2 += f" | Workers: {self.inference_pool.workers} ({len(self.inference_pool.pending)} in flight)"
+        cv2.putText(frame, stats_text2, (15, 115), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
+        
+        if config.show_stage_timing:
+            self.perf.draw(frame, (15, 160))
+        
+        # Per-stage queue depth and utilisation of the threaded pipeline, bottom left
+        if self.pipeline is not None:
+            pipeline_lines = self.pipeline.overlay_lines()
+            y = frame.shape[0] - 18 * len(pipeline_lines)
+            for line in pipeline_lines:
+                cv2.putText(frame, line, (15, y), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (200, 200, 200), 1)
+                y += 18
+        
+        # Show enhanced monitoring window
+        cv2.imshow(config.monitor_window_title, frame)
+    
+    def handle_monitor_key(self):
+        """Poll the monitor window keys, returns False when 'q' asks to stop"""
+        key = cv2.waitKey(1) & 0xFF
+        if key == ord('t') and self.perf.enabled:
+            stage_timing_file = config.stage_timing_file if CONFIG_AVAILABLE else "stage_timings.json"
+            print(f"⏱️  Stage timings written to {self.perf.dump_json(stage_timing_file)}")
+        return key != ord('q')
+    
     def monitor_faces(self):
         """Enhanced monitoring loop with better performance and config integration"""
         print("🚀 Starting enhanced face monitoring...")
         
         # Initialize camera with config values
-        camera_index = config.camera_index if CONFIG_AVAILABLE else 0
         camera_width = config.camera_width if CONFIG_AVAILABLE else 1280
         camera_height = config.camera_height if CONFIG_AVAILABLE else 720
         camera_fps = config.camera_fps if CONFIG_AVAILABLE else 30
+        threaded_capture = config.threaded_capture if CONFIG_AVAILABLE else True
+        capture_buffer_size = config.capture_buffer_size if CONFIG_AVAILABLE else 1
+        adaptive_detection = config.adaptive_detection if CONFIG_AVAILABLE else True
+        stable_period = config.stable_period if CONFIG_AVAILABLE else 3.0
+        face_count_probe = config.face_count_probe if CONFIG_AVAILABLE else True
+        stage_timing_file = config.stage_timing_file if CONFIG_AVAILABLE else "stage_timings.json"
+        pipeline_mode = config.pipeline_mode if CONFIG_AVAILABLE else 'serial'
+        pipeline_queue_size = config.pipeline_queue_size if CONFIG_AVAILABLE else 2
+        inference_workers = config.inference_workers if CONFIG_AVAILABLE else 0
         
-        self.camera = cv2.VideoCapture(camera_index)
-        if not self.camera.isOpened():
+        self.camera = self.open_frame_source(camera_width, camera_height, camera_fps)
+        if self.camera is None:
             print("❌ Error: Could not open camera")
             return
         
-        # Configure camera with enhanced settings
-        self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, camera_width)
-        self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, camera_height)
-        self.camera.set(cv2.CAP_PROP_FPS, camera_fps)
+        print(f"📹 Frame source initialized: {self.camera.description} ({camera_width}x{camera_height} @ {camera_fps}fps)")
+        
+        # Configure camera with enhanced settings (ignored by non-camera sources)
         self.camera.set(cv2.CAP_PROP_AUTO_EXPOSURE, 0.25)  # Enable auto exposure
         self.camera.set(cv2.CAP_PROP_BRIGHTNESS, 0.5)      # Balanced brightness
         
-        print(f"📹 Camera initialized: {camera_width}x{camera_height} @ {camera_fps}fps")
+        # Throughput measurement - process frames as fast as possible
+        processing_delay = 0.1 if self.camera.realtime else 0
+        if not self.camera.realtime:
+            threaded_capture = False
+        
+        # Drain the camera on a background thread so decisions use the freshest frame
+        # (the threaded pipeline has its own capture stage)
+        if threaded_capture and pipeline_mode != 'threaded':
+            self.camera.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+            self.camera = LatestFrameGrabber(self.camera, capture_buffer_size).start()
         
         # Setup keyboard listener for hotkey unlock
         hotkey = config.unlock_hotkey if CONFIG_AVAILABLE else 'ctrl+alt+o'
@@ -602,11 +969,112 @@ Press Ctrl+Alt+O to enter unlock password
         print(f"⌨️  Hotkey registered: {hotkey}")
         print("✅ Enhanced monitoring started!")
         
+        if self.face_tracker is not None:
+            self.face_tracker.reset()
+        
+        # Full recognition at DETECTION_INTERVAL while stable, every frame otherwise
+        self.detection_scheduler = AdaptiveDetectionScheduler(
+            self.face_detection_interval, stable_period, enabled=adaptive_detection)
+        
+        # Cheap scene-change check in front of the scheduler
+        if CONFIG_AVAILABLE:
+            self.motion_gate = MotionGate(pixel_threshold=config.motion_threshold,
+                                          min_changed_area=config.motion_min_area,
+                                          region=config.motion_region,
+                                          max_reuse=config.motion_max_reuse,
+                                          enabled=config.enable_motion_gate)
+        else:
+            self.motion_gate = MotionGate()
+        self.face_count_probe = face_count_probe
+        
+        # Keep a blurred screen snapshot ready so a lock covers the screen without capturing first
+        if CONFIG_AVAILABLE and config.enable_snapshot_cache:
+            self.lock_screen.start_snapshot_cache(config.snapshot_refresh_interval, config.snapshot_max_age,
+                                                  config.snapshot_max_width, config.snapshot_memory_limit)
+        
+        # Build the lock overlay now instead of on the first lock (threaded mode builds it on the decide thread)
+        if pipeline_mode != 'threaded':
+            try:
+                self.prepare_lock_overlay()
+            except Exception as e:
+                print(f"Error preparing lock overlay: {e}")
+        
+        if pipeline_mode == 'threaded':
+            # Detection and encoding in worker processes, one frame in flight per pool slot
+            detect_queue_size = pipeline_queue_size
+            if inference_workers > 0:
+                self.inference_pool = InferencePool(workers=inference_workers,
+                                                    options={'upscale_small': CONFIG_AVAILABLE, 'num_jitters': 2}).start()
+                detect_queue_size = max(pipeline_queue_size, self.inference_pool.slot_count)
+                print(f"🧮 Inference workers: {inference_workers} processes")
+            
+            # Capture, detection, recognition, decision and drawing on their own threads
+            self.pipeline = MonitorPipeline(self, self.camera, pipeline_queue_size, processing_delay, detect_queue_size)
+            self.pipeline.run()
+            for line in self.pipeline.overlay_lines():
+                print(f"🧵 Pipeline {line}")
+            self.pipeline = None
+            
+            if self.inference_pool is not None:
+                pool_stats = self.inference_pool.get_stats()
+                print(f"🧮 Inference workers: {pool_stats['completed']} frames in {pool_stats['workers']} processes "
+                      f"({pool_stats['throughput_fps']:.1f} frames/s, avg {pool_stats['avg_worker_ms']:.0f} ms per frame, "
+                      f"{pool_stats['errors']} errors, {pool_stats['timeouts']} timeouts)")
+                self.inference_pool.close()
+                self.inference_pool = None
+        else:
+            if inference_workers > 0:
+                print("ℹ️  INFERENCE_WORKERS needs PIPELINE_MODE = threaded - analysing in-process")
+            self.run_serial_loop(processing_delay)
+        
+        for line in self.lock_screen.summary_lines():
+            print(line)
+        self.lock_screen.stop_snapshot_cache()
+        
+        scheduler_stats = self.detection_scheduler.get_stats()
+        print(f"🔎 Detection stats: {scheduler_stats['frames_analysed']}/{scheduler_stats['frames_seen']} frames analysed "
+              f"({scheduler_stats['skip_ratio'] * 100:.0f}% skipped), {scheduler_stats['escalations']} escalations")
+        if self.face_tracker is not None:
+            tracker_stats = self.face_tracker.get_stats()
+            print(f"👥 Tracking: {tracker_stats['tracks_created']} tracks, {tracker_stats['recognitions']} recognitions, "
+                  f"{tracker_stats['labels_carried']} labels carried between recognitions")
+        escalation_stats = self.detector_escalation.get_stats()
+        print(f"🧠 Detector tiers: HOG {escalation_stats['hog_runs']} runs, CNN {escalation_stats['cnn_runs']} runs "
+              f"({escalation_stats['cnn_hits']} found faces, avg {escalation_stats['cnn_avg_ms']:.0f} ms), "
+              f"{escalation_stats['cnn_denied']} CNN retries skipped")
+        if self.gallery is not None:
+            gallery_stats = self.gallery.get_stats()
+            print(f"🗂️  Authorized users: {gallery_stats['identities']} identities, {gallery_stats['templates']} templates "
+                  f"({gallery_stats['index']} index, {gallery_stats['comparisons']} comparisons)")
+        if self.adaptation is not None:
+            adaptation_stats = self.adaptation.get_stats()
+            print(f"🌱 Template adaptation: {adaptation_stats['templates']}/{adaptation_stats['capacity']} adapted templates, "
+                  f"{adaptation_stats['adaptations']} adaptations, {adaptation_stats['rejected']} low-margin candidates rejected")
+        if self.profile_writer is not None:
+            self.profile_writer.flush()
+        motion_stats = self.motion_gate.get_stats()
+        print(f"🎞️  Motion gate: {motion_stats['frames_skipped']}/{motion_stats['frames_checked']} static frames reused "
+              f"({motion_stats['skip_ratio'] * 100:.0f}% skipped)")
+        if isinstance(self.camera, LatestFrameGrabber):
+            capture_stats = self.camera.get_stats()
+            print(f"📹 Capture stats: {capture_stats['frames_consumed']}/{capture_stats['frames_captured']} frames analysed, "
+                  f"{capture_stats['frames_dropped']} stale frames dropped")
+        if self.perf.enabled:
+            for line in self.perf.overlay_lines():
+                print(f"⏱️  {line}")
+            self.perf.dump_json(stage_timing_file)
+        self.camera.release()
+        cv2.destroyAllWindows()
+    
+    def run_serial_loop(self, processing_delay):
+        """Single-threaded monitoring loop: capture, analyse, decide and draw one frame at a time"""
         frame_count = 0
         start_time = time.time()
+        analysis = None
         
         while self.is_monitoring:
-            ret, frame = self.camera.read()
+            with self.perf.stage('capture'):
+                ret, frame = self.camera.read()
             if not ret:
                 print("❌ Error: Could not read frame")
                 break
@@ -615,106 +1083,28 @@ Press Ctrl+Alt+O to enter unlock password
             current_fps = frame_count / (time.time() - start_time) if (time.time() - start_time) > 0 else 0
             
             try:
-                owner_detected, face_detected, unauthorized_face_detected, total_faces = self.detect_faces(frame)
                 current_time = time.time()
                 
-                # Enhanced security logic
-                if unauthorized_face_detected:
-                    # Lock screen if ANY unauthorized face is detected, even with owner present
-                    if not self.screen_blurred:
-                        if owner_detected:
-                            print(f"SECURITY ALERT: Owner present but {total_faces - 1} unauthorized face(s) detected - locking screen")
-                        else:
-                            print(f"Unknown person(s) detected ({total_faces} faces) - locking screen")
-                        self.create_blur_overlay()
-                        self.screen_blurred = True
-                elif owner_detected and not unauthorized_face_detected and total_faces == 1:
-                    # Only unlock if ONLY the owner is present (no other faces)
-                    self.last_face_time = current_time
-                    self.owner_detected = True
-                    if self.screen_blurred:
-                        self.remove_blur_overlay()
-                        print("Owner detected alone - screen unlocked")
-                elif owner_detected and total_faces > 1:
-                    # Owner is present but with other faces - keep locked
-                    if not self.screen_blurred:
-                        print(f"Owner present with {total_faces - 1} other person(s) - maintaining lock")
-                        self.create_blur_overlay()
-                        self.screen_blurred = True
-                elif not face_detected:
-                    # No face detected - update timer but don't unlock yet
-                    self.last_face_time = current_time
-                elif face_detected and not owner_detected:
-                    # Only unauthorized faces detected
-                    if not self.screen_blurred and (current_time - self.last_face_time > self.grace_period):
-                        print(f"Only unauthorized person(s) detected ({total_faces} faces) - locking screen")
-                        self.create_blur_overlay()
-                        self.screen_blurred = True
+                # Static scene or stable owner - reuse the last analysis without running recognition
+                analyse, face_count = self.gate_frame(frame, current_time, analysis is not None)
+                if analyse:
+                    analysis = self.run_analysis(frame, current_time)
+                    self.detection_scheduler.record(analysis, current_time, face_count)
+                    self.motion_gate.mark_analysed(current_time)
                 
-                # Enhanced monitoring display with better configuration support
-                if CONFIG_AVAILABLE and config.show_monitor_window:
-                    # Enhanced status display with modern styling
-                    status_bg_height = 140
-                    overlay = frame.copy()
-                    cv2.rectangle(overlay, (0, 0), (frame.shape[1], status_bg_height), (0, 0, 0), -1)
-                    cv2.addWeighted(overlay, 0.7, frame, 0.3, 0, frame)
-                    
-                    if unauthorized_face_detected:
-                        status_text = f"🚨 SECURITY ALERT: {total_faces} faces detected"
-                        status_color = (0, 0, 255)  # Red
-                        if owner_detected:
-                            detail_text = f"Owner + {total_faces - 1} unauthorized person(s)"
-                        else:
-                            detail_text = f"{total_faces} unauthorized person(s)"
-                    elif owner_detected and total_faces == 1:
-                        status_text = "✅ SECURE: Owner authenticated"
-                        status_color = (0, 255, 0)  # Green
-                        detail_text = "Screen unlocked - single authorized user"
-                    elif total_faces > 1:
-                        status_text = "🔒 PRIVACY MODE: Multiple people"
-                        status_color = (0, 255, 255)  # Yellow
-                        detail_text = f"{total_faces} people detected - screen locked for privacy"
-                    elif total_faces == 0:
-                        status_text = "👀 MONITORING: No faces detected"
-                        status_color = (255, 255, 0)  # Cyan
-                        detail_text = "Scanning for faces..."
-                    else:
-                        status_text = "🔍 MONITORING: Analyzing..."
-                        status_color = (255, 255, 255)  # White
-                        detail_text = "Processing face data..."
-                    
-                    # Main status
-                    cv2.putText(frame, status_text, (15, 35), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.8, status_color, 2)
-                    
-                    # Detail text
-                    cv2.putText(frame, detail_text, (15, 65), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-                    
-                    # Stats line 1
-                    stats_text1 = f"Faces: {total_faces} | Screen: {'🔒 LOCKED' if self.screen_blurred else '🔓 UNLOCKED'}"
-                    cv2.putText(frame, stats_text1, (15, 95), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
-                    
-                    # Stats line 2
-                    stats_text2 = f"FPS: {current_fps:.1f} | Resolution: {frame.shape[1]}x{frame.shape[0]} | Enhanced Mode"
-                    cv2.putText(frame, stats_text2, (15, 115), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
-                    
-                    # Show enhanced monitoring window
-                    window_title = config.monitor_window_title if CONFIG_AVAILABLE else 'Enhanced Face Security Monitor'
-                    cv2.imshow(window_title, frame)
+                with self.perf.stage('decision'):
+                    self.apply_security_decision(analysis, current_time)
+                
+                with self.perf.stage('drawing'):
+                    self.render_monitor_frame(frame, analysis, current_fps)
                 
-                if cv2.waitKey(1) & 0xFF == ord('q'):
+                if not self.handle_monitor_key():
                     break
                 
             except Exception as e:
                 print(f"Error in face detection: {e}")
             
-            time.sleep(0.1)  # Small delay to reduce CPU usage
-        
-        self.camera.release()
-        cv2.destroyAllWindows()
+            time.sleep(processing_delay)  # Small delay to reduce CPU usage
     
     def start_monitoring(self):
         """Start the monitoring system"""
@@ -743,11 +1133,13 @@ def main():
     print("1. Register Owner")
     print("2. Start Monitoring")
     print("3. Stop Monitoring")
-    print("4. Exit")
+    print("4. Register Authorized User")
+    print("5. Consolidate Templates")
+    print("6. Exit")
     
     while True:
         try:
-            choice = input("\nSelect option (1-4): ").strip()
+            choice = input("\nSelect option (1-6): ").strip()
             
             if choice == '1':
                 if system.register_owner():
@@ -771,6 +1163,16 @@ def main():
                 system.stop_monitoring()
             
             elif choice == '4':
+                if system.register_authorized_user():
+                    print("Authorized user registered!")
+                else:
+                    print("Registration failed!")
+            
+            elif choice == '5':
+                if not system.consolidate_all_templates():
+                    print("Consolidation failed!")
+            
+            elif choice == '6':
                 system.stop_monitoring()
                 print("Goodbye!")
                 break
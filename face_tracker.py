@@ -0,0 +1,164 @@
+"""
+Face tracker for Face Security System
+Assigns stable track IDs to face boxes across frames by IoU overlap so
+recognition only has to run when a new track appears or when a track is
+due for periodic re-verification. The owner/unauthorized label is carried
+with the track in between.
+"""
+
+import time
+
+
+def box_iou(box_a, box_b):
+    """Intersection over union of two (x, y, width, height) boxes"""
+    ax, ay, aw, ah = box_a
+    bx, by, bw, bh = box_b
+
+    inter_w = min(ax + aw, bx + bw) - max(ax, bx)
+    inter_h = min(ay + ah, by + bh) - max(ay, by)
+    if inter_w <= 0 or inter_h <= 0:
+        return 0.0
+
+    intersection = inter_w * inter_h
+    union = aw * ah + bw * bh - intersection
+    return intersection / union if union > 0 else 0.0
+
+
+class FaceTrack:
+    def __init__(self, track_id, box, now):
+        self.track_id = track_id
+        self.box = box
+        self.created = now
+        self.last_seen = now
+        self.missed = 0
+
+        # Identity carried between recognitions
+        self.is_owner = None      # None until the track has been recognised
+        self.score = 0
+        self.landmarks = None
+        self.distance = None
+        self.identity = None
+        self.owner_streak = 0     # Consecutive owner verifications
+        self.last_verified = None
+        self.verifications = 0
+
+    @property
+    def verified(self):
+        return self.is_owner is not None
+
+    def needs_recognition(self, now, reverify_interval):
+        """New tracks and tracks due for re-verification need recognition"""
+        if not self.verified:
+            return True
+        return reverify_interval > 0 and now - self.last_verified >= reverify_interval
+
+    def assign_identity(self, is_owner, score, landmarks, now, distance=None, identity=None):
+        """Store a fresh recognition result on the track"""
+        self.is_owner = is_owner
+        self.score = score
+        self.landmarks = landmarks
+        self.distance = distance
+        self.identity = identity
+        self.owner_streak = self.owner_streak + 1 if is_owner else 0
+        self.last_verified = now
+        self.verifications += 1
+
+    def __repr__(self):
+        label = 'unverified' if not self.verified else ('owner' if self.is_owner else 'unauthorized')
+        return f"FaceTrack(id={self.track_id}, {label}, box={self.box})"
+
+
+class FaceTracker:
+    def __init__(self, iou_threshold=0.3, max_missed=5, reverify_interval=2.0):
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.reverify_interval = reverify_interval
+        self.tracks = []
+        self.next_track_id = 1
+
+        # Statistics
+        self.tracks_created = 0
+        self.recognitions = 0
+        self.labels_carried = 0
+        self.unconfirmed = 0
+
+    def reset(self):
+        """Forget all tracks"""
+        self.tracks = []
+
+    def update(self, boxes, now=None):
+        """Associate detected boxes with tracks
+
+        Returns the list of tracks aligned with boxes (one track per box)
+        """
+        now = now if now is not None else time.time()
+
+        # Greedy association, best overlaps first
+        candidates = []
+        for track_index, track in enumerate(self.tracks):
+            for box_index, box in enumerate(boxes):
+                iou = box_iou(track.box, box)
+                if iou >= self.iou_threshold:
+                    candidates.append((iou, track_index, box_index))
+        candidates.sort(reverse=True)
+
+        assigned = [None] * len(boxes)
+        matched_tracks = set()
+        for iou, track_index, box_index in candidates:
+            if track_index in matched_tracks or assigned[box_index] is not None:
+                continue
+            track = self.tracks[track_index]
+            track.box = boxes[box_index]
+            track.last_seen = now
+            track.missed = 0
+            assigned[box_index] = track
+            matched_tracks.add(track_index)
+
+        # Tracks without a box this frame age out
+        surviving = []
+        for track_index, track in enumerate(self.tracks):
+            if track_index not in matched_tracks:
+                track.missed += 1
+                if track.missed > self.max_missed:
+                    continue
+            surviving.append(track)
+        self.tracks = surviving
+
+        # Boxes without a track start new tracks
+        for box_index, box in enumerate(boxes):
+            if assigned[box_index] is None:
+                track = FaceTrack(self.next_track_id, box, now)
+                self.next_track_id += 1
+                self.tracks_created += 1
+                self.tracks.append(track)
+                assigned[box_index] = track
+
+        return assigned
+
+    def pending(self, tracks, now=None):
+        """Tracks from this frame that need recognition, the others carry their label"""
+        now = now if now is not None else time.time()
+        pending = [track for track in tracks if track.needs_recognition(now, self.reverify_interval)]
+        self.labels_carried += len(tracks) - len(pending)
+        return pending
+
+    def recognize(self, track, is_owner, score, landmarks, now, distance=None, identity=None):
+        """Assign a fresh recognition result to a pending track"""
+        track.assign_identity(is_owner, score, landmarks, now, distance, identity)
+        self.recognitions += 1
+
+    def reject(self, track):
+        """A pending track whose face could not be confirmed - it stays pending"""
+        self.unconfirmed += 1
+
+    def get_stats(self):
+        """Tracker statistics for display and logging"""
+        total = self.recognitions + self.labels_carried + self.unconfirmed
+        return {
+            'active_tracks': len(self.tracks),
+            'tracks_created': self.tracks_created,
+            'recognitions': self.recognitions,
+            'labels_carried': self.labels_carried,
+            'unconfirmed': self.unconfirmed,
+            'recognition_ratio': self.recognitions / total if total else 0.0,
+        }
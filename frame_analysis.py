@@ -0,0 +1,80 @@
+"""
+Frame analysis result shared by the monitoring pipeline
+Produced once per camera frame by the recognition backend and consumed by
+the security decision, the monitor window drawing and logging
+"""
+
+import time
+
+
+class FrameAnalysis:
+    def __init__(self, frame_shape=None, timestamp=None):
+        self.frame_shape = frame_shape
+        self.timestamp = timestamp if timestamp is not None else time.time()
+
+        # Per-face results, all lists share the same face index
+        self.boxes = []        # (x, y, width, height) in frame pixels
+        self.landmarks = []    # Feature vector / encoding used for matching
+        self.scores = []       # Best owner match score (0 when not matched)
+        self.is_owner = []     # Owner decision for the face
+        self.track_ids = []    # Face track ID when the tracker is enabled, else None
+        self.distances = []    # Best owner distance for distance-based matchers, else None
+        self.identities = []   # Authorized user name for faces matched in the gallery, else None
+
+        self.owner_detected = False
+        self.unauthorized_face_detected = False
+        self.low_confidence = False
+        self.error = None
+
+    @classmethod
+    def failsafe(cls, frame_shape=None, error=None):
+        """Analysis used when detection fails - assume unauthorized"""
+        analysis = cls(frame_shape)
+        analysis.unauthorized_face_detected = True
+        analysis.error = error
+        return analysis
+
+    def add_face(self, box, landmarks, score, is_owner, track_id=None, distance=None, identity=None):
+        """Record the result for a single face"""
+        self.boxes.append(box)
+        self.landmarks.append(landmarks)
+        self.scores.append(score)
+        self.is_owner.append(is_owner)
+        self.track_ids.append(track_id)
+        self.distances.append(distance)
+        self.identities.append(identity)
+
+        if is_owner:
+            self.owner_detected = True
+        else:
+            self.unauthorized_face_detected = True
+
+    @property
+    def total_faces(self):
+        return len(self.boxes)
+
+    @property
+    def face_detected(self):
+        return self.total_faces > 0
+
+    @property
+    def owner_faces(self):
+        return sum(1 for is_owner in self.is_owner if is_owner)
+
+    @property
+    def owner_alone(self):
+        """True when the owner is the only face in view"""
+        return self.owner_detected and not self.unauthorized_face_detected and self.total_faces == 1
+
+    @property
+    def labels(self):
+        return [identity if identity else ("Owner" if is_owner else "Unauthorized")
+                for is_owner, identity in zip(self.is_owner, self.identities)]
+
+    def as_detection_result(self):
+        """Legacy (owner_detected, face_detected, unauthorized_face_detected, total_faces) tuple"""
+        return self.owner_detected, self.face_detected, self.unauthorized_face_detected, self.total_faces
+
+    def __repr__(self):
+        return (f"FrameAnalysis(faces={self.total_faces}, owner={self.owner_detected}, "
+                f"unauthorized={self.unauthorized_face_detected})")
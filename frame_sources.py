@@ -0,0 +1,340 @@
+"""
+Frame sources for Face Security System
+Provides a common cv2.VideoCapture-like interface over a live camera,
+a video file, a directory of images and a synthetic frame generator, so
+the monitoring pipeline can be benchmarked and regression-tested on
+machines without a webcam
+
+Pacing modes:
+    realtime - frames are delivered at the source FPS (latency measurement)
+    fast     - frames are delivered as fast as they are read (throughput)
+"""
+
+import os
+import time
+
+import cv2
+import numpy as np
+
+SOURCE_TYPES = ('camera', 'video', 'images', 'synthetic')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+class FrameSource:
+    """Base class for all frame sources"""
+
+    def __init__(self, width=640, height=480, fps=30, pacing='realtime'):
+        self.width = width
+        self.height = height
+        self.fps = fps if fps and fps > 0 else 30
+        self.pacing = pacing
+        self.opened = False
+        self.frames_read = 0
+        self._next_frame_time = None
+
+    @property
+    def realtime(self):
+        """True when frames arrive at a live-camera rate"""
+        return self.pacing != 'fast'
+
+    @property
+    def description(self):
+        return self.__class__.__name__
+
+    def open(self):
+        """Open the source, returns True on success"""
+        self.opened = True
+        self.frames_read = 0
+        self._next_frame_time = None
+        return True
+
+    def isOpened(self):
+        return self.opened
+
+    def read(self):
+        """Return (ret, frame) like cv2.VideoCapture.read"""
+        if not self.opened:
+            return False, None
+
+        self._wait_for_next_frame()
+        ret, frame = self._read_frame()
+        if ret:
+            self.frames_read += 1
+        return ret, frame
+
+    def _read_frame(self):
+        raise NotImplementedError
+
+    def _wait_for_next_frame(self):
+        """Sleep until the next frame is due in realtime pacing mode"""
+        if not self.realtime:
+            return
+        now = time.time()
+        if self._next_frame_time is None:
+            self._next_frame_time = now
+        elif now < self._next_frame_time:
+            time.sleep(self._next_frame_time - now)
+        else:
+            # Running behind - don't try to catch up with a burst of frames
+            self._next_frame_time = now
+        self._next_frame_time += 1.0 / self.fps
+
+    def set(self, prop_id, value):
+        """Capture properties only apply to live cameras"""
+        return False
+
+    def get(self, prop_id):
+        if prop_id == cv2.CAP_PROP_FRAME_WIDTH:
+            return self.width
+        if prop_id == cv2.CAP_PROP_FRAME_HEIGHT:
+            return self.height
+        if prop_id == cv2.CAP_PROP_FPS:
+            return self.fps
+        return 0
+
+    def release(self):
+        self.opened = False
+
+
+class CameraSource(FrameSource):
+    """Live camera via cv2.VideoCapture - always paced by the device"""
+
+    def __init__(self, camera_index=0, width=640, height=480, fps=30):
+        super().__init__(width, height, fps, pacing='realtime')
+        self.camera_index = camera_index
+        self.capture = None
+
+    @property
+    def description(self):
+        return f"Camera {self.camera_index}"
+
+    def open(self):
+        self.capture = cv2.VideoCapture(self.camera_index)
+        if not self.capture.isOpened():
+            return False
+
+        self.capture.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        self.capture.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        self.capture.set(cv2.CAP_PROP_FPS, self.fps)
+        return super().open()
+
+    def isOpened(self):
+        return self.capture is not None and self.capture.isOpened()
+
+    def _wait_for_next_frame(self):
+        # The device blocks until the next frame is ready
+        pass
+
+    def _read_frame(self):
+        return self.capture.read()
+
+    def set(self, prop_id, value):
+        return self.capture.set(prop_id, value) if self.capture is not None else False
+
+    def get(self, prop_id):
+        return self.capture.get(prop_id) if self.capture is not None else 0
+
+    def release(self):
+        if self.capture is not None:
+            self.capture.release()
+        super().release()
+
+
+class VideoFileSource(FrameSource):
+    """Recorded clip, optionally looped"""
+
+    def __init__(self, path, fps=None, pacing='realtime', loop=True):
+        super().__init__(0, 0, fps or 30, pacing)
+        self.path = path
+        self.loop = loop
+        self.use_file_fps = not fps
+        self.capture = None
+
+    @property
+    def description(self):
+        return f"Video {self.path}"
+
+    def open(self):
+        if not os.path.exists(self.path):
+            print(f"Error: Video file not found: {self.path}")
+            return False
+
+        self.capture = cv2.VideoCapture(self.path)
+        if not self.capture.isOpened():
+            return False
+
+        self.width = int(self.capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        if self.use_file_fps and self.capture.get(cv2.CAP_PROP_FPS) > 0:
+            self.fps = self.capture.get(cv2.CAP_PROP_FPS)
+        return super().open()
+
+    def _read_frame(self):
+        ret, frame = self.capture.read()
+        if not ret and self.loop and self.frames_read > 0:
+            # Rewind and continue from the first frame
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.capture.read()
+        return ret, frame
+
+    def release(self):
+        if self.capture is not None:
+            self.capture.release()
+        super().release()
+
+
+class ImageDirectorySource(FrameSource):
+    """Still images from a directory (or a single image file such as test_frame.jpg)"""
+
+    def __init__(self, path, fps=30, pacing='realtime', loop=True):
+        super().__init__(0, 0, fps, pacing)
+        self.path = path
+        self.loop = loop
+        self.images = []
+        self.index = 0
+
+    @property
+    def description(self):
+        return f"Images {self.path} ({len(self.images)} files)"
+
+    def open(self):
+        if os.path.isdir(self.path):
+            files = sorted(os.path.join(self.path, name) for name in os.listdir(self.path)
+                           if name.lower().endswith(IMAGE_EXTENSIONS))
+        elif os.path.isfile(self.path):
+            files = [self.path]
+        else:
+            print(f"Error: Image path not found: {self.path}")
+            return False
+
+        # Decode once up front so reading measures the pipeline, not the disk
+        self.images = [image for image in (cv2.imread(f) for f in files) if image is not None]
+        if not self.images:
+            print(f"Error: No readable images in {self.path}")
+            return False
+
+        self.height, self.width = self.images[0].shape[:2]
+        self.index = 0
+        return super().open()
+
+    def _read_frame(self):
+        if self.index >= len(self.images):
+            if not self.loop:
+                return False, None
+            self.index = 0
+
+        # Hand out a copy - the monitoring loop draws on the frames it gets
+        frame = self.images[self.index].copy()
+        self.index += 1
+        return True, frame
+
+    def release(self):
+        self.images = []
+        super().release()
+
+
+class SyntheticSource(FrameSource):
+    """Generated frames with a configurable number of moving face patches
+
+    If face_image is given (a BGR array) its copies are used as the face
+    patches, otherwise simple drawn faces are used
+    """
+
+    def __init__(self, width=640, height=480, fps=30, pacing='realtime',
+                 face_count=1, face_image=None, noise=4, seed=0, max_frames=0):
+        super().__init__(width, height, fps, pacing)
+        self.face_count = face_count
+        self.face_image = face_image
+        self.noise = noise
+        self.seed = seed
+        self.max_frames = max_frames
+        self.background = None
+        self.face_patch = None
+        self.random = None
+
+    @property
+    def description(self):
+        return f"Synthetic {self.width}x{self.height} with {self.face_count} face(s)"
+
+    def open(self):
+        self.random = np.random.default_rng(self.seed)
+
+        # Static gradient background similar to an office wall
+        gradient = np.linspace(60, 140, self.width, dtype=np.float32)
+        background = np.tile(gradient, (self.height, 1))
+        self.background = cv2.merge([background, background * 0.9, background * 0.8]).astype(np.uint8)
+
+        face_size = max(32, min(self.width, self.height) // 3)
+        if self.face_image is not None:
+            self.face_patch = cv2.resize(self.face_image, (face_size, face_size), interpolation=cv2.INTER_AREA)
+        else:
+            self.face_patch = self._draw_face(face_size)
+        return super().open()
+
+    def _draw_face(self, size):
+        """Simple drawn face used when no face image is supplied"""
+        patch = np.full((size, size, 3), 110, dtype=np.uint8)
+        center = (size // 2, size // 2)
+        cv2.ellipse(patch, center, (size * 3 // 8, size * 15 // 32), 0, 0, 360, (150, 180, 220), -1)
+        eye_y = size * 13 // 32
+        for eye_x in (size * 5 // 16, size * 11 // 16):
+            cv2.circle(patch, (eye_x, eye_y), max(2, size // 20), (40, 30, 30), -1)
+        cv2.ellipse(patch, (size // 2, size * 11 // 16), (size // 8, size // 24), 0, 0, 180, (60, 60, 150), 2)
+        return patch
+
+    def _read_frame(self):
+        if self.max_frames and self.frames_read >= self.max_frames:
+            return False, None
+
+        frame = self.background.copy()
+        patch_h, patch_w = self.face_patch.shape[:2]
+        slots = max(1, self.face_count)
+
+        for i in range(self.face_count):
+            # Faces drift slowly side to side so consecutive frames differ
+            phase = self.frames_read / self.fps + i
+            slot_width = self.width // slots
+            x = int(i * slot_width + (slot_width - patch_w) / 2 + np.sin(phase) * patch_w * 0.1)
+            y = int((self.height - patch_h) / 2 + np.cos(phase) * patch_h * 0.05)
+            x = min(max(0, x), self.width - patch_w)
+            y = min(max(0, y), self.height - patch_h)
+            frame[y:y + patch_h, x:x + patch_w] = self.face_patch
+
+        if self.noise:
+            noise = self.random.integers(-self.noise, self.noise + 1, frame.shape, dtype=np.int16)
+            frame = np.clip(frame.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+        return True, frame
+
+
+def create_frame_source(source_type='camera', source_path='', camera_index=0, width=640,
+                        height=480, fps=30, pacing='realtime', loop=True):
+    """Build a frame source from its settings"""
+    source_type = (source_type or 'camera').strip().lower()
+
+    if source_type == 'camera':
+        return CameraSource(camera_index, width, height, fps)
+    if source_type == 'video':
+        return VideoFileSource(source_path, pacing=pacing, loop=loop)
+    if source_type == 'images':
+        return ImageDirectorySource(source_path or 'test_frame.jpg', fps, pacing, loop)
+    if source_type == 'synthetic':
+        # An optional image path supplies the face patch pasted into each frame
+        face_image = cv2.imread(source_path) if source_path else None
+        return SyntheticSource(width, height, fps, pacing, face_image=face_image)
+
+    raise ValueError(f"Unknown frame source type '{source_type}' (expected one of {', '.join(SOURCE_TYPES)})")
+
+
+def frame_source_from_config(width=None, height=None, fps=None):
+    """Build the frame source selected in config.ini [Camera]"""
+    from config_loader import config
+
+    return create_frame_source(
+        source_type=config.source_type,
+        source_path=config.source_path,
+        camera_index=config.camera_index,
+        width=width or config.camera_width,
+        height=height or config.camera_height,
+        fps=fps or config.camera_fps,
+        pacing=config.source_pacing,
+        loop=config.source_loop)
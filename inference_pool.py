@@ -0,0 +1,335 @@
+"""
+Process-pool inference workers for Face Security System
+face_recognition's HOG detector and dlib encodings (num_jitters=2) are
+CPU heavy and the Python around them holds the GIL, so threads alone do
+not scale. With INFERENCE_WORKERS > 0 the threaded pipeline hands frames
+to worker processes instead.
+
+Frames never go through pickle: the capture side copies each frame into
+a slot of a multiprocessing.shared_memory ring and only sends the slot
+number. A worker reads the frame in place, runs detection and encoding
+and sends back a compact result (face boxes and 128-d encodings). The
+slot is reused once its result has arrived.
+"""
+
+import math
+import multiprocessing
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+
+def detection_scale_for(frame_shape, upscale_small=True):
+    """Small frames are upscaled 1.5x before HOG detection for better recall"""
+    height, width = frame_shape[:2]
+    return 1.0 if not upscale_small or min(width, height) >= 720 else 1.5
+
+
+def preprocess_for_detection(frame, detection_scale=1.0):
+    """Upscale, equalize and denoise a BGR frame, returns the RGB frame for face_recognition"""
+    # 1. Resize for faster processing while maintaining quality
+    if detection_scale != 1.0:
+        height, width = frame.shape[:2]
+        frame = cv2.resize(frame, (int(width * detection_scale), int(height * detection_scale)),
+                           interpolation=cv2.INTER_CUBIC)
+
+    # 2. Apply histogram equalization for better lighting
+    yuv = cv2.cvtColor(frame, cv2.COLOR_BGR2YUV)
+    yuv[:, :, 0] = cv2.equalizeHist(yuv[:, :, 0])
+    frame = cv2.cvtColor(yuv, cv2.COLOR_YUV2BGR)
+
+    # 3. Apply slight Gaussian blur to reduce noise
+    frame = cv2.GaussianBlur(frame, (3, 3), 0.5)
+
+    # Convert to RGB for face_recognition
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+
+def load_face_recognition(options):
+    """Worker initializer - loads dlib's models once per process instead of on the first frame"""
+    import face_recognition  # noqa: F401
+
+
+def detect_and_encode(frame, options):
+    """HOG detection and encodings of one BGR frame, in original frame coordinates
+
+    Returns {'locations': (faces, 4) int32 (top, right, bottom, left),
+             'encodings': (faces, 128) float64}
+    """
+    import face_recognition
+
+    detection_scale = detection_scale_for(frame.shape, options.get('upscale_small', True))
+    rgb_frame = preprocess_for_detection(frame, detection_scale)
+    face_locations = face_recognition.face_locations(rgb_frame, model='hog')
+    face_locations = [(int(top / detection_scale), int(right / detection_scale),
+                       int(bottom / detection_scale), int(left / detection_scale))
+                      for (top, right, bottom, left) in face_locations]
+
+    encodings = face_recognition.face_encodings(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB), face_locations,
+                                                num_jitters=options.get('num_jitters', 2))
+    return {'locations': np.array(face_locations, dtype=np.int32).reshape(-1, 4),
+            'encodings': np.array(encodings, dtype=np.float64).reshape(-1, 128)}
+
+
+def _worker_main(task, options, initializer, tasks, results):
+    """Worker process loop - frames are read in place from the shared memory ring"""
+    if initializer is not None:
+        initializer(options)
+
+    segments = {}  # Shared memory blocks by name, attached on first use
+    try:
+        while True:
+            item = tasks.get()
+            if item is None:
+                break
+            job_id, name, offset, shape = item
+            if name not in segments:
+                for segment in segments.values():
+                    segment.close()  # The ring was reallocated for larger frames
+                segments = {name: shared_memory.SharedMemory(name=name)}
+
+            frame = np.ndarray(shape, dtype=np.uint8, buffer=segments[name].buf, offset=offset)
+            started = time.perf_counter()
+            try:
+                results.put((job_id, task(frame, options), None, time.perf_counter() - started))
+            except Exception as e:
+                results.put((job_id, None, f"{type(e).__name__}: {e}", time.perf_counter() - started))
+            del frame  # Release the buffer view before the segment can be closed
+    finally:
+        for segment in segments.values():
+            segment.close()
+
+
+class InferenceFuture:
+    """Result of a frame submitted to the pool"""
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+        self.worker_time = 0.0
+
+    def done(self):
+        return self.event.is_set()
+
+    def result(self, timeout=None):
+        """Wait for the worker result, raises RuntimeError if the worker failed"""
+        if not self.event.wait(timeout):
+            raise TimeoutError(f"Inference job {self.job_id} did not finish in time")
+        if self.error is not None:
+            raise RuntimeError(f"Inference worker failed: {self.error}")
+        return self.value
+
+
+class SharedFrameRing:
+    """Fixed-size frame slots in one shared memory block"""
+
+    def __init__(self, slots, slot_bytes):
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.memory = shared_memory.SharedMemory(create=True, size=slots * slot_bytes)
+        self.free = list(range(slots))
+
+    @property
+    def name(self):
+        return self.memory.name
+
+    def write(self, slot, frame):
+        """Copy a frame into a slot, returns the slot's byte offset"""
+        offset = slot * self.slot_bytes
+        view = np.ndarray(frame.shape, dtype=np.uint8, buffer=self.memory.buf, offset=offset)
+        np.copyto(view, frame)
+        del view
+        return offset
+
+    def close(self):
+        self.memory.close()
+        self.memory.unlink()
+
+
+class InferencePool:
+    def __init__(self, task=detect_and_encode, workers=2, options=None, initializer=load_face_recognition,
+                 slots_per_worker=2, result_timeout_factor=4.0, min_result_timeout=1.0, startup_timeout=30.0):
+        self.task = task                    # Module-level function(frame, options) run in the workers
+        self.workers = workers
+        self.options = options or {}
+        self.initializer = initializer
+        self.slot_count = max(1, workers * slots_per_worker)  # Frames in flight at most
+        self.result_timeout_factor = result_timeout_factor  # Result wait as a multiple of the recent worker time
+        self.min_result_timeout = min_result_timeout        # Never wait less than this (seconds)
+        self.startup_timeout = startup_timeout              # Wait before the first result, while models load
+
+        self.context = multiprocessing.get_context('spawn')  # Safe next to the pipeline threads, same on Windows
+        self.tasks = None
+        self.results = None
+        self.processes = []
+        self.ring = None
+        self.condition = threading.Condition()
+        self.pending = {}                   # job_id -> (future, slot)
+        self.next_job = 0
+        self.collector = None
+        self.running = False
+
+        # Statistics
+        self.submitted = 0
+        self.completed = 0
+        self.errors = 0
+        self.waits = 0
+        self.worker_time = 0.0
+        self.recent_worker_time = None      # Moving average of the last worker times (seconds)
+        self.timeouts = 0
+        self.started = None
+
+    def start(self):
+        """Start the worker processes (the frame ring is sized by the first frame)"""
+        self.tasks = self.context.Queue()
+        self.results = self.context.Queue()
+        self.processes = [self.context.Process(target=_worker_main, name=f"inference-worker-{i}", daemon=True,
+                                               args=(self.task, self.options, self.initializer, self.tasks, self.results))
+                          for i in range(self.workers)]
+        for process in self.processes:
+            process.start()
+
+        self.running = True
+        self.started = time.perf_counter()
+        self.collector = threading.Thread(target=self._collect, name="inference-collector", daemon=True)
+        self.collector.start()
+        return self
+
+    def _collect(self):
+        """Hand worker results to their futures and free the frame slots"""
+        while self.running or self.pending:
+            try:
+                job_id, value, error, worker_time = self.results.get(timeout=0.1)
+            except queue.Empty:
+                if not any(process.is_alive() for process in self.processes):
+                    self.running = False  # Later submits fail at once instead of waiting for a slot
+                    self._fail_pending("inference workers exited")
+                    return
+                continue
+
+            with self.condition:
+                future, slot = self.pending.pop(job_id, (None, None))
+                if slot is not None:
+                    self.ring.free.append(slot)
+                self.completed += 1
+                self.worker_time += worker_time
+                self.recent_worker_time = (worker_time if self.recent_worker_time is None
+                                           else 0.8 * self.recent_worker_time + 0.2 * worker_time)
+                if error is not None:
+                    self.errors += 1
+                self.condition.notify_all()
+            if future is not None:
+                future.value, future.error, future.worker_time = value, error, worker_time
+                future.event.set()
+
+    def _fail_pending(self, reason):
+        """Fail every frame in flight and free its slot - no worker will answer for it"""
+        with self.condition:
+            pending, self.pending = self.pending, {}
+            if self.ring is not None:
+                self.ring.free.extend(slot for _, slot in pending.values())
+            self.condition.notify_all()
+        for future, _ in pending.values():
+            future.error = reason
+            future.event.set()
+
+    def _ensure_ring(self, frame, timeout=None):
+        """Allocate the ring for this frame size, reallocating once no frame is in flight
+
+        Returns False if frames were still in flight after timeout
+        """
+        if self.ring is not None and frame.nbytes <= self.ring.slot_bytes:
+            return True
+        if not self.condition.wait_for(lambda: not self.pending, timeout):
+            return False
+        if self.ring is not None:
+            self.ring.close()
+        self.ring = SharedFrameRing(self.slot_count, frame.nbytes)
+        return True
+
+    def submit(self, frame, timeout=None):
+        """Queue a BGR uint8 frame for the workers, waits while every slot is in flight
+
+        Returns an InferenceFuture, or None if no slot became free within timeout
+        """
+        if not self.running:
+            raise RuntimeError("Inference pool is not running")
+        frame = np.ascontiguousarray(frame, dtype=np.uint8)
+        with self.condition:
+            if not self._ensure_ring(frame, timeout):
+                return None
+            if not self.ring.free:
+                self.waits += 1
+                if not self.condition.wait_for(lambda: self.ring.free, timeout):
+                    return None
+            slot = self.ring.free.pop()
+            job_id = self.next_job
+            self.next_job += 1
+            offset = self.ring.write(slot, frame)
+            future = InferenceFuture(job_id)
+            self.pending[job_id] = (future, slot)
+            self.submitted += 1
+        self.tasks.put((job_id, self.ring.name, offset, frame.shape))
+        return future
+
+    @property
+    def alive(self):
+        """False once the pool was closed or its workers exited"""
+        return self.running and any(process.is_alive() for process in self.processes)
+
+    def result_timeout(self):
+        """Seconds to wait for a submitted frame, sized from the recent worker time per frame queued per worker"""
+        if self.recent_worker_time is None:
+            return self.startup_timeout
+        queued = max(1, math.ceil(len(self.pending) / self.workers))
+        return max(self.min_result_timeout, self.result_timeout_factor * self.recent_worker_time * queued)
+
+    def wait(self, future):
+        """Result of a submitted frame, raises TimeoutError if the workers take longer than result_timeout()"""
+        try:
+            return future.result(self.result_timeout())
+        except TimeoutError:
+            self.timeouts += 1
+            raise
+
+    def close(self, timeout=5.0):
+        """Let in-flight frames finish, stop the workers and free the shared memory"""
+        with self.condition:
+            self.condition.wait_for(lambda: not self.pending, timeout)
+        self.running = False
+        for _ in self.processes:
+            self.tasks.put(None)
+        for process in self.processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        if self.collector is not None:
+            self.collector.join(timeout)
+        self._fail_pending("inference pool closed")
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+        self.tasks.close()
+        self.results.close()
+
+    def get_stats(self):
+        """Pool statistics for display and logging"""
+        elapsed = time.perf_counter() - self.started if self.started else 0.0
+        return {
+            'workers': self.workers,
+            'in_flight': len(self.pending),
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'errors': self.errors,
+            'slot_waits': self.waits,
+            'avg_worker_ms': self.worker_time / self.completed * 1000 if self.completed else 0.0,
+            'recent_worker_ms': self.recent_worker_time * 1000 if self.recent_worker_time is not None else 0.0,
+            'timeouts': self.timeouts,
+            'throughput_fps': self.completed / elapsed if elapsed > 0 else 0.0,
+        }
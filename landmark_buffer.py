@@ -0,0 +1,90 @@
+"""
+Landmark extraction buffer for the MediaPipe backend
+Copies FaceMesh results into one preallocated (faces, 478, 3) float32
+array that is reused across frames, instead of building a Python list of
+1434 floats per face. The flat (faces, 1434) view feeds the matching
+engine directly.
+
+The fast path decodes the serialized NormalizedLandmarkList with a single
+NumPy structured view: every landmark that only carries x, y and z is a
+fixed 17-byte record. Results with any other layout (e.g. visibility or
+presence set) fall back to np.fromiter over the landmark objects.
+"""
+
+import numpy as np
+
+FACE_MESH_LANDMARKS = 478  # 468 mesh points + 10 iris points with refine_landmarks=True
+
+# Wire layout of one `repeated NormalizedLandmark landmark = 1` entry with x, y, z set
+_LANDMARK_RECORD = np.dtype([
+    ('tag', 'u1'), ('length', 'u1'),
+    ('x_tag', 'u1'), ('x', '<f4'),
+    ('y_tag', 'u1'), ('y', '<f4'),
+    ('z_tag', 'u1'), ('z', '<f4'),
+])
+_RECORD_TAGS = (('tag', 0x0a), ('length', 0x0f), ('x_tag', 0x0d), ('y_tag', 0x15), ('z_tag', 0x1d))
+
+
+def decode_serialized_landmarks(data, landmark_count=FACE_MESH_LANDMARKS):
+    """Structured view over a serialized landmark list, or None if the layout is not x/y/z only"""
+    if len(data) != landmark_count * _LANDMARK_RECORD.itemsize:
+        return None
+    records = np.frombuffer(data, dtype=_LANDMARK_RECORD)
+    for field, value in _RECORD_TAGS:
+        if not np.all(records[field] == value):
+            return None
+    return records
+
+
+class LandmarkBuffer:
+    def __init__(self, max_faces=5, landmark_count=FACE_MESH_LANDMARKS):
+        self.landmark_count = landmark_count
+        self.buffer = np.zeros((max_faces, landmark_count, 3), np.float32)
+
+        # Statistics
+        self.fast_path = 0
+        self.slow_path = 0
+
+    @property
+    def feature_size(self):
+        return self.landmark_count * 3
+
+    def empty(self):
+        """(0, 1434) result for frames without faces"""
+        return self.buffer[:0].reshape(0, self.feature_size)
+
+    def _ensure_capacity(self, faces):
+        if faces > len(self.buffer):
+            self.buffer = np.zeros((faces, self.landmark_count, 3), np.float32)
+
+    def fill(self, multi_face_landmarks):
+        """Copy FaceMesh multi_face_landmarks into the buffer, returns a (faces, 478, 3) view
+
+        The view is overwritten by the next call - copy anything that must outlive the frame
+        """
+        faces = len(multi_face_landmarks) if multi_face_landmarks else 0
+        self._ensure_capacity(faces)
+        points = self.buffer[:faces]
+
+        for i in range(faces):
+            face_landmarks = multi_face_landmarks[i]
+            serialize = getattr(face_landmarks, 'SerializeToString', None)
+            records = decode_serialized_landmarks(serialize(), self.landmark_count) if serialize else None
+            if records is not None:
+                points[i, :, 0] = records['x']
+                points[i, :, 1] = records['y']
+                points[i, :, 2] = records['z']
+                self.fast_path += 1
+            else:
+                landmarks = face_landmarks.landmark
+                points[i].reshape(-1)[:] = np.fromiter(
+                    (value for landmark in landmarks for value in (landmark.x, landmark.y, landmark.z)),
+                    dtype=np.float32, count=len(landmarks) * 3)
+                self.slow_path += 1
+
+        return points
+
+    def features(self, multi_face_landmarks):
+        """Flat (faces, 1434) feature view over the filled buffer, in x, y, z order per landmark"""
+        points = self.fill(multi_face_landmarks)
+        return points.reshape(len(points), self.feature_size)
@@ -0,0 +1,110 @@
+"""
+Pose-normalized landmark descriptor for the MediaPipe backend
+Raw FaceMesh vectors are dominated by where the head is in the image and
+how large it is. The descriptor removes translation and scale, rotates
+every face onto the owner's reference shape (batched Kabsch) and projects
+the aligned shape onto a small PCA basis fitted at registration. The
+distance of the face from that basis is kept as one extra dimension, so a
+face the owner's samples cannot explain stays far from every template.
+
+Descriptors are float32 vectors of components + 1 values, scaled so that
+the Euclidean distance between two descriptors approximates the RMS
+landmark displacement in units of face size.
+"""
+
+import numpy as np
+
+from landmark_buffer import FACE_MESH_LANDMARKS
+
+
+def normalize_shapes(points):
+    """Remove translation and scale from (faces, landmarks, 3) points - unit RMS radius per face"""
+    centered = points - points.mean(axis=1, keepdims=True)
+    scale = np.sqrt(np.einsum('nij,nij->n', centered, centered) / points.shape[1])
+    return centered / np.maximum(scale, 1e-12)[:, None, None]
+
+
+def kabsch_rotations(shapes, reference):
+    """Batched proper rotations R (faces, 3, 3) minimising |shape @ R - reference|"""
+    covariance = np.einsum('nli,lj->nij', shapes, reference)
+    u, _, vt = np.linalg.svd(covariance)
+    # Reflection guard: force det(R) = +1
+    sign = np.sign(np.linalg.det(u @ vt))
+    u[:, :, 2] *= np.where(sign == 0, 1, sign)[:, None]
+    return u @ vt
+
+
+class PoseNormalizedDescriptor:
+    def __init__(self, components=32, landmark_count=FACE_MESH_LANDMARKS):
+        self.components = components
+        self.landmark_count = landmark_count
+        self.reference = None   # (landmarks, 3) mean aligned owner shape
+        self.mean = None        # (landmarks * 3,) mean of the aligned samples
+        self.basis = None       # (k, landmarks * 3) orthonormal PCA basis
+
+    @property
+    def fitted(self):
+        return self.reference is not None
+
+    @property
+    def size(self):
+        """Descriptor length"""
+        return len(self.basis) + 1 if self.fitted else 0
+
+    def _as_points(self, features):
+        features = np.asarray(features, dtype=np.float32)
+        return features.reshape(len(features), self.landmark_count, 3)
+
+    def align(self, features, reference=None):
+        """Normalize and rotate faces onto the reference shape, returns (aligned points, rotations)"""
+        shapes = normalize_shapes(self._as_points(features))
+        rotations = kabsch_rotations(shapes, self.reference if reference is None else reference)
+        return np.einsum('nli,nij->nlj', shapes, rotations), rotations
+
+    def fit(self, features, iterations=3):
+        """Fit the reference shape (generalized Procrustes) and the PCA basis on owner samples"""
+        shapes = normalize_shapes(self._as_points(features).astype(np.float64))
+        reference = shapes[0]
+        for _ in range(iterations):
+            rotations = kabsch_rotations(shapes, reference)
+            aligned = np.einsum('nli,nij->nlj', shapes, rotations)
+            reference = normalize_shapes(aligned.mean(axis=0)[None])[0]
+
+        flat = aligned.reshape(len(aligned), -1)
+        mean = flat.mean(axis=0)
+        _, _, vt = np.linalg.svd(flat - mean, full_matrices=False)
+        k = max(0, min(self.components, len(flat) - 1))
+
+        self.reference = reference.astype(np.float32)
+        self.mean = mean.astype(np.float32)
+        self.basis = np.ascontiguousarray(vt[:k], dtype=np.float32)
+        return self
+
+    def transform(self, features):
+        """(faces, 1434) raw landmark features -> (faces, components + 1) float32 descriptors"""
+        if len(features) == 0:
+            return np.zeros((0, self.size), np.float32)
+
+        aligned, _ = self.align(features)
+        centered = aligned.reshape(len(aligned), -1) - self.mean
+        coefficients = centered @ self.basis.T
+        residual = np.linalg.norm(centered - coefficients @ self.basis, axis=1)
+
+        descriptors = np.empty((len(centered), self.size), np.float32)
+        descriptors[:, :-1] = coefficients
+        descriptors[:, -1] = residual
+        descriptors /= np.sqrt(self.landmark_count)
+        return descriptors
+
+    def to_dict(self):
+        """Model state for the encrypted owner config"""
+        return {'components': self.components, 'landmark_count': self.landmark_count,
+                'reference': self.reference, 'mean': self.mean, 'basis': self.basis}
+
+    @classmethod
+    def from_dict(cls, data):
+        descriptor = cls(data['components'], data['landmark_count'])
+        descriptor.reference = np.asarray(data['reference'], np.float32)
+        descriptor.mean = np.asarray(data['mean'], np.float32)
+        descriptor.basis = np.asarray(data['basis'], np.float32)
+        return descriptor
@@ -0,0 +1,228 @@
+"""
+Reusable lock overlay window for Face Security System
+The lock screen used to be rebuilt on every lock: a new fullscreen
+Toplevel, a Canvas with ~120 gradient rectangles, every text item and a
+new PhotoImage, all destroyed again on unlock. When the owner and a
+passer-by alternate in front of the camera that churn sits right on the
+lock path.
+
+The overlay is now built once, when monitoring starts, and kept
+withdrawn. The static panel (gradient, borders and text) is rendered to
+a single image up front, so a lock only pastes the blurred screen into
+the existing background image and maps the window. Show and hide
+latencies are recorded for the monitoring summary.
+
+Each monitor gets its own overlay, placed at the monitor's position and
+sized to its resolution, with a panel rendered for its DPI scale.
+"""
+
+import time
+import tkinter as tk
+from collections import deque
+from functools import lru_cache
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont, ImageTk
+
+# Font files tried in order for each Tk-style font variant (Windows fonts first)
+FONT_FILES = {
+    'normal': ('segoeui.ttf', 'arial.ttf', 'DejaVuSans.ttf'),
+    'bold': ('segoeuib.ttf', 'arialbd.ttf', 'DejaVuSans-Bold.ttf'),
+    'italic': ('segoeuii.ttf', 'ariali.ttf', 'DejaVuSans-Oblique.ttf'),
+    'symbol': ('seguiemj.ttf', 'seguisym.ttf', 'DejaVuSans.ttf'),
+}
+
+
+@lru_cache(maxsize=32)
+def load_font(size, style='normal'):
+    """Font for a Tk point size and 'normal'/'bold'/'italic'/'symbol' style"""
+    pixels = max(1, round(size * 96 / 72))  # Tk sizes are points, at 96 DPI
+    for name in FONT_FILES[style]:
+        try:
+            return ImageFont.truetype(name, pixels)
+        except OSError:
+            continue
+    return ImageFont.load_default(pixels)
+
+
+def is_symbol(char):
+    """Emoji, dingbats and variation selectors go to the symbol font"""
+    code = ord(char)
+    return code >= 0x2190 and not 0x3000 <= code < 0xFE00
+
+
+def text_runs(text):
+    """Split a line into (run, is_symbol) pieces"""
+    runs = []
+    for char in text:
+        symbol = is_symbol(char)
+        if runs and runs[-1][1] == symbol:
+            runs[-1][0] += char
+        else:
+            runs.append([char, symbol])
+    return [(run, symbol) for run, symbol in runs]
+
+
+def text_width(text, size, style='normal'):
+    """Rendered width of a line in pixels"""
+    return sum(load_font(size, 'symbol' if symbol else style).getlength(run)
+               for run, symbol in text_runs(text))
+
+
+def wrap_line(text, size, style, max_width):
+    """Word-wrap a line to max_width pixels, like a Tk label's wraplength"""
+    lines, current = [], ''
+    for word in text.split(' '):
+        candidate = f"{current} {word}" if current else word
+        if current and text_width(candidate, size, style) > max_width:
+            lines.append(current)
+            current = word
+        else:
+            current = candidate
+    return lines + [current]
+
+
+def draw_centered_text(draw, center_x, center_y, text, size, style='normal', fill='#ffffff'):
+    """Draw a line centred on (center_x, center_y), emoji in the symbol font"""
+    x = center_x - text_width(text, size, style) / 2
+    for run, symbol in text_runs(text):
+        font = load_font(size, 'symbol' if symbol else style)
+        draw.text((x, center_y), run, font=font, fill=fill, anchor='lm', embedded_color=symbol)
+        x += font.getlength(run)
+
+
+def render_panel(size, items, background='#1a1a2e', gradient=None, borders=()):
+    """Static lock panel as one RGB image
+
+    items: (text, y, font_size, style, color) lines centred horizontally at height y
+    gradient: (top_rgb, bottom_rgb, band) vertical gradient in bands of band pixels
+    borders: (color, width, inset) rectangles drawn inside the panel edge
+    """
+    width, height = size
+    panel = Image.new('RGB', (width, height), background)
+    if gradient is not None:
+        top, bottom, band = gradient
+        rows = np.arange(height) // band * band / height
+        colors = np.asarray(top, np.float32) + np.outer(rows, np.subtract(bottom, top))
+        pixels = np.repeat(colors.astype(np.uint8)[:, None, :], width, axis=1)
+        panel = Image.fromarray(pixels)
+
+    draw = ImageDraw.Draw(panel)
+    for color, border_width, inset in borders:
+        draw.rectangle((inset, inset, width - 1 - inset, height - 1 - inset), outline=color, width=border_width)
+    for text, y, font_size, style, color in items:
+        if text.strip():
+            draw_centered_text(draw, width // 2, y, text, font_size, style, color)
+    return panel
+
+
+class LockOverlay:
+    def __init__(self, panel, screen_size, rely=0.5, fallback_color='#1a1a1a', position=(0, 0)):
+        self.panel = panel                  # Pre-rendered static panel (PIL image)
+        self.screen_size = screen_size      # (width, height) of the monitor it covers
+        self.position = position            # Monitor origin on the virtual desktop
+        self.rely = rely                    # Vertical position of the panel centre
+        self.fallback_color = fallback_color  # Shown when there is no blurred screen
+        self.window = None
+        self.background = None              # Screen-sized PhotoImage, pasted into on each lock
+        self.background_label = None
+        self.panel_photo = None
+        self.visible = False
+        self.generation = 0                 # Incremented on every show, to spot stale background swaps
+
+        # Statistics
+        self.shows = 0
+        self.hides = 0
+        self.show_times = deque(maxlen=100)  # Recent latencies in ms
+        self.hide_times = deque(maxlen=100)
+        self.build_ms = 0.0
+
+    def build(self):
+        """Create the window, withdrawn, with the panel already in place"""
+        if self.window is not None:
+            return self
+        started = time.perf_counter()
+        self.window = tk.Toplevel()
+        self.window.withdraw()
+        self.window.title("Screen Security")
+        # Fullscreen applies to the monitor the window sits on
+        self.window.geometry("{}x{}+{}+{}".format(*self.screen_size, *self.position))
+        self.window.attributes('-fullscreen', True)
+        self.window.attributes('-topmost', True)
+        self.window.attributes('-toolwindow', True)
+        self.window.configure(bg=self.fallback_color)
+
+        self.background = ImageTk.PhotoImage('RGB', self.screen_size)
+        self.background_label = tk.Label(self.window, image=self.background, bd=0, highlightthickness=0)
+        self.panel_photo = ImageTk.PhotoImage(self.panel)
+        panel_label = tk.Label(self.window, image=self.panel_photo, bd=0, highlightthickness=0)
+        panel_label.place(relx=0.5, rely=self.rely, anchor='center')
+        self.window.update_idletasks()
+        self.build_ms = (time.perf_counter() - started) * 1000
+        return self
+
+    def set_background(self, image):
+        """Paste a blurred screen (PIL image) into the existing background, None for a flat colour"""
+        if image is None:
+            self.background_label.place_forget()
+            return
+        if image.size != self.screen_size:
+            image = image.resize(self.screen_size, Image.BILINEAR)
+        self.background.paste(image)
+        self.background_label.place(x=0, y=0, relwidth=1, relheight=1)
+        self.background_label.lower()
+
+    def show(self, background=None):
+        """Map the overlay over a blurred screen, returns the show latency in ms"""
+        started = time.perf_counter()
+        self.build()
+        self.generation += 1
+        self.set_background(background)
+        self.window.deiconify()
+        self.window.attributes('-topmost', True)
+        self.window.lift()
+        self.window.update_idletasks()
+        self.visible = True
+        elapsed = (time.perf_counter() - started) * 1000
+        self.shows += 1
+        self.show_times.append(elapsed)
+        return elapsed
+
+    def hide(self):
+        """Withdraw the overlay (it stays built), returns the hide latency in ms"""
+        if self.window is None or not self.visible:
+            return 0.0
+        started = time.perf_counter()
+        self.window.withdraw()
+        self.window.update_idletasks()
+        self.visible = False
+        elapsed = (time.perf_counter() - started) * 1000
+        self.hides += 1
+        self.hide_times.append(elapsed)
+        return elapsed
+
+    def destroy(self):
+        if self.window is not None:
+            self.window.destroy()
+        self.window = None
+        self.background = self.background_label = self.panel_photo = None
+        self.visible = False
+
+    def get_stats(self):
+        """Show/hide latency statistics for display and logging"""
+        def summary(times):
+            return (times[-1] if times else 0.0, float(np.mean(times)) if times else 0.0,
+                    max(times) if times else 0.0)
+        last_show, avg_show, max_show = summary(self.show_times)
+        last_hide, avg_hide, max_hide = summary(self.hide_times)
+        return {
+            'build_ms': self.build_ms,
+            'shows': self.shows,
+            'last_show_ms': last_show,
+            'avg_show_ms': avg_show,
+            'max_show_ms': max_show,
+            'hides': self.hides,
+            'last_hide_ms': last_hide,
+            'avg_hide_ms': avg_hide,
+            'max_hide_ms': max_hide,
+        }
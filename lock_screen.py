@@ -0,0 +1,257 @@
+"""
+Lock screen for Face Security System
+Both backends cover the screen the same way: grab every monitor, blur
+the grabs, and show one pre-built overlay per monitor over them. That
+path - screen capture, the blurred snapshot cache, the overlays and the
+fresh-background swap - lives here once. The backends only supply the
+panel drawn on each overlay and decide when to lock.
+
+Tk objects may only be touched on the thread that created them. The
+fresh background swapped in after a cached lock is blurred on its own
+thread and handed back through a queue, which the thread that owns the
+overlays drains with apply_pending_backgrounds() on its next decision.
+"""
+
+import queue
+import threading
+import time
+import tkinter as tk
+
+import cv2
+from PIL import Image
+
+from lock_overlay import LockOverlay
+from screen_capture import Monitor, create_screen_capture
+from snapshot_cache import BlurredSnapshotCache
+
+
+class LockScreen:
+    def __init__(self, blur_engine, render_panel, rely=0.5, screen_capture=None, capture_backend='auto',
+                 blur_enabled=True):
+        self.blur_engine = blur_engine
+        self.render_panel = render_panel        # Monitor -> pre-rendered static panel (PIL image)
+        self.rely = rely                        # Vertical position of the panel centre
+        self.screen_capture = screen_capture    # Reusable screen grabber, created on first use if not injected
+        self.capture_backend = capture_backend  # SCREEN_CAPTURE_BACKEND used when none was injected
+        self.blur_enabled = blur_enabled        # False covers the screens with a flat colour
+        self.overlays = []                      # Reusable lock windows, one per monitor
+        self.monitors = []                      # Monitor layout the overlays were built for
+        self.overlay_excluded = False           # Whether screen captures leave the overlays out
+        self.snapshot_cache = None              # Pre-blurred screen snapshots, refreshed while monitoring
+        self.blur_thread = None
+        self.pending_backgrounds = queue.Queue()  # Fresh backgrounds blurred off the Tk thread, waiting to be shown
+        self.lock_latency_ms = None             # Time from the lock decision until the overlays covered the screens
+
+    @property
+    def visible(self):
+        return any(overlay.visible for overlay in self.overlays)
+
+    def get_screen_capture(self):
+        """Screen capture backend, None where no screen can be captured"""
+        if self.screen_capture is None:
+            try:
+                self.screen_capture = create_screen_capture(self.capture_backend)
+            except Exception as e:
+                print(f"Error opening screen capture: {e}")
+        return self.screen_capture
+
+    def get_monitors(self):
+        """Monitors to cover on lock, in virtual desktop coordinates"""
+        screen_capture = self.get_screen_capture()
+        if screen_capture is not None:
+            try:
+                return screen_capture.monitors()
+            except Exception as e:
+                print(f"Error listing monitors: {e}")
+        return [Monitor(0, 0, 0, 1920, 1080, primary=True)]  # Overlay size when the screen cannot be queried
+
+    def get_screen_size(self):
+        """Primary screen dimensions"""
+        monitors = self.get_monitors()
+        return next((monitor for monitor in monitors if monitor.primary), monitors[0]).size
+
+    def capture_screen(self):
+        """Capture the current screen content as a PIL image, None on failure"""
+        screen_capture = self.get_screen_capture()
+        if screen_capture is None:
+            return None
+        try:
+            # Grabbed into the capture's persistent buffer, converted to RGB once
+            return screen_capture.grab_image()
+        except Exception as e:
+            print(f"Error capturing screen: {e}")
+            return None
+
+    def create_blurred_background(self, screen_image=None):
+        """Blurred version of the current screen (or of a given PIL screen image)"""
+        try:
+            if not self.blur_enabled:
+                return None
+            if screen_image is None:
+                screen_image = self.capture_screen()
+            if screen_image is None:
+                return None
+
+            # Downscale, blur and darken as one NumPy/OpenCV pass (see blur_engine.py)
+            return self.blur_engine.blur_image(screen_image)
+
+        except Exception as e:
+            print(f"Error creating blurred background: {e}")
+            return None
+
+    def create_blurred_backgrounds(self):
+        """Grab all monitors at once and blur them on the engine's pool, {monitor index: PIL image}"""
+        try:
+            if not self.blur_enabled:
+                return {}
+            screen_capture = self.get_screen_capture()
+            if screen_capture is None:
+                return {}
+            with screen_capture.lock:  # The monitor views point into the capture buffer
+                views = screen_capture.grab_monitors()
+                images = self.blur_engine.map(
+                    lambda view: Image.fromarray(self.blur_engine.blur(view, conversion=cv2.COLOR_BGRA2RGB)),
+                    [view for _, view in views])
+            return {monitor.index: image for (monitor, _), image in zip(views, images)}
+        except Exception as e:
+            print(f"Error creating blurred backgrounds: {e}")
+            return {}
+
+    def exclude_from_capture(self, window):
+        """Keep a window out of screen captures (Windows 10 2004+), False where unsupported"""
+        screen_capture = self.get_screen_capture()
+        return screen_capture is not None and screen_capture.exclude_window(window)
+
+    def start_snapshot_cache(self, refresh_interval, max_age, max_width, memory_limit):
+        """Keep blurred snapshots ready so a lock covers the screens without capturing first"""
+        screen_capture = self.get_screen_capture()
+        if screen_capture is not None and self.blur_enabled:
+            self.snapshot_cache = BlurredSnapshotCache(screen_capture, self.blur_engine, refresh_interval, max_age,
+                                                       max_width, memory_limit).start()
+        return self.snapshot_cache
+
+    def prepare(self):
+        """Build one overlay per monitor once and keep them withdrawn, so a lock only has to show them"""
+        monitors = self.get_monitors()
+        if self.overlays and [monitor.rect for monitor in monitors] != [monitor.rect for monitor in self.monitors]:
+            # Monitors were added, removed or rearranged since the overlays were built
+            for overlay in self.overlays:
+                overlay.destroy()
+            self.overlays = []
+        if not self.overlays:
+            for monitor in monitors:
+                self.overlays.append(LockOverlay(self.render_panel(monitor), monitor.size, rely=self.rely,
+                                                 position=(monitor.x, monitor.y)).build())
+            self.monitors = monitors
+            # Screen captures taken while locked then see what is underneath
+            self.overlay_excluded = all([self.exclude_from_capture(overlay.window) for overlay in self.overlays])
+            print(f"🪟 Lock overlays ready for {len(monitors)} monitor(s) in "
+                  f"{sum(overlay.build_ms for overlay in self.overlays):.0f} ms")
+        return self.overlays
+
+    def cover(self):
+        """Cover every monitor with its overlay over a blurred copy of it"""
+        if self.visible:
+            return
+
+        lock_started = time.perf_counter()
+        if self.snapshot_cache is not None:
+            self.snapshot_cache.pause()  # It would only capture the overlays from now on
+        overlays = self.prepare()
+
+        backgrounds = None
+        from_cache = False
+        try:
+            if self.snapshot_cache is not None:
+                # Cover the screens with the pre-blurred snapshots now, a fresh capture is swapped in later
+                backgrounds = self.snapshot_cache.render_all(
+                    [(monitor.index, overlay.screen_size) for monitor, overlay in zip(self.monitors, overlays)],
+                    as_image=True)
+            from_cache = backgrounds is not None
+            if backgrounds is None:
+                # Create blurred backgrounds (None falls back to a dark background)
+                print("Capturing and blurring screen...")
+                blurred = self.create_blurred_backgrounds()
+                backgrounds = [blurred.get(monitor.index) for monitor in self.monitors]
+        except Exception as e:
+            print(f"Error setting blurred background: {e}")
+
+        # Only the background images change, the windows and the pre-rendered panels are reused
+        show_ms = sum(overlay.show(blurred_bg) for overlay, blurred_bg in zip(overlays, backgrounds or [None] * len(overlays)))
+        self.lock_latency_ms = (time.perf_counter() - lock_started) * 1000
+        print(f"🔒 Screen covered in {self.lock_latency_ms:.0f} ms "
+              f"({'cached snapshot' if from_cache else 'fresh capture'}, {len(overlays)} overlay(s) shown in {show_ms:.1f} ms)")
+        if from_cache:
+            self.swap_in_fresh_background()
+
+    def uncover(self):
+        """Hide the overlays (they stay built for the next lock) and resume snapshot refreshes"""
+        for overlay in self.overlays:
+            overlay.hide()
+        if self.snapshot_cache is not None:
+            self.snapshot_cache.resume()
+
+    def swap_in_fresh_background(self):
+        """Capture and blur the screens under the overlays off the Tk thread, queued for apply_pending_backgrounds"""
+        overlays = list(zip(self.monitors, self.overlays))
+        if not overlays or not all(overlay.visible for _, overlay in overlays):
+            return
+        if not self.overlay_excluded:
+            print("ℹ️  Keeping the cached lock background - overlays cannot be left out of screen captures here")
+            return  # A capture now would only show the overlays themselves
+        generations = [overlay.generation for _, overlay in overlays]
+
+        def refresh():
+            backgrounds = self.create_blurred_backgrounds()
+            if not backgrounds:
+                print("⚠️  Fresh lock background skipped - screen capture failed")
+                return
+            self.pending_backgrounds.put((overlays, generations, backgrounds))
+
+        self.blur_thread = threading.Thread(target=refresh, name="lock-background", daemon=True)
+        self.blur_thread.start()
+
+    def apply_pending_backgrounds(self):
+        """Show fresh backgrounds blurred since the last call - call on the thread that built the overlays
+
+        Returns the number of overlays updated.
+        """
+        updated = 0
+        while True:
+            try:
+                overlays, generations, backgrounds = self.pending_backgrounds.get_nowait()
+            except queue.Empty:
+                return updated
+            for (monitor, overlay), generation in zip(overlays, generations):
+                blurred_bg = backgrounds.get(monitor.index)
+                if blurred_bg is None:
+                    continue
+                if not overlay.visible or overlay.generation != generation:
+                    print(f"ℹ️  Fresh lock background for monitor {monitor.index} skipped - the lock it was captured for has ended")
+                    continue
+                try:
+                    overlay.set_background(blurred_bg)
+                    overlay.window.update_idletasks()
+                    updated += 1
+                except (AttributeError, tk.TclError) as e:
+                    print(f"⚠️  Fresh lock background for monitor {monitor.index} skipped: {e}")
+
+    def summary_lines(self):
+        """Overlay and snapshot cache statistics for the monitoring summary"""
+        lines = []
+        for monitor, overlay in zip(self.monitors, self.overlays):
+            stats = overlay.get_stats()
+            lines.append(f"🪟 Lock overlay {monitor.index} ({monitor.width}x{monitor.height}): {stats['shows']} shows "
+                         f"(avg {stats['avg_show_ms']:.1f} ms, max {stats['max_show_ms']:.1f} ms), "
+                         f"{stats['hides']} hides (avg {stats['avg_hide_ms']:.1f} ms)")
+        if self.snapshot_cache is not None:
+            stats = self.snapshot_cache.get_stats()
+            lines.append(f"🖼️  Snapshot cache: {stats['hits']}/{stats['hits'] + stats['misses']} locks covered from cache, "
+                         f"{stats['refreshes']} refreshes (last {stats['last_refresh_ms']:.0f} ms), "
+                         f"{stats['evictions']} evictions")
+        return lines
+
+    def stop_snapshot_cache(self):
+        if self.snapshot_cache is not None:
+            self.snapshot_cache.stop()
+            self.snapshot_cache = None
@@ -8,17 +8,29 @@ import threading
 from datetime import datetime
 import tkinter as tk
 from tkinter import messagebox, simpledialog
-from PIL import Image, ImageTk, ImageFilter
 import hashlib
 from cryptography.fernet import Fernet
-import win32gui
-import win32con
-import win32api
-import win32ui
-from ctypes import windll
 import keyboard
 from sklearn.metrics.pairwise import cosine_similarity
 import joblib
+from frame_analysis import FrameAnalysis
+from camera_grabber import LatestFrameGrabber
+from frame_sources import CameraSource, frame_source_from_config
+from detection_scheduler import AdaptiveDetectionScheduler
+from motion_gate import MotionGate
+from face_tracker import FaceTracker
+from face_matching import LandmarkMatcher, DescriptorMatcher
+from landmark_descriptor import PoseNormalizedDescriptor
+from pose_index import PoseBinnedIndex, estimate_head_pose
+from perf_stats import StageTimer
+from blur_engine import BlurEngine
+from lock_screen import LockScreen
+from lock_overlay import render_panel
+from pipeline import MonitorPipeline
+from landmark_buffer import LandmarkBuffer
+from face_gallery import FaceGallery, authorize_with_gallery
+from template_consolidation import consolidate_templates, format_report
+from template_adaptation import TemplateReservoir, AsyncProfileWriter
 
 try:
     from config_loader import config
@@ -28,7 +40,7 @@ except ImportError:
     print("Warning: config_loader not available, using default settings")
 
 class MediaPipeFaceSecuritySystem:
-    def __init__(self):
+    def __init__(self, frame_source=None, screen_capture=None):
         self.mp_face_detection = mp.solutions.face_detection
         self.mp_face_mesh = mp.solutions.face_mesh
         self.mp_drawing = mp.solutions.drawing_utils
@@ -42,6 +54,25 @@ class MediaPipeFaceSecuritySystem:
             self.face_detection_interval = config.detection_interval
             self.similarity_threshold = config.similarity_threshold
             self.registration_samples = config.registration_samples  # Use config value
+            tracker_settings = (config.track_iou_threshold, config.track_max_missed, config.reverify_interval)
+            enable_tracking = config.enable_tracking
+            self.perf = StageTimer(config.enable_stage_timing, config.stage_timing_window)
+            self.descriptor_mode = config.descriptor_mode
+            self.descriptor_components = config.descriptor_components
+            self.descriptor_scale = config.descriptor_scale
+            pose_index_settings = (config.enable_pose_index, config.pose_bin_size,
+                                   config.pose_neighbour_bins, config.pose_index_min_templates)
+            self.enable_authorized_users = config.enable_authorized_users
+            self.gallery_settings = {'brute_force_limit': config.gallery_brute_force_limit,
+                                     'n_clusters': config.gallery_clusters, 'n_probe': config.gallery_probes}
+            self.consolidation_settings = (config.enable_consolidation, config.max_templates_per_identity,
+                                           config.identity_template_caps)
+            self.adaptation = (TemplateReservoir(config.adaptation_capacity, config.adaptation_min_margin,
+                                                 config.adaptation_min_streak, config.adaptation_min_interval)
+                               if config.enable_adaptation else None)
+            self.blur_engine = BlurEngine(config.blur_quality, config.blur_intensity,
+                                          config.blur_quality_reduction, config.blur_overlay_darkness,
+                                          config.blur_workers)
         else:
             detection_confidence = 0.7
             self.config_file = "mediapipe_security_config.pkl"
@@ -50,6 +81,18 @@ class MediaPipeFaceSecuritySystem:
             self.face_detection_interval = 1.0
             self.similarity_threshold = 0.8
             self.registration_samples = 5  # Fallback value
+            tracker_settings = (0.3, 5, 2.0)
+            enable_tracking = True
+            self.perf = StageTimer()
+            self.descriptor_mode = 'raw'
+            self.descriptor_components = 32
+            self.descriptor_scale = 0.08
+            pose_index_settings = (True, 15.0, 1, 20)
+            self.enable_authorized_users = True
+            self.gallery_settings = {}
+            self.consolidation_settings = (True, 50, {})
+            self.adaptation = None
+            self.blur_engine = BlurEngine()
         
         self.face_detection = self.mp_face_detection.FaceDetection(
             model_selection=1, min_detection_confidence=detection_confidence)
@@ -59,14 +102,43 @@ class MediaPipeFaceSecuritySystem:
             refine_landmarks=True,
             min_detection_confidence=detection_confidence,
             min_tracking_confidence=0.5)
+        self.landmark_buffer = LandmarkBuffer(max_faces=5)  # Reused (faces, 478, 3) float32 landmark array
+        
+        # Detect-then-track: identities are carried with face tracks between recognitions
+        self.face_tracker = FaceTracker(*tracker_settings) if enable_tracking else None
+        # Landmarks of one pending track at a time, from a crop around its box - a separate
+        # single-face mesh so the full-frame mesh keeps its own tracking state
+        self.crop_face_mesh = self.mp_face_mesh.FaceMesh(
+            static_image_mode=True,
+            max_num_faces=1,
+            refine_landmarks=True,
+            min_detection_confidence=detection_confidence) if enable_tracking else None
         
         self.owner_face_features = []
+        self.owner_matcher = None  # Pre-normalised owner gallery, built from owner_face_features
+        self.descriptor = None     # Fitted PoseNormalizedDescriptor in pose_pca mode
+        self.owner_templates = []  # Compact owner descriptors in pose_pca mode
+        self.template_poses = None  # (templates, 2) yaw/pitch of each owner template
+        self.pose_index = None      # Pose-binned template index, built by update_owner_matcher
+        self.enable_pose_index, self.pose_bin_size, self.pose_neighbour_bins, self.pose_index_min_templates = pose_index_settings
+        self.gallery = None  # Authorized users besides the owner, loaded from the encrypted config
+        self.face_count_probe = True
+        self.display_settings = (True, True, "MediaPipe Face Security Monitor", True)  # Set by monitor_faces
+        self.pipeline = None  # MonitorPipeline while monitoring in threaded mode
+        self.profile_writer = None  # Background writer for adapted templates, created on first use
+        self.config_lock = threading.RLock()
         self.owner_name = "Owner"
         self.is_monitoring = False
         self.screen_blurred = False
         self.camera = None
-        self.blur_window = None
-        self.blur_thread = None
+        self.frame_source = frame_source  # Optional injected FrameSource (video, images, synthetic)
+        # Screen capture, blurred snapshots and the per-monitor lock overlays (see lock_screen.py)
+        self.lock_screen = LockScreen(self.blur_engine,
+                                      lambda monitor: self.render_lock_panel(monitor.width, monitor.height,
+                                                                             *self.lock_overlay_text(), monitor.scale),
+                                      rely=0.5, screen_capture=screen_capture,
+                                      capture_backend=config.screen_capture_backend if CONFIG_AVAILABLE else 'auto',
+                                      blur_enabled=config.enable_screen_blur if CONFIG_AVAILABLE else True)
         self.last_face_time = time.time()
         self.owner_detected = True
         self.setup_encryption()
@@ -86,8 +158,25 @@ class MediaPipeFaceSecuritySystem:
         """Hash password for secure storage"""
         return hashlib.sha256(password.encode()).hexdigest()
     
-    def extract_face_features(self, image):
-        """Extract face features using MediaPipe face mesh"""
+    def open_frame_source(self, width, height, fps):
+        """Open the injected frame source, or the one selected in config.ini"""
+        if self.frame_source is not None:
+            source = self.frame_source
+        elif CONFIG_AVAILABLE:
+            source = frame_source_from_config(width, height, fps)
+        else:
+            source = CameraSource(0, width, height, fps)
+        
+        if not source.open():
+            return None
+        return source
+    
+    def extract_face_features(self, image, face_mesh=None):
+        """Extract face features using MediaPipe face mesh (the full-frame mesh unless another is given)
+        
+        Returns a (faces, 1434) float32 view of the reused landmark buffer - it is
+        overwritten by the next call, so copy rows that must be kept
+        """
         try:
             # Ensure image is in correct format (8-bit, 3-channel BGR)
             if image.dtype != np.uint8:
@@ -106,20 +195,14 @@ class MediaPipeFaceSecuritySystem:
             # Ensure RGB image is contiguous in memory
             rgb_image = np.ascontiguousarray(rgb_image)
             
-            results = self.face_mesh.process(rgb_image)
+            results = (face_mesh or self.face_mesh).process(rgb_image)
             
             if results.multi_face_landmarks:
-                features = []
-                for face_landmarks in results.multi_face_landmarks:
-                    # Extract key facial landmarks
-                    landmarks = []
-                    for landmark in face_landmarks.landmark:
-                        landmarks.extend([landmark.x, landmark.y, landmark.z])
-                    features.append(np.array(landmarks))
-                return features
+                # Extract all facial landmarks of all faces into the preallocated buffer
+                return self.landmark_buffer.features(results.multi_face_landmarks)
         except Exception as e:
             print(f"Error in extract_face_features: {e}")
-        return []
+        return self.landmark_buffer.empty()
     
     def register_owner(self):
         """Register the owner's face with password protection"""
@@ -141,18 +224,65 @@ class MediaPipeFaceSecuritySystem:
         
         root.destroy()
         
+        face_features = self.capture_face_samples()
+        if face_features is None:
+            return False
+        
+        if len(face_features) >= self.registration_samples:
+            # Save the configuration
+            config = {
+                'owner_name': self.owner_name,
+                'password_hash': self.hash_password(password),
+                'registration_date': datetime.now().isoformat()
+            }
+            
+            # Head pose of every sample for the pose-binned template index
+            self.template_poses = estimate_head_pose(face_features)
+            
+            if self.descriptor_mode == 'pose_pca':
+                # Store only the fitted descriptor and the compact templates
+                self.fit_descriptor(face_features)
+            else:
+                self.descriptor = None
+                self.owner_face_features = np.asarray(face_features, dtype=np.float32)
+            if self.consolidation_settings[0]:
+                self.consolidate_owner()
+            
+            config['template_poses'] = self.template_poses
+            if self.descriptor is not None:
+                config['descriptor'] = self.descriptor.to_dict()
+                config['face_templates'] = self.owner_templates
+            else:
+                config['face_features'] = self.owner_face_features
+            
+            if self.gallery is not None:
+                # Raw samples stay valid, descriptors do not survive a refitted descriptor
+                if self.descriptor is None and self.gallery.metric == 'cosine':
+                    config['authorized_users'] = self.gallery.to_dict()  # Keep the authorized users
+                else:
+                    print("Authorized users must be registered again after a pose_pca owner registration")
+            
+            # Encrypt and save atomically, after any queued adapted-template write for the old profile
+            if self.profile_writer is not None:
+                self.profile_writer.flush()
+            self._write_config(config)
+            
+            print("Owner registration successful!")
+            return True
+        else:
+            print("Registration failed - insufficient face samples")
+            return False
+    
+    def capture_face_samples(self, title='Owner Registration', label="Owner Face"):
+        """Capture landmark feature samples from the camera (SPACE per sample), returns None when cancelled"""
         print("Position yourself in front of the camera...")
         print("Press SPACE to capture your face, ESC to cancel")
         
-        cap = cv2.VideoCapture(0)
-        if not cap.isOpened():
+        # Open frame source with properties that ensure proper format
+        cap = self.open_frame_source(640, 480, 30)
+        if cap is None:
             print("Error: Could not open camera")
-            return False
-        
-        # Set camera properties to ensure proper format
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-        cap.set(cv2.CAP_PROP_FPS, 30)
+            return None
         
         face_features = []
         
@@ -191,7 +321,7 @@ class MediaPipeFaceSecuritySystem:
                     height = int(bbox.height * h)
                     
                     cv2.rectangle(frame, (x, y), (x + width, y + height), (0, 255, 0), 2)
-                    cv2.putText(frame, "Owner Face", (x, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+                    cv2.putText(frame, label, (x, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
             
             cv2.putText(frame, "Press SPACE to capture, ESC to cancel", (10, 30), 
                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
@@ -200,13 +330,13 @@ class MediaPipeFaceSecuritySystem:
             cv2.putText(frame, f"Samples collected: {len(face_features)}/{self.registration_samples}", (10, 90), 
                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
             
-            cv2.imshow('Owner Registration', frame)
+            cv2.imshow(title, frame)
             
             key = cv2.waitKey(1) & 0xFF
             if key == ord(' '):  # Space to capture
                 current_features = self.extract_face_features(frame)
                 if len(current_features) == 1:
-                    face_features.append(current_features[0])
+                    face_features.append(current_features[0].copy())
                     print(f"Face captured! Total samples: {len(face_features)}")
                     
                     if len(face_features) >= self.registration_samples:  # Use config value
@@ -216,30 +346,12 @@ class MediaPipeFaceSecuritySystem:
             elif key == 27:  # ESC to cancel
                 cap.release()
                 cv2.destroyAllWindows()
-                return False
+                return None
         
         cap.release()
         cv2.destroyAllWindows()
         
-        if len(face_features) >= self.registration_samples:
-            # Save the configuration
-            config = {
-                'face_features': face_features,
-                'owner_name': self.owner_name,
-                'password_hash': self.hash_password(password),
-                'registration_date': datetime.now().isoformat()
-            }
-            
-            # Encrypt and save
-            encrypted_data = self.cipher.encrypt(pickle.dumps(config))
-            with open(self.config_file, 'wb') as f:
-                f.write(encrypted_data)
-            
-            print("Owner registration successful!")
-            return True
-        else:
-            print("Registration failed - insufficient face samples")
-            return False
+        return face_features
     
     def load_owner_data(self):
         """Load owner's face data"""
@@ -253,13 +365,175 @@ class MediaPipeFaceSecuritySystem:
             decrypted_data = self.cipher.decrypt(encrypted_data)
             config = pickle.loads(decrypted_data)
             
-            self.owner_face_features = config['face_features']
+            self.owner_face_features = config.get('face_features', [])
             self.owner_name = config['owner_name']
+            self.template_poses = config.get('template_poses')
+            if self.template_poses is None and len(self.owner_face_features):
+                self.template_poses = estimate_head_pose(self.owner_face_features)
+            
+            if 'descriptor' in config:
+                self.descriptor = PoseNormalizedDescriptor.from_dict(config['descriptor'])
+                self.owner_templates = np.asarray(config['face_templates'], dtype=np.float32)
+                if self.descriptor_mode == 'raw':
+                    print("Owner was registered with pose_pca descriptors - register again to use raw mode")
+            elif self.descriptor_mode == 'pose_pca':
+                # Raw registration - fit the descriptor from the stored samples
+                self.fit_descriptor(self.owner_face_features)
+            
+            if self.adaptation is not None:
+                # Adapted templates live in the owner's matching space
+                self.adaptation.space = 'pose_pca' if self.descriptor is not None else 'raw'
+                self.adaptation.load(config.get('adapted_templates'))
+            
+            self.gallery = None
+            if self.enable_authorized_users and config.get('authorized_users'):
+                if config['authorized_users']['metric'] == self.gallery_metric():
+                    self.gallery = FaceGallery.from_dict(config['authorized_users'], **self.gallery_settings)
+                else:
+                    print("Authorized users were registered in another descriptor mode - register them again")
+            self.update_owner_matcher()
             return True
         except Exception as e:
             print(f"Error loading configuration: {e}")
             return False
     
+    def _read_config(self):
+        with self.config_lock:
+            with open(self.config_file, 'rb') as f:
+                return pickle.loads(self.cipher.decrypt(f.read()))
+    
+    def _write_config(self, config):
+        """Encrypt and replace the profile atomically (it may be written from the profile writer thread)"""
+        with self.config_lock:
+            temp_file = self.config_file + '.tmp'
+            with open(temp_file, 'wb') as f:
+                f.write(self.cipher.encrypt(pickle.dumps(config)))
+            os.replace(temp_file, self.config_file)
+    
+    def gallery_metric(self):
+        """Cosine for raw landmark vectors, Euclidean for pose-normalized descriptors"""
+        return 'euclidean' if self.descriptor is not None else 'cosine'
+    
+    def add_authorized_user(self, name, face_features, policy=None):
+        """Store an additional authorized identity with its samples and policy in the encrypted config
+        
+        Samples are stored in the owner's matching space - raw features, or
+        descriptors from the owner's fitted pose-normalized descriptor
+        """
+        config = self._read_config()
+        gallery = self.gallery or FaceGallery(self.gallery_metric(), **self.gallery_settings)
+        templates = self.describe_faces(face_features)
+        if self.consolidation_settings[0]:
+            templates = self.consolidate_identity(name, templates).templates
+        gallery.add_identity(name, templates, policy)
+        config['authorized_users'] = gallery.to_dict()
+        self._write_config(config)
+        self.gallery = gallery
+        return gallery.identity(name)
+    
+    def template_cap(self, name):
+        """Maximum templates kept for an identity"""
+        _, max_templates, caps = self.consolidation_settings
+        return caps.get(name, max_templates)
+    
+    def consolidate_identity(self, name, templates):
+        """k-medoids + centroid consolidation of one identity's templates, logs the score change"""
+        result = consolidate_templates(templates, self.template_cap(name), self.gallery_metric())
+        if result.changed:
+            print(f"🧩 Consolidated {format_report(name, result.report)}")
+        return result
+    
+    def consolidate_owner(self):
+        """Consolidate the owner templates (raw features or descriptors) together with their poses"""
+        templates = self.owner_templates if self.descriptor is not None else self.owner_face_features
+        result = self.consolidate_identity(self.owner_name, templates)
+        if result.changed:
+            if self.descriptor is not None:
+                self.owner_templates = result.templates
+            else:
+                self.owner_face_features = result.templates
+            if self.template_poses is not None:
+                poses = np.asarray(self.template_poses, dtype=np.float32)
+                self.template_poses = np.concatenate([poses[result.kept], poses.mean(axis=0, keepdims=True)])
+        return result
+    
+    def consolidate_all_templates(self):
+        """Consolidate the owner and every authorized user on demand and save the result"""
+        if not self.load_owner_data():
+            print("No owner registered")
+            return False
+        
+        config = self._read_config()
+        owner = self.consolidate_owner()
+        reports = {self.owner_name: owner.report}
+        if owner.changed:
+            config['template_poses'] = self.template_poses
+            if self.descriptor is not None:
+                config['face_templates'] = self.owner_templates
+            else:
+                config['face_features'] = self.owner_face_features
+            self.update_owner_matcher()
+        
+        if self.gallery is not None:
+            updates = {}
+            template_std = {}
+            for name, templates, spread in zip(self.gallery.names(), self.gallery.templates, self.gallery.template_std):
+                result = self.consolidate_identity(name, templates)
+                reports[name] = result.report
+                if result.changed:
+                    updates[name] = result.templates
+                    if spread is not None:
+                        # Stored templates are normalised - keep the raw std of the medoids, average for the centroid
+                        template_std[name] = np.append(spread[result.kept], spread.mean())
+            if updates:
+                self.gallery.replace_templates(updates, template_std)
+                config['authorized_users'] = self.gallery.to_dict()
+        
+        self._write_config(config)
+        for name, report in reports.items():
+            print(f"   {format_report(name, report)}")
+        return reports
+    
+    def remove_authorized_user(self, name):
+        """Delete an authorized identity, returns False if it does not exist"""
+        if self.gallery is None or not self.gallery.remove_identity(name):
+            return False
+        config = self._read_config()
+        config['authorized_users'] = self.gallery.to_dict()
+        self._write_config(config)
+        return True
+    
+    def register_authorized_user(self):
+        """Register an additional authorized user, confirmed with the owner password"""
+        print("=== Authorized User Registration (MediaPipe) ===")
+        if not self.load_owner_data():
+            print("Register the owner first")
+            return False
+        
+        root = tk.Tk()
+        root.withdraw()
+        password = simpledialog.askstring("Authorized User", "Owner password:", show='*')
+        if not password or not self.verify_password(password):
+            messagebox.showerror("Error", "Invalid password!")
+            root.destroy()
+            return False
+        name = simpledialog.askstring("Authorized User", "Name of the user:")
+        allow_unlock = messagebox.askyesno("Authorized User", "May this user unlock the screen?")
+        root.destroy()
+        if not name or name == self.owner_name:
+            print("A unique user name is required")
+            return False
+        
+        face_features = self.capture_face_samples('Authorized User Registration', name)
+        if face_features is None or len(face_features) < self.registration_samples:
+            print("Registration failed - insufficient face samples")
+            return False
+        
+        self.add_authorized_user(name, face_features, {'allow_unlock': allow_unlock})
+        print(f"Authorized user '{name}' registered with {len(face_features)} face samples "
+              f"({self.gallery.get_stats()['identities']} authorized users)")
+        return True
+    
     def verify_password(self, password):
         """Verify password against stored hash"""
         if not os.path.exists(self.config_file):
@@ -317,195 +591,391 @@ class MediaPipeFaceSecuritySystem:
             print(f"Error in face comparison: {e}")
             return False
     
-    def detect_faces(self, frame):
-        """Enhanced face detection with preprocessing and quality checks"""
+    def landmarks_to_box(self, features, frame_width, frame_height):
+        """Bounding box (x, y, width, height) in pixels around a face's landmarks"""
+        xs = features[0::3]
+        ys = features[1::3]
+        x = int(np.min(xs) * frame_width)
+        y = int(np.min(ys) * frame_height)
+        width = int((np.max(xs) - np.min(xs)) * frame_width)
+        height = int((np.max(ys) - np.min(ys)) * frame_height)
+        return x, y, width, height
+    
+    def fit_descriptor(self, face_features):
+        """Fit the pose-normalized descriptor on owner samples and build the compact templates"""
+        self.descriptor = PoseNormalizedDescriptor(self.descriptor_components).fit(face_features)
+        self.owner_templates = self.descriptor.transform(face_features)
+        return self.descriptor
+    
+    def describe_faces(self, features_list):
+        """Raw landmark features, or compact descriptors when a pose-normalized descriptor is fitted"""
+        if self.descriptor is None:
+            return features_list
+        return self.descriptor.transform(features_list)
+    
+    def enrolled_template_count(self):
+        """Number of enrolled owner templates - adapted templates follow them in the matcher"""
+        return len(self.owner_templates) if self.descriptor is not None else len(self.owner_face_features)
+    
+    def update_owner_matcher(self):
+        """Prepare the owner samples once for batched matching"""
+        templates = self.owner_templates if self.descriptor is not None else self.owner_face_features
+        poses = self.template_poses
+        if self.adaptation is not None and len(self.adaptation):
+            templates = np.concatenate([np.asarray(templates, dtype=np.float32), self.adaptation.templates])
+            adapted_poses = self.adaptation.pose_array()
+            poses = np.concatenate([poses, adapted_poses]) if poses is not None and adapted_poses is not None else None
+        
+        if self.descriptor is not None:
+            self.owner_matcher = DescriptorMatcher(templates, self.similarity_threshold, self.descriptor_scale)
+        else:
+            self.owner_matcher = LandmarkMatcher(templates, self.similarity_threshold)
+        
+        # Large galleries are searched by head pose first
+        self.pose_index = None
+        if (self.enable_pose_index and poses is not None
+                and len(poses) == len(self.owner_matcher)
+                and len(self.owner_matcher) >= self.pose_index_min_templates):
+            self.pose_index = PoseBinnedIndex(poses, self.pose_bin_size, self.pose_neighbour_bins)
+        return self.owner_matcher
+    
+    def adapt_owner_template(self, track, now):
+        """Fold a sustained, high-margin owner track into the adapted templates, returns the slot or None"""
+        if (self.adaptation is None or not track.is_owner or track.identity is not None
+                or not self.adaptation.eligible(track.owner_streak, now)):
+            return None
+        
+        features = np.asarray(track.landmarks, dtype=np.float32).reshape(1, -1)
+        template = self.describe_faces(features)
+        enrolled = self.enrolled_template_count()
+        margin = float(self.owner_matcher.match(template).best_score[0]) - self.similarity_threshold
+        anchored = enrolled > 0 and bool(self.owner_matcher.match(template, np.arange(enrolled)).is_owner[0])
+        pose = estimate_head_pose(features)[0]
+        slot = self.adaptation.offer(template[0], margin, now, anchored, pose)
+        if slot is not None:
+            # One row update instead of re-normalising the gallery
+            self.owner_matcher.set_sample(enrolled + slot, template[0])
+            if self.pose_index is not None:
+                self.pose_index.set_pose(enrolled + slot, pose)
+            self.save_adapted_templates()
+        return slot
+    
+    def save_adapted_templates(self):
+        """Queue the adapted templates for an asynchronous write to the encrypted profile"""
+        if self.profile_writer is None:
+            self.profile_writer = AsyncProfileWriter(self._write_adapted_templates)
+        self.profile_writer.submit(self.adaptation.to_dict())
+    
+    def _write_adapted_templates(self, snapshot):
+        with self.config_lock:
+            config = self._read_config()
+            config['adapted_templates'] = snapshot
+            self._write_config(config)
+    
+    def match_faces(self, features_list):
+        """Score all faces of a frame against all owner samples in one batched operation
+        
+        Faces that are not the owner are then looked up among the authorized users
+        """
+        if self.owner_matcher is None:
+            self.update_owner_matcher()
+        descriptors = self.describe_faces(features_list)
+        if self.pose_index is not None and len(features_list):
+            result = self.pose_index.match(self.owner_matcher, descriptors, estimate_head_pose(features_list))
+        else:
+            result = self.owner_matcher.match(descriptors)
+        return authorize_with_gallery(result, self.gallery, descriptors, self._accept_gallery_face)
+    
+    def _accept_gallery_face(self, identity, score, face, template_std=None):
+        """Apply the owner's decision rule to the best gallery score of a face
+        
+        Raw mode: score is the cosine similarity, turned into the combined
+        similarity and compared with the quality-adaptive threshold - from
+        min(std(face), std(template)) as for the owner, or std(face) alone
+        for templates saved before their std was stored.
+        Descriptor mode: score is the descriptor distance.
+        """
+        threshold = identity.threshold if identity.threshold is not None else self.similarity_threshold
+        if self.descriptor is not None:
+            similarity = 1.0 / (1.0 + score / self.descriptor_scale)
+            return similarity > threshold, similarity
+        combined = 0.7 * score + 0.3 / (1.0 + np.sqrt(max(2.0 - 2.0 * score, 0.0)))
+        feature_quality = float(np.std(face))
+        if template_std is not None:
+            feature_quality = min(feature_quality, template_std)
+        adaptive_threshold = threshold * (0.8 + 0.2 * min(feature_quality, 1.0))
+        return combined > adaptive_threshold, score
+    
+    def match_owner(self, features):
+        """Match a face against the owner samples, returns (is_owner, confidence score)"""
+        result = self.match_faces([features])
+        return bool(result.is_owner[0]), float(result.confidence[0])
+    
+    def analyze_frame(self, frame):
+        """Run detection, landmark extraction and owner matching once for a frame"""
         try:
-            # Preprocess frame for better detection
+            current_features = self.extract_frame_features(frame)
+            return self.recognize_features(frame, current_features)
+            
+        except Exception as e:
+            print(f"Error in face detection: {e}")
+            return FrameAnalysis.failsafe(frame.shape, e)  # Fail-safe: assume unauthorized on error
+    
+    def preprocess_frame(self, frame):
+        """Contrast enhancement and noise reduction before landmark extraction"""
+        with self.perf.stage('preprocess'):
             # 1. Enhance contrast and brightness
             enhanced_frame = cv2.convertScaleAbs(frame, alpha=1.2, beta=10)
             
             # 2. Apply noise reduction
-            denoised_frame = cv2.bilateralFilter(enhanced_frame, 9, 75, 75)
-            
-            # 3. Extract face features from enhanced frame
-            current_features = self.extract_face_features(denoised_frame)
-            
-            owner_detected = False
-            unauthorized_face_detected = False
-            total_faces = len(current_features)
-            
-            # Track which faces are recognized as owner
-            recognized_faces = 0
-            face_confidence_scores = []
-            
-            for features in current_features:
-                is_owner = False
-                best_match_score = 0
-                
-                # Compare with owner's face features using multiple samples
-                for owner_features in self.owner_face_features:
-                    if self.compare_faces(features, owner_features):
-                        is_owner = True
-                        owner_detected = True
-                        recognized_faces += 1
-                        
-                        # Calculate confidence score for this match
-                        features_norm = features / np.linalg.norm(features)
-                        owner_norm = owner_features / np.linalg.norm(owner_features)
-                        match_score = cosine_similarity([features_norm], [owner_norm])[0][0]
-                        best_match_score = max(best_match_score, match_score)
-                        break
-                
-                face_confidence_scores.append(best_match_score)
-                
-                # If this face is not the owner, it's unauthorized
-                if not is_owner and total_faces > 0:
-                    unauthorized_face_detected = True
-            
-            # Additional security check: verify owner confidence
-            if owner_detected and face_confidence_scores:
-                avg_confidence = np.mean([score for score in face_confidence_scores if score > 0])
-                if avg_confidence < self.similarity_threshold * 0.9:  # High confidence required
-                    print(f"⚠️  Owner detection confidence low ({avg_confidence:.2f}) - treating as unauthorized")
-                    owner_detected = False
-                    unauthorized_face_detected = True
-            
-            face_detected = total_faces > 0
+            return cv2.bilateralFilter(enhanced_frame, 9, 75, 75)
+    
+    def extract_frame_features(self, frame):
+        """Preprocess a frame and extract the face mesh features (a view of the reused landmark buffer)"""
+        denoised_frame = self.preprocess_frame(frame)
+        
+        # 3. Extract face features from enhanced frame (single FaceMesh pass per frame)
+        with self.perf.stage('extraction'):
+            return self.extract_face_features(denoised_frame)
+    
+    def extract_track_features(self, frame, box, margin=0.25):
+        """Face mesh features of one tracked face, from a crop around its box
+        
+        Returns (1434,) float32 features in full-frame coordinates, or None
+        if the face mesh finds no face in the crop
+        """
+        frame_height, frame_width = frame.shape[:2]
+        x, y, width, height = box
+        x0 = max(0, int(x - width * margin))
+        y0 = max(0, int(y - height * margin))
+        x1 = min(frame_width, int(x + width * (1 + margin)))
+        y1 = min(frame_height, int(y + height * (1 + margin)))
+        if x1 - x0 < 2 or y1 - y0 < 2:
+            return None
+        
+        denoised_crop = self.preprocess_frame(frame[y0:y1, x0:x1])
+        with self.perf.stage('extraction'):
+            features = self.extract_face_features(denoised_crop, self.crop_face_mesh)
+        if not len(features):
+            return None
+        
+        # Crop-normalised landmarks back to the frame, as the owner templates were taken
+        points = features[0].reshape(-1, 3).copy()
+        points[:, 0] = (x0 + points[:, 0] * (x1 - x0)) / frame_width
+        points[:, 1] = (y0 + points[:, 1] * (y1 - y0)) / frame_height
+        points[:, 2] *= (x1 - x0) / frame_width  # z is scaled like x
+        return points.reshape(-1)
+    
+    def recognize_features(self, frame, current_features):
+        """Match extracted face features against the owner and authorized users, returns a FrameAnalysis"""
+        analysis = FrameAnalysis(frame.shape)
+        frame_height, frame_width = frame.shape[:2]
+        
+        with self.perf.stage('matching'):
+            match_result = self.match_faces(current_features)
             
-            return owner_detected, face_detected, unauthorized_face_detected, total_faces
+            # The analysis outlives the reused landmark buffer
+            current_features = current_features.copy()
+            for i, features in enumerate(current_features):
+                box = self.landmarks_to_box(features, frame_width, frame_height)
+                analysis.add_face(box, features, float(match_result.confidence[i]), bool(match_result.is_owner[i]),
+                                  identity=match_result.identities[i])
+        
+        # Additional security check: verify owner confidence
+        if analysis.owner_detected:
+            avg_confidence = np.mean([score for score in analysis.scores if score > 0])
+            if avg_confidence < self.similarity_threshold * 0.9:  # High confidence required
+                print(f"⚠️  Owner detection confidence low ({avg_confidence:.2f}) - treating as unauthorized")
+                analysis.owner_detected = False
+                analysis.unauthorized_face_detected = True
+                analysis.low_confidence = True
+                analysis.is_owner = [False] * analysis.total_faces  # No green "Owner" boxes under the alert
+                analysis.identities = [None] * analysis.total_faces  # Nor authorized-user names
+        
+        return analysis
+    
+    def detect_faces(self, frame):
+        """Enhanced face detection with preprocessing and quality checks"""
+        return self.analyze_frame(frame).as_detection_result()
+    
+    def detect_face_boxes(self, frame):
+        """Face boxes (x, y, width, height) from MediaPipe face detection, without landmarks"""
+        rgb_frame = np.ascontiguousarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        detection_results = self.face_detection.process(rgb_frame)
+        
+        boxes = []
+        if detection_results.detections:
+            h, w = frame.shape[:2]
+            for detection in detection_results.detections:
+                bbox = detection.location_data.relative_bounding_box
+                boxes.append((int(bbox.xmin * w), int(bbox.ymin * h), int(bbox.width * w), int(bbox.height * h)))
+        return boxes
+    
+    def analyze_frame_tracked(self, frame, now=None):
+        """Detect-then-track analysis - landmarks and matching only run for new or re-verified tracks"""
+        now = now if now is not None else time.time()
+        try:
+            with self.perf.stage('detection'):
+                boxes = self.detect_face_boxes(frame)
+            return self.recognize_tracked(frame, boxes, now)
             
         except Exception as e:
-            print(f"Error in face detection: {e}")
-            return False, False, True, 0  # Fail-safe: assume unauthorized on error
+            print(f"Error in tracked face detection: {e}")
+            return FrameAnalysis.failsafe(frame.shape, e)
     
-    def get_screen_size(self):
-        """Get screen dimensions"""
-        user32 = windll.user32
-        return user32.GetSystemMetrics(0), user32.GetSystemMetrics(1)
+    def recognize_tracked(self, frame, boxes, now):
+        """Update the face tracks with detected boxes and extract landmarks only for pending tracks
+        
+        A pending track whose crop the face mesh cannot confirm stays pending
+        and is tried again on the next frame. Until then it counts as an
+        unauthorized face, as the detector did see one.
+        """
+        tracks = self.face_tracker.update(boxes, now)
+        pending = self.face_tracker.pending(tracks, now)
+        
+        confirmed = []
+        unconfirmed = set()
+        for track in pending:
+            features = self.extract_track_features(frame, track.box)
+            if features is None:
+                self.face_tracker.reject(track)
+                unconfirmed.add(track.track_id)
+            else:
+                confirmed.append((track, features))
+        
+        if confirmed:
+            # Match the confirmed faces together, with the same low-confidence check as a full frame
+            pending_analysis = self.recognize_features(frame, np.stack([features for _, features in confirmed]))
+            for i, (track, features) in enumerate(confirmed):
+                self.face_tracker.recognize(track, pending_analysis.is_owner[i], pending_analysis.scores[i], features,
+                                            now, identity=pending_analysis.identities[i])
+                self.adapt_owner_template(track, now)
+        
+        # Tracks that could not be recognised or confirmed count as unauthorized (fail-safe)
+        analysis = FrameAnalysis(frame.shape, now)
+        for track in tracks:
+            if track.track_id in unconfirmed:
+                analysis.add_face(track.box, None, 0.0, False, track.track_id)
+            else:
+                analysis.add_face(track.box, track.landmarks, track.score, bool(track.is_owner), track.track_id,
+                                  identity=track.identity)
+        return analysis
     
-    def capture_screen(self):
-        """Capture the current screen content"""
+    def run_analysis(self, frame, now=None):
+        """Analyse a frame, through the face tracker when tracking is enabled"""
+        if self.face_tracker is not None:
+            return self.analyze_frame_tracked(frame, now)
+        return self.analyze_frame(frame)
+    
+    def detect_stage(self, frame, now=None):
+        """Detection half of run_analysis (threaded pipeline)
+        
+        Returns face boxes when tracking, the face mesh features otherwise -
+        copied, since the next frame reuses the landmark buffer. Errors are
+        handed on so the recognition stage fails safe.
+        """
         try:
-            # Get screen dimensions
-            screen_width, screen_height = self.get_screen_size()
-            
-            # Create device context
-            hwindc = win32gui.GetWindowDC(0)
-            srcdc = win32ui.CreateDCFromHandle(hwindc)
-            memdc = srcdc.CreateCompatibleDC()
-            
-            # Create bitmap
-            bmp = win32ui.CreateBitmap()
-            bmp.CreateCompatibleBitmap(srcdc, screen_width, screen_height)
-            memdc.SelectObject(bmp)
-            
-            # Copy screen to bitmap
-            memdc.BitBlt((0, 0), (screen_width, screen_height), srcdc, (0, 0), win32con.SRCCOPY)
-            
-            # Convert to PIL Image
-            bmpinfo = bmp.GetInfo()
-            bmpstr = bmp.GetBitmapBits(True)
-            
-            # Create PIL image from bitmap data
-            img = Image.frombuffer(
-                'RGB',
-                (bmpinfo['bmWidth'], bmpinfo['bmHeight']),
-                bmpstr, 'raw', 'BGRX', 0, 1)
-            
-            # Clean up
-            srcdc.DeleteDC()
-            memdc.DeleteDC()
-            win32gui.ReleaseDC(0, hwindc)
-            win32gui.DeleteObject(bmp.GetHandle())
-            
-            return img
-            
+            if self.face_tracker is not None:
+                with self.perf.stage('detection'):
+                    return self.detect_face_boxes(frame)
+            return self.extract_frame_features(frame).copy()
         except Exception as e:
-            print(f"Error capturing screen: {e}")
-            return None
+            print(f"Error in face detection stage: {e}")
+            return e
     
-    def create_blurred_background(self):
-        """Create a blurred version of the current screen"""
+    def recognize_stage(self, frame, detections, now=None):
+        """Recognition half of run_analysis (threaded pipeline), returns a FrameAnalysis"""
+        if isinstance(detections, Exception):
+            return FrameAnalysis.failsafe(frame.shape, detections)
+        now = now if now is not None else time.time()
         try:
-            # Check if blur is enabled
-            if CONFIG_AVAILABLE and not config.enable_screen_blur:
-                return None
-                
-            # Capture current screen
-            screen_image = self.capture_screen()
-            if screen_image is None:
-                return None
-            
-            # Get configuration values
-            if CONFIG_AVAILABLE:
-                blur_intensity = config.blur_intensity
-                quality_reduction = config.blur_quality_reduction
-                overlay_darkness = config.blur_overlay_darkness
-            else:
-                blur_intensity = 15
-                quality_reduction = 4
-                overlay_darkness = 100
-            
-            # Apply blur effect
-            # Reduce size for performance, then upscale
-            small_size = (screen_image.width // quality_reduction, screen_image.height // quality_reduction)
-            screen_image_small = screen_image.resize(small_size, Image.Resampling.LANCZOS)
-            
-            # Apply multiple blur passes for stronger effect
-            blurred = screen_image_small.filter(ImageFilter.GaussianBlur(radius=blur_intensity))
-            blurred = blurred.filter(ImageFilter.GaussianBlur(radius=blur_intensity//2))
-            
-            # Scale back to full size
-            blurred_full = blurred.resize(screen_image.size, Image.Resampling.LANCZOS)
-            
-            # Add darkening overlay for better text readability
-            overlay = Image.new('RGBA', blurred_full.size, (0, 0, 0, overlay_darkness))  # Semi-transparent black
-            blurred_full = blurred_full.convert('RGBA')
-            blurred_full = Image.alpha_composite(blurred_full, overlay)
-            
-            return blurred_full.convert('RGB')
-            
+            if self.face_tracker is not None:
+                return self.recognize_tracked(frame, detections, now)
+            return self.recognize_features(frame, detections)
         except Exception as e:
-            print(f"Error creating blurred background: {e}")
-            return None
-
-    def create_blur_overlay(self):
-        """Create a modern blurred overlay window with text"""
-        if self.blur_window:
-            return
-        
-        screen_width, screen_height = self.get_screen_size()
+            print(f"Error in face recognition stage: {e}")
+            return FrameAnalysis.failsafe(frame.shape, e)
+    
+    def gate_frame(self, frame, current_time, analysed_before=True):
+        """Whether a frame needs a fresh analysis, returns (analyse, face count probe result)
         
-        # Create fullscreen window
-        self.blur_window = tk.Toplevel()
-        self.blur_window.title("Screen Security")
-        self.blur_window.attributes('-fullscreen', True)
-        self.blur_window.attributes('-topmost', True)
-        self.blur_window.attributes('-toolwindow', True)
-        self.blur_window.configure(bg='#000000')
+        A static scene (motion gate) or a stably alone owner (detection
+        scheduler) reuses the last analysis instead
+        """
+        with self.perf.stage('motion'):
+            scene_changed = self.motion_gate.has_changed(frame, current_time)
+        if analysed_before and not scene_changed:
+            self.detection_scheduler.record_skipped()  # Still a frame the scheduler's skip ratio covers
+            return False, None
         
+        face_count = None
+        if self.face_count_probe and self.detection_scheduler.wants_probe:
+            with self.perf.stage('probe'):
+                face_count = self.count_faces(frame)
+        analyse = self.detection_scheduler.should_analyze(current_time, face_count)
+        return analyse or not analysed_before, face_count
+    
+    def count_faces(self, frame, max_width=320):
+        """Cheap face-count probe using MediaPipe face detection on a downscaled frame"""
         try:
-            # Create blurred background
-            print("Capturing and blurring screen...")
-            blurred_bg = self.create_blurred_background()
-            
-            if blurred_bg:
-                # Convert PIL image to PhotoImage for tkinter
-                photo = ImageTk.PhotoImage(blurred_bg)
-                
-                # Create background label with blurred image
-                bg_label = tk.Label(self.blur_window, image=photo, bd=0, highlightthickness=0)
-                bg_label.image = photo  # Keep a reference
-                bg_label.place(x=0, y=0, relwidth=1, relheight=1)
-            else:
-                # Fallback to gradient background if screen capture fails
-                self.blur_window.configure(bg='#1a1a1a')
-                
+            height, width = frame.shape[:2]
+            if width > max_width:
+                scale = max_width / width
+                frame = cv2.resize(frame, (max_width, int(height * scale)), interpolation=cv2.INTER_AREA)
+            rgb_frame = np.ascontiguousarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            detection_results = self.face_detection.process(rgb_frame)
+            return len(detection_results.detections) if detection_results.detections else 0
         except Exception as e:
-            print(f"Error setting blurred background: {e}")
-            # Fallback to dark background
-            self.blur_window.configure(bg='#1a1a1a')
+            print(f"Error in face count probe: {e}")
+            return None
+    
+    def draw_analysis(self, frame, analysis, show_rectangles=True):
+        """Draw face boxes and security status from a frame analysis"""
+        if show_rectangles:
+            for (x, y, width, height), is_owner, label, track_id in zip(analysis.boxes, analysis.is_owner, analysis.labels, analysis.track_ids):
+                color = (0, 255, 0) if is_owner else (0, 0, 255)
+                if track_id is not None:
+                    label = f"{label} #{track_id}"
+                cv2.rectangle(frame, (x, y), (x + width, y + height), color, 2)
+                cv2.putText(frame, label, (x, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
         
+        owner_detected = analysis.owner_detected
+        unauthorized_face_detected = analysis.unauthorized_face_detected
+        total_faces = analysis.total_faces
+        
+        # Enhanced status display
+        if unauthorized_face_detected:
+            status_text = f"SECURITY ALERT: {total_faces} faces ({('Owner + ' if owner_detected else '') + str(total_faces - (1 if owner_detected else 0)) + ' unauthorized'})"
+            status_color = (0, 0, 255)  # Red
+        elif owner_detected and total_faces == 1:
+            status_text = "Authorized (Owner Only)"
+            status_color = (0, 255, 0)  # Green
+        elif not analysis.face_detected:
+            status_text = "No faces detected"
+            status_color = (255, 255, 0)  # Yellow
+        else:
+            status_text = "Monitoring..."
+            status_color = (255, 255, 255)  # White
+        
+        cv2.putText(frame, status_text, (10, 30), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, status_color, 2)
+        cv2.putText(frame, f"Total Faces: {total_faces}", (10, 60), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+        cv2.putText(frame, f"Owner Present: {'Yes' if owner_detected else 'No'}", (10, 90), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0) if owner_detected else (255, 255, 255), 2)
+        cv2.putText(frame, f"Unauthorized: {'Yes' if unauthorized_face_detected else 'No'}", (10, 120), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255) if unauthorized_face_detected else (255, 255, 255), 2)
+    
+    def capture_screen(self):
+        """Capture the current screen content"""
+        return self.lock_screen.capture_screen()
+    
+    def create_blurred_background(self, screen_image=None):
+        """Create a blurred version of the current screen (or of a given PIL screen image)"""
+        return self.lock_screen.create_blurred_background(screen_image)
+
+    def lock_overlay_text(self):
+        """Warning text and unlock hotkey shown on the lock overlay"""
         # Get warning text from config
         if CONFIG_AVAILABLE:
             warning_text = config.lock_message.replace('\\n', '\n')  # Handle escaped newlines
@@ -527,71 +997,40 @@ Press Ctrl+Alt+O to enter unlock password
 
 For assistance, contact system administrator"""
             hotkey = 'ctrl+alt+o'
+        return warning_text, hotkey
+    
+    def render_lock_panel(self, screen_width, screen_height, warning_text, hotkey, scale=1.0):
+        """Pre-render the gradient lockdown panel with its text, scaled for the monitor's DPI"""
+        width = min(screen_width-round(100*scale), round(900*scale))
+        height = min(screen_height-round(100*scale), round(600*scale))
+        items = [("🛡️", 80, 48, 'symbol', '#00d4ff'),                                # Security icon
+                 ("SECURITY LOCKDOWN", 150, 28, 'bold', '#ffffff'),
+                 ("AI Face Recognition Protection Active", 190, 14, 'normal', '#00d4ff')]
         
-        # Create modern glassmorphism overlay with gradient background
-        overlay_frame = tk.Frame(self.blur_window, bg='#1a1a2e', bd=0, highlightthickness=0)
-        overlay_frame.place(relx=0.5, rely=0.5, anchor='center', 
-                           width=min(screen_width-100, 900), 
-                           height=min(screen_height-100, 600))
-        
-        # Add subtle gradient effect using Canvas
-        canvas = tk.Canvas(overlay_frame, 
-                          width=min(screen_width-100, 900), 
-                          height=min(screen_height-100, 600),
-                          bg='#1a1a2e', highlightthickness=0, bd=0)
-        canvas.pack(fill='both', expand=True)
-        
-        # Create gradient background on canvas
-        for i in range(0, min(screen_height-100, 600), 5):
-            alpha = int(255 * (i / min(screen_height-100, 600)))
-            color = f"#{alpha:02x}{alpha//4:02x}{alpha//2:02x}"
-            canvas.create_rectangle(0, i, min(screen_width-100, 900), i+5, 
-                                  fill=color, outline=color)
-        
-        # Add security icon
-        canvas.create_text(min(screen_width-100, 900)//2, 80, 
-                          text="🛡️", font=('Segoe UI Emoji', 48), 
-                          fill='#00d4ff', anchor='center')
-        
-        # Add main title
-        canvas.create_text(min(screen_width-100, 900)//2, 150, 
-                          text="SECURITY LOCKDOWN", 
-                          font=('Segoe UI', 28, 'bold'), 
-                          fill='#ffffff', anchor='center')
-        
-        # Add subtitle
-        canvas.create_text(min(screen_width-100, 900)//2, 190, 
-                          text="AI Face Recognition Protection Active", 
-                          font=('Segoe UI', 14), 
-                          fill='#00d4ff', anchor='center')
-        
-        # Split warning text into lines and display
-        lines = warning_text.split('\n')
-        y_start = 250
-        for i, line in enumerate(lines):
-            if line.strip():  # Skip empty lines
-                font_size = 16 if '🔒' in line or '⚠️' in line else 14
-                font_weight = 'bold' if '🔒' in line or '⚠️' in line else 'normal'
-                color = '#ff6b6b' if '⚠️' in line else '#ffffff'
-                
-                canvas.create_text(min(screen_width-100, 900)//2, y_start + i*25, 
-                                  text=line, 
-                                  font=('Segoe UI', font_size, font_weight), 
-                                  fill=color, anchor='center')
-        
-        # Add pulsing border effect
-        border_color = '#00d4ff'
-        canvas.create_rectangle(5, 5, min(screen_width-100, 900)-5, min(screen_height-100, 600)-5, 
-                              outline=border_color, width=3, fill='')
-        
-        # Add unlock instruction at bottom
-        canvas.create_text(min(screen_width-100, 900)//2, min(screen_height-100, 600)-50, 
-                          text=f"Press {hotkey.upper()} to unlock", 
-                          font=('Segoe UI', 16, 'bold'), 
-                          fill='#00ff88', anchor='center')
+        # Warning text lines, alerts highlighted
+        for i, line in enumerate(warning_text.split('\n')):
+            highlighted = '🔒' in line or '⚠️' in line
+            items.append((line, 250 + i*25, 16 if highlighted else 14, 'bold' if highlighted else 'normal',
+                          '#ff6b6b' if '⚠️' in line else '#ffffff'))
+        items = [(text, round(y*scale), size*scale, style, color) for text, y, size, style, color in items]
+        items.append((f"Press {hotkey.upper()} to unlock", height-round(50*scale), 16*scale, 'bold', '#00ff88'))
         
-        # Bind unlock hotkey
-        keyboard.add_hotkey(hotkey, self.request_unlock)
+        # Dark-to-magenta gradient in 5 px bands with a cyan border
+        return render_panel((width, height), items, gradient=((0, 0, 0), (255, 63.75, 127.5), max(1, round(5*scale))),
+                            borders=[('#00d4ff', round(3*scale), round(5*scale))])
+
+    def prepare_lock_overlay(self):
+        """Build the lock overlays once and keep them withdrawn, so a lock only has to show them"""
+        first_build = not self.lock_screen.overlays
+        overlays = self.lock_screen.prepare()
+        if first_build:
+            keyboard.add_hotkey(self.lock_overlay_text()[1], self.request_unlock)  # Bound once, not on every lock
+        return overlays
+    
+    def create_blur_overlay(self):
+        """Cover every monitor with its lock overlay over a blurred copy of it"""
+        with self.perf.stage('lock'):  # Timed apart from the 'decision' stage it runs in
+            self.lock_screen.cover()
     
     def request_unlock(self):
         """Request password to unlock screen"""
@@ -613,18 +1052,93 @@ For assistance, contact system administrator"""
     
     def remove_blur_overlay(self):
         """Remove the blur overlay"""
-        if self.blur_window:
-            self.blur_window.destroy()
-            self.blur_window = None
+        self.lock_screen.uncover()  # Overlays stay built for the next lock
         self.screen_blurred = False
     
+    def apply_security_decision(self, analysis, current_time):
+        """Lock or unlock the screen for an analysed frame"""
+        # Fresh lock backgrounds blurred since the last frame are shown here, on the thread that owns the overlays
+        self.lock_screen.apply_pending_backgrounds()
+        
+        owner_detected = analysis.owner_detected
+        face_detected = analysis.face_detected
+        unauthorized_face_detected = analysis.unauthorized_face_detected
+        total_faces = analysis.total_faces
+        
+        # Enhanced security logic - Lock screen whenever ANY unauthorized face is detected
+        if unauthorized_face_detected:
+            # Immediate lock when ANY unauthorized face is detected
+            if not self.screen_blurred:
+                if owner_detected and total_faces > 1:
+                    print(f"🚨 SECURITY ALERT: Owner present with {total_faces - 1} unauthorized person(s) - LOCKING SCREEN")
+                elif not owner_detected:
+                    print(f"🚨 UNAUTHORIZED ACCESS: {total_faces} unknown person(s) detected - LOCKING SCREEN")
+                if isinstance(self.camera, LatestFrameGrabber):
+                    print(f"   Decision made on a frame captured {self.camera.frame_age() * 1000:.0f} ms ago")
+                self.create_blur_overlay()
+                self.screen_blurred = True
+        elif analysis.owner_alone:
+            # Only unlock if ONLY the owner is present (no other faces)
+            self.last_face_time = current_time
+            self.owner_detected = True
+            if self.screen_blurred:
+                self.remove_blur_overlay()
+                print("✅ Owner verified alone - screen unlocked")
+                self.screen_blurred = False
+        elif not face_detected:
+            # No face detected - grace period before action
+            if current_time - self.last_face_time > self.grace_period and not self.screen_blurred:
+                print("⚠️  No authorized user detected - maintaining current state")
+        else:
+            # Other scenarios - maintain current state
+            self.last_face_time = current_time
+    
+    def render_monitor_frame(self, frame, analysis, current_fps):
+        """Draw the analysis and statistics and show the monitoring window"""
+        show_monitor, show_rectangles, window_title, show_stage_timing = self.display_settings
+        
+        # Optional: Display monitoring window (comment out for stealth mode)
+        if self.screen_blurred or not show_monitor:
+            return
+        
+        # Draw face detection results from the same analysis used for the decision
+        self.draw_analysis(frame, analysis, show_rectangles)
+        if isinstance(self.camera, LatestFrameGrabber):
+            capture_stats = self.camera.get_stats()
+            cv2.putText(frame, f"Frame age: {self.camera.frame_age() * 1000:.0f} ms | Dropped: {capture_stats['frames_dropped']}", (10, 150), 
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
+        scheduler_stats = self.detection_scheduler.get_stats()
+        cv2.putText(frame, f"Detection: {scheduler_stats['mode']} | Analysed {scheduler_stats['frames_analysed']}/{scheduler_stats['frames_seen']} frames", (10, 170), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
+        motion_stats = self.motion_gate.get_stats()
+        cv2.putText(frame, f"Motion gate: {motion_stats['skip_ratio'] * 100:.0f}% skipped | Changed area: {motion_stats['last_changed_area'] * 100:.1f}%", (10, 190), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
+        if show_stage_timing:
+            self.perf.draw(frame)
+        
+        # Per-stage queue depth and utilisation of the threaded pipeline, bottom left
+        if self.pipeline is not None:
+            pipeline_lines = [f"FPS: {current_fps:.1f}"] + self.pipeline.overlay_lines()
+            y = frame.shape[0] - 18 * len(pipeline_lines)
+            for line in pipeline_lines:
+                cv2.putText(frame, line, (10, y), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (200, 200, 200), 1)
+                y += 18
+        cv2.imshow(window_title, frame)
+    
+    def handle_monitor_key(self):
+        """Poll the monitor window keys, returns False when 'q' asks to stop"""
+        key = cv2.waitKey(1) & 0xFF
+        if key == ord('t') and self.perf.enabled:
+            stage_timing_file = config.stage_timing_file if CONFIG_AVAILABLE else "stage_timings.json"
+            print(f"⏱️  Stage timings written to {self.perf.dump_json(stage_timing_file)}")
+        return key != ord('q')
+    
     def monitor_faces(self):
         """Main monitoring loop"""
         print("Starting MediaPipe face monitoring...")
         
         # Get camera settings from config
         if CONFIG_AVAILABLE:
-            camera_index = config.camera_index
             camera_width = config.camera_width
             camera_height = config.camera_height
             camera_fps = config.camera_fps
@@ -632,8 +1146,16 @@ For assistance, contact system administrator"""
             show_rectangles = config.show_face_rectangles
             window_title = config.monitor_window_title
             processing_delay = config.processing_delay
+            threaded_capture = config.threaded_capture
+            capture_buffer_size = config.capture_buffer_size
+            adaptive_detection = config.adaptive_detection
+            stable_period = config.stable_period
+            face_count_probe = config.face_count_probe
+            show_stage_timing = config.show_stage_timing
+            stage_timing_file = config.stage_timing_file
+            pipeline_mode = config.pipeline_mode
+            pipeline_queue_size = config.pipeline_queue_size
         else:
-            camera_index = 0
             camera_width = 640
             camera_height = 480
             camera_fps = 30
@@ -641,121 +1163,158 @@ For assistance, contact system administrator"""
             show_rectangles = True
             window_title = "MediaPipe Face Security Monitor"
             processing_delay = 0.1
+            threaded_capture = True
+            capture_buffer_size = 1
+            adaptive_detection = True
+            stable_period = 3.0
+            face_count_probe = True
+            show_stage_timing = True
+            stage_timing_file = "stage_timings.json"
+            pipeline_mode = 'serial'
+            pipeline_queue_size = 2
         
-        self.camera = cv2.VideoCapture(camera_index)
+        # Camera (or the configured video/image/synthetic source) with properties set for better performance
+        self.camera = self.open_frame_source(camera_width, camera_height, camera_fps)
         
-        if not self.camera.isOpened():
+        if self.camera is None:
             print("Error: Could not open camera")
             return
         
-        # Set camera properties for better performance
-        self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, camera_width)
-        self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, camera_height)
-        self.camera.set(cv2.CAP_PROP_FPS, camera_fps)
+        print(f"Frame source: {self.camera.description}")
+        
+        if not self.camera.realtime:
+            # Throughput measurement - process frames as fast as possible
+            processing_delay = 0
+            threaded_capture = False
+        
+        # Drain the camera on a background thread so decisions use the freshest frame
+        # (the threaded pipeline has its own capture stage)
+        if threaded_capture and pipeline_mode != 'threaded':
+            self.camera.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+            self.camera = LatestFrameGrabber(self.camera, capture_buffer_size).start()
+        
+        if self.face_tracker is not None:
+            self.face_tracker.reset()
+        
+        # Full recognition at DETECTION_INTERVAL while stable, every frame otherwise
+        self.detection_scheduler = AdaptiveDetectionScheduler(
+            self.face_detection_interval, stable_period, enabled=adaptive_detection)
+        
+        # Cheap scene-change check in front of the scheduler
+        if CONFIG_AVAILABLE:
+            self.motion_gate = MotionGate(pixel_threshold=config.motion_threshold,
+                                          min_changed_area=config.motion_min_area,
+                                          region=config.motion_region,
+                                          max_reuse=config.motion_max_reuse,
+                                          enabled=config.enable_motion_gate)
+        else:
+            self.motion_gate = MotionGate()
+        self.face_count_probe = face_count_probe
+        self.display_settings = (show_monitor, show_rectangles, window_title, show_stage_timing)
+        
+        # Keep a blurred screen snapshot ready so a lock covers the screen without capturing first
+        if CONFIG_AVAILABLE and config.enable_snapshot_cache:
+            self.lock_screen.start_snapshot_cache(config.snapshot_refresh_interval, config.snapshot_max_age,
+                                                  config.snapshot_max_width, config.snapshot_memory_limit)
+        
+        # Build the lock overlay now instead of on the first lock (threaded mode builds it on the decide thread)
+        if pipeline_mode != 'threaded':
+            try:
+                self.prepare_lock_overlay()
+            except Exception as e:
+                print(f"Error preparing lock overlay: {e}")
+        
+        if pipeline_mode == 'threaded':
+            # Capture, detection, recognition, decision and drawing on their own threads
+            self.pipeline = MonitorPipeline(self, self.camera, pipeline_queue_size, processing_delay)
+            self.pipeline.run()
+            for line in self.pipeline.overlay_lines():
+                print(f"🧵 Pipeline {line}")
+            self.pipeline = None
+        else:
+            self.run_serial_loop(processing_delay)
+        
+        for line in self.lock_screen.summary_lines():
+            print(line)
+        self.lock_screen.stop_snapshot_cache()
+        
+        scheduler_stats = self.detection_scheduler.get_stats()
+        print(f"🔎 Detection stats: {scheduler_stats['frames_analysed']}/{scheduler_stats['frames_seen']} frames analysed "
+              f"({scheduler_stats['skip_ratio'] * 100:.0f}% skipped), {scheduler_stats['escalations']} escalations")
+        if self.face_tracker is not None:
+            tracker_stats = self.face_tracker.get_stats()
+            print(f"👥 Tracking: {tracker_stats['tracks_created']} tracks, {tracker_stats['recognitions']} recognitions, "
+                  f"{tracker_stats['labels_carried']} labels carried between recognitions, "
+                  f"{tracker_stats['unconfirmed']} unconfirmed by the face mesh")
+        if self.gallery is not None:
+            gallery_stats = self.gallery.get_stats()
+            print(f"🗂️  Authorized users: {gallery_stats['identities']} identities, {gallery_stats['templates']} templates "
+                  f"({gallery_stats['index']} index, {gallery_stats['comparisons']} comparisons)")
+        if self.adaptation is not None:
+            adaptation_stats = self.adaptation.get_stats()
+            print(f"🌱 Template adaptation: {adaptation_stats['templates']}/{adaptation_stats['capacity']} adapted templates, "
+                  f"{adaptation_stats['adaptations']} adaptations, {adaptation_stats['rejected']} low-margin candidates rejected")
+        if self.profile_writer is not None:
+            self.profile_writer.flush()
+        motion_stats = self.motion_gate.get_stats()
+        print(f"🎞️  Motion gate: {motion_stats['frames_skipped']}/{motion_stats['frames_checked']} static frames reused "
+              f"({motion_stats['skip_ratio'] * 100:.0f}% skipped)")
+        if isinstance(self.camera, LatestFrameGrabber):
+            capture_stats = self.camera.get_stats()
+            print(f"📹 Capture stats: {capture_stats['frames_consumed']}/{capture_stats['frames_captured']} frames analysed, "
+                  f"{capture_stats['frames_dropped']} stale frames dropped")
+        if self.pose_index is not None:
+            index_stats = self.pose_index.get_stats()
+            print(f"🧭 Pose index: {index_stats['templates']} templates in {index_stats['bins']} bins, "
+                  f"{index_stats['avg_candidates']:.1f} templates scored per face, "
+                  f"{index_stats['fallback_ratio'] * 100:.0f}% full scans")
+        if self.perf.enabled:
+            for line in self.perf.overlay_lines():
+                print(f"⏱️  {line}")
+            self.perf.dump_json(stage_timing_file)
+        self.camera.release()
+        cv2.destroyAllWindows()
+    
+    def run_serial_loop(self, processing_delay):
+        """Single-threaded monitoring loop: capture, analyse, decide and draw one frame at a time"""
+        frame_count = 0
+        start_time = time.time()
+        analysis = None
         
         while self.is_monitoring:
-            ret, frame = self.camera.read()
+            with self.perf.stage('capture'):
+                ret, frame = self.camera.read()
             if not ret:
                 print("Error: Could not read frame")
                 break
             
+            frame_count += 1
+            elapsed = time.time() - start_time
+            current_fps = frame_count / elapsed if elapsed > 0 else 0
+            
             try:
-                owner_detected, face_detected, unauthorized_face_detected, total_faces = self.detect_faces(frame)
                 current_time = time.time()
                 
-                # Store current features for display purposes
-                current_features = self.extract_face_features(frame)
+                # Static scene or stable owner - reuse the last analysis without running any inference
+                analyse, face_count = self.gate_frame(frame, current_time, analysis is not None)
+                if analyse:
+                    analysis = self.run_analysis(frame, current_time)
+                    self.detection_scheduler.record(analysis, current_time, face_count)
+                    self.motion_gate.mark_analysed(current_time)
                 
-                # Enhanced security logic - Lock screen whenever ANY unauthorized face is detected
-                if unauthorized_face_detected:
-                    # Immediate lock when ANY unauthorized face is detected
-                    if not self.screen_blurred:
-                        if owner_detected and total_faces > 1:
-                            print(f"🚨 SECURITY ALERT: Owner present with {total_faces - 1} unauthorized person(s) - LOCKING SCREEN")
-                        elif not owner_detected:
-                            print(f"🚨 UNAUTHORIZED ACCESS: {total_faces} unknown person(s) detected - LOCKING SCREEN")
-                        self.create_blur_overlay()
-                        self.screen_blurred = True
-                elif owner_detected and not unauthorized_face_detected and total_faces == 1:
-                    # Only unlock if ONLY the owner is present (no other faces)
-                    self.last_face_time = current_time
-                    self.owner_detected = True
-                    if self.screen_blurred:
-                        self.remove_blur_overlay()
-                        print("✅ Owner verified alone - screen unlocked")
-                        self.screen_blurred = False
-                elif not face_detected:
-                    # No face detected - grace period before action
-                    if current_time - self.last_face_time > self.grace_period and not self.screen_blurred:
-                        print("⚠️  No authorized user detected - maintaining current state")
-                else:
-                    # Other scenarios - maintain current state
-                    self.last_face_time = current_time
+                with self.perf.stage('decision'):
+                    self.apply_security_decision(analysis, current_time)
                 
-                # Optional: Display monitoring window (comment out for stealth mode)
-                if not self.screen_blurred and show_monitor:
-                    # Draw face detection results
-                    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    detection_results = self.face_detection.process(rgb_frame)
-                    
-                    if detection_results.detections and show_rectangles:
-                        face_index = 0
-                        for detection in detection_results.detections:
-                            bbox = detection.location_data.relative_bounding_box
-                            h, w, _ = frame.shape
-                            x = int(bbox.xmin * w)
-                            y = int(bbox.ymin * h)
-                            width = int(bbox.width * w)
-                            height = int(bbox.height * h)
-                            
-                            # Determine if this face is the owner
-                            is_owner_face = False
-                            if face_index < len(current_features):
-                                for owner_features in self.owner_face_features:
-                                    if self.compare_faces(current_features[face_index], owner_features):
-                                        is_owner_face = True
-                                        break
-                            
-                            color = (0, 255, 0) if is_owner_face else (0, 0, 255)
-                            cv2.rectangle(frame, (x, y), (x + width, y + height), color, 2)
-                            label = "Owner" if is_owner_face else "Unauthorized"
-                            cv2.putText(frame, label, (x, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
-                            face_index += 1
-                    
-                    # Enhanced status display
-                    if unauthorized_face_detected:
-                        status_text = f"SECURITY ALERT: {total_faces} faces ({('Owner + ' if owner_detected else '') + str(total_faces - (1 if owner_detected else 0)) + ' unauthorized'})"
-                        status_color = (0, 0, 255)  # Red
-                    elif owner_detected and total_faces == 1:
-                        status_text = "Authorized (Owner Only)"
-                        status_color = (0, 255, 0)  # Green
-                    elif not face_detected:
-                        status_text = "No faces detected"
-                        status_color = (255, 255, 0)  # Yellow
-                    else:
-                        status_text = "Monitoring..."
-                        status_color = (255, 255, 255)  # White
-                    
-                    cv2.putText(frame, status_text, (10, 30), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.6, status_color, 2)
-                    cv2.putText(frame, f"Total Faces: {total_faces}", (10, 60), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-                    cv2.putText(frame, f"Owner Present: {'Yes' if owner_detected else 'No'}", (10, 90), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0) if owner_detected else (255, 255, 255), 2)
-                    cv2.putText(frame, f"Unauthorized: {'Yes' if unauthorized_face_detected else 'No'}", (10, 120), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255) if unauthorized_face_detected else (255, 255, 255), 2)
-                    cv2.imshow(window_title, frame)
+                with self.perf.stage('drawing'):
+                    self.render_monitor_frame(frame, analysis, current_fps)
                 
-                if cv2.waitKey(1) & 0xFF == ord('q'):
+                if not self.handle_monitor_key():
                     break
                 
             except Exception as e:
                 print(f"Error in face detection: {e}")
             
             time.sleep(processing_delay)  # Configurable delay to reduce CPU usage
-        
-        self.camera.release()
-        cv2.destroyAllWindows()
     
     def start_monitoring(self):
         """Start the monitoring system"""
@@ -784,11 +1343,13 @@ def main():
     print("1. Register Owner")
     print("2. Start Monitoring")
     print("3. Stop Monitoring")
-    print("4. Exit")
+    print("4. Register Authorized User")
+    print("5. Consolidate Templates")
+    print("6. Exit")
     
     while True:
         try:
-            choice = input("\nSelect option (1-4): ").strip()
+            choice = input("\nSelect option (1-6): ").strip()
             
             if choice == '1':
                 if system.register_owner():
@@ -812,6 +1373,16 @@ def main():
                 system.stop_monitoring()
             
             elif choice == '4':
+                if system.register_authorized_user():
+                    print("Authorized user registered!")
+                else:
+                    print("Registration failed!")
+            
+            elif choice == '5':
+                if not system.consolidate_all_templates():
+                    print("Consolidation failed!")
+            
+            elif choice == '6':
                 system.stop_monitoring()
                 print("Goodbye!")
                 break
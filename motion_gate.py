@@ -0,0 +1,101 @@
+"""
+Motion gate for Face Security System
+Compares a small blurred grayscale copy of each frame with the frame that
+was last analysed, so the pipeline can reuse the previous FrameAnalysis
+while the scene is static and only pay for face analysis when pixels in
+the watched region actually change
+"""
+
+import time
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    def __init__(self, width=160, pixel_threshold=25, min_changed_area=0.01,
+                 region=(0.0, 0.0, 1.0, 1.0), max_reuse=5.0, enabled=True):
+        self.width = width
+        self.pixel_threshold = pixel_threshold
+        self.min_changed_area = min_changed_area
+        self.region = region            # (x, y, width, height) as fractions of the frame
+        self.max_reuse = max_reuse      # Re-verify a static scene at least this often (seconds)
+        self.enabled = enabled
+
+        self.reference = None
+        self.current = None
+        self.reference_time = None
+        self.last_changed_area = 0.0
+        self.last_changed = True
+
+        # Statistics
+        self.frames_checked = 0
+        self.frames_skipped = 0
+
+    def _prepare(self, frame):
+        """Downscaled, blurred grayscale crop of the watched region"""
+        height, width = frame.shape[:2]
+        small_height = max(1, int(height * self.width / width))
+        small = cv2.resize(frame, (self.width, small_height), interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        small = cv2.GaussianBlur(small, (5, 5), 0)
+
+        x, y, region_width, region_height = self.region
+        x0 = int(x * self.width)
+        y0 = int(y * small_height)
+        x1 = max(x0 + 1, int((x + region_width) * self.width))
+        y1 = max(y0 + 1, int((y + region_height) * small_height))
+        return small[y0:y1, x0:x1]
+
+    def has_changed(self, frame, now=None):
+        """True if the frame needs fresh analysis"""
+        now = now if now is not None else time.time()
+        self.frames_checked += 1
+
+        if not self.enabled:
+            self.last_changed = True
+            return True
+
+        self.current = self._prepare(frame)
+
+        if self.reference is None or self.reference.shape != self.current.shape:
+            self.last_changed_area = 1.0
+            self.last_changed = True
+            return True
+
+        diff = cv2.absdiff(self.current, self.reference)
+        self.last_changed_area = float(np.count_nonzero(diff > self.pixel_threshold)) / diff.size
+        self.last_changed = self.last_changed_area >= self.min_changed_area
+
+        if self.last_changed:
+            return True
+
+        if self.max_reuse and now - self.reference_time >= self.max_reuse:
+            # Static for too long - re-verify anyway
+            return True
+
+        self.frames_skipped += 1
+        return False
+
+    def mark_analysed(self, now=None, frame=None):
+        """An analysed frame becomes the reference - the one last passed to has_changed unless given"""
+        if not self.enabled:
+            return
+        current = self._prepare(frame) if frame is not None else self.current
+        if current is not None:
+            self.reference = current
+            self.reference_time = now if now is not None else time.time()
+
+    def reset(self):
+        """Force the next frame to be analysed"""
+        self.reference = None
+
+    def get_stats(self):
+        """Gate statistics for tuning"""
+        return {
+            'frames_checked': self.frames_checked,
+            'frames_skipped': self.frames_skipped,
+            'skip_ratio': self.frames_skipped / self.frames_checked if self.frames_checked else 0.0,
+            'last_changed_area': self.last_changed_area,
+        }
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Performance Regression Gate
+===========================
+
+Times the hot paths on fixed inputs (test_frame.jpg and a one-face
+synthetic frame at 640x480) with the offline benchmark suite and compares
+p95 latency and throughput against a committed baseline JSON file. Exits
+with status 1 and a per-stage diff when anything regressed beyond the
+tolerance.
+
+Hot paths:
+1. MediaPipeFaceSecuritySystem.detect_faces
+2. FaceSecuritySystem.detect_faces
+3. create_blurred_background of both backends
+4. The balanced blur engine tier on its own (runs without any backend)
+
+Baselines are machine specific - record one on the machine that runs the
+gate with --update-baseline and commit it.
+
+Usage:
+    python perf_gate.py --update-baseline
+    python perf_gate.py
+    python perf_gate.py --tolerance 0.1 --baseline perf_baseline.json
+"""
+
+import argparse
+import json
+import os
+import sys
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from benchmark import run_benchmarks
+
+DEFAULT_BASELINE = 'perf_baseline.json'
+GATED_BENCHMARKS = ('mediapipe.detect_faces', 'face_recognition.detect_faces',
+                    'mediapipe.create_blurred_background', 'face_recognition.create_blurred_background',
+                    'blur.engine_balanced')
+
+
+def case_key(result):
+    """Stable identifier of a benchmark case"""
+    faces = '' if result.get('faces') is None else f" faces={result['faces']}"
+    return f"{result['name']} [{result['input']} {result.get('resolution') or ''}{faces}]"
+
+
+def measure(iterations, warmup):
+    """Run the gated benchmarks on the fixed inputs"""
+    report = run_benchmarks([(640, 480)], [1], iterations=iterations, warmup=warmup, frames_per_input=5,
+                            benchmarks=('mediapipe', 'face_recognition', 'blur'))
+    report['results'] = [result for result in report['results'] if result['name'] in GATED_BENCHMARKS]
+    return report
+
+
+def compare_reports(baseline, current, tolerance=0.2, min_delta_ms=1.0):
+    """Compare two reports, returns (rows, regressions) with one row per case"""
+    baseline_cases = {case_key(result): result for result in baseline.get('results', [])}
+    current_cases = {case_key(result): result for result in current.get('results', [])}
+
+    rows = []
+    regressions = []
+    for key in sorted(set(baseline_cases) | set(current_cases)):
+        old, new = baseline_cases.get(key), current_cases.get(key)
+        if old is None:
+            rows.append((key, None, new['latency_ms']['p95'], None, new['throughput_fps'], 'new'))
+            continue
+        if new is None:
+            rows.append((key, old['latency_ms']['p95'], None, old['throughput_fps'], None, 'not measured'))
+            continue
+
+        old_p95, new_p95 = old['latency_ms']['p95'], new['latency_ms']['p95']
+        old_fps, new_fps = old['throughput_fps'], new['throughput_fps']
+
+        problems = []
+        # Small absolute changes on fast paths are timer noise, not regressions
+        if new_p95 > old_p95 * (1 + tolerance) and new_p95 - old_p95 > min_delta_ms:
+            problems.append('p95 latency')
+        if new_fps < old_fps * (1 - tolerance) and (1000 / max(new_fps, 1e-9) - 1000 / max(old_fps, 1e-9)) > min_delta_ms:
+            problems.append('throughput')
+
+        status = 'REGRESSED: ' + ', '.join(problems) if problems else 'ok'
+        rows.append((key, old_p95, new_p95, old_fps, new_fps, status))
+        if problems:
+            regressions.append(key)
+
+    return rows, regressions
+
+
+def format_change(old, new):
+    if old is None or new is None:
+        return '-'
+    return f"{(new - old) / old * 100:+.0f}%" if old else '-'
+
+
+def print_rows(rows):
+    """Per-stage diff table"""
+    print(f"{'Case':60} {'p95 base':>9} {'p95 now':>9} {'Δ':>6} {'fps base':>9} {'fps now':>9} {'Δ':>6}  Status")
+    for key, old_p95, new_p95, old_fps, new_fps, status in rows:
+        values = [f"{value:9.2f}" if value is not None else f"{'-':>9}" for value in (old_p95, new_p95)]
+        fps = [f"{value:9.1f}" if value is not None else f"{'-':>9}" for value in (old_fps, new_fps)]
+        print(f"{key:60} {values[0]} {values[1]} {format_change(old_p95, new_p95):>6} "
+              f"{fps[0]} {fps[1]} {format_change(old_fps, new_fps):>6}  {status}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Fail when hot-path latency regresses against a stored baseline")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Baseline JSON file")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="Allowed relative slowdown of p95 latency / throughput (0.2 = 20%%)")
+    parser.add_argument('--min-delta-ms', type=float, default=1.0,
+                        help="Ignore p95 increases smaller than this many milliseconds")
+    parser.add_argument('--iterations', type=int, default=30, help="Timed calls per hot path")
+    parser.add_argument('--warmup', type=int, default=3, help="Untimed calls before timing")
+    parser.add_argument('--update-baseline', action='store_true', help="Store the measurement as the new baseline")
+    parser.add_argument('--output', help="Also write the current measurement to this JSON file")
+    return parser
+
+
+def main(argv=None):
+    """Main gate function, returns the process exit code"""
+    args = build_parser().parse_args(argv)
+
+    print("🚦 Face Security System - Performance Regression Gate")
+    print("=" * 50)
+
+    current = measure(args.iterations, args.warmup)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=2)
+
+    if args.update_baseline:
+        if not current['results']:
+            print("❌ Nothing was measured - refusing to write an empty baseline")
+            return 2
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=2)
+        print(f"\n✅ Baseline with {len(current['results'])} cases written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\n❌ Baseline {args.baseline} not found - record one with --update-baseline")
+        return 2
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    rows, regressions = compare_reports(baseline, current, args.tolerance, args.min_delta_ms)
+
+    print("\n" + "=" * 50)
+    print(f"Baseline commit {baseline.get('meta', {}).get('commit')} vs current commit "
+          f"{current['meta'].get('commit')} (tolerance {args.tolerance * 100:.0f}%)\n")
+    print_rows(rows)
+
+    print("\n" + "=" * 50)
+    if regressions:
+        print(f"❌ {len(regressions)} hot path(s) regressed beyond {args.tolerance * 100:.0f}%")
+        return 1
+    if not any(status == 'ok' for *_, status in rows):
+        print("❌ No hot path could be compared against the baseline")
+        return 2
+    print("✅ No performance regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
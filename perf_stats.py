@@ -0,0 +1,149 @@
+"""
+Per-stage timing for the monitoring pipeline
+Wrap each pipeline stage in `with perf.stage('detection'):` to collect a
+rolling window of latencies per stage. Summaries report p50/p95/p99 in
+milliseconds, can be drawn into the monitor window and dumped to JSON.
+When disabled, stage() returns a shared no-op context manager so the hot
+path only pays for one method call. Stages may be timed from several
+threads (threaded pipeline mode). A stage opened inside another one is
+recorded on its own and left out of the outer stage's time, so a rare
+'lock' (covering the screens) does not inflate the 'decision' percentiles.
+"""
+
+import json
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+# Display order of the well-known stages, any other stage name is listed after these
+STAGE_ORDER = ('capture', 'motion', 'probe', 'preprocess', 'detection', 'extraction',
+               'matching', 'decision', 'lock', 'drawing')
+
+
+class _NullStage:
+    """No-op context manager used while timing is disabled"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ('timer', 'name', 'started', 'nested')
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+        self.nested = 0.0           # Time spent in stages opened inside this one
+
+    def __enter__(self):
+        self.timer.open_stages().append(self)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        elapsed = time.perf_counter() - self.started
+        stages = self.timer.open_stages()
+        stages.pop()
+        if stages:
+            stages[-1].nested += elapsed
+        self.timer.record(self.name, elapsed - self.nested)
+        return False
+
+
+class StageTimer:
+    def __init__(self, enabled=False, window=300):
+        self.enabled = enabled
+        self.window = window        # Samples kept per stage for the rolling percentiles
+        self.samples = {}           # stage -> deque of durations in seconds
+        self.counts = {}            # stage -> total number of samples ever recorded
+        self.started = time.time()
+        self.lock = threading.Lock()
+        self.local = threading.local()  # Stages currently open on each thread
+
+    def open_stages(self):
+        """Stack of the stages open on the calling thread"""
+        stages = getattr(self.local, 'stages', None)
+        if stages is None:
+            stages = self.local.stages = []
+        return stages
+
+    def stage(self, name):
+        """Context manager timing one pass through a stage"""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def record(self, name, seconds):
+        """Add a duration (seconds) measured outside a stage() block"""
+        with self.lock:
+            samples = self.samples.get(name)
+            if samples is None:
+                samples = self.samples[name] = deque(maxlen=self.window)
+                self.counts[name] = 0
+            samples.append(seconds)
+            self.counts[name] += 1
+
+    def reset(self):
+        """Drop all collected samples"""
+        self.samples = {}
+        self.counts = {}
+        self.started = time.time()
+
+    def stage_names(self):
+        """Stages with samples, in pipeline order"""
+        known = [name for name in STAGE_ORDER if name in self.samples]
+        return known + sorted(name for name in self.samples if name not in STAGE_ORDER)
+
+    def summary(self):
+        """Rolling latency percentiles per stage in milliseconds"""
+        with self.lock:
+            snapshot = {name: (list(self.samples[name]), self.counts[name]) for name in self.stage_names()}
+        summary = {}
+        for name, (samples, count) in snapshot.items():
+            durations = np.array(samples, dtype=np.float64) * 1000
+            p50, p95, p99 = np.percentile(durations, (50, 95, 99))
+            summary[name] = {
+                'count': count,
+                'mean_ms': float(durations.mean()),
+                'p50_ms': float(p50),
+                'p95_ms': float(p95),
+                'p99_ms': float(p99),
+                'max_ms': float(durations.max()),
+            }
+        return summary
+
+    def overlay_lines(self):
+        """One short text line per stage for the monitor window"""
+        return [f"{name}: p50 {stats['p50_ms']:.1f} / p95 {stats['p95_ms']:.1f} / p99 {stats['p99_ms']:.1f} ms"
+                for name, stats in self.summary().items()]
+
+    def draw(self, frame, origin=(10, 210), line_height=18):
+        """Draw the per-stage percentiles onto a frame"""
+        if not self.enabled:
+            return
+        x, y = origin
+        for line in self.overlay_lines():
+            cv2.putText(frame, line, (x, y), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (200, 200, 200), 1)
+            y += line_height
+
+    def dump_json(self, path):
+        """Write the current summary to a JSON file"""
+        data = {
+            'timestamp': time.time(),
+            'uptime_s': time.time() - self.started,
+            'window': self.window,
+            'stages': self.summary(),
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        return path
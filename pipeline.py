@@ -0,0 +1,280 @@
+"""
+Threaded monitoring pipeline for Face Security System
+Splits the monitoring loop into stages that run on their own threads:
+
+    capture -> detect -> recognize -> decide -> render
+
+Stages are connected by small bounded queues. A live camera never waits:
+when a stage falls behind, the oldest queued frame is dropped so the
+stages downstream always work on recent frames. Finite sources (video
+files, image folders) block instead, so no frame is lost in throughput
+runs. The slowest stage then only limits its own rate instead of the
+whole loop.
+
+Works with any backend that provides
+    gate_frame(frame, now, analysed_before) -> (analyse, face_count)
+    detect_stage(frame, now)                 -> detections
+    recognize_stage(frame, detections, now)  -> FrameAnalysis
+    apply_security_decision(analysis, now)
+    render_monitor_frame(frame, analysis, fps)
+    handle_monitor_key()                     -> False to stop
+plus the detection_scheduler and motion_gate set up by monitor_faces.
+An optional prepare_lock_overlay() is run on the decide thread before
+the first frame, since Tk windows belong to the thread that creates them.
+"""
+
+import threading
+import time
+from collections import deque
+
+
+class DropOldestQueue:
+    def __init__(self, maxsize=2):
+        self.maxsize = maxsize
+        self.items = deque()
+        self.condition = threading.Condition()
+        self.closed = False
+
+        # Statistics
+        self.put_count = 0
+        self.dropped = 0
+        self.max_depth = 0
+
+    def __len__(self):
+        return len(self.items)
+
+    def put(self, item, block=False):
+        """Queue an item - when full, drop the oldest one (or wait with block=True)"""
+        with self.condition:
+            if block:
+                self.condition.wait_for(lambda: len(self.items) < self.maxsize or self.closed)
+            if self.closed:
+                return False
+            if len(self.items) >= self.maxsize:
+                self.items.popleft()
+                self.dropped += 1
+            self.items.append(item)
+            self.put_count += 1
+            self.max_depth = max(self.max_depth, len(self.items))
+            self.condition.notify_all()
+            return True
+
+    def get(self, timeout=0.1):
+        """Next item, or None after timeout / once closed and drained"""
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.items or self.closed, timeout):
+                return None
+            if not self.items:
+                return None
+            item = self.items.popleft()
+            self.condition.notify_all()
+            return item
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def get_stats(self):
+        return {'depth': len(self.items), 'max_depth': self.max_depth,
+                'put': self.put_count, 'dropped': self.dropped}
+
+
+class FrameJob:
+    """A captured frame and everything the stages learn about it"""
+
+    def __init__(self, frame, timestamp, sequence):
+        self.frame = frame
+        self.timestamp = timestamp
+        self.sequence = sequence
+        self.analyse = False     # Detect stage decided to run recognition
+        self.face_count = None   # Face-count probe result, if it ran
+        self.detections = None   # Output of the backend's detect stage
+        self.analysis = None     # FrameAnalysis to decide and render on
+
+
+class PipelineStage:
+    def __init__(self, name, work, inbox=None, outbox=None, block_output=False, setup=None):
+        self.name = name
+        self.work = work              # job -> job to forward, or None to forward nothing
+        self.setup = setup            # Called once on the stage's own thread before the first job
+        self.inbox = inbox            # None for the source stage
+        self.outbox = outbox
+        self.block_output = block_output
+        self.thread = None
+        self.done = False             # Set by a source stage when it has nothing more to produce
+
+        # Statistics
+        self.processed = 0
+        self.errors = 0
+        self.busy_time = 0.0
+        self.started = None
+
+    def run(self, pipeline):
+        if self.setup is not None:
+            try:
+                self.setup()
+            except Exception as e:
+                print(f"Error setting up {self.name} stage: {e}")
+        self.started = time.perf_counter()
+        while pipeline.running and not self.done:
+            job = None
+            if self.inbox is not None:
+                job = self.inbox.get()
+                if job is None:
+                    if self.inbox.closed:
+                        break
+                    continue
+
+            begin = time.perf_counter()
+            try:
+                result = self.work(job)
+            except Exception as e:
+                self.errors += 1
+                print(f"Error in {self.name} stage: {e}")
+                result = None
+            self.busy_time += time.perf_counter() - begin
+            self.processed += 1
+
+            if result is not None and self.outbox is not None:
+                self.outbox.put(result, block=self.block_output)
+
+        if self.outbox is not None:
+            self.outbox.close()
+
+    def start(self, pipeline):
+        self.thread = threading.Thread(target=self.run, args=(pipeline,), name=f"pipeline-{self.name}", daemon=True)
+        self.thread.start()
+        return self
+
+    def get_stats(self):
+        elapsed = time.perf_counter() - self.started if self.started else 0.0
+        stats = {
+            'processed': self.processed,
+            'errors': self.errors,
+            'utilisation': self.busy_time / elapsed if elapsed > 0 else 0.0,
+            'avg_ms': self.busy_time / self.processed * 1000 if self.processed else 0.0,
+        }
+        if self.inbox is not None:
+            inbox_stats = self.inbox.get_stats()
+            stats.update(queue_depth=inbox_stats['depth'], max_depth=inbox_stats['max_depth'],
+                         dropped=inbox_stats['dropped'])
+        return stats
+
+
+class MonitorPipeline:
+    def __init__(self, system, camera, queue_size=2, processing_delay=0.0, detect_queue_size=None):
+        self.system = system
+        self.camera = camera
+        self.processing_delay = processing_delay
+        self.running = False
+        self.gate_lock = threading.Lock()   # Scheduler and motion gate are shared by detect and recognize
+        self.analysed_before = False
+        self.last_analysis = None
+        self.sequence = 0
+        self.rendered = 0
+        self.start_time = None
+
+        # Finite sources apply backpressure instead of dropping frames
+        block = not getattr(camera, 'realtime', True)
+        queues = [DropOldestQueue(queue_size) for _ in range(4)]
+        if detect_queue_size is not None:
+            # Deeper when detection only submits to inference workers, so every worker has a frame
+            queues[1] = DropOldestQueue(detect_queue_size)
+        self.stages = [
+            PipelineStage('capture', self._capture, None, queues[0], block),
+            PipelineStage('detect', self._detect, queues[0], queues[1], block),
+            PipelineStage('recognize', self._recognize, queues[1], queues[2], block),
+            PipelineStage('decide', self._decide, queues[2], queues[3], block,
+                          setup=getattr(system, 'prepare_lock_overlay', None)),
+            PipelineStage('render', self._render, queues[3]),
+        ]
+
+    # Stage work functions
+    def _capture(self, _):
+        with self.system.perf.stage('capture'):
+            ret, frame = self.camera.read()
+        if not ret:
+            # Close the capture queue, the remaining frames still drain through the stages
+            print("❌ Error: Could not read frame")
+            self.stages[0].done = True
+            return None
+        self.sequence += 1
+        if self.processing_delay:
+            time.sleep(self.processing_delay)
+        return FrameJob(frame, time.time(), self.sequence)
+
+    def _detect(self, job):
+        with self.gate_lock:
+            job.analyse, job.face_count = self.system.gate_frame(job.frame, job.timestamp, self.analysed_before)
+            self.analysed_before = self.analysed_before or job.analyse
+        if job.analyse:
+            job.detections = self.system.detect_stage(job.frame, job.timestamp)
+        return job
+
+    def _recognize(self, job):
+        if job.analyse:
+            job.analysis = self.system.recognize_stage(job.frame, job.detections, job.timestamp)
+            self.last_analysis = job.analysis
+            with self.gate_lock:
+                self.system.detection_scheduler.record(job.analysis, job.timestamp, job.face_count)
+                # The gate may already hold a later frame - compare against the one analysed
+                self.system.motion_gate.mark_analysed(job.timestamp, job.frame)
+        else:
+            # Frames that were not analysed reuse the latest analysis. Every job carries the newest
+            # result, so an analysed job dropped before the decide stage is not lost with it
+            job.analysis = self.last_analysis
+        return job
+
+    def _decide(self, job):
+        if job.analysis is None:
+            return None
+        with self.system.perf.stage('decision'):
+            self.system.apply_security_decision(job.analysis, job.timestamp)
+        return job
+
+    def _render(self, job):
+        self.rendered += 1
+        elapsed = time.time() - self.start_time
+        with self.system.perf.stage('drawing'):
+            self.system.render_monitor_frame(job.frame, job.analysis, self.rendered / elapsed if elapsed > 0 else 0.0)
+        if not self.system.handle_monitor_key():
+            self.running = False
+        return None
+
+    def run(self):
+        """Run all stages until stopped, the source is drained or monitoring is switched off"""
+        self.running = True
+        self.start_time = time.time()
+        for stage in self.stages:
+            stage.start(self)
+        try:
+            while self.running and self.system.is_monitoring and self.stages[-1].thread.is_alive():
+                time.sleep(0.05)
+        finally:
+            self.stop()
+        return self
+
+    def stop(self, timeout=2.0):
+        self.running = False
+        for stage in self.stages:
+            if stage.outbox is not None:
+                stage.outbox.close()
+        current = threading.current_thread()
+        for stage in self.stages:
+            if stage.thread is not None and stage.thread is not current:
+                stage.thread.join(timeout)
+
+    def get_stats(self):
+        """Per-stage statistics, in pipeline order"""
+        return {stage.name: stage.get_stats() for stage in self.stages}
+
+    def overlay_lines(self):
+        """Short per-stage summary for the monitor window and logs"""
+        lines = []
+        for name, stats in self.get_stats().items():
+            line = f"{name}: {stats['utilisation'] * 100:.0f}% busy, {stats['avg_ms']:.1f} ms"
+            if 'queue_depth' in stats:
+                line += f", queue {stats['queue_depth']} (max {stats['max_depth']}), {stats['dropped']} dropped"
+            lines.append(line)
+        return lines
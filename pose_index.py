@@ -0,0 +1,121 @@
+"""
+Head-pose-binned owner template index for the MediaPipe backend
+Every owner template is filed under a (yaw, pitch) bin estimated from its
+FaceMesh landmarks. A live face is first matched only against the
+templates in its own and the neighbouring bins; the full gallery is
+scanned only when that finds no owner match. Matching cost then stays
+roughly flat as more samples are registered to cover more poses.
+"""
+
+import numpy as np
+
+from face_matching import MatchResult
+
+# FaceMesh landmark indices used for the pose estimate
+RIGHT_EYE_OUTER = 33
+LEFT_EYE_OUTER = 263
+FOREHEAD = 10
+CHIN = 152
+
+
+def estimate_head_pose(features):
+    """(faces, 2) yaw and pitch in degrees from (faces, 1434) raw landmark features
+
+    Yaw is the depth slope along the outer eye corners, pitch the depth
+    slope along the forehead-chin line. Coarse, but stable enough for binning.
+    """
+    points = np.asarray(features, dtype=np.float32).reshape(len(features), -1, 3)
+    eye_line = points[:, LEFT_EYE_OUTER] - points[:, RIGHT_EYE_OUTER]
+    face_line = points[:, CHIN] - points[:, FOREHEAD]
+    yaw = np.degrees(np.arctan2(eye_line[:, 2], eye_line[:, 0]))
+    pitch = np.degrees(np.arctan2(face_line[:, 2], face_line[:, 1]))
+    return np.stack([yaw, pitch], axis=1)
+
+
+class PoseBinnedIndex:
+    def __init__(self, template_poses, bin_size=15.0, neighbour_bins=1):
+        self.bin_size = bin_size
+        self.neighbour_bins = neighbour_bins
+        self.poses = np.asarray(template_poses, dtype=np.float32).reshape(-1, 2)
+
+        bins = {}
+        for index, key in enumerate(map(tuple, self._bin_of(self.poses))):
+            bins.setdefault(key, []).append(index)
+        self.bins = {key: np.array(indices, dtype=np.int64) for key, indices in bins.items()}
+
+        # Statistics
+        self.lookups = 0
+        self.full_scans = 0
+        self.candidates_scored = 0
+
+    def __len__(self):
+        return len(self.poses)
+
+    def _bin_of(self, poses):
+        return np.floor(np.asarray(poses) / self.bin_size).astype(np.int64)
+
+    def set_pose(self, index, pose):
+        """Re-file one template under its pose bin (append when index == len(self))"""
+        pose = np.asarray(pose, dtype=np.float32).reshape(1, 2)
+        if index == len(self.poses):
+            self.poses = np.concatenate([self.poses, pose])
+        else:
+            old_key = tuple(self._bin_of(self.poses[index]))
+            self.bins[old_key] = self.bins[old_key][self.bins[old_key] != index]
+            if not len(self.bins[old_key]):
+                del self.bins[old_key]
+            self.poses[index] = pose[0]
+        key = tuple(self._bin_of(pose[0]))
+        self.bins[key] = np.sort(np.append(self.bins.get(key, np.zeros(0, np.int64)), index))
+
+    def candidates(self, pose):
+        """Sorted template indices in the face's pose bin and its neighbours"""
+        yaw_bin, pitch_bin = self._bin_of(pose)
+        reach = range(-self.neighbour_bins, self.neighbour_bins + 1)
+        found = [self.bins[key] for key in ((yaw_bin + dy, pitch_bin + dp) for dy in reach for dp in reach)
+                 if key in self.bins]
+        return np.sort(np.concatenate(found)) if found else np.zeros(0, np.int64)
+
+    def match(self, matcher, faces, face_poses):
+        """Match faces against their pose neighbourhood first, full gallery as fallback
+
+        Returns a MatchResult over the whole gallery; scores of templates that
+        were not evaluated are NaN
+        """
+        samples = len(matcher)
+        result = MatchResult.no_match(len(faces), samples)
+        result.scores = np.full((len(faces), samples), np.nan, np.float32)
+        faces = np.asarray(faces, dtype=np.float32).reshape(len(faces), -1)
+
+        for i, pose in enumerate(face_poses):
+            self.lookups += 1
+            candidates = self.candidates(pose)
+            face_result = matcher.match(faces[i:i + 1], candidates) if len(candidates) else None
+            self.candidates_scored += len(candidates)
+
+            if face_result is None or not face_result.is_owner[0]:
+                # Nothing in the pose neighbourhood - fall back to the full gallery
+                self.full_scans += 1
+                candidates = np.arange(samples)
+                face_result = matcher.match(faces[i:i + 1])
+                self.candidates_scored += samples
+
+            result.scores[i, candidates] = face_result.scores[0]
+            result.matches[i, candidates] = face_result.matches[0]
+            result.is_owner[i] = face_result.is_owner[0]
+            result.confidence[i] = face_result.confidence[0]
+            result.best_index[i] = candidates[face_result.best_index[0]]
+            result.best_score[i] = face_result.best_score[0]
+
+        return result
+
+    def get_stats(self):
+        """Index statistics for logging"""
+        return {
+            'templates': len(self.poses),
+            'bins': len(self.bins),
+            'lookups': self.lookups,
+            'full_scans': self.full_scans,
+            'fallback_ratio': self.full_scans / self.lookups if self.lookups else 0.0,
+            'avg_candidates': self.candidates_scored / self.lookups if self.lookups else 0.0,
+        }
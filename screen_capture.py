@@ -0,0 +1,512 @@
+"""
+Screen capture backends for Face Security System
+capture_screen used to create and destroy a device context and a bitmap
+through pywin32 on every call, and the backends could not be imported
+anywhere but Windows. A ScreenCapture now keeps its capture resources
+alive between grabs and hands back the captured pixels as a NumPy view
+of its own buffer:
+
+    Win32ScreenCapture - BitBlt into a persistent DIB section (ctypes only)
+    X11ScreenCapture   - XShmGetImage into a persistent shared memory image,
+                         XGetImage where the MIT-SHM extension is missing
+    FakeScreenCapture  - an in-memory screen for tests and headless runs
+
+grab() returns the (height, width, 4) BGRA buffer itself, which the next
+grab overwrites. Callers that keep the pixels use grab_rgb() or
+grab_image(), which convert while holding the capture lock.
+
+The buffer covers the whole virtual desktop, so every monitor is
+captured by one grab. grab_monitors() hands back a view per monitor
+(EnumDisplayMonitors on Windows, XRandR monitors on X11) together with
+its position and DPI scale.
+"""
+
+import ctypes
+import ctypes.util
+import sys
+import threading
+from ctypes import wintypes
+
+import cv2
+import numpy as np
+from PIL import Image
+
+SCREEN_CAPTURE_BACKENDS = ('auto', 'win32', 'x11', 'fake')
+
+
+class Monitor:
+    """One display, in virtual desktop pixels"""
+
+    def __init__(self, index, x, y, width, height, scale=1.0, primary=False):
+        self.index = index
+        self.x, self.y = x, y
+        self.width, self.height = width, height
+        self.scale = scale          # DPI scale, 1.0 at 96 DPI
+        self.primary = primary
+
+    @property
+    def size(self):
+        return self.width, self.height
+
+    @property
+    def rect(self):
+        return self.x, self.y, self.width, self.height
+
+    def __repr__(self):
+        return f"Monitor({self.index}, {self.width}x{self.height}+{self.x}+{self.y}, scale={self.scale:g})"
+
+
+class ScreenCapture:
+    """Reusable screen grabber, subclasses implement _open, _grab and _close"""
+    name = 'base'
+
+    def __init__(self):
+        self.lock = threading.RLock()   # One grab at a time, the buffer is shared
+        self.size = None                # (width, height) the resources were opened for
+        self.bounds = None              # (x, y, width, height) of the captured virtual desktop
+        self.frame = None               # (height, width, 4) BGRA view of the capture buffer
+
+        # Statistics
+        self.grabs = 0
+        self.reopens = 0
+
+    def screen_size(self):
+        """Current (width, height) of the captured screen"""
+        raise NotImplementedError
+
+    def virtual_bounds(self):
+        """(x, y, width, height) of the desktop spanning every monitor"""
+        return (0, 0) + tuple(self.screen_size())
+
+    def monitors(self):
+        """Monitors in virtual desktop coordinates, primary one flagged"""
+        return [Monitor(0, 0, 0, *self.screen_size(), primary=True)]
+
+    def primary_monitor(self):
+        monitors = self.monitors()
+        return next((monitor for monitor in monitors if monitor.primary), monitors[0])
+
+    def _open(self, width, height):
+        raise NotImplementedError
+
+    def _grab(self):
+        raise NotImplementedError
+
+    def _close(self):
+        pass
+
+    def grab(self):
+        """Capture the screen into the reusable buffer, returns the BGRA view of it"""
+        with self.lock:
+            bounds = tuple(self.virtual_bounds())
+            if bounds != self.bounds:
+                # Resolution or monitor layout changed (or first grab) - reallocate once
+                if self.size is not None:
+                    self._close()
+                    self.reopens += 1
+                self._open(*bounds[2:])
+                self.size, self.bounds = bounds[2:], bounds
+            self._grab()
+            self.grabs += 1
+            return self.frame
+
+    def grab_monitors(self):
+        """Grab once and return [(monitor, BGRA view)] - views into the buffer, use them under self.lock"""
+        with self.lock:
+            monitors = self.monitors()
+            frame = self.grab()
+            left, top, width, height = self.bounds
+            views = []
+            for monitor in monitors:
+                x0, y0 = max(0, monitor.x - left), max(0, monitor.y - top)
+                x1, y1 = min(width, monitor.x - left + monitor.width), min(height, monitor.y - top + monitor.height)
+                if x1 > x0 and y1 > y0:
+                    views.append((monitor, frame[y0:y1, x0:x1]))
+            return views
+
+    def grab_rgb(self):
+        """Capture the screen as a new (height, width, 3) RGB array"""
+        with self.lock:
+            return cv2.cvtColor(self.grab(), cv2.COLOR_BGRA2RGB)
+
+    def grab_image(self):
+        """Capture the screen as a PIL RGB image"""
+        return Image.fromarray(self.grab_rgb())
+
+    def exclude_window(self, window):
+        """Leave a Tk window out of later captures, False where the platform cannot"""
+        return False
+
+    def close(self):
+        with self.lock:
+            if self.size is not None:
+                self._close()
+            self.size = self.bounds = None
+            self.frame = None
+
+    def get_stats(self):
+        return {'backend': self.name, 'size': self.size, 'bounds': self.bounds,
+                'grabs': self.grabs, 'reopens': self.reopens}
+
+
+# Win32 structures for a top-down 32-bit DIB section
+class BITMAPINFOHEADER(ctypes.Structure):
+    _fields_ = [('biSize', wintypes.DWORD), ('biWidth', wintypes.LONG), ('biHeight', wintypes.LONG),
+                ('biPlanes', wintypes.WORD), ('biBitCount', wintypes.WORD), ('biCompression', wintypes.DWORD),
+                ('biSizeImage', wintypes.DWORD), ('biXPelsPerMeter', wintypes.LONG),
+                ('biYPelsPerMeter', wintypes.LONG), ('biClrUsed', wintypes.DWORD),
+                ('biClrImportant', wintypes.DWORD)]
+
+
+class BITMAPINFO(ctypes.Structure):
+    _fields_ = [('bmiHeader', BITMAPINFOHEADER), ('bmiColors', wintypes.DWORD * 3)]
+
+
+class MONITORINFO(ctypes.Structure):
+    _fields_ = [('cbSize', wintypes.DWORD), ('rcMonitor', wintypes.RECT), ('rcWork', wintypes.RECT),
+                ('dwFlags', wintypes.DWORD)]
+
+
+class Win32ScreenCapture(ScreenCapture):
+    """BitBlt into a DIB section whose pixel memory is the NumPy buffer"""
+    name = 'win32'
+    SRCCOPY = 0x00CC0020
+    WDA_EXCLUDEFROMCAPTURE = 0x11
+    MONITORINFOF_PRIMARY = 1
+
+    def __init__(self):
+        super().__init__()
+        self.user32 = ctypes.windll.user32
+        self.gdi32 = ctypes.windll.gdi32
+        try:
+            # Per-monitor DPI aware, so monitor rectangles, captures and Tk windows all use real pixels
+            ctypes.windll.shcore.SetProcessDpiAwareness(2)
+        except (AttributeError, OSError):
+            pass
+        # Handles are pointer sized, the default int restype would truncate them on 64-bit
+        self.user32.GetDC.restype = wintypes.HDC
+        self.user32.GetDC.argtypes = [wintypes.HWND]
+        self.user32.ReleaseDC.argtypes = [wintypes.HWND, wintypes.HDC]
+        self.user32.GetParent.restype = wintypes.HWND
+        self.user32.GetParent.argtypes = [wintypes.HWND]
+        self.user32.SetWindowDisplayAffinity.argtypes = [wintypes.HWND, wintypes.DWORD]
+        self.monitor_enum_proc = ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HMONITOR, wintypes.HDC,
+                                                    ctypes.POINTER(wintypes.RECT), wintypes.LPARAM)
+        self.user32.EnumDisplayMonitors.argtypes = [wintypes.HDC, ctypes.POINTER(wintypes.RECT),
+                                                    self.monitor_enum_proc, wintypes.LPARAM]
+        self.user32.GetMonitorInfoW.argtypes = [wintypes.HMONITOR, ctypes.POINTER(MONITORINFO)]
+        self.gdi32.CreateCompatibleDC.restype = wintypes.HDC
+        self.gdi32.CreateCompatibleDC.argtypes = [wintypes.HDC]
+        self.gdi32.CreateDIBSection.restype = wintypes.HBITMAP
+        self.gdi32.CreateDIBSection.argtypes = [wintypes.HDC, ctypes.POINTER(BITMAPINFO), wintypes.UINT,
+                                                ctypes.POINTER(ctypes.c_void_p), wintypes.HANDLE, wintypes.DWORD]
+        self.gdi32.SelectObject.restype = wintypes.HGDIOBJ
+        self.gdi32.SelectObject.argtypes = [wintypes.HDC, wintypes.HGDIOBJ]
+        self.gdi32.BitBlt.argtypes = [wintypes.HDC, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int,
+                                      wintypes.HDC, ctypes.c_int, ctypes.c_int, wintypes.DWORD]
+        self.gdi32.DeleteObject.argtypes = [wintypes.HGDIOBJ]
+        self.gdi32.DeleteDC.argtypes = [wintypes.HDC]
+        self.screen_dc = self.memory_dc = self.bitmap = self.previous_bitmap = None
+
+    def screen_size(self):
+        return self.user32.GetSystemMetrics(0), self.user32.GetSystemMetrics(1)
+
+    def virtual_bounds(self):
+        # SM_XVIRTUALSCREEN, SM_YVIRTUALSCREEN, SM_CXVIRTUALSCREEN, SM_CYVIRTUALSCREEN
+        return tuple(self.user32.GetSystemMetrics(index) for index in (76, 77, 78, 79))
+
+    def monitors(self):
+        handles = []
+        callback = self.monitor_enum_proc(lambda handle, dc, rect, data: handles.append(handle) or True)
+        self.user32.EnumDisplayMonitors(None, None, callback, 0)
+        monitors = []
+        for index, handle in enumerate(handles):
+            info = MONITORINFO()
+            info.cbSize = ctypes.sizeof(MONITORINFO)
+            if not self.user32.GetMonitorInfoW(handle, ctypes.byref(info)):
+                continue
+            rect = info.rcMonitor
+            monitors.append(Monitor(index, rect.left, rect.top, rect.right - rect.left, rect.bottom - rect.top,
+                                    self._monitor_scale(handle), bool(info.dwFlags & self.MONITORINFOF_PRIMARY)))
+        return monitors or super().monitors()
+
+    def _monitor_scale(self, handle):
+        """Effective DPI of a monitor relative to 96 (Windows 8.1 and later)"""
+        try:
+            dpi_x, dpi_y = wintypes.UINT(), wintypes.UINT()
+            if ctypes.windll.shcore.GetDpiForMonitor(handle, 0, ctypes.byref(dpi_x), ctypes.byref(dpi_y)) == 0:
+                return dpi_x.value / 96.0
+        except (AttributeError, OSError):
+            pass
+        return 1.0
+
+    def _open(self, width, height):
+        self.screen_dc = self.user32.GetDC(None)
+        self.memory_dc = self.gdi32.CreateCompatibleDC(self.screen_dc)
+
+        info = BITMAPINFO()
+        info.bmiHeader.biSize = ctypes.sizeof(BITMAPINFOHEADER)
+        info.bmiHeader.biWidth = width
+        info.bmiHeader.biHeight = -height  # Top-down rows, same order as a NumPy image
+        info.bmiHeader.biPlanes = 1
+        info.bmiHeader.biBitCount = 32
+        bits = ctypes.c_void_p()
+        self.bitmap = self.gdi32.CreateDIBSection(self.memory_dc, ctypes.byref(info), 0, ctypes.byref(bits), None, 0)
+        if not self.bitmap:
+            raise OSError("CreateDIBSection failed")
+        self.previous_bitmap = self.gdi32.SelectObject(self.memory_dc, self.bitmap)
+
+        buffer = (ctypes.c_ubyte * (width * height * 4)).from_address(bits.value)
+        self.frame = np.ndarray((height, width, 4), dtype=np.uint8, buffer=buffer)
+
+    def _grab(self):
+        left, top, width, height = self.bounds
+        if not self.gdi32.BitBlt(self.memory_dc, 0, 0, width, height, self.screen_dc, left, top, self.SRCCOPY):
+            raise OSError("BitBlt failed")
+        self.gdi32.GdiFlush()
+
+    def _close(self):
+        self.frame = None
+        self.gdi32.SelectObject(self.memory_dc, self.previous_bitmap)
+        self.gdi32.DeleteObject(self.bitmap)
+        self.gdi32.DeleteDC(self.memory_dc)
+        self.user32.ReleaseDC(None, self.screen_dc)
+        self.screen_dc = self.memory_dc = self.bitmap = self.previous_bitmap = None
+
+    def exclude_window(self, window):
+        """SetWindowDisplayAffinity(WDA_EXCLUDEFROMCAPTURE), Windows 10 2004 and later"""
+        try:
+            hwnd = self.user32.GetParent(window.winfo_id())
+            return bool(self.user32.SetWindowDisplayAffinity(hwnd, self.WDA_EXCLUDEFROMCAPTURE))
+        except Exception:
+            return False
+
+
+# Xlib structures used by the X11 backend
+class XImage(ctypes.Structure):
+    _fields_ = [('width', ctypes.c_int), ('height', ctypes.c_int), ('xoffset', ctypes.c_int),
+                ('format', ctypes.c_int), ('data', ctypes.c_void_p), ('byte_order', ctypes.c_int),
+                ('bitmap_unit', ctypes.c_int), ('bitmap_bit_order', ctypes.c_int), ('bitmap_pad', ctypes.c_int),
+                ('depth', ctypes.c_int), ('bytes_per_line', ctypes.c_int), ('bits_per_pixel', ctypes.c_int),
+                ('red_mask', ctypes.c_ulong), ('green_mask', ctypes.c_ulong), ('blue_mask', ctypes.c_ulong),
+                ('obdata', ctypes.c_void_p), ('f', ctypes.c_void_p * 6)]
+
+
+class XShmSegmentInfo(ctypes.Structure):
+    _fields_ = [('shmseg', ctypes.c_ulong), ('shmid', ctypes.c_int), ('shmaddr', ctypes.c_void_p),
+                ('readOnly', ctypes.c_int)]
+
+
+class XRRMonitorInfo(ctypes.Structure):
+    _fields_ = [('name', ctypes.c_ulong), ('primary', ctypes.c_int), ('automatic', ctypes.c_int),
+                ('noutput', ctypes.c_int), ('x', ctypes.c_int), ('y', ctypes.c_int),
+                ('width', ctypes.c_int), ('height', ctypes.c_int), ('mwidth', ctypes.c_int),
+                ('mheight', ctypes.c_int), ('outputs', ctypes.c_void_p)]
+
+
+class X11ScreenCapture(ScreenCapture):
+    """XShmGetImage into a shared memory XImage, XGetImage without MIT-SHM"""
+    name = 'x11'
+    ZPIXMAP = 2
+    ALL_PLANES = 0xFFFFFFFF
+    IPC_PRIVATE, IPC_CREAT, IPC_RMID = 0, 0o1000, 0
+
+    def __init__(self, display_name=None):
+        super().__init__()
+        self.xlib = ctypes.CDLL(ctypes.util.find_library('X11') or 'libX11.so.6')
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        xlib, libc = self.xlib, self.libc
+        xlib.XOpenDisplay.restype = ctypes.c_void_p
+        xlib.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        for name in ('XDefaultScreen', 'XDisplayWidth', 'XDisplayHeight', 'XDefaultDepth', 'XCloseDisplay', 'XSync'):
+            getattr(xlib, name).argtypes = [ctypes.c_void_p] + ([ctypes.c_int] if name in (
+                'XDisplayWidth', 'XDisplayHeight', 'XDefaultDepth', 'XSync') else [])
+        xlib.XRootWindow.restype = ctypes.c_ulong
+        xlib.XRootWindow.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        xlib.XDefaultVisual.restype = ctypes.c_void_p
+        xlib.XDefaultVisual.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        xlib.XGetImage.restype = ctypes.POINTER(XImage)
+        xlib.XGetImage.argtypes = [ctypes.c_void_p, ctypes.c_ulong, ctypes.c_int, ctypes.c_int, ctypes.c_uint,
+                                   ctypes.c_uint, ctypes.c_ulong, ctypes.c_int]
+        xlib.XDestroyImage.argtypes = [ctypes.POINTER(XImage)]
+        libc.shmget.argtypes = [ctypes.c_int, ctypes.c_size_t, ctypes.c_int]
+        libc.shmat.restype = ctypes.c_void_p
+        libc.shmat.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_int]
+        libc.shmdt.argtypes = [ctypes.c_void_p]
+        libc.shmctl.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_void_p]
+
+        self.display = xlib.XOpenDisplay(display_name.encode() if display_name else None)
+        if not self.display:
+            raise OSError("Cannot open X display")
+        self.screen = xlib.XDefaultScreen(self.display)
+        self.root = xlib.XRootWindow(self.display, self.screen)
+
+        self.xext = None
+        try:
+            xext = ctypes.CDLL(ctypes.util.find_library('Xext') or 'libXext.so.6')
+            xext.XShmQueryExtension.argtypes = [ctypes.c_void_p]
+            if xext.XShmQueryExtension(self.display):
+                xext.XShmCreateImage.restype = ctypes.POINTER(XImage)
+                xext.XShmCreateImage.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int,
+                                                 ctypes.c_void_p, ctypes.POINTER(XShmSegmentInfo),
+                                                 ctypes.c_uint, ctypes.c_uint]
+                xext.XShmAttach.argtypes = [ctypes.c_void_p, ctypes.POINTER(XShmSegmentInfo)]
+                xext.XShmDetach.argtypes = [ctypes.c_void_p, ctypes.POINTER(XShmSegmentInfo)]
+                xext.XShmGetImage.argtypes = [ctypes.c_void_p, ctypes.c_ulong, ctypes.POINTER(XImage),
+                                              ctypes.c_int, ctypes.c_int, ctypes.c_ulong]
+                self.xext = xext
+        except OSError:
+            pass  # No libXext, every grab goes through XGetImage
+        self.xrandr = None
+        try:
+            xrandr = ctypes.CDLL(ctypes.util.find_library('Xrandr') or 'libXrandr.so.2')
+            xrandr.XRRGetMonitors.restype = ctypes.POINTER(XRRMonitorInfo)
+            xrandr.XRRGetMonitors.argtypes = [ctypes.c_void_p, ctypes.c_ulong, ctypes.c_int,
+                                              ctypes.POINTER(ctypes.c_int)]
+            xrandr.XRRFreeMonitors.argtypes = [ctypes.POINTER(XRRMonitorInfo)]
+            self.xrandr = xrandr
+        except (OSError, AttributeError):
+            pass  # No RandR 1.5, the root window is treated as one monitor
+        self.image = None
+        self.segment = None
+
+    def monitors(self):
+        if self.xrandr is None:
+            return super().monitors()
+        count = ctypes.c_int()
+        info = self.xrandr.XRRGetMonitors(self.display, self.root, 1, ctypes.byref(count))
+        if not info:
+            return super().monitors()
+        try:
+            monitors = [Monitor(index, entry.x, entry.y, entry.width, entry.height,
+                                self._monitor_scale(entry.width, entry.mwidth), bool(entry.primary))
+                        for index, entry in enumerate(info[:count.value])]
+        finally:
+            self.xrandr.XRRFreeMonitors(info)
+        return monitors or super().monitors()
+
+    @staticmethod
+    def _monitor_scale(width, width_mm):
+        """DPI scale from the reported physical width, in steps of 0.25"""
+        if width_mm <= 0:
+            return 1.0
+        return max(1.0, round(width / (width_mm / 25.4) / 96 * 4) / 4)
+
+    @property
+    def shared_memory(self):
+        return self.xext is not None
+
+    def screen_size(self):
+        return (self.xlib.XDisplayWidth(self.display, self.screen),
+                self.xlib.XDisplayHeight(self.display, self.screen))
+
+    def _view(self, image, width, height):
+        """BGRA view of an XImage's 32 bpp ZPixmap data (rows may be padded)"""
+        contents = image.contents
+        if contents.bits_per_pixel != 32:
+            raise OSError(f"Unsupported X11 pixel format: {contents.bits_per_pixel} bpp")
+        buffer = (ctypes.c_ubyte * (contents.bytes_per_line * height)).from_address(contents.data)
+        rows = np.ndarray((height, contents.bytes_per_line // 4, 4), dtype=np.uint8, buffer=buffer)
+        return rows[:, :width]
+
+    def _open(self, width, height):
+        if not self.shared_memory:
+            return  # XGetImage allocates per grab
+        depth = self.xlib.XDefaultDepth(self.display, self.screen)
+        visual = self.xlib.XDefaultVisual(self.display, self.screen)
+        self.segment = XShmSegmentInfo()
+        self.image = self.xext.XShmCreateImage(self.display, visual, depth, self.ZPIXMAP, None,
+                                               ctypes.byref(self.segment), width, height)
+        if not self.image:
+            raise OSError("XShmCreateImage failed")
+        size = self.image.contents.bytes_per_line * height
+        self.segment.shmid = self.libc.shmget(self.IPC_PRIVATE, size, self.IPC_CREAT | 0o600)
+        if self.segment.shmid < 0:
+            raise OSError(ctypes.get_errno(), "shmget failed")
+        self.segment.shmaddr = self.libc.shmat(self.segment.shmid, None, 0)
+        self.image.contents.data = self.segment.shmaddr
+        self.segment.readOnly = 0
+        self.xext.XShmAttach(self.display, ctypes.byref(self.segment))
+        self.xlib.XSync(self.display, 0)
+        # Mark the segment for removal now, it lives until the last detach
+        self.libc.shmctl(self.segment.shmid, self.IPC_RMID, None)
+        self.frame = self._view(self.image, width, height)
+
+    def _grab(self):
+        width, height = self.size
+        if self.shared_memory:
+            if not self.xext.XShmGetImage(self.display, self.root, self.image, 0, 0, self.ALL_PLANES):
+                raise OSError("XShmGetImage failed")
+            return
+        image = self.xlib.XGetImage(self.display, self.root, 0, 0, width, height, self.ALL_PLANES, self.ZPIXMAP)
+        if not image:
+            raise OSError("XGetImage failed")
+        try:
+            if self.frame is None or self.frame.shape[:2] != (height, width):
+                self.frame = np.empty((height, width, 4), dtype=np.uint8)
+            np.copyto(self.frame, self._view(image, width, height))
+        finally:
+            self.xlib.XDestroyImage(image)
+
+    def _close(self):
+        self.frame = None
+        if self.image is not None:
+            self.xext.XShmDetach(self.display, ctypes.byref(self.segment))
+            self.xlib.XSync(self.display, 0)
+            self.image.contents.data = None  # The segment is not XImage's to free
+            self.xlib.XDestroyImage(self.image)
+            self.libc.shmdt(self.segment.shmaddr)
+            self.image = self.segment = None
+
+    def close(self):
+        super().close()
+        if self.display:
+            self.xlib.XCloseDisplay(self.display)
+            self.display = None
+
+
+class FakeScreenCapture(ScreenCapture):
+    """In-memory screen - tests swap in what the "screen" shows with set_screen
+
+    monitors: optional (x, y, width, height[, scale]) layout on the screen, first one primary
+    """
+    name = 'fake'
+
+    def __init__(self, screen=None, size=(1920, 1080), monitors=None):
+        super().__init__()
+        self.screen = None
+        self.layout = monitors
+        self.set_screen(screen if screen is not None else np.full((size[1], size[0], 3), 64, np.uint8))
+
+    def set_screen(self, screen):
+        """Show an (height, width, 3) RGB array on the fake screen"""
+        with self.lock:
+            self.screen = cv2.cvtColor(np.ascontiguousarray(screen, dtype=np.uint8), cv2.COLOR_RGB2BGRA)
+
+    def screen_size(self):
+        return self.screen.shape[1], self.screen.shape[0]
+
+    def monitors(self):
+        if not self.layout:
+            return super().monitors()
+        return [Monitor(index, *rect[:4], scale=rect[4] if len(rect) > 4 else 1.0, primary=index == 0)
+                for index, rect in enumerate(self.layout)]
+
+    def _open(self, width, height):
+        self.frame = np.empty((height, width, 4), dtype=np.uint8)
+
+    def _grab(self):
+        np.copyto(self.frame, self.screen)
+
+
+def create_screen_capture(backend='auto'):
+    """ScreenCapture for 'win32', 'x11', 'fake' or 'auto' (this platform's native backend)"""
+    if backend not in SCREEN_CAPTURE_BACKENDS:
+        raise ValueError(f"Unknown screen capture backend '{backend}', expected one of {', '.join(SCREEN_CAPTURE_BACKENDS)}")
+    if backend == 'auto':
+        backend = 'win32' if sys.platform == 'win32' else 'x11'
+    if backend == 'win32':
+        return Win32ScreenCapture()
+    if backend == 'x11':
+        return X11ScreenCapture()
+    return FakeScreenCapture()
@@ -0,0 +1,209 @@
+"""
+Pre-blurred screen snapshot cache for Face Security System
+Capturing and blurring the screen used to happen only after an intruder
+was detected, so the lock path paid for both before anything covered
+the screen. With ENABLE_SNAPSHOT_CACHE a background thread refreshes a
+low-resolution blurred snapshot every few seconds while the screen is
+unlocked. On lock the overlay shows the cached snapshot straight away
+(one linear upscale) and a fresh capture is swapped in afterwards.
+
+Only the blurred, darkened working-resolution image is kept, never the
+raw screen. Snapshots older than max_age are evicted instead of being
+shown, and the cache stays below a memory limit by dropping the least
+recently refreshed entries.
+
+Every monitor gets its own snapshot, keyed by monitor index. One grab
+covers the whole desktop and the monitors are blurred with the blur
+engine's map(), in parallel where there are cores to spare.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+import cv2
+from PIL import Image
+
+
+class BlurredSnapshot:
+    """A blurred working-resolution screen and the size it covers"""
+
+    def __init__(self, image, output_size, timestamp):
+        self.image = image              # (h, w, 3) uint8, blurred and darkened
+        self.output_size = output_size  # (width, height) of the captured screen
+        self.timestamp = timestamp      # time.monotonic() of the capture
+
+    @property
+    def nbytes(self):
+        return self.image.nbytes
+
+    def age(self, now=None):
+        return (time.monotonic() if now is None else now) - self.timestamp
+
+
+class BlurredSnapshotCache:
+    def __init__(self, capture, blur_engine, refresh_interval=3.0, max_age=10.0,
+                 max_width=960, memory_limit=16 * 1024 * 1024):
+        self.capture = capture                  # ScreenCapture, grabbed once per refresh for all monitors
+        self.blur_engine = blur_engine
+        self.refresh_interval = refresh_interval
+        self.max_age = max_age                  # Older snapshots are evicted instead of shown
+        self.max_width = max_width              # Snapshots are shrunk further to at most this width
+        self.memory_limit = memory_limit        # Bytes of snapshot pixels kept at most
+        self.entries = OrderedDict()            # key -> BlurredSnapshot, least recently refreshed first
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.paused = threading.Event()         # Set while the screen is locked
+        self.thread = None
+
+        # Statistics
+        self.refreshes = 0
+        self.failures = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.last_refresh_ms = 0.0
+
+    def start(self):
+        """Take a first snapshot and keep refreshing on a background thread"""
+        if self.thread is not None:
+            return self
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._refresh_loop, name="snapshot-cache", daemon=True)
+        self.thread.start()
+        return self
+
+    def _refresh_loop(self):
+        while not self.stop_event.is_set():
+            if not self.paused.is_set():
+                try:
+                    self.refresh()
+                except Exception as e:
+                    self.failures += 1
+                    print(f"Error refreshing screen snapshot: {e}")
+            self.stop_event.wait(self.refresh_interval)
+
+    def stop(self, timeout=2.0):
+        """Stop refreshing and drop every snapshot"""
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
+        self.clear()
+
+    def pause(self):
+        """Stop refreshing while the lock overlay is on screen - it would capture itself"""
+        self.paused.set()
+
+    def resume(self):
+        self.paused.clear()
+
+    def refresh(self):
+        """Capture every monitor, blur them in parallel and store one snapshot each
+
+        Returns False if nothing could be captured.
+        """
+        started = time.perf_counter()
+        with self.capture.lock:  # The monitor views point into the capture buffer
+            views = self.capture.grab_monitors()
+            smalls = self.blur_engine.map(self._blur_view, [view for _, view in views])
+        if not views:
+            self.failures += 1
+            return False
+        timestamp = time.monotonic()
+        for (monitor, _), small in zip(views, smalls):
+            self.put(monitor.index, BlurredSnapshot(small, monitor.size, timestamp))
+
+        self.last_refresh_ms = (time.perf_counter() - started) * 1000
+        self.refreshes += 1
+        return True
+
+    def _blur_view(self, view):
+        """Blurred RGB working image of one BGRA monitor view, at most max_width wide"""
+        small = self.blur_engine.blur_small(view, cv2.COLOR_BGRA2RGB)
+        if self.max_width and small.shape[1] > self.max_width:
+            scale = self.max_width / small.shape[1]
+            small = cv2.resize(small, (self.max_width, max(1, int(round(small.shape[0] * scale)))),
+                               interpolation=cv2.INTER_AREA)
+        return small
+
+    def put(self, key, snapshot):
+        """Store a snapshot, evicting the oldest entries beyond the memory limit"""
+        with self.lock:
+            self.entries.pop(key, None)
+            if snapshot.nbytes > self.memory_limit:
+                self.evictions += 1
+                return False
+            self.entries[key] = snapshot
+            while sum(entry.nbytes for entry in self.entries.values()) > self.memory_limit:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+            return True
+
+    def _lookup(self, key, max_age):
+        """Fresh snapshot or None, evicting a stale one - call with self.lock held"""
+        snapshot = self.entries.get(key)
+        if snapshot is not None and snapshot.age() > (self.max_age if max_age is None else max_age):
+            del self.entries[key]
+            self.evictions += 1
+            snapshot = None
+        return snapshot
+
+    def get(self, key=0, max_age=None):
+        """Snapshot of a monitor no older than max_age (defaults to the cache's), or None"""
+        with self.lock:
+            snapshot = self._lookup(key, max_age)
+            if snapshot is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return snapshot
+
+    def render(self, key=0, output_size=None, max_age=None):
+        """Cached snapshot upscaled to the monitor size, or None on a miss"""
+        snapshot = self.get(key, max_age)
+        if snapshot is None:
+            return None
+        return self.blur_engine.upscale(snapshot.image, output_size or snapshot.output_size)
+
+    def render_all(self, requests, max_age=None, as_image=False):
+        """Upscale the snapshots of several monitors in parallel
+
+        requests: (key, output_size) pairs, output_size None for the captured size
+        Returns the images in request order, or None unless every monitor hits -
+        a lock is covered from the cache completely or not at all. Counted as one lookup.
+        """
+        with self.lock:
+            snapshots = [self._lookup(key, max_age) for key, _ in requests]
+            if not snapshots or any(snapshot is None for snapshot in snapshots):
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        def render(item):
+            snapshot, output_size = item
+            image = self.blur_engine.upscale(snapshot.image, output_size or snapshot.output_size)
+            return Image.fromarray(image) if as_image else image
+        return self.blur_engine.map(render, zip(snapshots, [size for _, size in requests]))
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def get_stats(self):
+        """Cache statistics for display and logging"""
+        with self.lock:
+            entries = len(self.entries)
+            memory = sum(entry.nbytes for entry in self.entries.values())
+        lookups = self.hits + self.misses
+        return {
+            'entries': entries,
+            'memory_bytes': memory,
+            'refreshes': self.refreshes,
+            'failures': self.failures,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'last_refresh_ms': self.last_refresh_ms,
+        }
@@ -0,0 +1,159 @@
+"""
+Online owner template adaptation for Face Security System
+Lighting and appearance drift slowly lower the owner's match scores. With
+adaptation enabled, a face that stays verified as the owner with a high
+margin over a sustained track may be folded into a small reservoir of
+adapted templates that are matched next to the enrolled ones.
+
+The reservoir is bounded: once full, a new template replaces a random
+slot, so the adapted set follows recent appearance while older templates
+fade out geometrically. Matchers are updated one row at a time and the
+reservoir is saved to the encrypted profile on a background thread.
+"""
+
+import threading
+
+import numpy as np
+
+
+class TemplateReservoir:
+    def __init__(self, capacity=20, min_margin=0.1, min_streak=5, min_interval=60.0, space=None, seed=None):
+        self.capacity = capacity
+        self.min_margin = min_margin        # Required score margin over the acceptance threshold
+        self.min_streak = min_streak        # Consecutive owner verifications on the track
+        self.min_interval = min_interval    # Seconds between two adaptations
+        self.space = space                  # Template space tag, e.g. the backend's matching metric
+        self.rng = np.random.default_rng(seed)
+
+        self.templates = []     # Adapted templates in slot order
+        self.poses = []         # Optional per-template head pose
+        self.last_adapted = None
+
+        # Statistics
+        self.adaptations = 0
+        self.rejected = 0
+
+    def __len__(self):
+        return len(self.templates)
+
+    def eligible(self, streak, now):
+        """Whether a track with this owner streak may be considered now"""
+        if streak < self.min_streak:
+            return False
+        return self.last_adapted is None or now - self.last_adapted >= self.min_interval
+
+    def offer(self, template, margin, now, anchored=True, pose=None):
+        """Fold a verified template into the reservoir, returns the written slot or None
+
+        anchored: the face is still accepted by the enrolled templates alone,
+        which keeps adapted templates from drifting away on their own
+        """
+        if margin < self.min_margin or not anchored:
+            self.rejected += 1
+            return None
+
+        template = np.array(template, dtype=np.float32).reshape(-1)
+        if len(self.templates) < self.capacity:
+            self.templates.append(template)
+            self.poses.append(pose)
+            slot = len(self.templates) - 1
+        else:
+            slot = int(self.rng.integers(self.capacity))
+            self.templates[slot] = template
+            self.poses[slot] = pose
+
+        self.last_adapted = now
+        self.adaptations += 1
+        return slot
+
+    def pose_array(self):
+        """(templates, 2) poses, or None unless every template has one"""
+        if not self.poses or any(pose is None for pose in self.poses):
+            return None
+        return np.asarray(self.poses, dtype=np.float32).reshape(-1, 2)
+
+    def to_dict(self):
+        """Snapshot for the encrypted profile (copies, safe to hand to another thread)"""
+        return {'space': self.space,
+                'templates': np.array(self.templates, dtype=np.float32),
+                'poses': self.pose_array()}
+
+    def load(self, data):
+        """Restore a snapshot, returns False when it was stored for another template space"""
+        self.templates, self.poses = [], []
+        if not data or data.get('space') != self.space:
+            return False
+        templates = np.asarray(data['templates'], dtype=np.float32)[-self.capacity:]
+        poses = data.get('poses')
+        self.templates = list(templates)
+        self.poses = list(np.asarray(poses)[-self.capacity:]) if poses is not None else [None] * len(templates)
+        return True
+
+    def get_stats(self):
+        """Reservoir statistics for logging"""
+        return {
+            'templates': len(self.templates),
+            'capacity': self.capacity,
+            'adaptations': self.adaptations,
+            'rejected': self.rejected,
+        }
+
+
+class AsyncProfileWriter:
+    """Saves profile snapshots on a background thread
+
+    Only the latest pending snapshot is kept, so a slow disk never queues
+    up more than one write behind the monitor loop.
+    """
+
+    def __init__(self, write):
+        self.write = write
+        self.condition = threading.Condition()
+        self.pending = None
+        self.busy = False
+        self.closed = False
+
+        # Statistics
+        self.writes = 0
+        self.coalesced = 0
+        self.errors = 0
+
+        self.thread = threading.Thread(target=self._run, name="profile-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, snapshot):
+        with self.condition:
+            if self.pending is not None:
+                self.coalesced += 1
+            self.pending = snapshot
+            self.condition.notify_all()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.pending is not None or self.closed)
+                if self.pending is None:
+                    return
+                snapshot, self.pending = self.pending, None
+                self.busy = True
+            try:
+                self.write(snapshot)
+                self.writes += 1
+            except Exception as e:
+                self.errors += 1
+                print(f"Error saving profile: {e}")
+            with self.condition:
+                self.busy = False
+                self.condition.notify_all()
+
+    def flush(self, timeout=5.0):
+        """Wait until every submitted snapshot has been written"""
+        with self.condition:
+            return self.condition.wait_for(lambda: self.pending is None and not self.busy, timeout)
+
+    def close(self, timeout=5.0):
+        self.flush(timeout)
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.thread.join(timeout)
@@ -0,0 +1,104 @@
+"""
+Template consolidation for Face Security System
+Bounds the number of stored templates per identity: the templates are
+clustered with k-medoids and only the medoids (real enrolment samples)
+plus one centroid are kept. Matching cost then stays fixed however many
+samples are enrolled over time.
+
+Every run reports how the best-match distance of the enrolled samples
+changes, leave-one-out: a sample is never matched against its own copy.
+"""
+
+import numpy as np
+
+
+def pairwise_distances(templates, metric='euclidean'):
+    """(n, n) Euclidean or cosine (1 - cos) distances"""
+    matrix = np.asarray(templates, dtype=np.float64).reshape(len(templates), -1)
+    if metric == 'cosine':
+        matrix = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+        return np.maximum(1.0 - matrix @ matrix.T, 0.0)
+    sq_norms = np.einsum('ij,ij->i', matrix, matrix)
+    return np.sqrt(np.maximum(sq_norms[:, None] + sq_norms[None, :] - 2.0 * matrix @ matrix.T, 0.0))
+
+
+def k_medoids(distances, k, iterations=20):
+    """Alternating k-medoids with greedy PAM BUILD seeding, returns (medoid indices, assignment)"""
+    # BUILD: repeatedly add the sample that lowers the total distance to the nearest medoid most
+    medoids = [int(np.argmin(distances.sum(axis=1)))]
+    nearest = distances[:, medoids[0]].copy()
+    for _ in range(1, k):
+        gain = np.maximum(nearest[:, None] - distances, 0.0).sum(axis=0)
+        gain[medoids] = -1.0
+        medoids.append(int(gain.argmax()))
+        nearest = np.minimum(nearest, distances[:, medoids[-1]])
+    medoids = np.array(medoids)
+
+    for _ in range(iterations):
+        assignment = distances[:, medoids].argmin(axis=1)
+        updated = medoids.copy()
+        for cluster in range(k):
+            members = np.flatnonzero(assignment == cluster)
+            if len(members):
+                updated[cluster] = members[distances[np.ix_(members, members)].sum(axis=1).argmin()]
+        if np.array_equal(updated, medoids):
+            break
+        medoids = updated
+    return medoids, distances[:, medoids].argmin(axis=1)
+
+
+class ConsolidationResult:
+    def __init__(self, templates, kept, report):
+        self.templates = templates  # Consolidated templates: medoids first, centroid last
+        self.kept = kept            # Indices of the retained enrolment samples
+        self.report = report
+
+    @property
+    def changed(self):
+        return self.report['after'] < self.report['before']
+
+
+def consolidate_templates(templates, cap, metric='euclidean'):
+    """Keep at most cap templates: cap - 1 k-medoids plus the centroid
+
+    Identities with cap or fewer templates are returned unchanged.
+    """
+    templates = np.asarray(templates, dtype=np.float32).reshape(len(templates), -1)
+    n = len(templates)
+    distances = pairwise_distances(templates, metric)
+    if cap < 2 or n <= cap:
+        kept = np.arange(n)
+        return ConsolidationResult(templates, kept, score_report(distances, templates, templates, kept, metric))
+
+    medoids, _ = k_medoids(distances, cap - 1)
+    kept = np.sort(medoids)
+    centroid = templates.mean(axis=0, keepdims=True)
+    consolidated = np.concatenate([templates[kept], centroid]).astype(np.float32)
+    return ConsolidationResult(consolidated, kept, score_report(distances, templates, consolidated, kept, metric))
+
+
+def score_report(distances, templates, consolidated, kept, metric):
+    """Leave-one-out best-match distances of every enrolled sample, before and after"""
+    n = len(templates)
+    before = distances + np.diag(np.full(n, np.inf))
+
+    after = pairwise_distances(np.concatenate([templates, consolidated]), metric)[:n, n:]
+    after[kept, np.arange(len(kept))] = np.inf  # A retained sample may not match itself
+
+    best_before = before.min(axis=1) if n > 1 else np.zeros(n)
+    best_after = after.min(axis=1) if n > 1 else np.zeros(n)
+    return {
+        'before': n,
+        'after': len(consolidated),
+        'mean_before': float(best_before.mean()) if n else 0.0,
+        'mean_after': float(best_after.mean()) if n else 0.0,
+        'worst_before': float(best_before.max()) if n else 0.0,
+        'worst_after': float(best_after.max()) if n else 0.0,
+    }
+
+
+def format_report(name, report):
+    """One log line per consolidated identity"""
+    return (f"{name}: {report['before']} -> {report['after']} templates, best-match distance "
+            f"mean {report['mean_before']:.3f} -> {report['mean_after']:.3f}, "
+            f"worst {report['worst_before']:.3f} -> {report['worst_after']:.3f}")
@@ -12,6 +12,7 @@ Features Tested:
 3. Glassmorphism overlay design
 4. Configuration-based blur settings
 5. Fallback to black overlay if blur fails
+6. Blur engine tiers against the former PIL blur pipeline (headless)
 
 Usage:
     python test_blur_effect.py
@@ -54,9 +55,9 @@ def test_blur_capture():
             return False
         
         print("\n🌀 Testing blur effect generation...")
-        blurred_img = system.create_blurred_background()
-        if blurred_img:
-            print(f"✅ Blur effect created successfully: {blurred_img.size}")
+        blurred_imgs = system.lock_screen.create_blurred_backgrounds()
+        if blurred_imgs:
+            print(f"✅ Blur effect created successfully: {[img.size for img in blurred_imgs.values()]}")
         else:
             print("❌ Blur effect generation failed")
             return False
@@ -70,6 +71,10 @@ def test_blur_capture():
         time.sleep(5)
         system.remove_blur_overlay()
         print("✅ Blur overlay removed")
+        for monitor, overlay in zip(system.lock_screen.monitors, system.lock_screen.overlays):
+            overlay_stats = overlay.get_stats()
+            print(f"⏱️  Overlay {monitor.index} built in {overlay_stats['build_ms']:.0f} ms, "
+                  f"shown in {overlay_stats['last_show_ms']:.1f} ms, hidden in {overlay_stats['last_hide_ms']:.1f} ms")
         
         return True
         
@@ -91,6 +96,304 @@ def test_configuration():
         print(f"⚠️  Configuration test failed: {e}")
         return False
 
+def test_blur_engine():
+    """Test that every blur engine tier matches the former PIL blur pipeline"""
+    try:
+        import cv2
+        import numpy as np
+        from PIL import Image
+        from blur_engine import BLUR_TIERS, BlurEngine
+        from benchmark import pil_reference_blur
+
+        print("\n🌀 Testing blur engine tiers:")
+        screen = cv2.cvtColor(cv2.resize(cv2.imread('test_frame.jpg'), (1280, 720)), cv2.COLOR_BGR2RGB)
+        reference = np.asarray(pil_reference_blur(Image.fromarray(screen)), dtype=np.float32)
+
+        for quality in BLUR_TIERS:
+            engine = BlurEngine(quality)
+            blurred = engine.blur(screen)
+            difference = float(np.abs(blurred.astype(np.float32) - reference).mean())
+            print(f"  {quality}: {engine.last_ms:.1f} ms, mean difference {difference:.2f} grey levels")
+            if blurred.shape != screen.shape or difference > 3.0:
+                print(f"❌ {quality} tier does not match the reference blur")
+                return False
+
+        # Darkening equals compositing black with the overlay alpha
+        flat = np.full((90, 160, 3), 200, np.uint8)
+        if abs(int(BlurEngine(overlay_darkness=100).blur(flat)[45, 80, 0]) - round(200 * 155 / 255)) > 1:
+            print("❌ Darkening does not match the overlay alpha")
+            return False
+        return True
+    except Exception as e:
+        print(f"❌ Blur engine test failed: {e}")
+        return False
+
+def test_screen_capture():
+    """Test the reusable screen capture buffer with the in-memory backend"""
+    try:
+        import numpy as np
+        from screen_capture import FakeScreenCapture, create_screen_capture
+
+        print("\n🖥️  Testing screen capture:")
+        screen = np.random.default_rng(1).integers(0, 256, (1080, 1920, 3), dtype=np.uint8)
+        capture = FakeScreenCapture(screen)
+
+        first = capture.grab()
+        if first.shape != (1080, 1920, 4) or capture.grab() is not first:
+            print("❌ Grabs do not reuse the capture buffer")
+            return False
+        if not np.array_equal(capture.grab_rgb(), screen) or capture.grab_image().size != (1920, 1080):
+            print("❌ RGB conversion does not match the screen")
+            return False
+
+        # A resolution change reallocates the buffer once
+        capture.set_screen(screen[:720, :1280])
+        if capture.grab().shape != (720, 1280, 4) or capture.get_stats()['reopens'] != 1:
+            print("❌ Resolution change was not picked up")
+            return False
+        capture.close()
+
+        try:
+            create_screen_capture('gdi')
+            print("❌ Unknown backend was accepted")
+            return False
+        except ValueError:
+            pass
+        print(f"  Fake backend: {capture.get_stats()['grabs']} grabs, {capture.get_stats()['reopens']} reallocation")
+        return True
+    except Exception as e:
+        print(f"❌ Screen capture test failed: {e}")
+        return False
+
+def test_snapshot_cache():
+    """Test the pre-blurred snapshot cache with a fake screen capture"""
+    try:
+        import time
+        import cv2
+        import numpy as np
+        from blur_engine import BlurEngine
+        from screen_capture import FakeScreenCapture
+        from snapshot_cache import BlurredSnapshotCache
+
+        print("\n🖼️  Testing snapshot cache:")
+        screen = cv2.cvtColor(cv2.resize(cv2.imread('test_frame.jpg'), (1920, 1080)), cv2.COLOR_BGR2RGB)
+        engine = BlurEngine('quality')
+        cache = BlurredSnapshotCache(FakeScreenCapture(screen), engine, refresh_interval=0.05, max_width=240)
+
+        if cache.get() is not None or not cache.refresh():
+            print("❌ Cache did not start empty or the refresh failed")
+            return False
+        snapshot = cache.get()
+        covered = cache.render(output_size=(1920, 1080))
+        difference = float(np.abs(covered.astype(np.float32) - engine.blur(screen)).mean())
+        print(f"  Snapshot {snapshot.image.shape[1]}x{snapshot.image.shape[0]} ({snapshot.nbytes // 1024} KB), "
+              f"refresh {cache.last_refresh_ms:.1f} ms, mean difference {difference:.2f} grey levels")
+        if snapshot.image.shape[1] > 240 or covered.shape != screen.shape or difference > 3.0:
+            print("❌ Cached snapshot does not match a fresh blur")
+            return False
+
+        # Stale snapshots are evicted instead of shown
+        if cache.get(max_age=0.0) is not None or cache.get() is not None:
+            print("❌ Stale snapshot was not evicted")
+            return False
+
+        # The memory limit keeps only the most recently refreshed monitors
+        cache.capture = FakeScreenCapture(np.hstack([screen, screen]), monitors=[(0, 0, 1920, 1080), (1920, 0, 1920, 1080)])
+        cache.memory_limit = snapshot.nbytes
+        cache.refresh()
+        if cache.get(0) is not None or cache.get(1) is None:
+            print("❌ Memory limit was not enforced")
+            return False
+        cache.capture = FakeScreenCapture(screen)
+
+        # The background thread refreshes until paused
+        cache.clear()
+        cache.start()
+        time.sleep(0.3)
+        cache.pause()
+        time.sleep(0.1)
+        paused_refreshes = cache.refreshes
+        time.sleep(0.2)
+        cache.stop()
+        stats = cache.get_stats()
+        print(f"  Background refreshes: {stats['refreshes']}, evictions: {stats['evictions']}")
+        if paused_refreshes < 2 or cache.refreshes != paused_refreshes or stats['entries'] != 0:
+            print("❌ Background refresh did not follow pause/stop")
+            return False
+        return True
+    except Exception as e:
+        print(f"❌ Snapshot cache test failed: {e}")
+        return False
+
+def test_multi_monitor():
+    """Test per-monitor capture, parallel blur and all-or-nothing cache hits on three fake monitors"""
+    try:
+        import time
+        import cv2
+        import numpy as np
+        from blur_engine import BlurEngine
+        from lock_screen import LockScreen
+        from screen_capture import FakeScreenCapture
+        from snapshot_cache import BlurredSnapshotCache
+
+        print("\n🖥️  Testing multi-monitor capture and blur:")
+        screen = cv2.cvtColor(cv2.resize(cv2.imread('test_frame.jpg'), (1920, 1080)), cv2.COLOR_BGR2RGB)
+        desktop = np.zeros((1440, 1920 * 2 + 2560, 3), dtype=np.uint8)
+        desktop[:1080, :1920] = screen
+        desktop[:1080, 1920:3840] = screen[:, ::-1]
+        desktop[:, 3840:] = cv2.resize(screen, (2560, 1440))
+        capture = FakeScreenCapture(desktop, monitors=[(0, 0, 1920, 1080), (1920, 0, 1920, 1080),
+                                                       (3840, 0, 2560, 1440, 1.25)])
+
+        with capture.lock:
+            views = capture.grab_monitors()
+            if [view.shape[:2] for _, view in views] != [(1080, 1920), (1080, 1920), (1440, 2560)]:
+                print("❌ Monitor views do not match the layout")
+                return False
+            if not np.array_equal(views[1][1][..., 2::-1], desktop[:1080, 1920:3840]) or views[2][0].scale != 1.25:
+                print("❌ Monitor view shows the wrong pixels")
+                return False
+
+            # Parallel blur gives the same pixels as blurring one monitor after another
+            engine = BlurEngine('balanced', workers=3)
+            blur = lambda view: engine.blur(view, conversion=cv2.COLOR_BGRA2RGB)
+            started = time.perf_counter()
+            serial = [blur(view) for _, view in views]
+            serial_ms = (time.perf_counter() - started) * 1000
+            engine.map(blur, [view for _, view in views])  # Warm the pool up
+            started = time.perf_counter()
+            parallel = engine.map(blur, [view for _, view in views])
+            parallel_ms = (time.perf_counter() - started) * 1000
+
+            # A single worker runs in the caller instead of handing off to a pool
+            single = BlurEngine('balanced', workers=1)
+            single.map(blur, [view for _, view in views])
+            if single.pool is not None:
+                print("❌ Single-worker engine started a thread pool")
+                return False
+        print(f"  3 monitors: serial {serial_ms:.1f} ms, parallel {parallel_ms:.1f} ms on {os.cpu_count()} core(s)")
+        if any(not np.array_equal(a, b) for a, b in zip(serial, parallel)):
+            print("❌ Parallel blur differs from the serial one")
+            return False
+        if not np.array_equal(parallel[0], engine.blur(screen)):
+            print("❌ BGRA conversion changed the blur")
+            return False
+
+        # One snapshot per monitor, a lock is covered from the cache only if every monitor hits
+        cache = BlurredSnapshotCache(capture, engine, max_width=240)
+        cache.refresh()
+        requests = [(monitor.index, monitor.size) for monitor, _ in views]
+        images = cache.render_all(requests, as_image=True)
+        if cache.get_stats()['entries'] != 3 or [image.size for image in images] != [(1920, 1080), (1920, 1080), (2560, 1440)]:
+            print("❌ Snapshots were not cached per monitor")
+            return False
+        cache.entries.pop(2)
+        if cache.render_all(requests) is not None or cache.get_stats()['hits'] != 1:
+            print("❌ Partial cache hit was used")
+            return False
+
+        # The shared lock path blurs every monitor of one grab to its own size
+        lock_screen = LockScreen(engine, render_panel=None, screen_capture=capture)
+        backgrounds = lock_screen.create_blurred_backgrounds()
+        if {index: image.size for index, image in backgrounds.items()} != {0: (1920, 1080), 1: (1920, 1080), 2: (2560, 1440)} \
+                or lock_screen.get_screen_size() != (1920, 1080):
+            print("❌ Lock screen did not blur every monitor")
+            return False
+        engine.close()
+        return True
+    except Exception as e:
+        print(f"❌ Multi-monitor test failed: {e}")
+        return False
+
+class FakeOverlay:
+    """Stand-in for a LockOverlay window, records the backgrounds it is given"""
+
+    def __init__(self):
+        self.visible = True
+        self.generation = 1
+        self.background = None
+        self.window = self
+
+    def set_background(self, image):
+        self.background = image
+
+    def update_idletasks(self):
+        pass
+
+def test_background_swap():
+    """Test that fresh lock backgrounds are queued for the overlay thread instead of Tk's after()"""
+    try:
+        import numpy as np
+        from blur_engine import BlurEngine
+        from lock_screen import LockScreen
+        from screen_capture import FakeScreenCapture
+
+        print("\n🔁 Testing fresh background swap:")
+        desktop = np.random.default_rng(2).integers(0, 256, (720, 2560, 3), dtype=np.uint8)
+        capture = FakeScreenCapture(desktop, monitors=[(0, 0, 1280, 720), (1280, 0, 1280, 720)])
+        lock_screen = LockScreen(BlurEngine('fast'), render_panel=None, screen_capture=capture)
+        lock_screen.monitors = capture.monitors()
+        lock_screen.overlays = [FakeOverlay(), FakeOverlay()]
+        lock_screen.overlay_excluded = True
+
+        # The blur thread only queues, the overlays change when the owning thread drains the queue
+        lock_screen.swap_in_fresh_background()
+        lock_screen.blur_thread.join(5)
+        if any(overlay.background is not None for overlay in lock_screen.overlays):
+            print("❌ Background was set from the blur thread")
+            return False
+        if lock_screen.apply_pending_backgrounds() != 2 or lock_screen.overlays[1].background.size != (1280, 720):
+            print("❌ Queued backgrounds were not shown")
+            return False
+
+        # A swap that finishes after an unlock (or a later lock) is dropped
+        lock_screen.swap_in_fresh_background()
+        lock_screen.blur_thread.join(5)
+        lock_screen.overlays[0].generation += 1
+        lock_screen.overlays[1].visible = False
+        if lock_screen.apply_pending_backgrounds() != 0:
+            print("❌ Stale background was shown")
+            return False
+        print("  Fresh backgrounds applied on the overlay thread, stale ones skipped")
+        return True
+    except Exception as e:
+        print(f"❌ Background swap test failed: {e}")
+        return False
+
+def test_lock_panel():
+    """Test pre-rendering of the static lock panel"""
+    try:
+        import time
+        import numpy as np
+        from lock_overlay import render_panel, text_width, wrap_line
+
+        print("\n🪟 Testing lock panel rendering:")
+        started = time.perf_counter()
+        panel = render_panel((900, 600), [("SECURITY LOCKDOWN", 150, 28, 'bold', '#ffffff'),
+                                          ("⚠️ Unauthorized person(s) detected", 250, 16, 'bold', '#ff6b6b')],
+                             gradient=((0, 0, 0), (255, 63.75, 127.5), 5), borders=[('#00d4ff', 3, 5)])
+        print(f"  Rendered {panel.size[0]}x{panel.size[1]} panel in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+        pixels = np.asarray(panel)
+        if panel.size != (900, 600) or pixels[2, 450].sum() != 0 or pixels[-3, 450, 0] < 240:
+            print("❌ Gradient does not run from black to magenta")
+            return False
+        if tuple(pixels[300, 6]) != (0, 212, 255):
+            print("❌ Border missing")
+            return False
+        if not (pixels[140:160, 300:600] == 255).all(axis=2).any():
+            print("❌ Title text missing")
+            return False
+
+        lines = wrap_line("This computer uses advanced facial recognition security", 14, 'normal', 250)
+        if len(lines) < 2 or any(text_width(line, 14) > 250 for line in lines):
+            print("❌ Warning text was not wrapped")
+            return False
+        return True
+    except Exception as e:
+        print(f"❌ Lock panel test failed: {e}")
+        return False
+
 def interactive_test():
     """Interactive test with user controls"""
     print("\n🎮 Interactive Blur Test")
@@ -136,9 +439,21 @@ def main():
     
     # Test configuration first
     config_ok = test_configuration()
+    engine_ok = test_blur_engine()
+    capture_ok = test_screen_capture()
+    cache_ok = test_snapshot_cache()
+    monitors_ok = test_multi_monitor()
+    swap_ok = test_background_swap()
+    panel_ok = test_lock_panel()
     
     print(f"\n📊 SYSTEM STATUS:")
     print(f"  Configuration: {'✅ OK' if config_ok else '❌ Failed'}")
+    print(f"  Blur engine: {'✅ OK' if engine_ok else '❌ Failed'}")
+    print(f"  Screen capture: {'✅ OK' if capture_ok else '❌ Failed'}")
+    print(f"  Snapshot cache: {'✅ OK' if cache_ok else '❌ Failed'}")
+    print(f"  Multi-monitor blur: {'✅ OK' if monitors_ok else '❌ Failed'}")
+    print(f"  Background swap: {'✅ OK' if swap_ok else '❌ Failed'}")
+    print(f"  Lock panel: {'✅ OK' if panel_ok else '❌ Failed'}")
     
     # Ask user if they want to run the blur test
     print(f"\n⚠️  WARNING: This will briefly show a blur overlay on your screen!")
@@ -0,0 +1,601 @@
+#!/usr/bin/env python3
+"""
+Face Matching Engine Test
+=========================
+
+Headless check that the batched gallery matcher makes exactly the same
+decisions as the original per-pair comparison loop.
+
+Features Tested:
+1. LandmarkMatcher vs MediaPipe compare_faces decisions and confidence
+2. EncodingMatcher vs the face_recognition tolerance ladder
+3. LandmarkBuffer extraction from serialized and plain landmark lists
+4. Pose-normalized descriptor: pose invariance, identity separation and size
+5. Pose-binned template index vs full gallery scan
+6. Multi-user gallery: clustered index recall, policies and persistence
+7. Template consolidation: cap, medoid coverage and score report
+8. Template adaptation: bounded reservoir, incremental matcher rows, async saving
+9. Face tracker: IoU association, ageing, re-verification and carried labels
+
+Usage:
+    python test_face_matching.py
+"""
+
+import sys
+import os
+
+import numpy as np
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+def reference_compare_faces(features1, features2, threshold):
+    """Per-pair comparison as implemented in MediaPipeFaceSecuritySystem.compare_faces"""
+    features1_norm = features1 / np.linalg.norm(features1)
+    features2_norm = features2 / np.linalg.norm(features2)
+    cosine_sim = np.dot(features1_norm, features2_norm)
+    euclidean_sim = 1 / (1 + np.linalg.norm(features1_norm - features2_norm))
+    dot_sim = np.dot(features1_norm, features2_norm)
+    combined_similarity = (cosine_sim * 0.5) + (euclidean_sim * 0.3) + (dot_sim * 0.2)
+    feature_quality = min(np.std(features1), np.std(features2))
+    adaptive_threshold = threshold * (0.8 + 0.2 * min(feature_quality, 1.0))
+    return combined_similarity > adaptive_threshold
+
+def make_landmark_faces(rng, count, base, noise):
+    """Landmark-like feature vectors scattered around a base face"""
+    return [np.clip(base + rng.normal(0, noise, base.shape), 0, 1) for _ in range(count)]
+
+def test_landmark_matcher_equivalence():
+    """Test batched landmark matching against the per-pair loop"""
+    print("\n🧮 TESTING LANDMARK MATCHER EQUIVALENCE")
+    print("=" * 50)
+
+    try:
+        from face_matching import LandmarkMatcher
+
+        rng = np.random.default_rng(7)
+        owner_base = rng.uniform(0.2, 0.8, 1434)
+        owner_samples = make_landmark_faces(rng, 10, owner_base, 0.01)
+
+        faces = []
+        for noise in (0.01, 0.2, 0.5, 0.8, 1.2):
+            faces += make_landmark_faces(rng, 20, owner_base, noise)
+
+        # Use a threshold that splits the test faces into matches and non-matches
+        threshold = 0.9
+        matcher = LandmarkMatcher(owner_samples, threshold)
+        result = matcher.match(faces)
+
+        mismatches = 0
+        for i, face in enumerate(faces):
+            expected_owner, expected_confidence = False, 0.0
+            for owner_features in owner_samples:
+                if reference_compare_faces(face, owner_features, threshold):
+                    expected_owner = True
+                    expected_confidence = np.dot(face / np.linalg.norm(face),
+                                                 owner_features / np.linalg.norm(owner_features))
+                    break
+            if bool(result.is_owner[i]) != expected_owner or abs(result.confidence[i] - expected_confidence) > 1e-4:
+                mismatches += 1
+
+        owners = int(result.is_owner.sum())
+        print(f"✅ {len(faces)} faces x {len(owner_samples)} samples scored, {owners} matched")
+        if mismatches or owners in (0, len(faces)):
+            print(f"❌ {mismatches} decisions differ from the per-pair loop")
+            return False
+        print("✅ Decisions and confidence identical to compare_faces loop")
+        return True
+
+    except Exception as e:
+        print(f"❌ Landmark Matcher Error: {e}")
+        return False
+
+def reference_tolerance_ladder(owner_encodings, face_encoding, tolerances):
+    """Per-face tolerance ladder as implemented in FaceSecuritySystem before batching"""
+    # Same arithmetic as face_recognition.face_distance / compare_faces
+    for tolerance in tolerances:
+        face_distances = np.linalg.norm(np.asarray(owner_encodings) - face_encoding, axis=1)
+        if True in list(face_distances <= tolerance):
+            best_match_distance = min(face_distances)
+            if best_match_distance < tolerance:
+                return True, 1 - best_match_distance
+    return False, 0
+
+def test_encoding_matcher_equivalence():
+    """Test the batched distance matrix against the per-face tolerance ladder"""
+    print("\n📏 TESTING ENCODING MATCHER EQUIVALENCE")
+    print("=" * 50)
+
+    try:
+        from face_matching import EncodingMatcher
+
+        rng = np.random.default_rng(11)
+        owner_base = rng.normal(0, 0.1, 128)
+        owner_encodings = [owner_base + rng.normal(0, 0.01, 128) for _ in range(25)]
+
+        # Spread of distances across all rungs of the ladder and beyond
+        encodings = []
+        for noise in (0.01, 0.04, 0.05, 0.06, 0.08, 0.12):
+            encodings += [owner_base + rng.normal(0, noise, 128) for _ in range(20)]
+
+        tolerances = [0.5, 0.6, 0.8]
+        result = EncodingMatcher(owner_encodings, tolerances).match(encodings)
+
+        mismatches = 0
+        for i, encoding in enumerate(encodings):
+            expected_owner, expected_confidence = reference_tolerance_ladder(owner_encodings, encoding, tolerances)
+            if bool(result.is_owner[i]) != expected_owner or abs(result.confidence[i] - expected_confidence) > 1e-9:
+                mismatches += 1
+
+        owners = int(result.is_owner.sum())
+        rungs = sorted(set(result.matched_tolerance[result.is_owner].tolist()))
+        print(f"✅ {len(encodings)} faces x {len(owner_encodings)} samples scored, {owners} matched at tolerances {rungs}")
+        if mismatches or owners in (0, len(encodings)):
+            print(f"❌ {mismatches} decisions differ from the tolerance ladder loop")
+            return False
+
+        empty = EncodingMatcher([], tolerances).match(encodings[:3])
+        if empty.is_owner.any():
+            print("❌ Empty gallery matched a face")
+            return False
+
+        print("✅ Decisions and confidence identical to the tolerance ladder loop")
+        return True
+
+    except Exception as e:
+        print(f"❌ Encoding Matcher Error: {e}")
+        return False
+
+class FakeLandmark:
+    def __init__(self, x, y, z):
+        self.x, self.y, self.z = x, y, z
+
+class FakeLandmarkList:
+    """Stand-in for mediapipe NormalizedLandmarkList (protobuf wire format for x, y, z only)"""
+    def __init__(self, points, serializable=True):
+        self.landmark = [FakeLandmark(*point) for point in points]
+        self.serializable = serializable
+
+    def SerializeToString(self):
+        import struct
+        if not self.serializable:
+            return b''
+        return b''.join(struct.pack('<BBBfBfBf', 0x0a, 0x0f, 0x0d, lm.x, 0x15, lm.y, 0x1d, lm.z)
+                        for lm in self.landmark)
+
+def test_landmark_buffer_extraction():
+    """Test buffered landmark extraction against the per-landmark extend loop"""
+    print("\n📍 TESTING LANDMARK BUFFER EXTRACTION")
+    print("=" * 50)
+
+    try:
+        from landmark_buffer import LandmarkBuffer
+
+        rng = np.random.default_rng(3)
+        faces = [rng.uniform(-0.1, 1.0, (478, 3)).astype(np.float32) for _ in range(3)]
+        results = [FakeLandmarkList(faces[0]), FakeLandmarkList(faces[1], serializable=False),
+                   FakeLandmarkList(faces[2])]
+
+        buffer = LandmarkBuffer(max_faces=2)
+        features = buffer.features(results)
+
+        for i, result in enumerate(results):
+            landmarks = []
+            for landmark in result.landmark:
+                landmarks.extend([landmark.x, landmark.y, landmark.z])
+            if not np.array_equal(features[i], np.array(landmarks, dtype=np.float32)):
+                print(f"❌ Face {i} differs from the per-landmark loop")
+                return False
+
+        print(f"✅ {features.shape} float32 features, {buffer.fast_path} decoded / {buffer.slow_path} iterated")
+
+        # The buffer is reused: no reallocation for a smaller frame
+        base = buffer.buffer
+        buffer.features(results[:1])
+        if buffer.buffer is not base or buffer.empty().shape != (0, 1434):
+            print("❌ Landmark buffer was reallocated")
+            return False
+
+        print("✅ Extraction identical to the per-landmark loop, buffer reused across frames")
+        return buffer.fast_path == 3 and buffer.slow_path == 1
+
+    except Exception as e:
+        print(f"❌ Landmark Buffer Error: {e}")
+        return False
+
+def posed_faces(rng, shape, count, noise):
+    """Flattened landmark sets of one face shape under random head pose, scale and position"""
+    faces = []
+    for _ in range(count):
+        yaw, pitch, roll = rng.uniform(-0.35, 0.35, 3)
+        rz = np.array([[np.cos(roll), -np.sin(roll), 0], [np.sin(roll), np.cos(roll), 0], [0, 0, 1]])
+        ry = np.array([[np.cos(yaw), 0, np.sin(yaw)], [0, 1, 0], [-np.sin(yaw), 0, np.cos(yaw)]])
+        rx = np.array([[1, 0, 0], [0, np.cos(pitch), -np.sin(pitch)], [0, np.sin(pitch), np.cos(pitch)]])
+        points = (shape + rng.normal(0, noise, shape.shape)) @ (rz @ ry @ rx) * rng.uniform(0.05, 0.25)
+        faces.append((points + rng.uniform(0.2, 0.8, 3)).reshape(-1))
+    return np.array(faces, dtype=np.float32)
+
+def test_pose_normalized_descriptor():
+    """Test that descriptors ignore head pose but separate identities"""
+    print("\n🧭 TESTING POSE-NORMALIZED DESCRIPTOR")
+    print("=" * 50)
+
+    try:
+        from landmark_descriptor import PoseNormalizedDescriptor
+        from face_matching import DescriptorMatcher
+
+        rng = np.random.default_rng(5)
+        owner_shape = rng.normal(0, 1, (478, 3))
+        other_shape = owner_shape + rng.normal(0, 0.15, (478, 3))
+
+        samples = posed_faces(rng, owner_shape, 10, 0.01)
+        descriptor = PoseNormalizedDescriptor(32).fit(samples)
+        matcher = DescriptorMatcher(descriptor.transform(samples), similarity_threshold=0.8, scale=0.08)
+
+        owner_result = matcher.match(descriptor.transform(posed_faces(rng, owner_shape, 20, 0.01)))
+        other_result = matcher.match(descriptor.transform(posed_faces(rng, other_shape, 20, 0.01)))
+
+        ratio = samples.shape[1] / descriptor.size
+        print(f"✅ Descriptor size {descriptor.size} floats ({ratio:.0f}x smaller than raw landmarks)")
+        print(f"✅ Owner under random pose: {int(owner_result.is_owner.sum())}/20 matched, "
+              f"other face: {int(other_result.is_owner.sum())}/20 matched")
+
+        if not owner_result.is_owner.all() or other_result.is_owner.any() or ratio < 10:
+            print("❌ Descriptor does not separate owner and other face across poses")
+            return False
+        return True
+
+    except Exception as e:
+        print(f"❌ Descriptor Error: {e}")
+        return False
+
+def test_pose_binned_index():
+    """Test that the pose index makes the same decisions as a full scan with fewer comparisons"""
+    print("\n🗂️  TESTING POSE-BINNED TEMPLATE INDEX")
+    print("=" * 50)
+
+    try:
+        from landmark_descriptor import PoseNormalizedDescriptor
+        from face_matching import DescriptorMatcher
+        from pose_index import PoseBinnedIndex, estimate_head_pose
+
+        rng = np.random.default_rng(9)
+        owner_shape = rng.normal(0, 1, (478, 3))
+        other_shape = owner_shape + rng.normal(0, 0.15, (478, 3))
+
+        samples = posed_faces(rng, owner_shape, 60, 0.01)
+        descriptor = PoseNormalizedDescriptor(32).fit(samples)
+        matcher = DescriptorMatcher(descriptor.transform(samples), similarity_threshold=0.8, scale=0.08)
+        index = PoseBinnedIndex(estimate_head_pose(samples), bin_size=15.0, neighbour_bins=1)
+
+        faces = np.concatenate([posed_faces(rng, owner_shape, 20, 0.01), posed_faces(rng, other_shape, 5, 0.01)])
+        full = matcher.match(descriptor.transform(faces))
+        binned = index.match(matcher, descriptor.transform(faces), estimate_head_pose(faces))
+
+        stats = index.get_stats()
+        print(f"✅ {stats['templates']} templates in {stats['bins']} pose bins, "
+              f"{stats['avg_candidates']:.1f} scored per face, {stats['full_scans']} full scans")
+
+        if not np.array_equal(full.is_owner, binned.is_owner) or int(binned.is_owner.sum()) != 20:
+            print("❌ Binned decisions differ from the full gallery scan")
+            return False
+
+        # Only the 5 other faces may need the full scan fallback
+        if stats['full_scans'] != 5 or index.candidates_scored >= len(faces) * len(samples):
+            print("❌ Owner faces were not narrowed down by pose")
+            return False
+
+        print("✅ Decisions identical to the full scan, owner faces narrowed by pose")
+        return True
+
+    except Exception as e:
+        print(f"❌ Pose Index Error: {e}")
+        return False
+
+def test_face_gallery():
+    """Test the multi-user gallery against an exhaustive search at 10k templates"""
+    print("\n👪 TESTING MULTI-USER FACE GALLERY")
+    print("=" * 50)
+
+    try:
+        import time
+        from face_gallery import FaceGallery, authorize_with_gallery
+        from face_matching import MatchResult
+
+        rng = np.random.default_rng(21)
+        centers = rng.normal(0, 0.3, (500, 128))
+        gallery = FaceGallery('euclidean', brute_force_limit=4096, n_probe=4)
+        started = time.perf_counter()
+        for i, center in enumerate(centers):
+            gallery.add_identity(f"user{i}", center + rng.normal(0, 0.03, (20, 128)))
+        build_ms = (time.perf_counter() - started) * 1000
+
+        exhaustive = FaceGallery('euclidean', brute_force_limit=10 ** 6)
+        for name, templates in zip(gallery.names(), gallery.templates):
+            exhaustive.add_identity(name, templates)
+
+        targets = rng.choice(len(centers), 50, replace=False)
+        faces = centers[targets] + rng.normal(0, 0.03, (50, 128))
+        started = time.perf_counter()
+        match = gallery.search(faces)
+        search_ms = (time.perf_counter() - started) * 1000
+        reference = exhaustive.search(faces)
+
+        stats = gallery.get_stats()
+        print(f"✅ {stats['templates']} templates, {stats['index']} index, built in {build_ms:.0f} ms, "
+              f"50 faces searched in {search_ms:.1f} ms with {stats['comparisons']} comparisons")
+
+        recall = np.mean(match.identity_index == reference.identity_index)
+        if stats['index'] != 'ivf' or recall < 0.95 or not np.all(reference.identity_index == targets):
+            print(f"❌ Clustered index recall too low: {recall:.2f}")
+            return False
+        if stats['comparisons'] >= len(faces) * len(gallery) // 4:
+            print("❌ Clustered index did not reduce the comparisons")
+            return False
+
+        # Reloading keeps the trained clusters and the answers
+        reloaded = FaceGallery.from_dict(gallery.to_dict(), brute_force_limit=4096, n_probe=4)
+        if not np.array_equal(reloaded.search(faces).identity_index, match.identity_index):
+            print("❌ Reloaded gallery answers differently")
+            return False
+
+        # Policies: a visitor is recognised but may not unlock, disabled users are not matched
+        gallery.set_policy("user1", allow_unlock=False)
+        gallery.set_policy("user2", enabled=False)
+        probes = centers[[0, 1, 2]] + rng.normal(0, 0.03, (3, 128))
+        result = authorize_with_gallery(MatchResult.no_match(3, 0), gallery, probes,
+                                        lambda identity, distance, face, template_std: (distance < 0.6, 1 - distance))
+        if result.identities[:2] != ["user0", "user1"] or list(result.is_owner) != [True, False, False] \
+                or result.identities[2] == "user2":
+            print(f"❌ Unexpected policy decisions: {result.identities}, {result.is_owner}")
+            return False
+
+        # Cosine galleries normalise their templates but keep each raw template's std for the quality term
+        landmarks = np.abs(rng.normal(0.5, 0.2, (4, 1434)))
+        cosine = FaceGallery('cosine')
+        cosine.add_identity("user0", landmarks)
+        best = cosine.search(landmarks[2:3] * 1.001)
+        saved = cosine.to_dict()
+        reloaded = FaceGallery.from_dict(saved)
+        for entry in saved['identities']:
+            del entry['template_std']  # As saved by older versions
+        legacy = FaceGallery.from_dict(saved)
+        if (abs(best.template_std(0) - landmarks[2].std()) > 1e-5
+                or abs(reloaded.search(landmarks[2:3]).template_std(0) - landmarks[2].std()) > 1e-5
+                or legacy.search(landmarks[2:3]).template_std(0) is not None):
+            print("❌ Raw template std not kept with the cosine gallery")
+            return False
+
+        print(f"✅ Recall {recall:.2f} vs exhaustive search, policies and reload consistent")
+        return True
+
+    except Exception as e:
+        print(f"❌ Face Gallery Error: {e}")
+        return False
+
+
+def test_template_consolidation():
+    """Test that consolidation bounds the templates while every sample is still recognised"""
+    print("\n🧩 TESTING TEMPLATE CONSOLIDATION")
+    print("=" * 50)
+
+    try:
+        from template_consolidation import consolidate_templates, format_report
+        from face_matching import EncodingMatcher
+
+        # Owner encodings drifting over four enrolment sessions
+        rng = np.random.default_rng(33)
+        sessions = rng.normal(0, 0.02, (4, 128)) + rng.normal(0, 0.1, 128)
+        encodings = np.concatenate([session + rng.normal(0, 0.03, (60, 128)) for session in sessions])
+
+        result = consolidate_templates(encodings, 20, 'euclidean')
+        print(f"✅ {format_report('Owner', result.report)}")
+
+        if len(result.templates) != 20 or not np.allclose(result.templates[:-1], encodings[result.kept]):
+            print("❌ Expected 19 retained samples plus the centroid")
+            return False
+        if min(np.bincount(result.kept // 60, minlength=4)) < 3:
+            print("❌ A session is not covered by the retained samples")
+            return False
+
+        matcher = EncodingMatcher(result.templates, [0.5, 0.6, 0.8])
+        if not matcher.match(encodings).is_owner.all():
+            print("❌ Some enrolled samples are no longer recognised")
+            return False
+        if result.report['worst_after'] > 2 * result.report['worst_before']:
+            print("❌ Leave-one-out distances degraded too much")
+            return False
+
+        small = consolidate_templates(encodings[:10], 20, 'euclidean')
+        if small.changed or len(small.templates) != 10:
+            print("❌ Identities under the cap must be left unchanged")
+            return False
+
+        print("✅ Cap enforced, every session covered, all samples still recognised")
+        return True
+
+    except Exception as e:
+        print(f"❌ Template Consolidation Error: {e}")
+        return False
+
+
+def test_template_adaptation():
+    """Test the adaptive template reservoir, row-wise matcher updates and the async profile writer"""
+    print("\n🌱 TESTING TEMPLATE ADAPTATION")
+    print("=" * 50)
+
+    try:
+        import threading
+        from template_adaptation import TemplateReservoir, AsyncProfileWriter
+        from face_matching import LandmarkMatcher, EncodingMatcher, DescriptorMatcher
+
+        rng = np.random.default_rng(44)
+        base = rng.normal(0, 0.1, 128)
+        enrolled = base + rng.normal(0, 0.03, (10, 128))
+        faces = base + rng.normal(0, 0.05, (6, 128))
+
+        # Incremental row updates must equal a full rebuild
+        landmark_like = lambda vectors: np.abs(vectors) * 10
+        for make, transform in ((lambda samples: EncodingMatcher(samples), np.asarray),
+                                (lambda samples: DescriptorMatcher(samples, 0.8, 0.08), np.asarray),
+                                (lambda samples: LandmarkMatcher(samples, 0.8), landmark_like)):
+            matcher = make(transform(enrolled))
+            adapted = list(transform(enrolled))
+            for step in range(8):
+                template = transform(base + rng.normal(0, 0.03, 128))
+                slot = 10 + min(step, 3)  # Fill 3 slots, then keep replacing the last one
+                matcher.set_sample(slot, template)
+                adapted[slot:slot + 1] = [template]
+            reference = make(np.array(adapted))
+            if not np.allclose(matcher.match(transform(faces)).scores, reference.match(transform(faces)).scores, atol=1e-5):
+                print(f"❌ {type(matcher).__name__} row updates differ from a rebuild")
+                return False
+
+        # Bounded reservoir with margin, anchor and interval gating
+        reservoir = TemplateReservoir(capacity=4, min_margin=0.1, min_streak=3, min_interval=10.0, space='encoding', seed=0)
+        if reservoir.eligible(2, 0.0) or not reservoir.eligible(3, 0.0):
+            print("❌ Streak gating broken")
+            return False
+        if reservoir.offer(faces[0], 0.05, 0.0) is not None or reservoir.offer(faces[0], 0.3, 0.0, anchored=False) is not None:
+            print("❌ Low-margin or unanchored candidate accepted")
+            return False
+        for step in range(12):
+            reservoir.offer(faces[step % 6], 0.3, step * 10.0)
+        if len(reservoir) != 4 or reservoir.eligible(5, 115.0) or reservoir.adaptations != 12:
+            print(f"❌ Reservoir not bounded or not rate limited: {reservoir.get_stats()}")
+            return False
+
+        # The async writer coalesces to the latest snapshot and persists it
+        written = []
+        release = threading.Event()
+        writer = AsyncProfileWriter(lambda snapshot: (release.wait(2.0), written.append(snapshot)))
+        for version in range(5):
+            writer.submit({'version': version})
+        release.set()
+        writer.close()
+        if not written or written[-1]['version'] != 4 or len(written) > 2:
+            print(f"❌ Unexpected writes: {written}")
+            return False
+
+        restored = TemplateReservoir(capacity=4, space='encoding')
+        if not restored.load(reservoir.to_dict()) or len(restored) != 4 or TemplateReservoir(space='raw').load(reservoir.to_dict()):
+            print("❌ Reservoir snapshot did not round-trip")
+            return False
+
+        print(f"✅ Row updates match rebuilds, reservoir bounded at {len(reservoir)}, "
+              f"5 snapshots saved in {len(written)} write(s)")
+        return True
+
+    except Exception as e:
+        print(f"❌ Template Adaptation Error: {e}")
+        return False
+
+
+def test_face_tracker():
+    """Test track association, ageing, re-verification and the fail-safe label of new tracks"""
+    print("\n👥 TESTING FACE TRACKER")
+    print("=" * 50)
+
+    try:
+        from face_tracker import FaceTracker, box_iou
+        from frame_analysis import FrameAnalysis
+
+        if box_iou((0, 0, 10, 10), (0, 0, 10, 10)) != 1.0 or box_iou((0, 0, 10, 10), (20, 0, 10, 10)) != 0.0:
+            print("❌ IoU of identical or disjoint boxes is wrong")
+            return False
+        if abs(box_iou((0, 0, 10, 10), (5, 0, 10, 10)) - 50 / 150) > 1e-9:
+            print("❌ IoU of half-overlapping boxes is wrong")
+            return False
+
+        tracker = FaceTracker(iou_threshold=0.3, max_missed=2, reverify_interval=2.0)
+        owner_box, other_box = (100, 100, 50, 50), (300, 100, 50, 50)
+        tracks = tracker.update([owner_box, other_box], now=0.0)
+
+        # New, unverified tracks need recognition and count as unauthorized until recognised
+        if tracker.pending(tracks, 0.0) != tracks:
+            print("❌ New tracks are not pending recognition")
+            return False
+        analysis = FrameAnalysis((480, 640, 3), 0.0)
+        for track in tracks:
+            analysis.add_face(track.box, track.landmarks, track.score, bool(track.is_owner), track.track_id)
+        if not analysis.unauthorized_face_detected or analysis.owner_detected:
+            print("❌ Unverified tracks did not count as unauthorized")
+            return False
+        if tracker.get_stats()['recognitions'] != 0:
+            print("❌ Pending tracks were counted as recognitions before an identity was assigned")
+            return False
+        tracker.recognize(tracks[0], True, 0.9, None, 0.0)
+        tracker.reject(tracks[1])  # Its face could not be confirmed, it stays pending
+
+        # Moved boxes keep their track (best overlap first) and the owner label is carried
+        moved = tracker.update([(305, 102, 50, 50), (104, 98, 50, 50)], now=1.0)
+        if [track.track_id for track in moved] != [tracks[1].track_id, tracks[0].track_id]:
+            print(f"❌ Boxes not associated by IoU: {moved}")
+            return False
+        if tracker.pending(moved, 1.0) != [tracks[1]] or not moved[1].is_owner:
+            print("❌ Owner label not carried or unverified track not pending")
+            return False
+
+        # Re-verification once reverify_interval has passed since the last recognition
+        if tracker.pending([tracks[0]], 1.9) or tracker.pending([tracks[0]], 2.0) != [tracks[0]]:
+            print("❌ Track not re-verified after reverify_interval")
+            return False
+
+        # A track survives max_missed frames without a box, then ages out
+        for frame in range(2):
+            tracker.update([(104, 98, 50, 50)], now=3.0 + frame)
+        if tracks[1] not in tracker.tracks:
+            print("❌ Track dropped before max_missed frames")
+            return False
+        tracker.update([(104, 98, 50, 50)], now=5.0)
+        if tracks[1] in tracker.tracks:
+            print("❌ Track kept after max_missed frames")
+            return False
+        if tracker.update([other_box], now=6.0)[0].track_id == tracks[1].track_id:
+            print("❌ Aged-out track was revived")
+            return False
+
+        stats = tracker.get_stats()
+        if stats['recognitions'] != 1 or stats['unconfirmed'] != 1 or stats['tracks_created'] != 3:
+            print(f"❌ Unexpected tracker statistics: {stats}")
+            return False
+
+        print(f"✅ {stats['tracks_created']} tracks, {stats['recognitions']} recognition, "
+              f"{stats['labels_carried']} labels carried, {stats['unconfirmed']} unconfirmed")
+        return True
+
+    except Exception as e:
+        print(f"❌ Face Tracker Error: {e}")
+        return False
+
+def main():
+    """Main test function"""
+    print("🧮 Face Security System - Matching Engine Test")
+    print("=" * 50)
+
+    tests = [
+        ("Landmark Matcher Equivalence", test_landmark_matcher_equivalence),
+        ("Encoding Matcher Equivalence", test_encoding_matcher_equivalence),
+        ("Landmark Buffer Extraction", test_landmark_buffer_extraction),
+        ("Pose-Normalized Descriptor", test_pose_normalized_descriptor),
+        ("Pose-Binned Template Index", test_pose_binned_index),
+        ("Multi-User Face Gallery", test_face_gallery),
+        ("Template Consolidation", test_template_consolidation),
+        ("Template Adaptation", test_template_adaptation),
+        ("Face Tracker", test_face_tracker),
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        try:
+            if test_func():
+                passed += 1
+        except Exception as e:
+            print(f"❌ {test_name} crashed: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
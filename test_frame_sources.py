@@ -0,0 +1,694 @@
+#!/usr/bin/env python3
+"""
+Frame Source Test
+=================
+
+Headless test of the pluggable frame sources and the threaded grabber.
+No webcam or desktop session is needed.
+
+Features Tested:
+1. Image source over test_frame.jpg
+2. Synthetic source in fast and realtime pacing modes
+3. Video file source with looping
+4. Latest-frame grabber over a realtime source
+5. Threaded monitor pipeline: drop-oldest queues and backpressure
+6. Inference worker pool: shared-memory frame slots and parallel workers
+7. Inference result timeout: stalled or exited workers never block the pipeline
+8. Adaptive detection scheduler: stable back-off, escalation and probing
+9. Motion gate: static frames skipped, watched region, forced re-verification
+10. Detector escalation: CNN rate limit, duty-cycle back-off and motion gating
+11. Stage timer: percentiles, rolling window, nested stages and the disabled no-op
+
+Usage:
+    python test_frame_sources.py
+"""
+
+import sys
+import os
+import time
+import tempfile
+
+import numpy as np
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+def test_image_source():
+    """Test reading test_frame.jpg through the image source"""
+    print("\n🖼️  TESTING IMAGE SOURCE")
+    print("=" * 50)
+
+    try:
+        from frame_sources import ImageDirectorySource
+
+        source = ImageDirectorySource('test_frame.jpg', pacing='fast', loop=False)
+        if not source.open():
+            print("❌ Could not open test_frame.jpg")
+            return False
+
+        ret, frame = source.read()
+        ret_end, _ = source.read()
+        source.release()
+
+        if not ret or frame.shape[2] != 3:
+            print("❌ Image source returned no frame")
+            return False
+        if ret_end:
+            print("❌ Non-looping image source did not stop")
+            return False
+
+        print(f"✅ Image source: {frame.shape[1]}x{frame.shape[0]} frame read, stops at end")
+        return True
+
+    except Exception as e:
+        print(f"❌ Image Source Error: {e}")
+        return False
+
+def test_synthetic_pacing():
+    """Test fast and realtime pacing of the synthetic source"""
+    print("\n⏱️  TESTING SYNTHETIC SOURCE PACING")
+    print("=" * 50)
+
+    try:
+        from frame_sources import SyntheticSource
+
+        results = {}
+        for pacing in ('fast', 'realtime'):
+            source = SyntheticSource(640, 480, fps=50, pacing=pacing, face_count=2)
+            source.open()
+            start_time = time.time()
+            for _ in range(10):
+                ret, frame = source.read()
+                if not ret or frame.shape != (480, 640, 3):
+                    print(f"❌ Bad synthetic frame in {pacing} mode")
+                    return False
+            results[pacing] = time.time() - start_time
+            source.release()
+            print(f"✅ {pacing}: 10 frames in {results[pacing] * 1000:.1f} ms")
+
+        # 10 frames at 50 FPS need at least ~180 ms when paced
+        if results['realtime'] < 0.15 or results['fast'] >= results['realtime']:
+            print("❌ Realtime pacing not applied")
+            return False
+        return True
+
+    except Exception as e:
+        print(f"❌ Synthetic Source Error: {e}")
+        return False
+
+def test_video_source():
+    """Test a recorded clip with looping"""
+    print("\n🎞️  TESTING VIDEO FILE SOURCE")
+    print("=" * 50)
+
+    try:
+        import cv2
+        from frame_sources import SyntheticSource, VideoFileSource
+
+        clip_path = os.path.join(tempfile.mkdtemp(), 'clip.avi')
+        writer = cv2.VideoWriter(clip_path, cv2.VideoWriter_fourcc(*'MJPG'), 10, (320, 240))
+        synthetic = SyntheticSource(320, 240, pacing='fast')
+        synthetic.open()
+        for _ in range(5):
+            writer.write(synthetic.read()[1])
+        writer.release()
+
+        source = VideoFileSource(clip_path, pacing='fast', loop=True)
+        if not source.open():
+            print("❌ Could not open recorded clip")
+            return False
+
+        frames = sum(1 for _ in range(12) if source.read()[0])
+        source.release()
+
+        if frames != 12:
+            print(f"❌ Looping clip returned only {frames}/12 frames")
+            return False
+
+        print("✅ Video source: 5-frame clip looped to 12 frames")
+        return True
+
+    except Exception as e:
+        print(f"❌ Video Source Error: {e}")
+        return False
+
+def test_latest_frame_grabber():
+    """Test stale frame dropping over a realtime source"""
+    print("\n📹 TESTING LATEST-FRAME GRABBER")
+    print("=" * 50)
+
+    try:
+        from frame_sources import SyntheticSource
+        from camera_grabber import LatestFrameGrabber
+
+        source = SyntheticSource(320, 240, fps=100, pacing='realtime')
+        source.open()
+        grabber = LatestFrameGrabber(source).start()
+
+        for _ in range(3):
+            ret, frame = grabber.read()
+            if not ret:
+                print("❌ Grabber returned no frame")
+                grabber.release()
+                return False
+            time.sleep(0.1)  # Simulate slow inference
+
+        stats = grabber.get_stats()
+        age_ms = grabber.frame_age() * 1000
+        grabber.release()
+
+        print(f"✅ Consumed {stats['frames_consumed']} of {stats['frames_captured']} frames, "
+              f"{stats['frames_dropped']} dropped, last frame age {age_ms:.0f} ms")
+        if stats['frames_dropped'] == 0:
+            print("❌ Stale frames were not dropped")
+            return False
+
+        # A larger buffer hands out the unread frames oldest first, in order
+        source = SyntheticSource(320, 240, fps=100, pacing='realtime')
+        source.open()
+        grabber = LatestFrameGrabber(source, buffer_size=3).start()
+        grabber.read()
+        time.sleep(0.1)  # Simulate slow inference, the buffer fills up
+        timestamps = [grabber.read_latest()[1] for _ in range(3)]
+        stats = grabber.get_stats()
+        grabber.release()
+        if None in timestamps or timestamps != sorted(timestamps) or stats['frames_dropped'] == 0:
+            print("❌ Buffered frames were not handed out oldest first")
+            return False
+        print(f"✅ Buffer of 3: frames handed out in capture order, {stats['frames_dropped']} pushed out unread")
+        return True
+
+    except Exception as e:
+        print(f"❌ Grabber Error: {e}")
+        return False
+
+class PipelineProbeSystem:
+    """Backend stand-in with a slow recognition stage"""
+
+    def __init__(self, recognize_delay):
+        from perf_stats import StageTimer
+        from detection_scheduler import AdaptiveDetectionScheduler
+        from motion_gate import MotionGate
+
+        self.recognize_delay = recognize_delay
+        self.perf = StageTimer()
+        self.detection_scheduler = AdaptiveDetectionScheduler(enabled=False)
+        self.motion_gate = MotionGate(enabled=False)
+        self.is_monitoring = True
+        self.decisions = 0
+        self.rendered = []
+
+    def gate_frame(self, frame, now, analysed_before=True):
+        return True, None
+
+    def detect_stage(self, frame, now=None):
+        return [(0, 0, 10, 10)]
+
+    def recognize_stage(self, frame, detections, now=None):
+        from frame_analysis import FrameAnalysis
+        time.sleep(self.recognize_delay)
+        return FrameAnalysis(frame.shape, now)
+
+    def apply_security_decision(self, analysis, now):
+        self.decisions += 1
+
+    def render_monitor_frame(self, frame, analysis, fps):
+        self.rendered.append(frame)
+
+    def handle_monitor_key(self):
+        return True
+
+def test_monitor_pipeline():
+    """Test the threaded pipeline over a finite and a realtime source"""
+    print("\n🧵 TESTING MONITOR PIPELINE")
+    print("=" * 50)
+
+    try:
+        import threading
+        from frame_sources import SyntheticSource
+        from pipeline import DropOldestQueue, MonitorPipeline
+
+        queue = DropOldestQueue(2)
+        for item in range(3):
+            queue.put(item)
+        if queue.get() != 1 or queue.get_stats()['dropped'] != 1:
+            print("❌ Full queue did not drop its oldest item")
+            return False
+
+        # Finite source: backpressure, every frame reaches the render stage
+        source = SyntheticSource(160, 120, pacing='fast', max_frames=30)
+        source.open()
+        system = PipelineProbeSystem(0.005)
+        stats = MonitorPipeline(system, source, queue_size=2).run().get_stats()
+        dropped = sum(stage.get('dropped', 0) for stage in stats.values())
+        if len(system.rendered) != 30 or dropped:
+            print(f"❌ Finite source lost frames: {len(system.rendered)} rendered, {dropped} dropped")
+            return False
+
+        # Realtime source faster than recognition: stale frames are dropped in front of the slow stage
+        source = SyntheticSource(160, 120, fps=200, pacing='realtime')
+        source.open()
+        system = PipelineProbeSystem(0.03)
+        threading.Timer(0.6, lambda: setattr(system, 'is_monitoring', False)).start()
+        pipeline = MonitorPipeline(system, source, queue_size=2).run()
+        stats = pipeline.get_stats()
+        source.release()
+
+        for line in pipeline.overlay_lines():
+            print(f"   {line}")
+        if stats['recognize']['dropped'] == 0 or stats['recognize']['utilisation'] < 0.5:
+            print("❌ Slow stage did not drop stale frames")
+            return False
+
+        # An analysed job dropped before the decide stage: the next, reused job still carries its result
+        from pipeline import FrameJob
+        probe = PipelineProbeSystem(0.0)
+        probe_pipeline = MonitorPipeline(probe, source)
+        analysed, reused = FrameJob(np.zeros((120, 160, 3), np.uint8), 1.0, 1), FrameJob(None, 1.1, 2)
+        analysed.analyse = True
+        intruder = probe_pipeline._recognize(analysed).analysis
+        probe_pipeline._decide(probe_pipeline._recognize(reused))
+        if reused.analysis is not intruder or probe.decisions != 1:
+            print("❌ Reused frame did not carry the latest analysis to the decide stage")
+            return False
+
+        print(f"✅ Finite source: 30/30 frames rendered; realtime source: "
+              f"{stats['capture']['processed']} captured, {len(system.rendered)} rendered")
+        return True
+
+    except Exception as e:
+        print(f"❌ Pipeline Error: {e}")
+        return False
+
+def frame_checksum(frame, options):
+    """Inference pool task: simulated inference time and a compact result"""
+    time.sleep(options['delay'])
+    return {'sum': int(frame.sum(dtype=np.int64)), 'shape': frame.shape}
+
+def test_inference_pool():
+    """Test frames reaching worker processes through shared memory"""
+    print("\n🧮 TESTING INFERENCE WORKER POOL")
+    print("=" * 50)
+
+    pool = None
+    try:
+        from inference_pool import InferencePool
+
+        delay = 0.1
+        pool = InferencePool(frame_checksum, workers=2, options={'delay': delay}, initializer=None).start()
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 255, (120, 160, 3), dtype=np.uint8) for _ in range(8)]
+        pool.submit(frames[0]).result(timeout=30)  # Worker start-up
+
+        started = time.perf_counter()
+        futures = [pool.submit(frame, timeout=5) for frame in frames]
+        results = [future.result(timeout=10) for future in futures]
+        elapsed = time.perf_counter() - started
+        if [result['sum'] for result in results] != [int(frame.sum(dtype=np.int64)) for frame in frames]:
+            print("❌ Worker results do not match the submitted frames")
+            return False
+        if elapsed > len(frames) * delay * 0.8:
+            print(f"❌ Workers did not overlap: {elapsed:.2f}s for {len(frames)} frames")
+            return False
+
+        # A larger frame reallocates the ring once nothing is in flight
+        large = rng.integers(0, 255, (240, 320, 3), dtype=np.uint8)
+        if pool.submit(large).result(timeout=10)['shape'] != large.shape:
+            print("❌ Larger frame was not transferred")
+            return False
+
+        stats = pool.get_stats()
+        print(f"✅ {len(frames)} frames in {elapsed:.2f}s with {stats['workers']} workers "
+              f"(sequential {len(frames) * delay:.2f}s), {stats['slot_waits']} waits for a free slot")
+        return True
+
+    except Exception as e:
+        print(f"❌ Inference Pool Error: {e}")
+        return False
+    finally:
+        if pool is not None:
+            pool.close()
+
+def stalling_task(frame, options):
+    """Inference pool task: frames with a non-zero first pixel stall the worker"""
+    time.sleep(options['stall'] if frame[0, 0, 0] else 0.01)
+    return {'shape': frame.shape}
+
+def test_inference_timeout():
+    """Test the result timeout sized from recent worker times"""
+    print("\n⏳ TESTING INFERENCE RESULT TIMEOUT")
+    print("=" * 50)
+
+    pool = None
+    try:
+        from inference_pool import InferencePool
+        from frame_analysis import FrameAnalysis
+
+        pool = InferencePool(stalling_task, workers=1, options={'stall': 2.0}, initializer=None,
+                             min_result_timeout=0.2)
+        if pool.result_timeout() != pool.startup_timeout:
+            print("❌ First result did not get the start-up timeout")
+            return False
+        pool.start()
+        frame = np.zeros((60, 80, 3), dtype=np.uint8)
+        for _ in range(3):
+            pool.wait(pool.submit(frame))
+        timeout = pool.result_timeout()
+        if not 0.2 <= timeout < 1.0:
+            print(f"❌ Timeout not sized from recent worker times: {timeout:.2f}s")
+            return False
+
+        stalled = frame.copy()
+        stalled[0, 0, 0] = 1
+        future = pool.submit(stalled)
+        started = time.perf_counter()
+        try:
+            pool.wait(future)
+            print("❌ Stalled worker result did not time out")
+            return False
+        except TimeoutError as e:
+            analysis = FrameAnalysis.failsafe(stalled.shape, str(e))
+        waited = time.perf_counter() - started
+        if waited >= 1.5 or not analysis.unauthorized_face_detected or pool.get_stats()['timeouts'] != 1:
+            print(f"❌ Timed-out frame not handled as unauthorized after {waited:.2f}s")
+            return False
+
+        # With every slot held by the stalled worker, submitting gives up instead of blocking
+        pool.submit(stalled)
+        started = time.perf_counter()
+        if pool.submit(frame, pool.result_timeout()) is not None or time.perf_counter() - started >= 1.0:
+            print("❌ Submit did not give up while every slot was in flight")
+            return False
+
+        # Workers that exit free their slots and the pool refuses new frames
+        for process in pool.processes:
+            process.terminate()
+        deadline = time.time() + 5.0
+        while (pool.running or pool.pending) and time.time() < deadline:
+            time.sleep(0.05)  # The collector notices on its next poll
+        if pool.pending or len(pool.ring.free) != pool.slot_count or pool.running:
+            print(f"❌ Slots not freed after the workers exited: {len(pool.ring.free)}/{pool.slot_count} free")
+            return False
+        try:
+            pool.submit(frame, 0.1)
+            print("❌ Dead pool accepted a frame")
+            return False
+        except RuntimeError:
+            pass
+
+        print(f"✅ Stalled frame given up after {waited * 1000:.0f} ms "
+              f"(recent worker time {pool.get_stats()['recent_worker_ms']:.0f} ms), analysis fails safe")
+        return True
+
+    except Exception as e:
+        print(f"❌ Inference Timeout Error: {e}")
+        return False
+    finally:
+        if pool is not None:
+            pool.close()
+
+def owner_analysis(now, score=0.9, faces=1):
+    """FrameAnalysis of the owner alone (faces=1) or with others"""
+    from frame_analysis import FrameAnalysis
+    analysis = FrameAnalysis((480, 640, 3), now)
+    for face in range(faces):
+        analysis.add_face((100 * face, 0, 50, 50), None, score, face == 0)
+    return analysis
+
+def test_detection_scheduler():
+    """Test the stable back-off and the escalation back to every-frame analysis"""
+    print("\n🔎 TESTING ADAPTIVE DETECTION SCHEDULER")
+    print("=" * 50)
+
+    try:
+        from detection_scheduler import AdaptiveDetectionScheduler
+
+        scheduler = AdaptiveDetectionScheduler(detection_interval=1.0, stable_period=3.0, confidence_margin=0.05)
+
+        # Alert mode: every frame analysed and no probe until the owner was alone for stable_period
+        now = 0.0
+        while now < 3.0:
+            if not scheduler.should_analyze(now) or scheduler.wants_probe:
+                print(f"❌ Frame at {now:.1f}s skipped or probed in alert mode")
+                return False
+            scheduler.record(owner_analysis(now), now)
+            now += 0.5
+        if scheduler.mode != 'alert':
+            print("❌ Backed off before stable_period")
+            return False
+        scheduler.should_analyze(now)
+        scheduler.record(owner_analysis(now), now)
+        if scheduler.mode != 'stable' or not scheduler.wants_probe:
+            print("❌ No back-off after stable_period")
+            return False
+
+        # Stable mode: analysis every detection_interval, frames in between reuse it
+        analysed = [scheduler.should_analyze(now + offset, face_count=1) for offset in (0.2, 0.5, 0.9, 1.0)]
+        if analysed != [False, False, False, True]:
+            print(f"❌ Stable mode did not analyse once per interval: {analysed}")
+            return False
+
+        # A face-count change escalates at once
+        if not scheduler.should_analyze(now + 1.1, face_count=2) or scheduler.mode != 'alert' or scheduler.wants_probe:
+            print("❌ Face-count change did not escalate")
+            return False
+
+        # Back to stable, then an owner confidence drop escalates
+        now += 2.0
+        for step in range(8):
+            scheduler.should_analyze(now)
+            scheduler.record(owner_analysis(now), now)
+            now += 0.5
+        if scheduler.mode != 'stable':
+            print("❌ Did not return to stable mode")
+            return False
+        scheduler.record(owner_analysis(now, score=0.8), now)
+        if scheduler.mode != 'alert' or not scheduler.should_analyze(now + 0.1):
+            print("❌ Confidence drop did not escalate")
+            return False
+
+        stats = scheduler.get_stats()
+        if stats['escalations'] != 2 or not 0 < stats['skip_ratio'] < 1:
+            print(f"❌ Unexpected scheduler statistics: {stats}")
+            return False
+
+        disabled = AdaptiveDetectionScheduler(enabled=False)
+        disabled.mode = 'stable'
+        if disabled.wants_probe or not disabled.should_analyze(0.0):
+            print("❌ Disabled scheduler skipped or probed a frame")
+            return False
+
+        print(f"✅ {stats['frames_analysed']}/{stats['frames_seen']} frames analysed, "
+              f"{stats['escalations']} escalations ({scheduler.last_escalation_reason})")
+        return True
+
+    except Exception as e:
+        print(f"❌ Detection Scheduler Error: {e}")
+        return False
+
+def test_motion_gate():
+    """Test skipping static frames, the watched region and the forced re-verification"""
+    print("\n🏃 TESTING MOTION GATE")
+    print("=" * 50)
+
+    try:
+        from motion_gate import MotionGate
+        from detection_scheduler import AdaptiveDetectionScheduler
+
+        # Watch the left half of the frame only
+        gate = MotionGate(width=160, region=(0.0, 0.0, 0.5, 1.0), max_reuse=5.0)
+        scheduler = AdaptiveDetectionScheduler()
+        frame = np.full((240, 320, 3), 80, dtype=np.uint8)
+
+        def check(frame, now):
+            """One gated frame as the backends run it, True if analysed"""
+            if gate.has_changed(frame, now):
+                scheduler.should_analyze(now)
+                gate.mark_analysed(now)
+                return True
+            scheduler.record_skipped()
+            return False
+
+        if not check(frame, 0.0):
+            print("❌ First frame not analysed")
+            return False
+        if check(frame.copy(), 1.0):
+            print("❌ Static frame was analysed")
+            return False
+
+        outside = frame.copy()
+        outside[60:180, 200:300] = 255
+        if check(outside, 2.0):
+            print("❌ Change outside the watched region triggered analysis")
+            return False
+        inside = frame.copy()
+        inside[60:180, 20:120] = 255
+        if not check(inside, 3.0):
+            print("❌ Change inside the watched region was skipped")
+            return False
+
+        # A static scene is re-verified once max_reuse seconds passed since the last analysis
+        if check(inside, 7.9) or not check(inside, 8.0) or check(inside, 8.1):
+            print("❌ Static scene not re-verified after max_reuse")
+            return False
+
+        stats = gate.get_stats()
+        if stats['frames_checked'] != 7 or stats['frames_skipped'] != 4 or abs(stats['skip_ratio'] - 4 / 7) > 1e-9:
+            print(f"❌ Unexpected gate statistics: {stats}")
+            return False
+        if scheduler.get_stats()['frames_seen'] != 7:
+            print("❌ Gated frames missing from the scheduler's frame count")
+            return False
+
+        # The analysed frame becomes the reference, even when the gate has since seen a later one
+        gate.has_changed(frame, 9.0)
+        gate.mark_analysed(9.0, inside)
+        if gate.has_changed(inside, 9.1):
+            print("❌ Reference not taken from the analysed frame")
+            return False
+
+        print(f"✅ {stats['frames_skipped']}/{stats['frames_checked']} static frames skipped "
+              f"({stats['skip_ratio'] * 100:.0f}%), changes outside the region ignored")
+        return True
+
+    except Exception as e:
+        print(f"❌ Motion Gate Error: {e}")
+        return False
+
+def test_detector_escalation():
+    """Test when an empty HOG result may be retried with the CNN detector, on injected timestamps"""
+    print("\n🪜 TESTING DETECTOR ESCALATION")
+    print("=" * 50)
+
+    try:
+        from detector_escalation import DetectorEscalationPolicy
+
+        policy = DetectorEscalationPolicy(min_interval=10.0, require_motion=True, max_duty_cycle=0.1)
+        policy.record_hog()
+        if not policy.allow_cnn(0.0, motion_seen=True) or policy.allow_cnn(0.0, motion_seen=False):
+            print("❌ CNN_REQUIRE_MOTION not applied")
+            return False
+
+        # Cheap pass (0.5 s): the next one is allowed min_interval after it finished
+        policy.record_cnn(0.0, 0.5, faces_found=1)
+        if policy.allow_cnn(10.4) or not policy.allow_cnn(10.5):
+            print("❌ CNN not rate limited to min_interval")
+            return False
+
+        # Expensive pass (2 s): back off to cost / max_duty_cycle = 20 s
+        policy.record_hog()
+        policy.record_cnn(10.5, 12.5, faces_found=0)
+        if policy.allow_cnn(22.5) or policy.allow_cnn(32.4) or not policy.allow_cnn(32.5):
+            print("❌ CNN not backed off to its duty cycle")
+            return False
+
+        anywhere = DetectorEscalationPolicy(require_motion=False)
+        disabled = DetectorEscalationPolicy(enabled=False)
+        if not anywhere.allow_cnn(0.0, motion_seen=False) or disabled.allow_cnn(0.0):
+            print("❌ Motion requirement or enable switch ignored")
+            return False
+
+        stats = policy.get_stats()
+        expected = {'hog_runs': 2, 'cnn_runs': 2, 'cnn_denied': 4, 'cnn_hits': 1}
+        if any(stats[key] != value for key, value in expected.items()) or abs(stats['cnn_avg_ms'] - 1250) > 1e-6:
+            print(f"❌ Unexpected tier counters: {stats}")
+            return False
+
+        print(f"✅ {stats['cnn_runs']} CNN passes (avg {stats['cnn_avg_ms']:.0f} ms), "
+              f"{stats['cnn_denied']} denied, {stats['cnn_hits']} found faces")
+        return True
+
+    except Exception as e:
+        print(f"❌ Detector Escalation Error: {e}")
+        return False
+
+def test_stage_timer():
+    """Test the per-stage percentiles, the rolling window, nested stages and the disabled no-op"""
+    print("\n⏲️  TESTING STAGE TIMER")
+    print("=" * 50)
+
+    try:
+        from perf_stats import StageTimer
+
+        timer = StageTimer(enabled=True, window=100)
+        for ms in range(1, 101):
+            timer.record('detection', ms / 1000)
+        stats = timer.summary()['detection']
+        if abs(stats['p50_ms'] - 50.5) > 1e-6 or abs(stats['p95_ms'] - 95.05) > 1e-6 or stats['max_ms'] != 100:
+            print(f"❌ Wrong percentiles: {stats}")
+            return False
+
+        # Only the last `window` samples count, the total count keeps growing
+        for _ in range(100):
+            timer.record('detection', 0.2)
+        stats = timer.summary()['detection']
+        if stats['count'] != 200 or abs(stats['p50_ms'] - 200) > 1e-6 or abs(stats['mean_ms'] - 200) > 1e-6:
+            print(f"❌ Rolling window not applied: {stats}")
+            return False
+
+        # A nested stage is timed on its own and left out of the outer stage
+        with timer.stage('decision'):
+            with timer.stage('lock'):
+                time.sleep(0.05)
+        summary = timer.summary()
+        if summary['lock']['p50_ms'] < 45 or summary['decision']['p50_ms'] > 20:
+            print(f"❌ Nested stage counted in the outer stage: lock {summary['lock']['p50_ms']:.1f} ms, "
+                  f"decision {summary['decision']['p50_ms']:.1f} ms")
+            return False
+        if timer.stage_names() != ['detection', 'decision', 'lock']:
+            print(f"❌ Stages not in pipeline order: {timer.stage_names()}")
+            return False
+
+        disabled = StageTimer(enabled=False)
+        with disabled.stage('detection') as first, disabled.stage('matching') as second:
+            pass
+        if first is not second or disabled.summary():
+            print("❌ Disabled timer recorded samples")
+            return False
+
+        path = timer.dump_json(os.path.join(tempfile.mkdtemp(), 'stage_timings.json'))
+        if not os.path.exists(path):
+            print("❌ Summary not written to JSON")
+            return False
+
+        print(f"✅ p50/p95 over a {timer.window}-sample window, nested 'lock' "
+              f"{summary['lock']['p50_ms']:.0f} ms kept out of 'decision' ({summary['decision']['p50_ms']:.2f} ms)")
+        return True
+
+    except Exception as e:
+        print(f"❌ Stage Timer Error: {e}")
+        return False
+
+def main():
+    """Main test function"""
+    print("🎥 Face Security System - Frame Source Test")
+    print("=" * 50)
+
+    tests = [
+        ("Image Source", test_image_source),
+        ("Synthetic Pacing", test_synthetic_pacing),
+        ("Video File Source", test_video_source),
+        ("Latest-Frame Grabber", test_latest_frame_grabber),
+        ("Monitor Pipeline", test_monitor_pipeline),
+        ("Inference Worker Pool", test_inference_pool),
+        ("Inference Result Timeout", test_inference_timeout),
+        ("Adaptive Detection Scheduler", test_detection_scheduler),
+        ("Motion Gate", test_motion_gate),
+        ("Detector Escalation", test_detector_escalation),
+        ("Stage Timer", test_stage_timer),
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        try:
+            if test_func():
+                passed += 1
+        except Exception as e:
+            print(f"❌ {test_name} crashed: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)